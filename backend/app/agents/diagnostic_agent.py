@@ -8,7 +8,8 @@ from typing import List, Dict, Any, Optional, AsyncGenerator
 import json
 
 from app.models.chat import ChatMessage, ChatResponse, ModelType
-from app.services.azure_openai_service import AzureOpenAIService
+from app.services.azure_openai_service import AzureOpenAIService, azure_openai_service as shared_openai_service
+from app.services.prompt_caching import PromptAssembler
 from app.utils.exceptions import AgentError
 
 logger = logging.getLogger(__name__)
@@ -19,8 +20,8 @@ class DiagnosticAgent:
     Uses GPT-4o for complex medical reasoning
     """
     
-    def __init__(self):
-        self.azure_openai_service = AzureOpenAIService()
+    def __init__(self, azure_openai_service: Optional[AzureOpenAIService] = None):
+        self.azure_openai_service = azure_openai_service or shared_openai_service
         # Diagnostic tools for function calling
         self.diagnostic_tools = [
             {
@@ -129,6 +130,7 @@ class DiagnosticAgent:
         - Siempre recomienda consulta presencial para casos complejos
         - En emergencias, deriva inmediatamente a servicios de urgencia
         """
+        self.prompt_assembler = PromptAssembler(self.system_prompt)
     
     async def initialize(self):
         """Initialize the Azure OpenAI service"""
@@ -225,24 +227,13 @@ class DiagnosticAgent:
         """
         Prepare enhanced messages with patient context for diagnostic analysis
         """
-        enhanced_messages = [
-            ChatMessage(role="system", content=self.system_prompt)
-        ]
-        
         # Add patient context if available
+        patient_block = None
         if patient_context:
             context_content = self._format_patient_context(patient_context)
-            enhanced_messages.append(
-                ChatMessage(
-                    role="system",
-                    content=f"CONTEXTO DEL PACIENTE:\\n{context_content}"
-                )
-            )
+            patient_block = f"CONTEXTO DEL PACIENTE:\\n{context_content}"
         
-        # Add user messages
-        enhanced_messages.extend(messages)
-        
-        return enhanced_messages
+        return self.prompt_assembler.assemble(messages, patient_block=patient_block)
     
     def _format_patient_context(self, context: Dict[str, Any]) -> str:
         """Format patient context for diagnostic analysis"""
@@ -263,6 +254,9 @@ class DiagnosticAgent:
             if history.get("conditions"):
                 formatted_context.append(f"Condiciones médicas: {', '.join(history['conditions'])}")
         
+        if context.get("patient_digest"):
+            formatted_context.append(context["patient_digest"])
+        
         if "recent_visits" in context:
             visits = context["recent_visits"]
             if visits:
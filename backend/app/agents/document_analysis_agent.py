@@ -8,19 +8,23 @@ from typing import List, Dict, Any, Optional, AsyncGenerator
 import json
 
 from app.models.chat import ChatMessage, ChatResponse, ModelType
-from app.services.azure_openai_service import AzureOpenAIService
+from app.services.azure_openai_service import AzureOpenAIService, azure_openai_service as shared_openai_service
+from app.services.prompt_caching import PromptAssembler
 from app.utils.exceptions import AgentError
 
 logger = logging.getLogger(__name__)
 
+# Documents rendered in full per request (the ones ranked first)
+MAX_ANALYSIS_DOCUMENTS = 5
+
 class DocumentAnalysisAgent:
     """
     Specialized agent for medical document analysis
     Uses GPT-4o for complex document understanding and analysis
     """
     
-    def __init__(self):
-        self.azure_openai_service = AzureOpenAIService()
+    def __init__(self, azure_openai_service: Optional[AzureOpenAIService] = None):
+        self.azure_openai_service = azure_openai_service or shared_openai_service
         self.system_prompt = """Eres un especialista en análisis de documentos médicos con experiencia en:
         
         1. ANÁLISIS DE EXPEDIENTES: Revisión completa de historias clínicas
@@ -43,6 +47,7 @@ class DocumentAnalysisAgent:
         - Proporciona análisis contextualizado
         - Respeta la confidencialidad médica
         """
+        self.prompt_assembler = PromptAssembler(self.system_prompt)
         
         # Document analysis tools
         self.analysis_tools = [
@@ -281,11 +286,11 @@ class DocumentAnalysisAgent:
     ) -> List[ChatMessage]:
         """
         Prepare enhanced messages with document context
-        """
-        enhanced_messages = [
-            ChatMessage(role="system", content=self.system_prompt)
-        ]
         
+        Documents are formatted in a deterministic order without per-query data so
+        the prompt prefix is reused across follow-up turns; the relevance ranking
+        for the current query is sent separately, next to the latest message.
+        """
         # Add document context if available (check both 'documents' and 'full_documents')
         documents = None
         if patient_context:
@@ -296,35 +301,46 @@ class DocumentAnalysisAgent:
             elif "documents" in patient_context:
                 documents = patient_context["documents"]
         
+        document_blocks = []
+        volatile_blocks = []
+        
+        # Longitudinal patient digest first: it covers the whole history and changes only when documents are added
+        if patient_context and patient_context.get("patient_digest"):
+            document_blocks.append(patient_context["patient_digest"])
+        
+        # Follow-up turns: digest of documents already sent earlier in the conversation
+        if patient_context and patient_context.get("document_digest"):
+            document_blocks.append(self._format_document_digest(patient_context["document_digest"]))
+        
         if documents:
-            document_content = self._format_documents_for_analysis(documents)
-            enhanced_messages.append(
-                ChatMessage(
-                    role="system",
-                    content=f"DOCUMENTOS MÉDICOS PARA ANÁLISIS:\\n{document_content}"
-                )
-            )
+            selected = documents[:MAX_ANALYSIS_DOCUMENTS]
+            document_content = self._format_documents_for_analysis(self.prompt_assembler.sort_documents(selected))
+            document_blocks.append(f"DOCUMENTOS MÉDICOS PARA ANÁLISIS:\\n{document_content}")
+            volatile_blocks.append(self._format_relevance_ranking(selected))
+        
+        if patient_context and patient_context.get("relevant_passages"):
+            volatile_blocks.append(self._format_relevant_passages(patient_context["relevant_passages"]))
+        
+        documents_block = "\\n\\n".join(document_blocks) or None
         
         # Add patient info context
+        patient_block = None
         if patient_context and "patient_info" in patient_context:
             patient_info = self._format_patient_info(patient_context["patient_info"])
-            enhanced_messages.append(
-                ChatMessage(
-                    role="system",
-                    content=f"INFORMACIÓN DEL PACIENTE:\\n{patient_info}"
-                )
-            )
-        
-        # Add user messages
-        enhanced_messages.extend(messages)
+            patient_block = f"INFORMACIÓN DEL PACIENTE:\\n{patient_info}"
         
-        return enhanced_messages
+        return self.prompt_assembler.assemble(
+            messages,
+            documents_block=documents_block,
+            patient_block=patient_block,
+            volatile_blocks=volatile_blocks
+        )
     
     def _format_documents_for_analysis(self, documents: List[Dict[str, Any]]) -> str:
         """Format documents for analysis (supports both legacy and enhanced formats)"""
         formatted_docs = []
         
-        for i, doc in enumerate(documents[:5], 1):  # Limit to 5 most recent
+        for i, doc in enumerate(documents, 1):
             doc_text = f"DOCUMENTO {i}:\\n"
             
             # Handle both legacy and enhanced document formats
@@ -342,20 +358,47 @@ class DocumentAnalysisAgent:
             title = doc.get('title', 'N/A')
             doc_text += f"Título: {title}\\n"
             
-            # Add additional enhanced format fields if available
-            if doc.get('relevance_score'):
-                doc_text += f"Relevancia: {doc['relevance_score']:.2f}\\n"
-            
             if doc.get('document_id'):
                 doc_text += f"ID: {doc['document_id']}\\n"
             
             content = doc.get('content', 'N/A')
-            doc_text += f"Contenido:\\n{content}\\n"
+            if doc.get('content_mode') == "summary":
+                doc_text += f"Contenido (resumen precalculado; texto completo omitido por menor relevancia):\\n{content}\\n"
+            else:
+                doc_text += f"Contenido:\\n{content}\\n"
             doc_text += "---\\n"
             formatted_docs.append(doc_text)
         
         return "\\n".join(formatted_docs)
     
+    def _format_document_digest(self, digest: List[Dict[str, Any]]) -> str:
+        """Format the digest of documents already reviewed in this conversation"""
+        lines = [
+            f"- {item.get('title', 'N/A')} ({item.get('created_at') or 'N/A'}): {item.get('digest', '')}"
+            for item in self.prompt_assembler.sort_documents(digest)
+        ]
+        return (
+            "DOCUMENTOS YA REVISADOS EN ESTA CONVERSACIÓN (resumen; el contenido completo se envió en turnos anteriores):\\n"
+            + "\\n".join(lines)
+        )
+    
+    def _format_relevant_passages(self, passages: List[Dict[str, Any]]) -> str:
+        """Format passages of already reviewed documents that match the current query"""
+        lines = [f"[{item.get('title') or item.get('document_id', 'N/A')}] {item['passage']}" for item in passages]
+        return "FRAGMENTOS RELEVANTES PARA ESTA CONSULTA:\\n" + "\\n".join(lines)
+    
+    def _format_relevance_ranking(self, documents: List[Dict[str, Any]]) -> Optional[str]:
+        """Format the per-query relevance of the selected documents"""
+        ranked = [doc for doc in documents if doc.get('relevance_score')]
+        if not ranked:
+            return None
+        
+        lines = [
+            f"- {doc.get('title') or doc.get('document_id', 'N/A')}: {doc['relevance_score']:.2f}"
+            for doc in ranked
+        ]
+        return "RELEVANCIA DE LOS DOCUMENTOS PARA ESTA CONSULTA:\\n" + "\\n".join(lines)
+    
     def _format_patient_info(self, patient_info: Dict[str, Any]) -> str:
         """Format patient information"""
         info_parts = []
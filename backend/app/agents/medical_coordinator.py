@@ -3,30 +3,33 @@ Medical Coordinator Agent
 Main orchestrator that routes medical queries to specialized agents with enhanced document context
 """
 
+import asyncio
 import logging
+from collections import Counter
 from typing import List, Dict, Any, Optional, AsyncGenerator
-from enum import Enum
 from datetime import datetime
 
+from app.core.config import settings
 from app.models.chat import ChatMessage, ChatResponse, ModelType
-from app.services.azure_openai_service import AzureOpenAIService
+from app.services.azure_openai_service import AzureOpenAIService, azure_openai_service as shared_openai_service
+from app.services.openai_resilience import is_overload_error
 from app.services.enhanced_document_service import enhanced_document_service, ContextStrategy
+from app.services.conversation_session_store import conversation_session_store
+from app.services.patient_digest_service import format_patient_digest
 from app.database.factory import get_db_async
 from app.agents.diagnostic_agent import DiagnosticAgent
-from app.agents.document_analysis_agent import DocumentAnalysisAgent
+from app.agents.document_analysis_agent import DocumentAnalysisAgent, MAX_ANALYSIS_DOCUMENTS
 from app.agents.quick_response_agent import QuickResponseAgent
 from app.agents.search_agent import SearchAgent
+from app.agents.query_classifier import FastQueryClassifier, QueryType, normalize_query
 from app.utils.exceptions import AgentError
+from app.utils.ttl_cache import TTLCache
 
 logger = logging.getLogger(__name__)
 
-class QueryType(str, Enum):
-    """Types of medical queries for agent routing"""
-    DIAGNOSTIC = "diagnostic"
-    DOCUMENT_ANALYSIS = "document_analysis"
-    QUICK_QUESTION = "quick_question"
-    SEARCH = "search"
-    GENERAL = "general"
+# Agents whose prompts render the carryover digest and passages; the others read only
+# full_documents and must keep receiving every selected document on follow-up turns
+CONTEXT_CARRYOVER_QUERY_TYPES = ("document_analysis",)
 
 class MedicalCoordinatorAgent:
     """
@@ -34,12 +37,26 @@ class MedicalCoordinatorAgent:
     Uses complete medical documents for optimal medical assistance
     """
     
-    def __init__(self):
-        self.azure_openai_service = AzureOpenAIService()
-        self.diagnostic_agent = DiagnosticAgent()
-        self.document_agent = DocumentAnalysisAgent()
-        self.quick_agent = QuickResponseAgent()
-        self.search_agent = SearchAgent()
+    def __init__(self, azure_openai_service: Optional[AzureOpenAIService] = None):
+        # All agents share one service and therefore one pooled Azure OpenAI client
+        self.azure_openai_service = azure_openai_service or shared_openai_service
+        self.diagnostic_agent = DiagnosticAgent(self.azure_openai_service)
+        self.document_agent = DocumentAnalysisAgent(self.azure_openai_service)
+        self.quick_agent = QuickResponseAgent(self.azure_openai_service)
+        self.search_agent = SearchAgent(self.azure_openai_service)
+        
+        # Local classifier tried before the LLM classification round trip
+        self.fast_classifier = FastQueryClassifier()
+        
+        # LLM classifications of repeated intents, keyed by (normalized query, has_context)
+        self.classification_cache: Optional[TTLCache] = None
+        if settings.QUERY_CLASSIFICATION_CACHE_ENABLED:
+            self.classification_cache = TTLCache(
+                max_entries=settings.QUERY_CLASSIFICATION_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.QUERY_CLASSIFICATION_CACHE_TTL_SECONDS
+            )
+        self.classification_counts: Counter = Counter()
+        self.speculation_counts: Counter = Counter()
         
         # Enhanced context configuration
         self.use_enhanced_context = True
@@ -96,11 +113,13 @@ class MedicalCoordinatorAgent:
         if not self.azure_openai_service.is_initialized:
             await self.azure_openai_service.initialize()
         
-        # Initialize all agents
-        await self.diagnostic_agent.initialize()
-        await self.document_agent.initialize()
-        await self.quick_agent.initialize()
-        await self.search_agent.initialize()
+        # Initialize all agents concurrently
+        await asyncio.gather(
+            self.diagnostic_agent.initialize(),
+            self.document_agent.initialize(),
+            self.quick_agent.initialize(),
+            self.search_agent.initialize()
+        )
     
     async def process_request(
         self,
@@ -110,7 +129,8 @@ class MedicalCoordinatorAgent:
         model_type: ModelType = ModelType.GPT4O,
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
-        context_strategy: Optional[ContextStrategy] = None
+        context_strategy: Optional[ContextStrategy] = None,
+        conversation_id: Optional[str] = None
     ) -> ChatResponse:
         """
         Process medical request with enhanced hybrid context
@@ -123,6 +143,7 @@ class MedicalCoordinatorAgent:
             temperature: Sampling temperature
             max_tokens: Maximum tokens
             context_strategy: Context retrieval strategy
+            conversation_id: Conversation identifier for document carryover between turns
             
         Returns:
             ChatResponse from specialized agent with enhanced context
@@ -198,7 +219,8 @@ class MedicalCoordinatorAgent:
                 enhanced_context,  # New enhanced context
                 model_type,
                 temperature,
-                max_tokens
+                max_tokens,
+                conversation_id
             )
             
             # Step 5: Add enhanced coordinator metadata
@@ -237,7 +259,8 @@ class MedicalCoordinatorAgent:
         model_type: ModelType = ModelType.GPT4O,
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
-        context_strategy: Optional[ContextStrategy] = None
+        context_strategy: Optional[ContextStrategy] = None,
+        conversation_id: Optional[str] = None
     ) -> AsyncGenerator[str, None]:
         """
         Process medical request with streaming response and enhanced context
@@ -255,46 +278,34 @@ class MedicalCoordinatorAgent:
                         user_query = msg.content
                         break
             
+            if settings.SPECULATIVE_STREAMING_ENABLED:
+                async for chunk in self._process_request_stream_speculative(
+                    messages,
+                    user_query,
+                    patient_context,
+                    patient_id,
+                    model_type,
+                    temperature,
+                    max_tokens,
+                    context_strategy,
+                    conversation_id
+                ):
+                    yield chunk
+                return
+            
             # Step 1: Get enhanced context FIRST if available
             enhanced_context = None
             if patient_id and self.use_enhanced_context:
-                try:
-                    async with get_db_async() as db:
-                        enhanced_context = await enhanced_document_service.get_enhanced_patient_context(
-                            patient_id=patient_id,
-                            query=user_query,
-                            strategy=context_strategy or self.default_context_strategy,
-                            db=db,
-                            include_recent=True,
-                            include_critical=False  # Don't assume critical yet
-                        )
-                    logger.info(f"🔍 Pre-classification streaming context: {enhanced_context.total_documents} docs, {enhanced_context.total_tokens} tokens")
-                except Exception as e:
-                    logger.warning(f"⚠️ Enhanced context failed for streaming: {str(e)}")
-                    enhanced_context = None
+                enhanced_context = await self._load_stream_context(patient_id, user_query, context_strategy)
             
             # Step 2: Classify query WITH context information
             query_classification = await self._classify_query_enhanced(messages, enhanced_context)
             logger.info(f"🌊 Context-aware streaming classification: {query_classification['query_type']} (confidence: {query_classification['confidence']:.2f})")
             
             # Step 3: Refine context based on classification if needed
-            if enhanced_context and query_classification.get("context_strategy"):
-                refined_strategy = ContextStrategy(query_classification["context_strategy"])
-                if refined_strategy != enhanced_context.strategy_used:
-                    logger.info(f"🔄 Refining streaming context strategy from {enhanced_context.strategy_used.value} to {refined_strategy.value}")
-                    try:
-                        async with get_db_async() as db:
-                            enhanced_context = await enhanced_document_service.get_enhanced_patient_context(
-                                patient_id=patient_id,
-                                query=user_query,
-                                strategy=refined_strategy,
-                                db=db,
-                                include_recent=True,
-                                include_critical=query_classification.get("urgency", "low") in ["high", "critical"]
-                        )
-                        logger.info(f"🔍 Refined streaming context: {enhanced_context.total_documents} docs, {enhanced_context.total_tokens} tokens")
-                    except Exception as e:
-                        logger.warning(f"⚠️ Streaming context refinement failed: {str(e)}")
+            enhanced_context = await self._refine_stream_context(
+                query_classification, enhanced_context, patient_id, user_query
+            )
             
             # Step 4: Route to appropriate agent for streaming
             async for chunk in self._route_to_agent_stream_enhanced(
@@ -304,7 +315,8 @@ class MedicalCoordinatorAgent:
                 enhanced_context,
                 model_type,
                 temperature,
-                max_tokens
+                max_tokens,
+                conversation_id
             ):
                 yield chunk
                 
@@ -312,17 +324,243 @@ class MedicalCoordinatorAgent:
             logger.error(f"❌ Enhanced streaming coordinator error: {str(e)}")
             yield f"Error: {str(e)}"
     
-    async def _classify_query_enhanced(self, messages: List[ChatMessage], enhanced_context=None) -> Dict[str, Any]:
+    async def _load_stream_context(
+        self,
+        patient_id: str,
+        user_query: str,
+        context_strategy: Optional[ContextStrategy] = None
+    ):
+        """Load the initial patient context for a streaming request (None on failure)"""
+        try:
+            async with get_db_async() as db:
+                enhanced_context = await enhanced_document_service.get_enhanced_patient_context(
+                    patient_id=patient_id,
+                    query=user_query,
+                    strategy=context_strategy or self.default_context_strategy,
+                    db=db,
+                    include_recent=True,
+                    include_critical=False  # Don't assume critical yet
+                )
+            logger.info(f"🔍 Pre-classification streaming context: {enhanced_context.total_documents} docs, {enhanced_context.total_tokens} tokens")
+            return enhanced_context
+        except Exception as e:
+            logger.warning(f"⚠️ Enhanced context failed for streaming: {str(e)}")
+            return None
+    
+    async def _refine_stream_context(
+        self,
+        query_classification: Dict[str, Any],
+        enhanced_context,
+        patient_id: Optional[str],
+        user_query: str
+    ):
+        """Reload the context when the classification recommends a different strategy"""
+        if not enhanced_context or not query_classification.get("context_strategy"):
+            return enhanced_context
+        
+        refined_strategy = ContextStrategy(query_classification["context_strategy"])
+        if refined_strategy == enhanced_context.strategy_used:
+            return enhanced_context
+        
+        logger.info(f"🔄 Refining streaming context strategy from {enhanced_context.strategy_used.value} to {refined_strategy.value}")
+        try:
+            async with get_db_async() as db:
+                refined_context = await enhanced_document_service.get_enhanced_patient_context(
+                    patient_id=patient_id,
+                    query=user_query,
+                    strategy=refined_strategy,
+                    db=db,
+                    include_recent=True,
+                    include_critical=query_classification.get("urgency", "low") in ["high", "critical"]
+                )
+            logger.info(f"🔍 Refined streaming context: {refined_context.total_documents} docs, {refined_context.total_tokens} tokens")
+            return refined_context
+        except Exception as e:
+            logger.warning(f"⚠️ Streaming context refinement failed: {str(e)}")
+            return enhanced_context
+    
+    @staticmethod
+    def _stream_agent_for(query_type: str) -> str:
+        """Agent that _route_to_agent_stream_enhanced uses for a query type"""
+        if query_type in ("diagnostic", "document_analysis", "quick_question"):
+            return query_type
+        return "general"  # Search has no streaming agent yet
+    
+    async def _process_request_stream_speculative(
+        self,
+        messages: List[ChatMessage],
+        user_query: str,
+        patient_context: Optional[Dict[str, Any]],
+        patient_id: Optional[str],
+        model_type: ModelType,
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        context_strategy: Optional[ContextStrategy],
+        conversation_id: Optional[str] = None
+    ) -> AsyncGenerator[str, None]:
+        """
+        Speculative streaming: overlap context loading, classification and generation
+        
+        Context loading and classification run concurrently (classification assumes
+        the selected patient has documents and is repeated against the loaded context
+        when the patient has none or its confidence is below
+        SPECULATIVE_STREAMING_MIN_CONFIDENCE). If the classification is still pending
+        once the context is ready, the agent guessed by the local classifier starts
+        streaming into a buffer. The buffer is flushed when the classification agrees
+        and discarded (cancelling the speculative call) when it does not.
+        """
+        context_expected = bool(patient_id and self.use_enhanced_context)
+        context_task = None
+        if context_expected:
+            context_task = asyncio.create_task(self._load_stream_context(patient_id, user_query, context_strategy))
+        classification_task = asyncio.create_task(
+            self._classify_query_enhanced(messages, None, context_expected=context_expected)
+        )
+        speculative_task = None
+        
+        try:
+            enhanced_context = await context_task if context_task else None
+            has_context = enhanced_context is not None and enhanced_context.total_documents > 0
+            
+            # Speculate only while the classification is still in flight
+            if not classification_task.done():
+                guess = self.fast_classifier.classify(user_query, has_context)
+                if guess["confidence"] >= settings.SPECULATIVE_STREAMING_MIN_CONFIDENCE:
+                    speculative_agent = self._stream_agent_for(guess["query_type"])
+                    buffer: asyncio.Queue = asyncio.Queue()
+                    speculative_task = asyncio.create_task(self._buffer_agent_stream(
+                        buffer,
+                        guess,
+                        messages,
+                        patient_context,
+                        enhanced_context,
+                        model_type,
+                        temperature,
+                        max_tokens,
+                        conversation_id
+                    ))
+                    self.speculation_counts["started"] += 1
+                    logger.info(f"🔮 Speculatively streaming from {speculative_agent} agent")
+            
+            query_classification = await classification_task
+            if (
+                has_context != context_expected
+                or query_classification["confidence"] < settings.SPECULATIVE_STREAMING_MIN_CONFIDENCE
+            ):
+                # The patient turned out to have no usable documents, or the result is uncertain:
+                # classify again against the real context
+                query_classification = await self._classify_query_enhanced(messages, enhanced_context)
+            query_classification["context_available"] = enhanced_context is not None
+            query_classification["context_documents"] = enhanced_context.total_documents if enhanced_context else 0
+            logger.info(f"🌊 Context-aware streaming classification: {query_classification['query_type']} (confidence: {query_classification['confidence']:.2f})")
+            
+            refined_context = await self._refine_stream_context(
+                query_classification, enhanced_context, patient_id, user_query
+            )
+            
+            if speculative_task is not None:
+                agrees = (
+                    self._stream_agent_for(query_classification["query_type"]) == speculative_agent
+                    and refined_context is enhanced_context
+                )
+                if agrees:
+                    self.speculation_counts["confirmed"] += 1
+                    logger.info(f"✅ Speculation confirmed for {speculative_agent} agent, flushing buffer")
+                    while True:
+                        chunk = await buffer.get()
+                        if chunk is None:
+                            break
+                        yield chunk
+                    await speculative_task
+                    return
+                
+                self.speculation_counts["cancelled"] += 1
+                logger.info(
+                    f"↩️ Speculation cancelled: guessed {speculative_agent}, "
+                    f"classified {query_classification['query_type']}"
+                )
+                speculative_task.cancel()
+                try:
+                    await speculative_task
+                except asyncio.CancelledError:
+                    pass
+            
+            async for chunk in self._route_to_agent_stream_enhanced(
+                query_classification,
+                messages,
+                patient_context,
+                refined_context,
+                model_type,
+                temperature,
+                max_tokens,
+                conversation_id
+            ):
+                yield chunk
+        
+        finally:
+            # Client disconnects or errors must not leave background calls running
+            for task in (context_task, classification_task, speculative_task):
+                if task is not None and not task.done():
+                    task.cancel()
+    
+    async def _buffer_agent_stream(self, buffer: asyncio.Queue, classification: Dict[str, Any], *route_args) -> None:
+        """Stream an agent response into a buffer, ending with None"""
+        try:
+            async for chunk in self._route_to_agent_stream_enhanced(classification, *route_args):
+                buffer.put_nowait(chunk)
+        finally:
+            buffer.put_nowait(None)
+    
+    async def _classify_query_enhanced(
+        self,
+        messages: List[ChatMessage],
+        enhanced_context=None,
+        context_expected: bool = False
+    ) -> Dict[str, Any]:
         """
         Enhanced query classification that considers available patient context
         
         Args:
             messages: Chat messages from user
             enhanced_context: Available patient context (HybridContext object)
+            context_expected: Classify as if patient documents were available while
+                the context is still loading (speculative streaming)
             
         Returns:
             Classification result with context-aware decisions
         """
+        if enhanced_context is not None:
+            has_context = enhanced_context.total_documents > 0
+        else:
+            has_context = context_expected
+        user_query = next((msg.content for msg in reversed(messages) if msg.role == "user"), "")
+        
+        # Fast path: skip the LLM round trip when local rules are confident
+        if settings.QUERY_CLASSIFIER_FAST_PATH_ENABLED:
+            local_classification = self.fast_classifier.classify(user_query, has_context)
+            if local_classification["confidence"] >= settings.QUERY_CLASSIFIER_CONFIDENCE_THRESHOLD:
+                local_classification["context_available"] = enhanced_context is not None
+                local_classification["context_documents"] = enhanced_context.total_documents if enhanced_context else 0
+                self.classification_counts[local_classification["classifier"]] += 1
+                logger.info(
+                    f"⚡ Fast classification: {local_classification['query_type']} "
+                    f"(confidence: {local_classification['confidence']:.2f}, {local_classification['classifier']})"
+                )
+                return local_classification
+        
+        # Repeated intent: reuse a previous LLM classification
+        cache_key = (normalize_query(user_query), has_context)
+        if self.classification_cache is not None:
+            cached_classification = self.classification_cache.get(cache_key)
+            if cached_classification is not None:
+                classification = dict(cached_classification)
+                classification["cache_hit"] = True
+                classification["context_available"] = enhanced_context is not None
+                classification["context_documents"] = enhanced_context.total_documents if enhanced_context else 0
+                self.classification_counts["cache"] += 1
+                logger.info(f"♻️ Cached classification: {classification['query_type']}")
+                return classification
+        
         try:
             # Prepare context information for classification
             context_info = ""
@@ -335,11 +573,18 @@ class MedicalCoordinatorAgent:
                 - Estrategia usada: {enhanced_context.strategy_used.value}
                 - Confianza del contexto: {enhanced_context.confidence:.2f}
                 - Documentos completos: {len(enhanced_context.full_documents)}
-                - Documentos médicos: {len(enhanced_context.vector_results)}
                 
                 IMPORTANTE: Si la consulta pide información específica del paciente y hay documentos disponibles,
                 es muy probable que sea "document_analysis" o "search" en lugar de "general".
                 """
+            elif context_expected:
+                context_info = """
+                
+                CONTEXTO DEL PACIENTE: Hay un paciente seleccionado y sus documentos se están cargando.
+                
+                IMPORTANTE: Si la consulta pide información específica del paciente,
+                es muy probable que sea "document_analysis" o "search" en lugar de "general".
+                """
             else:
                 context_info = """
                 
@@ -421,13 +666,18 @@ class MedicalCoordinatorAgent:
                     classification["context_strategy"] = self._determine_default_strategy(classification["query_type"])
                 
                 # Add context awareness metadata
+                classification["classifier"] = "llm"
+                if self.classification_cache is not None:
+                    self.classification_cache.set(cache_key, dict(classification))
+                self.classification_counts["llm"] += 1
+                
                 classification["context_available"] = enhanced_context is not None
                 classification["context_documents"] = enhanced_context.total_documents if enhanced_context else 0
                 
                 return classification
             else:
                 # Fallback classification with context awareness
-                has_context = enhanced_context is not None and enhanced_context.total_documents > 0
+                self.classification_counts["fallback"] += 1
                 return {
                     "query_type": "document_analysis" if has_context else "general",
                     "confidence": 0.5,
@@ -442,7 +692,7 @@ class MedicalCoordinatorAgent:
         except Exception as e:
             logger.error(f"❌ Enhanced query classification failed: {str(e)}")
             # Return safe fallback with context awareness
-            has_context = enhanced_context is not None and enhanced_context.total_documents > 0
+            self.classification_counts["fallback"] += 1
             return {
                 "query_type": "document_analysis" if has_context else "general",
                 "confidence": 0.3,
@@ -464,7 +714,22 @@ class MedicalCoordinatorAgent:
             "general": "full_docs_only"
         }
         return strategy_map.get(query_type, "full_docs_only")
-    
+
+    def get_classification_stats(self) -> Dict[str, Any]:
+        """Get classification counts per source and classification cache hit rates"""
+        total = sum(self.classification_counts.values())
+        llm_avoided = total - self.classification_counts["llm"] - self.classification_counts["fallback"]
+        return {
+            "total": total,
+            "by_source": dict(self.classification_counts),
+            "llm_avoided_rate": llm_avoided / total if total else 0.0,
+            "cache": self.classification_cache.get_stats() if self.classification_cache is not None else None,
+            "speculation": {
+                "enabled": settings.SPECULATIVE_STREAMING_ENABLED,
+                **{outcome: self.speculation_counts[outcome] for outcome in ("started", "confirmed", "cancelled")}
+            }
+        }
+
     async def _route_to_agent_enhanced(
         self,
         classification: Dict[str, Any],
@@ -473,14 +738,18 @@ class MedicalCoordinatorAgent:
         enhanced_context,  # HybridContext object
         model_type: ModelType,
         temperature: Optional[float],
-        max_tokens: Optional[int]
+        max_tokens: Optional[int],
+        conversation_id: Optional[str] = None
     ) -> ChatResponse:
         """Route request to appropriate specialized agent with enhanced context"""
         
         query_type = classification.get("query_type", "general")
         
         # Prepare unified context for agents
-        unified_context = await self._prepare_unified_context(legacy_context, enhanced_context)
+        unified_context = await self._prepare_unified_context(
+            legacy_context, enhanced_context, messages=messages, conversation_id=conversation_id,
+            query_type=query_type
+        )
         
         try:
             if query_type == "diagnostic":
@@ -551,6 +820,9 @@ class MedicalCoordinatorAgent:
                 
         except Exception as e:
             logger.error(f"❌ Enhanced agent routing failed for {query_type}: {str(e)}")
+            if is_overload_error(e):
+                # Azure OpenAI is saturated; another completion would only add to the overload
+                raise
             # Fallback to general response
             return await self.azure_openai_service.chat_completion(
                 messages=messages,
@@ -567,12 +839,16 @@ class MedicalCoordinatorAgent:
         enhanced_context,  # HybridContext object
         model_type: ModelType,
         temperature: Optional[float],
-        max_tokens: Optional[int]
+        max_tokens: Optional[int],
+        conversation_id: Optional[str] = None
     ) -> AsyncGenerator[str, None]:
         """Route request to appropriate agent for streaming with enhanced context"""
         
         query_type = classification.get("query_type", "general")
-        unified_context = await self._prepare_unified_context(legacy_context, enhanced_context)
+        unified_context = await self._prepare_unified_context(
+            legacy_context, enhanced_context, messages=messages, conversation_id=conversation_id,
+            query_type=self._stream_agent_for(query_type)
+        )
         
         logger.info(f"🎯 MedicalCoordinator: Routing to {query_type} agent")
         logger.info(f"🎯 MedicalCoordinator: Unified context prepared with {len(unified_context)} keys")
@@ -656,7 +932,10 @@ class MedicalCoordinatorAgent:
         self, 
         legacy_context: Optional[Dict[str, Any]], 
         enhanced_context,  # HybridContext object
-        patient_id: Optional[str] = None
+        patient_id: Optional[str] = None,
+        messages: Optional[List[ChatMessage]] = None,
+        conversation_id: Optional[str] = None,
+        query_type: Optional[str] = None
     ) -> Dict[str, Any]:
         """Prepare unified context combining legacy and enhanced context"""
         unified = {}
@@ -712,13 +991,38 @@ class MedicalCoordinatorAgent:
                         "relevance_level": doc.relevance_level.value,
                         "source": doc.source,
                         "created_at": doc.created_at.isoformat(),
-                        "key_points": doc.key_points or []
+                        "summary": doc.summary,
+                        "key_points": doc.key_points or [],
+                        "content_mode": doc.content_mode
                     }
                     for doc in enhanced_context.full_documents
                 ],
                 "documents_count": len(enhanced_context.full_documents),  # Add count for easier access
-                "full_documents_count": len(enhanced_context.full_documents)
+                "full_documents_count": len(enhanced_context.full_documents),
+                "patient_digest": format_patient_digest(enhanced_context.patient_digest)
             })
+            
+            # Follow-up turns: documents already sent in this conversation become a digest
+            if (
+                conversation_id and messages and settings.CONVERSATION_CONTEXT_CARRYOVER_ENABLED
+                and query_type in CONTEXT_CARRYOVER_QUERY_TYPES
+            ):
+                user_messages = [msg for msg in messages if msg.role == "user"]
+                plan = conversation_session_store.plan_context(
+                    conversation_id=conversation_id,
+                    patient_id=str(enhanced_context.patient_id),
+                    documents=unified["full_documents"],
+                    query=user_messages[-1].content if user_messages else "",
+                    turn=len(user_messages),
+                    max_full_documents=MAX_ANALYSIS_DOCUMENTS
+                )
+                unified.update({
+                    "full_documents": plan.full_documents,
+                    "document_digest": plan.digest,
+                    "relevant_passages": plan.passages,
+                    "context_carryover": plan.to_metadata(),
+                    "full_documents_count": len(plan.full_documents)
+                })
         
         # Add metadata
         unified["context_type"] = "hybrid" if enhanced_context else "legacy"
@@ -0,0 +1,313 @@
+"""
+Fast Query Classifier
+Local keyword/regex rules plus an optional naive Bayes model that classify medical
+queries without an LLM round trip when they are confident enough
+"""
+
+import json
+import logging
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryType(str, Enum):
+    """Types of medical queries for agent routing"""
+    DIAGNOSTIC = "diagnostic"
+    DOCUMENT_ANALYSIS = "document_analysis"
+    QUICK_QUESTION = "quick_question"
+    SEARCH = "search"
+    GENERAL = "general"
+
+
+# Query types that need patient documents to be answerable
+PATIENT_CONTEXT_TYPES = {QueryType.DOCUMENT_ANALYSIS, QueryType.SEARCH}
+
+DEFAULT_CONTEXT_STRATEGIES = {
+    QueryType.DIAGNOSTIC: "full_docs_only",
+    QueryType.DOCUMENT_ANALYSIS: "full_docs_only",
+    QueryType.QUICK_QUESTION: "recent_docs",
+    QueryType.SEARCH: "full_docs_only",
+    QueryType.GENERAL: "full_docs_only"
+}
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase, strip accents and punctuation, and collapse whitespace"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    text = re.sub(r"[^\w\s]", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+@dataclass
+class ClassificationRule:
+    """Regex rule voting for a query type with a given precision weight (0-1)"""
+    query_type: QueryType
+    pattern: str
+    weight: float
+    regex: re.Pattern = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.regex = re.compile(self.pattern)
+
+
+# Patterns run over normalize_query() output (lowercase, no accents or punctuation)
+DEFAULT_RULES: List[ClassificationRule] = [
+    # Greetings, thanks and small talk (only when that is the whole message)
+    ClassificationRule(
+        QueryType.GENERAL,
+        r"^((hola|buen(os|as)? (dias|tardes|noches)|buenas|que tal|saludos|hey|muchas gracias|gracias|"
+        r"adios|hasta (luego|manana|pronto)|ok|okay|perfecto|excelente|muy bien|"
+        r"doctor|doctora|dr|dra|a todos|como estas|como esta) ?)+$",
+        0.97
+    ),
+    ClassificationRule(QueryType.GENERAL, r"^(quien eres|que puedes hacer|como funcionas|ayuda)$", 0.95),
+
+    # Record summaries and study interpretation
+    ClassificationRule(
+        QueryType.DOCUMENT_ANALYSIS,
+        r"\b(resumen|resume|resumir|resumeme|sintetiza)\b.*\b(expediente|historial|historia clinica|paciente|documentos?|consultas?|estudios?)\b",
+        0.95
+    ),
+    ClassificationRule(QueryType.DOCUMENT_ANALYSIS, r"\b(resumen|resume) (completo|general|clinico)\b", 0.9),
+    ClassificationRule(
+        QueryType.DOCUMENT_ANALYSIS,
+        r"\b(que|cuales) (estudios|analisis|examenes|laboratorios|procedimientos) (se ha|le han|tiene|se le)",
+        0.93
+    ),
+    ClassificationRule(
+        QueryType.DOCUMENT_ANALYSIS,
+        r"\b(resultados?|valores) (de|del|de los) (laboratorio|laboratorios|estudios?|biometria|quimica|perfil|cultivo|imagen)",
+        0.92
+    ),
+    ClassificationRule(QueryType.DOCUMENT_ANALYSIS, r"\b(ultimos|recientes) (laboratorios|estudios|resultados)\b", 0.9),
+    ClassificationRule(
+        QueryType.DOCUMENT_ANALYSIS,
+        r"\b(analiza|interpreta|revisa|explica)\b.*\b(documento|expediente|estudio|laboratorio|resultado|nota|reporte|radiografia|tomografia)",
+        0.9
+    ),
+    ClassificationRule(QueryType.DOCUMENT_ANALYSIS, r"\b(expediente|historial|historia clinica)\b", 0.6),
+
+    # Point lookups in the record
+    ClassificationRule(QueryType.SEARCH, r"^(busca|buscar|encuentra|localiza)\b", 0.93),
+    ClassificationRule(
+        QueryType.SEARCH,
+        r"\b(fecha|cuando fue|en que fecha|que dia)\b.*\b(ultima|ultimo|primera|primer|consulta|cirugia|ingreso|egreso|alta|estudio|visita)",
+        0.9
+    ),
+    ClassificationRule(QueryType.SEARCH, r"\b(numero de expediente|tipo de sangre|alergias? registradas?|medico tratante)\b", 0.85),
+
+    # Clinical reasoning about this patient
+    ClassificationRule(QueryType.DIAGNOSTIC, r"\b(diagnosticos? diferencial(es)?|diferenciales?)\b", 0.95),
+    ClassificationRule(
+        QueryType.DIAGNOSTIC,
+        r"\b(analiza|evalua|valora) (los )?(sintomas|signos|cuadro)\b",
+        0.93
+    ),
+    ClassificationRule(
+        QueryType.DIAGNOSTIC,
+        r"\b(que (puede|podria) tener|posibles? (diagnosticos?|causas?)|sospecha (de|diagnostica)|causa probable)\b",
+        0.92
+    ),
+    ClassificationRule(
+        QueryType.DIAGNOSTIC,
+        r"\bpaciente (con|presenta|refiere|tiene)\b.*\b(dolor|fiebre|tos|disnea|nausea|vomito|mareo|cefalea|sangrado)",
+        0.88
+    ),
+
+    # General medical knowledge
+    ClassificationRule(
+        QueryType.QUICK_QUESTION,
+        r"^(que es|que son|que significa|define|definicion de|para que sirve|como se trata|como actua)\b",
+        0.92
+    ),
+    ClassificationRule(
+        QueryType.QUICK_QUESTION,
+        r"\b(cual es la dosis|dosis (de|maxima|recomendada)|efectos (secundarios|adversos)|contraindicaciones|interacciones)\b",
+        0.92
+    ),
+    ClassificationRule(QueryType.QUICK_QUESTION, r"^(cuales son )?los sintomas de (la |el )?\w+", 0.9),
+    ClassificationRule(QueryType.QUICK_QUESTION, r"\b(valores? normales?|rango normal)\b", 0.85),
+]
+
+URGENCY_PATTERNS: List[Tuple[str, re.Pattern]] = [
+    ("critical", re.compile(r"\b(paro|inconsciente|convulsion|anafilaxia|hemorragia masiva|choque)\b")),
+    ("high", re.compile(r"\b(urgente|emergencia|dolor (toracico|de pecho)|sangrado|disnea severa|sepsis)\b")),
+]
+
+
+class NaiveBayesQueryModel:
+    """
+    Multinomial naive Bayes over word unigrams and bigrams
+
+    Small enough to train from a few hundred labelled queries (e.g. LLM labels
+    collected by ``scripts/benchmark_query_classifier.py``) and to serialize as JSON.
+    """
+
+    def __init__(self):
+        self.class_counts: Dict[str, int] = {}
+        self.token_counts: Dict[str, Dict[str, int]] = {}
+        self.total_tokens: Dict[str, int] = {}
+        self.vocabulary: set = set()
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        words = normalize_query(text).split()
+        return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+    def train(self, samples: Iterable[Tuple[str, str]]) -> "NaiveBayesQueryModel":
+        """Fit the model on (query, label) pairs"""
+        class_counts: Counter = Counter()
+        token_counts: Dict[str, Counter] = defaultdict(Counter)
+        for text, label in samples:
+            class_counts[label] += 1
+            token_counts[label].update(self.tokenize(text))
+
+        self.class_counts = dict(class_counts)
+        self.token_counts = {label: dict(counts) for label, counts in token_counts.items()}
+        self.total_tokens = {label: sum(counts.values()) for label, counts in token_counts.items()}
+        self.vocabulary = {token for counts in token_counts.values() for token in counts}
+        return self
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        """Posterior probability per label"""
+        if not self.class_counts:
+            return {}
+
+        tokens = self.tokenize(text)
+        total_samples = sum(self.class_counts.values())
+        vocabulary_size = len(self.vocabulary) + 1
+        log_scores = {}
+        for label, count in self.class_counts.items():
+            score = math.log(count / total_samples)
+            label_tokens = self.token_counts.get(label, {})
+            denominator = self.total_tokens.get(label, 0) + vocabulary_size
+            for token in tokens:
+                score += math.log((label_tokens.get(token, 0) + 1) / denominator)
+            log_scores[label] = score
+
+        best = max(log_scores.values())
+        exp_scores = {label: math.exp(score - best) for label, score in log_scores.items()}
+        normalizer = sum(exp_scores.values())
+        return {label: value / normalizer for label, value in exp_scores.items()}
+
+    def save(self, path: str) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "class_counts": self.class_counts,
+                "token_counts": self.token_counts
+            }, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> "NaiveBayesQueryModel":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        model = cls()
+        model.class_counts = data["class_counts"]
+        model.token_counts = data["token_counts"]
+        model.total_tokens = {label: sum(counts.values()) for label, counts in model.token_counts.items()}
+        model.vocabulary = {token for counts in model.token_counts.values() for token in counts}
+        return model
+
+
+class FastQueryClassifier:
+    """
+    Local first-stage classifier for MedicalCoordinatorAgent
+
+    Returns a classification in the same shape as the LLM tool call, with a
+    confidence the coordinator compares against
+    ``settings.QUERY_CLASSIFIER_CONFIDENCE_THRESHOLD`` to decide whether the
+    LLM classification round trip can be skipped.
+    """
+
+    def __init__(
+        self,
+        rules: Optional[List[ClassificationRule]] = None,
+        model: Optional[NaiveBayesQueryModel] = None,
+        model_path: Optional[str] = None
+    ):
+        self.rules = rules if rules is not None else DEFAULT_RULES
+        self.model = model
+        model_path = model_path if model_path is not None else settings.QUERY_CLASSIFIER_MODEL_PATH
+        if self.model is None and model_path:
+            try:
+                self.model = NaiveBayesQueryModel.load(model_path)
+                logger.info(f"🧠 Loaded query classifier model from {model_path}")
+            except FileNotFoundError:
+                logger.warning(f"⚠️ Query classifier model not found at {model_path}, using rules only")
+            except Exception as e:
+                logger.warning(f"⚠️ Could not load query classifier model: {str(e)}")
+
+    def _score_rules(self, normalized: str) -> Dict[QueryType, float]:
+        """Combine matched rule weights per type as independent evidence"""
+        miss_probability: Dict[QueryType, float] = {}
+        for rule in self.rules:
+            if rule.regex.search(normalized):
+                miss_probability[rule.query_type] = miss_probability.get(rule.query_type, 1.0) * (1 - rule.weight)
+        return {query_type: 1 - miss for query_type, miss in miss_probability.items()}
+
+    @staticmethod
+    def _detect_urgency(normalized: str) -> str:
+        for urgency, pattern in URGENCY_PATTERNS:
+            if pattern.search(normalized):
+                return urgency
+        return "low"
+
+    def classify(self, query: str, has_context: bool = False) -> Dict[str, Any]:
+        """
+        Classify a query locally
+
+        Args:
+            query: Last user message
+            has_context: Whether patient documents are available
+
+        Returns:
+            Classification dict (query_type, confidence, reasoning, ...) with
+            ``classifier`` set to "rules", "model" or "none"
+        """
+        normalized = normalize_query(query)
+        query_type, confidence, source = QueryType.GENERAL, 0.0, "none"
+
+        scores = self._score_rules(normalized)
+        if scores:
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            query_type, confidence = ranked[0]
+            # Competing evidence for another type lowers confidence
+            if len(ranked) > 1:
+                confidence *= ranked[0][1] / (ranked[0][1] + ranked[1][1])
+            source = "rules"
+
+        if self.model is not None and normalized:
+            probabilities = self.model.predict_proba(normalized)
+            if probabilities:
+                label, probability = max(probabilities.items(), key=lambda item: item[1])
+                if probability > confidence and label in QueryType._value2member_map_:
+                    query_type, confidence, source = QueryType(label), probability, "model"
+
+        reasoning = f"Local {source} classification"
+        # Same contextual rule the LLM classifier follows: patient-specific queries
+        # without documents are handled as general conversation
+        if query_type in PATIENT_CONTEXT_TYPES and not has_context:
+            query_type = QueryType.GENERAL
+            reasoning += " (no patient documents available)"
+
+        return {
+            "query_type": query_type.value,
+            "confidence": round(confidence, 4),
+            "reasoning": reasoning,
+            "requires_patient_context": query_type in PATIENT_CONTEXT_TYPES,
+            "urgency": self._detect_urgency(normalized),
+            "context_strategy": DEFAULT_CONTEXT_STRATEGIES[query_type],
+            "classifier": source
+        }
@@ -7,7 +7,8 @@ import logging
 from typing import List, Dict, Any, Optional, AsyncGenerator
 
 from app.models.chat import ChatMessage, ChatResponse, ModelType
-from app.services.azure_openai_service import AzureOpenAIService
+from app.services.azure_openai_service import AzureOpenAIService, azure_openai_service as shared_openai_service
+from app.services.prompt_caching import PromptAssembler
 from app.utils.exceptions import AgentError
 
 logger = logging.getLogger(__name__)
@@ -18,8 +19,8 @@ class QuickResponseAgent:
     Uses GPT-4o-mini for fast, efficient answers to simple queries
     """
     
-    def __init__(self):
-        self.azure_openai_service = AzureOpenAIService()
+    def __init__(self, azure_openai_service: Optional[AzureOpenAIService] = None):
+        self.azure_openai_service = azure_openai_service or shared_openai_service
         self.system_prompt = """Eres un asistente médico especializado en respuestas rápidas y precisas.
         Tu función es proporcionar información médica clara y concisa para:
         
@@ -41,6 +42,7 @@ class QuickResponseAgent:
         - No proporciones diagnósticos específicos
         - En caso de emergencia, deriva inmediatamente
         """
+        self.prompt_assembler = PromptAssembler(self.system_prompt)
         
         # Quick response tools for function calling
         self.quick_tools = [
@@ -177,25 +179,14 @@ class QuickResponseAgent:
         """
         Prepare enhanced messages for quick response
         """
-        enhanced_messages = [
-            ChatMessage(role="system", content=self.system_prompt)
-        ]
-        
         # Add minimal patient context if available (for quick responses)
+        patient_block = None
         if patient_context:
             context_summary = self._create_quick_context_summary(patient_context)
             if context_summary:
-                enhanced_messages.append(
-                    ChatMessage(
-                        role="system",
-                        content=f"Contexto del paciente: {context_summary}"
-                    )
-                )
-        
-        # Add user messages
-        enhanced_messages.extend(messages)
+                patient_block = f"Contexto del paciente: {context_summary}"
         
-        return enhanced_messages
+        return self.prompt_assembler.assemble(messages, patient_block=patient_block)
     
     def _create_quick_context_summary(self, context: Dict[str, Any]) -> str:
         """Create brief context summary for quick responses"""
@@ -7,7 +7,8 @@ import logging
 from typing import List, Dict, Any, Optional, AsyncGenerator
 
 from app.models.chat import ChatMessage, ChatResponse, ModelType
-from app.services.azure_openai_service import AzureOpenAIService
+from app.services.azure_openai_service import AzureOpenAIService, azure_openai_service as shared_openai_service
+from app.services.prompt_caching import PromptAssembler
 from app.utils.exceptions import AgentError
 
 logger = logging.getLogger(__name__)
@@ -18,8 +19,8 @@ class SearchAgent:
     Uses enhanced context with complete medical documents for intelligent analysis
     """
     
-    def __init__(self):
-        self.azure_openai_service = AzureOpenAIService()
+    def __init__(self, azure_openai_service: Optional[AzureOpenAIService] = None):
+        self.azure_openai_service = azure_openai_service or shared_openai_service
         self.system_prompt = """Eres un especialista en análisis médico que ayuda a encontrar y analizar información relevante en expedientes clínicos completos.
         
         Tu función es:
@@ -63,6 +64,7 @@ class SearchAgent:
         - Sugiere búsquedas complementarias solo si falta información
         - Mantén la confidencialidad médica
         """
+        self.prompt_assembler = PromptAssembler(self.system_prompt)
         
         # Search tools for function calling
         self.search_tools = [
@@ -379,31 +381,14 @@ class SearchAgent:
         """
         Prepare enhanced messages with search results context
         """
-        enhanced_messages = [
-            ChatMessage(role="system", content=self.system_prompt)
-        ]
-        
-        # Add search results context
+        # Search results depend on the query, so they go after the conversation history
         if search_results:
             results_content = self._format_search_results_for_analysis(search_results)
-            enhanced_messages.append(
-                ChatMessage(
-                    role="system",
-                    content=f"RESULTADOS DE BÚSQUEDA:\\n{results_content}"
-                )
-            )
+            results_block = f"RESULTADOS DE BÚSQUEDA:\\n{results_content}"
         else:
-            enhanced_messages.append(
-                ChatMessage(
-                    role="system",
-                    content="No se encontraron resultados en la búsqueda. Informa al usuario y sugiere búsquedas alternativas."
-                )
-            )
-        
-        # Add user messages
-        enhanced_messages.extend(messages)
+            results_block = "No se encontraron resultados en la búsqueda. Informa al usuario y sugiere búsquedas alternativas."
         
-        return enhanced_messages
+        return self.prompt_assembler.assemble(messages, volatile_blocks=[results_block])
     
     def _format_search_results_for_analysis(self, results: List[Dict[str, Any]]) -> str:
         """Format search results for AI analysis"""
@@ -5,11 +5,13 @@ API endpoints for administrative review of batch processing cases
 """
 
 import logging
-from typing import List, Dict, Any, Optional
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Union
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 
+from app.core.config import settings
 from app.database.abstract_layer import DatabaseSession
 from app.database.factory import get_db
 from app.services.admin_review_service import (
@@ -25,12 +27,30 @@ admin_review_service = AdminReviewService()
 class AdminDecisionRequest(BaseModel):
     """Request model for admin decision"""
     decision: AdminDecisionEnum
-    selected_patient_id: Optional[int] = None
+    selected_patient_id: Optional[Union[int, str]] = None
     new_patient_data: Optional[Dict[str, Any]] = None
     admin_notes: Optional[str] = None
     reviewed_by: str = Field(..., description="Admin user identifier")
 
 
+class BulkDecisionItem(BaseModel):
+    """Decision on one batch file of a bulk decision request"""
+    batch_file_id: Union[int, str]
+    decision: AdminDecisionEnum
+    selected_patient_id: Optional[Union[int, str]] = None
+    new_patient_data: Optional[Dict[str, Any]] = None
+    admin_notes: Optional[str] = None
+
+
+class BulkDecisionRequest(BaseModel):
+    """Request model for bulk admin decisions"""
+    decisions: List[BulkDecisionItem] = Field(
+        ..., min_length=1, max_length=settings.ADMIN_BULK_DECISION_MAX_ITEMS,
+        description="Approve, reject or manual-match decisions"
+    )
+    reviewed_by: str = Field(..., description="Admin user identifier")
+
+
 class NewPatientData(BaseModel):
     """Model for new patient data"""
     medical_record_number: str
@@ -52,9 +72,9 @@ class BulkApprovalRequest(BaseModel):
 
 class ReviewCaseResponse(BaseModel):
     """Response model for review case"""
-    batch_file_id: int
+    batch_file_id: Union[int, str]
     filename: str
-    session_id: str
+    session_id: Optional[str]
     parsed_patient_id: Optional[str]
     parsed_patient_name: Optional[str]
     parsed_document_type: Optional[str]
@@ -65,7 +85,7 @@ class ReviewCaseResponse(BaseModel):
     suggested_matches: List[Dict[str, Any]]
     review_priority: str
     review_category: str
-    created_at: str
+    created_at: Optional[Union[datetime, str]]
 
 
 @router.get("/review/pending", response_model=List[ReviewCaseResponse])
@@ -74,16 +94,18 @@ async def get_pending_reviews(
     priority: Optional[str] = Query(None, description="Filter by priority: high, medium, low"),
     category: Optional[str] = Query(None, description="Filter by category: patient_match, parsing_error, processing_error"),
     limit: int = Query(50, ge=1, le=100, description="Maximum number of cases to return"),
+    offset: int = Query(0, ge=0, description="Number of cases to skip (pagination)"),
     db: DatabaseSession = Depends(get_db)
 ):
-    """Get all files requiring admin review with optional filtering"""
+    """Get files requiring admin review, highest priority first, with optional filtering"""
     try:
         review_cases = await admin_review_service.get_pending_reviews(
             session_id=session_id,
             priority=priority,
             category=category,
             limit=limit,
-            db=db
+            db=db,
+            offset=offset
         )
         
         # Convert to response format
@@ -116,9 +138,24 @@ async def get_pending_reviews(
         )
 
 
+def _batch_file_id(batch_file_id: str) -> Union[int, str]:
+    """Batch file ID from the path: SQLite IDs are integers, MongoDB IDs are strings"""
+    return int(batch_file_id) if batch_file_id.isdigit() else batch_file_id
+
+
+def _decision_response(result: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-serializable result of one admin decision"""
+    return {
+        **result,
+        "decision": AdminDecisionEnum(result["decision"]).value,
+        "patient_id": str(result["patient_id"]) if result["patient_id"] is not None else None,
+        "document_id": str(result["document_id"]) if result["document_id"] is not None else None
+    }
+
+
 @router.post("/review/{batch_file_id}/decision")
 async def make_admin_decision(
-    batch_file_id: int,
+    batch_file_id: str,
     request: AdminDecisionRequest,
     db: DatabaseSession = Depends(get_db)
 ):
@@ -132,20 +169,19 @@ async def make_admin_decision(
             reviewed_by=request.reviewed_by
         )
         
-        result = await admin_review_service.make_admin_decision(
-            batch_file_id=batch_file_id,
+        result = await admin_review_service.process_admin_decision(
+            batch_file_id=_batch_file_id(batch_file_id),
             decision=decision,
             db=db
         )
+        result = _decision_response(result)
         
         return JSONResponse(
             status_code=status.HTTP_200_OK,
             content={
-                "success": True,
+                **result,
                 "batch_file_id": batch_file_id,
-                "decision": request.decision,
-                "processed_patient_id": result.processed_patient_id,
-                "message": result.message
+                "processed_patient_id": result["patient_id"]
             }
         )
         
@@ -163,6 +199,48 @@ async def make_admin_decision(
         )
 
 
+@router.post("/review/decisions/bulk")
+async def apply_bulk_decisions(
+    request: BulkDecisionRequest,
+    db: DatabaseSession = Depends(get_db)
+):
+    """Apply many approve, reject and manual-match decisions in one call, with a result per decision"""
+    try:
+        decisions = [
+            (
+                item.batch_file_id,
+                AdminDecision(
+                    decision=item.decision,
+                    selected_patient_id=item.selected_patient_id,
+                    new_patient_data=item.new_patient_data,
+                    admin_notes=item.admin_notes,
+                    reviewed_by=request.reviewed_by
+                )
+            )
+            for item in request.decisions
+        ]
+        
+        results = await admin_review_service.apply_bulk_decisions(decisions, db)
+        applied = sum(1 for result in results if result["success"])
+        
+        return JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content={
+                "success": applied == len(results),
+                "applied_count": applied,
+                "failed_count": len(results) - applied,
+                "results": [_decision_response(result) for result in results]
+            }
+        )
+        
+    except Exception as e:
+        logger.error(f"❌ Failed to apply bulk decisions: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to apply bulk decisions: {str(e)}"
+        )
+
+
 @router.get("/review/statistics")
 async def get_review_statistics(
     session_id: Optional[str] = Query(None, description="Filter by batch session ID"),
@@ -199,24 +277,33 @@ async def bulk_approve_high_confidence_matches(
 ):
     """Bulk approve high confidence matches for a batch session"""
     try:
-        result = await admin_review_service.bulk_approve_high_confidence(
+        logger.info(f"📋 Bulk approval of session {session_id} requested by {request.reviewed_by}")
+        result = await admin_review_service.bulk_approve_high_confidence_matches(
             session_id=session_id,
             confidence_threshold=request.confidence_threshold,
-            reviewed_by=request.reviewed_by,
             db=db
         )
         
         return JSONResponse(
             status_code=status.HTTP_200_OK,
             content={
-                "success": True,
+                "success": result["failed_count"] == 0,
                 "session_id": session_id,
-                "approved_count": result.approved_count,
-                "remaining_count": result.remaining_count,
-                "message": result.message
+                "approved_count": result["approved_count"],
+                "failed_count": result["failed_count"],
+                "confidence_threshold": result["confidence_threshold"],
+                "message": (
+                    f"{result['approved_count']} matches approved, {result['failed_count']} failed"
+                )
             }
         )
         
+    except ValueError as e:
+        logger.error(f"❌ Invalid bulk approval request: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"❌ Failed to bulk approve: {str(e)}")
         raise HTTPException(
@@ -3,14 +3,21 @@ Chat Endpoints
 API endpoints for medical chat functionality with enhanced hybrid context
 """
 
+import asyncio
 import logging
+import uuid
 from typing import Dict, Any
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
 import json
 
+from app.core.startup import startup_orchestrator
 from app.models.chat import ChatRequest, ChatResponse, ModelType
-from app.services.azure_openai_service import AzureOpenAIService
+from app.services.azure_openai_service import azure_openai_service
+from app.services.openai_resilience import openai_resilience
+from app.services.rate_limiter import openai_rate_limiter
+from app.services.prompt_caching import prompt_cache_tracker
+from app.services.conversation_session_store import conversation_session_store
 from app.services.enhanced_document_service import ContextStrategy
 from app.agents.medical_coordinator import MedicalCoordinatorAgent
 
@@ -18,23 +25,28 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Initialize medical coordinator agent and Azure OpenAI service
-coordinator_agent = MedicalCoordinatorAgent()
-azure_openai_service = AzureOpenAIService()
+# Medical coordinator agent sharing the process-wide Azure OpenAI service
+coordinator_agent = MedicalCoordinatorAgent(azure_openai_service)
 
 # Global initialization flag
 _services_initialized = False
+_initialization_lock = asyncio.Lock()
 
 async def ensure_services_initialized():
-    """Ensure all services are properly initialized"""
+    """Ensure all services are properly initialized (once, even under concurrent requests)"""
     global _services_initialized
-    if not _services_initialized:
-        await coordinator_agent.initialize()
-        if not azure_openai_service.is_initialized:
-            await azure_openai_service.initialize()
-        # ChromaDB removed - using only complete documents
-        logger.info("✅ Using complete document context only")
-        _services_initialized = True
+    if _services_initialized:
+        return
+    
+    async with _initialization_lock:
+        if not _services_initialized:
+            # Initializes the shared Azure OpenAI service and all agents
+            await coordinator_agent.initialize()
+            # ChromaDB removed - using only complete documents
+            logger.info("✅ Using complete document context only")
+            _services_initialized = True
+            # A failed startup attempt is reported by /health until this lazy retry succeeds
+            startup_orchestrator.mark_ready("medical_agents")
 
 @router.post("/medical/stream")
 async def medical_chat_stream(request: ChatRequest):
@@ -60,6 +72,9 @@ async def medical_chat_stream(request: ChatRequest):
             except ValueError:
                 logger.warning(f"⚠️ Invalid context strategy: {request.context_strategy}")
         
+        # Clients reuse the returned conversation_id on follow-up turns
+        conversation_id = request.conversation_id or uuid.uuid4().hex
+        
         async def generate_enhanced_stream():
             try:
                 logger.info("🌊 Starting enhanced stream generation")
@@ -74,7 +89,8 @@ async def medical_chat_stream(request: ChatRequest):
                     model_type=request.model_type,
                     temperature=request.temperature,
                     max_tokens=request.max_tokens,
-                    context_strategy=context_strategy
+                    context_strategy=context_strategy,
+                    conversation_id=conversation_id
                 ):
                     chunk_count += 1
                     
@@ -83,6 +99,7 @@ async def medical_chat_stream(request: ChatRequest):
                         context_info = {
                             "type": "context_info",
                             "patient_id": request.patient_id,
+                            "conversation_id": conversation_id,
                             "enhanced_context_available": request.patient_id is not None,
                             "context_strategy": context_strategy.value if context_strategy else "default"
                         }
@@ -122,6 +139,18 @@ async def medical_chat_stream(request: ChatRequest):
         raise HTTPException(status_code=500, detail="Streaming error")
 
 
+@router.get("/metrics")
+async def get_chat_metrics() -> Dict[str, Any]:
+    """Get Azure OpenAI call metrics (retries, circuit state, load shedding, rate limits, prompt cache, classification, context carryover)"""
+    return {
+        "azure_openai": openai_resilience.get_metrics(),
+        "rate_limits": openai_rate_limiter.get_stats(),
+        "prompt_cache": prompt_cache_tracker.get_stats(),
+        "query_classification": coordinator_agent.get_classification_stats(),
+        "conversation_context": conversation_session_store.get_stats()
+    }
+
+
 @router.get("/models")
 async def get_available_models() -> Dict[str, Any]:
     """Get information about available AI models and enhanced features"""
@@ -3,17 +3,30 @@ Documents Endpoints
 API endpoints for medical document management and analysis
 """
 
+import asyncio
+import json
 import logging
+import uuid
+from pathlib import Path
 from typing import List, Dict, Any, Optional
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends
+from fastapi.responses import StreamingResponse
 
+from app.core.config import settings
 from app.models.medical import DocumentAnalysisRequest, DocumentAnalysisResponse
 # from app.services.chroma_service import ChromaService  # Removed - focusing on complete storage
 from app.agents.document_analysis_agent import DocumentAnalysisAgent
 from app.core.database import get_db
+from app.database.factory import get_db_async
+from app.db.models import BatchUploadStatusEnum
 from app.database.abstract_layer import DatabaseSession
-from app.services.patient_matching_service import PatientMatchingService
+from app.services.patient_matching_service import PatientMatchingService, patient_resolution_locks
 from app.services.tecsalud_filename_parser import TecSaludFilenameService
+from app.services.document_summary_service import document_summary_service
+from app.services.job_queue import JobStatus, job_queue
+from app.services.batch_processing_service import BatchProcessingService
+from app.services.batch_progress import CANCELLED_STATUS, batch_progress_tracker
+from app.utils.text_extraction import extract_text
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +35,16 @@ router = APIRouter()
 # Initialize services
 document_agent = DocumentAnalysisAgent()
 filename_service = TecSaludFilenameService()
+batch_service = BatchProcessingService()
+
+UPLOAD_JOB_TYPE = "document_upload"
+
+TERMINAL_BATCH_STATUSES = {
+    BatchUploadStatusEnum.COMPLETED.value,
+    BatchUploadStatusEnum.PARTIALLY_FAILED.value,
+    BatchUploadStatusEnum.FAILED.value,
+    CANCELLED_STATUS
+}
 
 @router.post("/upload")
 async def upload_document(
@@ -44,7 +67,7 @@ async def upload_document(
         db: Database session
         
     Returns:
-        Upload result with document processing status
+        Queued job (job_id and status_url), or the processing result when upload jobs are disabled
     """
     try:
         logger.info(f"📤 Uploading document: {file.filename} for patient {patient_id} (type: {processing_type})")
@@ -65,31 +88,134 @@ async def upload_document(
         if len(content) > 10 * 1024 * 1024:
             raise HTTPException(status_code=400, detail="File too large (max 10MB)")
         
-        # Generate document ID
-        import hashlib
-        import time
-        document_id = f"DOC_{patient_id}_{int(time.time())}_{hashlib.md5(content).hexdigest()[:8]}"
+        if not settings.DOCUMENT_UPLOAD_JOBS_ENABLED:
+            return await _process_uploaded_document(
+                file.filename, content, patient_id, document_type, title, processing_type, db
+            )
         
-        # Extract text content
-        text_content = await _extract_text_from_file(file.filename, content)
+        # Stage the file and process it in the background; clients poll the job status
+        staged_path = await _stage_upload(file.filename, content)
+        job_id = await job_queue.enqueue(UPLOAD_JOB_TYPE, {
+            "file_path": staged_path,
+            "filename": file.filename,
+            "patient_id": patient_id,
+            "document_type": document_type,
+            "title": title,
+            "processing_type": processing_type
+        }, db)
         
-        # Handle TecSalud filename parsing and patient creation
-        actual_patient_id = patient_id
-        patient_creation_result = None
+        return {
+            "job_id": job_id,
+            "status": JobStatus.QUEUED.value,
+            "status_url": f"/api/v1/documents/jobs/{job_id}",
+            "filename": file.filename,
+            "size": len(content),
+            "processing_type": processing_type,
+            "message": "Document queued for processing"
+        }
         
-        if patient_id == 'BULK_UPLOAD_PATIENT' and processing_type in ["complete", "both"]:
-            logger.info(f"🔍 Parsing TecSalud filename: {file.filename}")
-            
-            # Parse TecSalud filename
-            parse_result = await filename_service.parse_filename(file.filename)
-            
-            if parse_result.success and parse_result.patient_data:
-                # Initialize patient matching service
-                patient_matching_service = PatientMatchingService(db)
-                
-                # Find or create patient
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Document upload failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Document upload failed: {str(e)}")
+
+
+async def _stage_upload(filename: str, content: bytes) -> str:
+    """Save an uploaded file until its processing job runs"""
+    staging_dir = Path(settings.UPLOAD_DIRECTORY) / "pending"
+    path = staging_dir / f"{uuid.uuid4().hex}_{Path(filename).name}"
+    
+    def write() -> None:
+        staging_dir.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+    
+    await asyncio.to_thread(write)
+    return str(path)
+
+
+async def _run_upload_job(payload: Dict[str, Any], db: DatabaseSession) -> Dict[str, Any]:
+    """
+    Job handler: process a staged upload and remove the staged file
+    
+    Failed jobs are not retried, so the staged file is removed whether processing
+    succeeds or fails. A job re-run after a crash reuses the document stored by
+    the interrupted run instead of creating a duplicate.
+    """
+    path = Path(payload["file_path"])
+    try:
+        content = await asyncio.to_thread(path.read_bytes)
+        
+        return await _process_uploaded_document(
+            payload["filename"],
+            content,
+            payload["patient_id"],
+            payload["document_type"],
+            payload.get("title"),
+            payload["processing_type"],
+            db,
+            reuse_existing=True
+        )
+    finally:
+        await _remove_staged_upload(payload)
+
+
+async def _remove_staged_upload(payload: Dict[str, Any]) -> None:
+    """Delete the staged file of an upload job"""
+    await asyncio.to_thread(Path(payload["file_path"]).unlink, True)
+
+
+job_queue.register_handler(UPLOAD_JOB_TYPE, _run_upload_job, cleanup=_remove_staged_upload)
+
+
+async def _process_uploaded_document(
+    filename: str,
+    content: bytes,
+    patient_id: str,
+    document_type: str,
+    title: Optional[str],
+    processing_type: str,
+    db: DatabaseSession,
+    reuse_existing: bool = False
+) -> Dict[str, Any]:
+    """
+    Extract, match, store and analyze an uploaded document
+    
+    Runs in a job worker, or inline when upload jobs are disabled.
+    
+    Args:
+        reuse_existing: Reuse a document already stored for the same patient, content
+            and filename (set by the job handler so re-run jobs stay idempotent)
+    
+    Returns:
+        Upload result with document processing status
+    """
+    # Generate document ID
+    import hashlib
+    import time
+    document_id = f"DOC_{patient_id}_{int(time.time())}_{hashlib.md5(content).hexdigest()[:8]}"
+
+    # Extract text content
+    text_content = await _extract_text_from_file(filename, content)
+
+    # Handle TecSalud filename parsing and patient creation
+    actual_patient_id = patient_id
+    patient_creation_result = None
+
+    if patient_id == 'BULK_UPLOAD_PATIENT' and processing_type in ["complete", "both"]:
+        logger.info(f"🔍 Parsing TecSalud filename: {filename}")
+
+        # Parse TecSalud filename
+        parse_result = await filename_service.parse_filename(filename)
+
+        if parse_result.success and parse_result.patient_data:
+            # Initialize patient matching service
+            patient_matching_service = PatientMatchingService(db)
+
+            # Find or create patient, serialized per expediente so concurrent uploads match once
+            async with patient_resolution_locks.acquire(parse_result.patient_data.expediente_id):
                 match_result = await patient_matching_service.find_patient_matches(parse_result.patient_data)
-                
+
                 if match_result.best_match and match_result.best_match.confidence >= 0.8:
                     # Use existing patient
                     actual_patient_id = str(match_result.best_match.patient_id)
@@ -99,7 +225,7 @@ async def upload_document(
                     patient_creation_result = await patient_matching_service.create_patient_from_tecsalud_data(
                         parse_result.patient_data
                     )
-                    
+
                     if patient_creation_result.success:
                         actual_patient_id = str(patient_creation_result.patient_id)
                         logger.info(f"✅ Created new patient: {parse_result.patient_data.full_name} (ID: {actual_patient_id})")
@@ -108,112 +234,124 @@ async def upload_document(
                         # Use default patient ID for failed cases
                         actual_patient_id = "FAILED_PATIENT_CREATION"
                         logger.warning(f"⚠️ Using default patient ID for failed creation: {actual_patient_id}")
-            else:
-                logger.warning(f"⚠️ Could not parse TecSalud filename: {file.filename}")
-                # Use default patient ID for unknown documents
-                actual_patient_id = "UNKNOWN_PATIENT"
-                logger.warning(f"⚠️ Using default patient ID for unknown document: {actual_patient_id}")
-        
-        # Prepare metadata
-        metadata = {
-            "patient_id": actual_patient_id,
-            "document_type": document_type,
-            "filename": file.filename,
-            "title": title or file.filename,
-            "file_size": len(content),
-            "upload_date": "2024-01-01",  # Would use actual timestamp
-            "processed": True,
-            "processing_type": processing_type
-        }
-        
-        processing_results = {}
-        
-        # Skip vectorization - focusing only on complete document storage
-        if processing_type in ["vectorized", "both"]:
-            processing_results["vectorized"] = "skipped - not implemented"
-            logger.info("ℹ️ Vectorization skipped - focusing on complete document storage")
-        
-        # Handle complete document storage (MongoDB)
-        if processing_type in ["complete", "both"]:
-            try:
-                import hashlib
-                from datetime import datetime
-                
-                # Create document data for MongoDB
-                # Handle patient_id conversion for MongoDB
-                patient_id_for_doc = None
-                if actual_patient_id and actual_patient_id.isdigit():
-                    patient_id_for_doc = int(actual_patient_id)
-                elif actual_patient_id and actual_patient_id not in ["FAILED_PATIENT_CREATION", "UNKNOWN_PATIENT"]:
-                    patient_id_for_doc = actual_patient_id  # Keep as string for MongoDB ObjectId
-                
-                medical_doc_data = {
+        else:
+            logger.warning(f"⚠️ Could not parse TecSalud filename: {filename}")
+            # Use default patient ID for unknown documents
+            actual_patient_id = "UNKNOWN_PATIENT"
+            logger.warning(f"⚠️ Using default patient ID for unknown document: {actual_patient_id}")
+
+    # Prepare metadata
+    metadata = {
+        "patient_id": actual_patient_id,
+        "document_type": document_type,
+        "filename": filename,
+        "title": title or filename,
+        "file_size": len(content),
+        "upload_date": "2024-01-01",  # Would use actual timestamp
+        "processed": True,
+        "processing_type": processing_type
+    }
+
+    processing_results = {}
+
+    # Skip vectorization - focusing only on complete document storage
+    if processing_type in ["vectorized", "both"]:
+        processing_results["vectorized"] = "skipped - not implemented"
+        logger.info("ℹ️ Vectorization skipped - focusing on complete document storage")
+
+    # Handle complete document storage (MongoDB)
+    if processing_type in ["complete", "both"]:
+        try:
+            import hashlib
+            from datetime import datetime
+
+            # Create document data for MongoDB
+            # Handle patient_id conversion for MongoDB
+            patient_id_for_doc = None
+            if actual_patient_id and actual_patient_id.isdigit():
+                patient_id_for_doc = int(actual_patient_id)
+            elif actual_patient_id and actual_patient_id not in ["FAILED_PATIENT_CREATION", "UNKNOWN_PATIENT"]:
+                patient_id_for_doc = actual_patient_id  # Keep as string for MongoDB ObjectId
+
+            medical_doc_data = {
+                "patient_id": patient_id_for_doc,
+                "document_type": document_type,
+                "title": title or filename,
+                "content": text_content,
+                "file_path": f"uploads/{filename}",
+                "file_size": len(content),
+                "created_by": "admin",  # Would be actual user
+                "processing_type": processing_type,
+                "original_filename": filename,
+                "vectorization_status": "completed" if processing_type in ["vectorized", "both"] else "pending",
+                "content_hash": hashlib.sha256(content).hexdigest(),
+                "created_at": datetime.now().isoformat(),
+                "updated_at": datetime.now().isoformat()
+            }
+
+            existing = None
+            if reuse_existing:
+                existing = await db.find_one("medical_documents", {
                     "patient_id": patient_id_for_doc,
-                    "document_type": document_type,
-                    "title": title or file.filename,
-                    "content": text_content,
-                    "file_path": f"uploads/{file.filename}",
-                    "file_size": len(content),
-                    "created_by": "admin",  # Would be actual user
-                    "processing_type": processing_type,
-                    "original_filename": file.filename,
-                    "vectorization_status": "completed" if processing_type in ["vectorized", "both"] else "pending",
-                    "content_hash": hashlib.sha256(content).hexdigest(),
-                    "created_at": datetime.now().isoformat(),
-                    "updated_at": datetime.now().isoformat()
-                }
-                
+                    "content_hash": medical_doc_data["content_hash"],
+                    "original_filename": filename
+                })
+
+            if existing:
+                # Stored by an interrupted run of the same job
+                document_mongo_id = str(existing.get("_id") or existing.get("id"))
+                logger.info(f"♻️ Reusing stored document: {document_mongo_id}")
+            else:
                 # Store in MongoDB
                 result = await db.create("medical_documents", medical_doc_data)
-                
+
                 # Get document ID from result
                 if isinstance(result, dict):
                     document_mongo_id = str(result.get("_id") or result.get("id"))
                 else:
                     document_mongo_id = str(result)
-                
-                processing_results["complete_storage"] = "success"
-                processing_results["medical_document_id"] = document_mongo_id
                 logger.info(f"✅ Document stored completely: {document_mongo_id}")
-                
-            except Exception as e:
-                logger.error(f"❌ Complete storage failed: {str(e)}")
-                processing_results["complete_storage"] = f"error: {str(e)}"
-        
-        # Generate automatic analysis for complete documents
-        analysis_summary = "No analysis performed"
-        if processing_results.get("complete_storage") == "success":
-            try:
-                analysis_summary = await _generate_document_analysis(text_content, document_type)
-            except Exception as e:
-                logger.warning(f"⚠️ Analysis generation failed: {str(e)}")
-                analysis_summary = "Analysis not available"
-        
-        # Prepare response
-        response = {
-            "document_id": document_id,
-            "filename": file.filename,
-            "size": len(content),
-            "text_length": len(text_content),
-            "processing_type": processing_type,
-            "processing_results": processing_results,
-            "status": "processed",
-            "analysis_summary": analysis_summary,
-            "message": f"Document uploaded with {processing_type} processing"
-        }
-        
-        # Add patient information to response
-        if actual_patient_id != patient_id:
-            response["patient_id"] = actual_patient_id
-            response["patient_created"] = patient_creation_result and patient_creation_result.success
-        
-        return response
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"❌ Document upload failed: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Document upload failed: {str(e)}")
+
+            processing_results["complete_storage"] = "success"
+            processing_results["medical_document_id"] = document_mongo_id
+
+            # Summary and key points are generated in the background for chat context
+            if document_summary_service.schedule(document_mongo_id):
+                processing_results["summary_status"] = "pending"
+
+        except Exception as e:
+            logger.error(f"❌ Complete storage failed: {str(e)}")
+            processing_results["complete_storage"] = f"error: {str(e)}"
+
+    # Generate automatic analysis for complete documents
+    analysis_summary = "No analysis performed"
+    if processing_results.get("complete_storage") == "success":
+        try:
+            analysis_summary = await _generate_document_analysis(text_content, document_type)
+        except Exception as e:
+            logger.warning(f"⚠️ Analysis generation failed: {str(e)}")
+            analysis_summary = "Analysis not available"
+
+    # Prepare response
+    response = {
+        "document_id": document_id,
+        "filename": filename,
+        "size": len(content),
+        "text_length": len(text_content),
+        "processing_type": processing_type,
+        "processing_results": processing_results,
+        "status": "processed",
+        "analysis_summary": analysis_summary,
+        "message": f"Document uploaded with {processing_type} processing"
+    }
+
+    # Add patient information to response
+    if actual_patient_id != patient_id:
+        response["patient_id"] = actual_patient_id
+        response["patient_created"] = patient_creation_result and patient_creation_result.success
+
+    return response
+
 
 @router.post("/analyze", response_model=DocumentAnalysisResponse)
 async def analyze_document(
@@ -234,6 +372,110 @@ async def analyze_document(
         detail="Document analysis temporarily disabled - focusing on complete document storage"
     )
 
+@router.get("/jobs/{job_id}")
+async def get_document_job(
+    job_id: str,
+    db: DatabaseSession = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Get the status of a document processing job
+    
+    Args:
+        job_id: Job identifier returned by the upload endpoint
+        db: Database session
+        
+    Returns:
+        Job status, attempts, timestamps and, once completed, the processing result
+    """
+    job = await job_queue.get_job(job_id, db)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job
+
+@router.get("/batch/{session_id}/status")
+async def get_batch_status(
+    session_id: str,
+    include_files: bool = False,
+    db: DatabaseSession = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Get the aggregated status of a batch upload session
+    
+    Args:
+        session_id: Batch upload session ID
+        include_files: Include the per-file status list
+        db: Database session
+        
+    Returns:
+        File counts by status, plus live progress while the batch runs in this process
+    """
+    try:
+        status = await batch_service.get_batch_status(session_id, db, include_files=include_files)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    progress = batch_progress_tracker.get(session_id)
+    if progress:
+        status["progress"] = progress.snapshot()
+    return status
+
+@router.get("/batch/{session_id}/progress")
+async def stream_batch_progress(session_id: str) -> StreamingResponse:
+    """
+    Stream batch progress as Server-Sent Events
+    
+    Live counters (files done, throughput, ETA, per-stage latency) are sent every
+    ``BATCH_PROGRESS_STREAM_INTERVAL_SECONDS``. Sessions not running in this
+    process fall back to the aggregated database status, queried at most every
+    ``BATCH_PROGRESS_DB_POLL_SECONDS``. The stream ends when the batch finishes,
+    or with a ``timeout`` event when the counters have not changed for
+    ``BATCH_PROGRESS_STREAM_IDLE_TIMEOUT_SECONDS``.
+    
+    Args:
+        session_id: Batch upload session ID
+    """
+    async def generate_progress():
+        loop = asyncio.get_running_loop()
+        db_status, last_db_poll = None, 0.0
+        last_counters, last_change = None, loop.time()
+        
+        while True:
+            progress = batch_progress_tracker.get(session_id)
+            if progress:
+                snapshot = progress.snapshot()
+            else:
+                if db_status is None or loop.time() - last_db_poll >= settings.BATCH_PROGRESS_DB_POLL_SECONDS:
+                    try:
+                        async with get_db_async() as db:
+                            db_status = await batch_service.get_batch_status(session_id, db, include_files=False)
+                    except ValueError as e:
+                        yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+                        return
+                    last_db_poll = loop.time()
+                snapshot = {**db_status, "source": "database"}
+            
+            yield f"event: progress\ndata: {json.dumps(snapshot, default=str)}\n\n"
+            if snapshot["status"] in TERMINAL_BATCH_STATUSES:
+                return
+            
+            counters = (snapshot["status"], snapshot.get("processed_files"), snapshot.get("failed_files"))
+            if counters != last_counters:
+                last_counters, last_change = counters, loop.time()
+            elif loop.time() - last_change >= settings.BATCH_PROGRESS_STREAM_IDLE_TIMEOUT_SECONDS:
+                idle_seconds = round(loop.time() - last_change, 1)
+                yield f"event: timeout\ndata: {json.dumps({'session_id': session_id, 'idle_seconds': idle_seconds})}\n\n"
+                return
+            await asyncio.sleep(settings.BATCH_PROGRESS_STREAM_INTERVAL_SECONDS)
+    
+    return StreamingResponse(
+        generate_progress(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive"
+        }
+    )
+
 @router.get("/{document_id}")
 async def get_document(document_id: str) -> Dict[str, Any]:
     """
@@ -326,107 +568,7 @@ async def search_documents(
 
 async def _extract_text_from_file(filename: str, content: bytes) -> str:
     """Extract text content from uploaded file using appropriate libraries"""
-    try:
-        import io
-        import logging
-        
-        logger = logging.getLogger(__name__)
-        
-        if filename.lower().endswith('.txt'):
-            return content.decode('utf-8')
-            
-        elif filename.lower().endswith('.pdf'):
-            # Try with pdfplumber first (better for complex layouts)
-            try:
-                import pdfplumber
-                
-                text_content = []
-                with io.BytesIO(content) as file_buffer:
-                    with pdfplumber.open(file_buffer) as pdf:
-                        for page_num, page in enumerate(pdf.pages, 1):
-                            try:
-                                page_text = page.extract_text()
-                                if page_text and page_text.strip():
-                                    text_content.append(f"=== PÁGINA {page_num} ===\n{page_text.strip()}")
-                                else:
-                                    text_content.append(f"=== PÁGINA {page_num} ===\n[Página sin texto extraíble]")
-                            except Exception as e:
-                                logger.warning(f"Error extracting page {page_num}: {str(e)}")
-                                text_content.append(f"=== PÁGINA {page_num} ===\n[Error en extracción: {str(e)}]")
-                
-                if text_content:
-                    full_text = "\n\n".join(text_content)
-                    logger.info(f"✅ PDF extraction successful using pdfplumber: {len(full_text)} characters from {len(text_content)} pages")
-                    return full_text
-                else:
-                    logger.warning("⚠️ No text extracted with pdfplumber, trying PyPDF2")
-                    
-            except Exception as e:
-                logger.warning(f"⚠️ pdfplumber extraction failed: {str(e)}, trying PyPDF2")
-            
-            # Fallback to PyPDF2
-            try:
-                import PyPDF2
-                
-                text_content = []
-                with io.BytesIO(content) as file_buffer:
-                    pdf_reader = PyPDF2.PdfReader(file_buffer)
-                    
-                    for page_num, page in enumerate(pdf_reader.pages, 1):
-                        try:
-                            page_text = page.extract_text()
-                            if page_text and page_text.strip():
-                                text_content.append(f"=== PÁGINA {page_num} ===\n{page_text.strip()}")
-                            else:
-                                text_content.append(f"=== PÁGINA {page_num} ===\n[Página sin texto extraíble]")
-                        except Exception as e:
-                            logger.warning(f"Error extracting page {page_num} with PyPDF2: {str(e)}")
-                            text_content.append(f"=== PÁGINA {page_num} ===\n[Error en extracción: {str(e)}]")
-                
-                if text_content:
-                    full_text = "\n\n".join(text_content)
-                    logger.info(f"✅ PDF extraction successful using PyPDF2: {len(full_text)} characters from {len(text_content)} pages")
-                    return full_text
-                else:
-                    logger.error("❌ No text could be extracted from PDF with either library")
-                    return f"[PDF Error] {filename} - No se pudo extraer texto del PDF. Posiblemente sea un PDF de imagen o esté protegido."
-                    
-            except Exception as e:
-                logger.error(f"❌ PyPDF2 extraction failed: {str(e)}")
-                return f"[PDF Error] {filename} - Error al extraer contenido: {str(e)}"
-            
-        elif filename.lower().endswith(('.doc', '.docx')):
-            # Try to extract from Word documents
-            try:
-                import docx
-                
-                with io.BytesIO(content) as file_buffer:
-                    doc = docx.Document(file_buffer)
-                    text_content = []
-                    
-                    for paragraph in doc.paragraphs:
-                        if paragraph.text.strip():
-                            text_content.append(paragraph.text.strip())
-                    
-                    if text_content:
-                        full_text = "\n\n".join(text_content)
-                        logger.info(f"✅ DOCX extraction successful: {len(full_text)} characters")
-                        return full_text
-                    else:
-                        return f"[Word Document] {filename} - Documento vacío o sin texto extraíble"
-                        
-            except ImportError:
-                logger.warning("python-docx not installed, cannot extract Word documents")
-                return f"[Word Document] {filename} - Biblioteca python-docx no disponible para extraer contenido"
-            except Exception as e:
-                logger.error(f"❌ Word document extraction failed: {str(e)}")
-                return f"[Word Document Error] {filename} - Error al extraer contenido: {str(e)}"
-        else:
-            return f"[Unknown Format] {filename} - Formato de archivo no soportado para extracción de texto"
-            
-    except Exception as e:
-        logger.error(f"❌ Text extraction failed for {filename}: {str(e)}")
-        return f"[Error] No se pudo extraer texto de {filename}: {str(e)}"
+    return await asyncio.to_thread(extract_text, filename, content)
 
 async def _generate_document_analysis(content: str, document_type: str) -> str:
     """Generate automatic document analysis summary"""
@@ -51,7 +51,44 @@ class Settings(BaseSettings):
     GPT4O_MAX_TOKENS: int = Field(default=4096, env="GPT4O_MAX_TOKENS")
     GPT4O_MINI_MAX_TOKENS: int = Field(default=2048, env="GPT4O_MINI_MAX_TOKENS")
     TEMPERATURE: float = Field(default=0.1, env="TEMPERATURE")
-    
+
+    # Azure OpenAI HTTP connection pool (shared by all services)
+    OPENAI_HTTP_MAX_CONNECTIONS: int = Field(default=100, env="OPENAI_HTTP_MAX_CONNECTIONS")
+    OPENAI_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = Field(default=20, env="OPENAI_HTTP_MAX_KEEPALIVE_CONNECTIONS")
+    OPENAI_HTTP_KEEPALIVE_EXPIRY: float = Field(default=30.0, env="OPENAI_HTTP_KEEPALIVE_EXPIRY")
+    OPENAI_HTTP_TIMEOUT: float = Field(default=120.0, env="OPENAI_HTTP_TIMEOUT")
+    OPENAI_HTTP_CONNECT_TIMEOUT: float = Field(default=10.0, env="OPENAI_HTTP_CONNECT_TIMEOUT")
+    OPENAI_HTTP2_ENABLED: bool = Field(default=True, env="OPENAI_HTTP2_ENABLED")
+    AZURE_OPENAI_LAZY_INIT: bool = Field(default=False, env="AZURE_OPENAI_LAZY_INIT")  # Skip startup test call
+
+    # Azure OpenAI Resilience
+    OPENAI_MAX_RETRIES: int = Field(default=3, env="OPENAI_MAX_RETRIES")
+    OPENAI_RETRY_BASE_DELAY: float = Field(default=0.5, env="OPENAI_RETRY_BASE_DELAY")
+    OPENAI_RETRY_MAX_DELAY: float = Field(default=20.0, env="OPENAI_RETRY_MAX_DELAY")
+    OPENAI_CIRCUIT_FAILURE_THRESHOLD: int = Field(default=5, env="OPENAI_CIRCUIT_FAILURE_THRESHOLD")
+    OPENAI_CIRCUIT_RECOVERY_TIMEOUT: float = Field(default=30.0, env="OPENAI_CIRCUIT_RECOVERY_TIMEOUT")
+    OPENAI_LOAD_SHEDDING_ENABLED: bool = Field(default=True, env="OPENAI_LOAD_SHEDDING_ENABLED")
+    OPENAI_STREAM_USAGE_ENABLED: bool = Field(default=False, env="OPENAI_STREAM_USAGE_ENABLED")  # Needs API version 2024-09-01-preview or later
+
+    # Azure OpenAI client-side rate limiting (per deployment)
+    OPENAI_RATE_LIMIT_ENABLED: bool = Field(default=True, env="OPENAI_RATE_LIMIT_ENABLED")
+    OPENAI_DEFAULT_RPM: int = Field(default=900, env="OPENAI_DEFAULT_RPM")
+    OPENAI_DEFAULT_TPM: int = Field(default=150000, env="OPENAI_DEFAULT_TPM")
+    OPENAI_RATE_LIMIT_BURST_SECONDS: float = Field(default=10.0, env="OPENAI_RATE_LIMIT_BURST_SECONDS")
+    OPENAI_DEPLOYMENT_RATE_LIMITS: Dict[str, Dict[str, int]] = Field(
+        default={},
+        env="OPENAI_DEPLOYMENT_RATE_LIMITS"
+    )  # e.g. {"gpt-4o": {"rpm": 60, "tpm": 30000}}
+
+    # Embedding Cache
+    EMBEDDING_CACHE_ENABLED: bool = Field(default=True, env="EMBEDDING_CACHE_ENABLED")
+    EMBEDDING_CACHE_PATH: str = Field(
+        default="./data/embedding_cache.db",
+        env="EMBEDDING_CACHE_PATH"
+    )
+    EMBEDDING_CACHE_MAX_ENTRIES: int = Field(default=200000, env="EMBEDDING_CACHE_MAX_ENTRIES")
+    EMBEDDING_CACHE_RECOUNT_SECONDS: float = Field(default=60.0, env="EMBEDDING_CACHE_RECOUNT_SECONDS")  # Picks up rows written by other processes
+
     # Database
     DATABASE_TYPE: str = Field(
         default="mongodb", 
@@ -73,6 +110,7 @@ class Settings(BaseSettings):
         default="tecsalud", 
         env="MONGODB_DATABASE_NAME"
     )
+    MONGODB_EXPLAIN_QUERIES: bool = Field(default=True, env="MONGODB_EXPLAIN_QUERIES")  # Warn on COLLSCAN query-builder queries
     
     # MongoDB Collections (matching the image)
     MONGODB_COLLECTIONS: Dict[str, str] = {
@@ -84,7 +122,9 @@ class Settings(BaseSettings):
         "vital_signs": "vital_signs",
         "patient_interactions": "patient_interactions",
         "batch_uploads": "batch_uploads",
-        "batch_files": "batch_files"
+        "batch_files": "batch_files",
+        "patient_digests": "patient_digests",
+        "jobs": "jobs"
     }
     
 
@@ -140,6 +180,63 @@ class Settings(BaseSettings):
     ENABLE_TOOL_CALLING: bool = Field(default=True, env="ENABLE_TOOL_CALLING")
     MAX_TOOL_CALLS: int = Field(default=5, env="MAX_TOOL_CALLS")
     
+    # Query Classification
+    QUERY_CLASSIFIER_FAST_PATH_ENABLED: bool = Field(default=True, env="QUERY_CLASSIFIER_FAST_PATH_ENABLED")
+    QUERY_CLASSIFIER_CONFIDENCE_THRESHOLD: float = Field(default=0.85, env="QUERY_CLASSIFIER_CONFIDENCE_THRESHOLD")
+    QUERY_CLASSIFIER_MODEL_PATH: str = Field(default="", env="QUERY_CLASSIFIER_MODEL_PATH")  # Optional naive Bayes model
+    QUERY_CLASSIFICATION_CACHE_ENABLED: bool = Field(default=True, env="QUERY_CLASSIFICATION_CACHE_ENABLED")
+    QUERY_CLASSIFICATION_CACHE_MAX_ENTRIES: int = Field(default=2048, env="QUERY_CLASSIFICATION_CACHE_MAX_ENTRIES")
+    QUERY_CLASSIFICATION_CACHE_TTL_SECONDS: float = Field(default=900.0, env="QUERY_CLASSIFICATION_CACHE_TTL_SECONDS")
+    SPECULATIVE_STREAMING_ENABLED: bool = Field(default=False, env="SPECULATIVE_STREAMING_ENABLED")
+    # Also the threshold below which the speculative classification (made before the patient's
+    # documents are loaded) is repeated against the loaded context. Confident results are kept when
+    # the patient has documents, trading some routing accuracy for latency; a patient without
+    # documents is always classified again.
+    SPECULATIVE_STREAMING_MIN_CONFIDENCE: float = Field(default=0.5, env="SPECULATIVE_STREAMING_MIN_CONFIDENCE")
+    
+    # Conversation context carryover (follow-up document analysis turns send a digest of documents already seen)
+    CONVERSATION_CONTEXT_CARRYOVER_ENABLED: bool = Field(default=False, env="CONVERSATION_CONTEXT_CARRYOVER_ENABLED")
+    CONVERSATION_SESSION_TTL_SECONDS: float = Field(default=3600.0, env="CONVERSATION_SESSION_TTL_SECONDS")
+    CONVERSATION_SESSION_MAX_SESSIONS: int = Field(default=1000, env="CONVERSATION_SESSION_MAX_SESSIONS")
+    CONVERSATION_FULL_CONTEXT_EVERY_N_TURNS: int = Field(default=5, env="CONVERSATION_FULL_CONTEXT_EVERY_N_TURNS")  # 0 disables
+    CONVERSATION_DIGEST_MAX_CHARS: int = Field(default=300, env="CONVERSATION_DIGEST_MAX_CHARS")
+    CONVERSATION_PASSAGE_MAX_CHARS: int = Field(default=2000, env="CONVERSATION_PASSAGE_MAX_CHARS")
+    
+    # Document summaries (generated in the background after ingest, used for lower-ranked documents)
+    DOCUMENT_SUMMARIES_ENABLED: bool = Field(default=True, env="DOCUMENT_SUMMARIES_ENABLED")
+    DOCUMENT_SUMMARY_CONCURRENCY: int = Field(default=2, env="DOCUMENT_SUMMARY_CONCURRENCY")
+    DOCUMENT_SUMMARY_MAX_INPUT_CHARS: int = Field(default=24000, env="DOCUMENT_SUMMARY_MAX_INPUT_CHARS")
+    CONTEXT_FULL_TEXT_TOP_N: int = Field(default=3, env="CONTEXT_FULL_TEXT_TOP_N")  # 0 sends full text for every document
+    
+    # Background jobs (uploads and batch processing run outside the HTTP request)
+    DOCUMENT_UPLOAD_JOBS_ENABLED: bool = Field(default=True, env="DOCUMENT_UPLOAD_JOBS_ENABLED")
+    JOB_QUEUE_MAX_WORKERS: int = Field(default=2, env="JOB_QUEUE_MAX_WORKERS")
+    JOB_QUEUE_MAX_ATTEMPTS: int = Field(default=3, env="JOB_QUEUE_MAX_ATTEMPTS")  # Restarts a job survives
+    
+    # Batch progress stream
+    BATCH_PROGRESS_STREAM_INTERVAL_SECONDS: float = Field(default=1.0, env="BATCH_PROGRESS_STREAM_INTERVAL_SECONDS")
+    BATCH_PROGRESS_DB_POLL_SECONDS: float = Field(default=5.0, env="BATCH_PROGRESS_DB_POLL_SECONDS")  # Without live progress
+    BATCH_PROGRESS_STREAM_IDLE_TIMEOUT_SECONDS: float = Field(default=600.0, env="BATCH_PROGRESS_STREAM_IDLE_TIMEOUT_SECONDS")  # Ends a stream whose counters stopped moving
+    
+    # Reference data (default doctor, document types) cached per process for patient creation
+    REFERENCE_DATA_CACHE_TTL_SECONDS: float = Field(default=300.0, env="REFERENCE_DATA_CACHE_TTL_SECONDS")
+    
+    # Admin review
+    ADMIN_BULK_DECISION_MAX_ITEMS: int = Field(default=500, env="ADMIN_BULK_DECISION_MAX_ITEMS")  # Decisions per bulk request
+    REVIEW_STATISTICS_CACHE_TTL_SECONDS: float = Field(default=5.0, env="REVIEW_STATISTICS_CACHE_TTL_SECONDS")
+    
+    # Bulk import (directory or CSV manifest imports run from scripts/bulk_import.py)
+    BULK_IMPORT_WORKERS: int = Field(default=0, env="BULK_IMPORT_WORKERS")  # Extraction processes; 0 uses the CPU count
+    BULK_IMPORT_CONCURRENCY: int = Field(default=16, env="BULK_IMPORT_CONCURRENCY")  # Files processed concurrently
+    BULK_IMPORT_DOCUMENT_BATCH_SIZE: int = Field(default=50, env="BULK_IMPORT_DOCUMENT_BATCH_SIZE")
+    BULK_IMPORT_REGISTRATION_CHUNK_SIZE: int = Field(default=1000, env="BULK_IMPORT_REGISTRATION_CHUNK_SIZE")
+    
+    # Patient digest (materialized longitudinal summary, updated as documents are summarized)
+    PATIENT_DIGEST_ENABLED: bool = Field(default=True, env="PATIENT_DIGEST_ENABLED")
+    PATIENT_DIGEST_MAX_LABS: int = Field(default=30, env="PATIENT_DIGEST_MAX_LABS")
+    PATIENT_DIGEST_MAX_ITEMS: int = Field(default=25, env="PATIENT_DIGEST_MAX_ITEMS")  # Per diagnoses/medications/allergies list
+    PATIENT_DIGEST_MAX_TIMELINE_ENTRIES: int = Field(default=40, env="PATIENT_DIGEST_MAX_TIMELINE_ENTRIES")
+    
     # Rate Limiting
     RATE_LIMIT_REQUESTS: int = Field(default=100, env="RATE_LIMIT_REQUESTS")
     RATE_LIMIT_WINDOW: int = Field(default=3600, env="RATE_LIMIT_WINDOW")  # 1 hour
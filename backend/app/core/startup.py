@@ -0,0 +1,116 @@
+"""
+Startup Orchestration
+Initializes application components concurrently and records per-component timings
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ComponentStartup:
+    """Startup outcome for a single component"""
+    name: str
+    required: bool
+    status: str = "pending"  # pending, ready, failed
+    duration_ms: float = 0.0
+    error: Optional[str] = None
+
+
+class StartupOrchestrator:
+    """
+    Runs registered component initializers concurrently
+
+    Components that do not depend on each other (database, Azure OpenAI client,
+    agents) start in parallel, so cold start costs the slowest component instead
+    of the sum of all of them. A failing required component aborts startup; an
+    optional one is reported and retried lazily by its owner on first use.
+    """
+
+    def __init__(self):
+        self._initializers: Dict[str, Callable[[], Awaitable[Any]]] = {}
+        self.components: Dict[str, ComponentStartup] = {}
+        self.started_at: Optional[datetime] = None
+        self.total_duration_ms = 0.0
+
+    def register(self, name: str, initializer: Callable[[], Awaitable[Any]], required: bool = True) -> None:
+        """
+        Register a component initializer
+
+        Args:
+            name: Component name reported in /health
+            initializer: Zero-argument coroutine function
+            required: Whether a failure should abort startup
+        """
+        self._initializers[name] = initializer
+        self.components[name] = ComponentStartup(name=name, required=required)
+
+    async def _run_component(self, name: str) -> None:
+        component = self.components[name]
+        started = time.perf_counter()
+        try:
+            await self._initializers[name]()
+            component.status = "ready"
+        except Exception as e:
+            component.status = "failed"
+            component.error = str(e)
+            log = logger.error if component.required else logger.warning
+            log(f"❌ Startup of {name} failed: {str(e)}")
+        finally:
+            component.duration_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"⏱️ {name} started in {component.duration_ms:.0f}ms ({component.status})")
+
+    async def run(self) -> None:
+        """Initialize all registered components concurrently"""
+        self.started_at = datetime.now()
+        started = time.perf_counter()
+
+        await asyncio.gather(*(self._run_component(name) for name in self._initializers))
+
+        self.total_duration_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"🚀 Startup completed in {self.total_duration_ms:.0f}ms")
+
+        failed_required: List[str] = [
+            name for name, component in self.components.items()
+            if component.required and component.status == "failed"
+        ]
+        if failed_required:
+            raise RuntimeError(f"Required components failed to start: {', '.join(failed_required)}")
+
+    def mark_ready(self, name: str) -> None:
+        """Record that a component which failed at startup was initialized lazily later"""
+        component = self.components.get(name)
+        if component is not None and component.status == "failed":
+            component.status = "ready"
+            component.error = None
+            logger.info(f"✅ {name} initialized after startup")
+
+    @property
+    def is_healthy(self) -> bool:
+        """All required components are ready"""
+        return all(
+            component.status == "ready"
+            for component in self.components.values()
+            if component.required
+        )
+
+    def get_report(self) -> Dict[str, Any]:
+        """Get startup status and timings for the health endpoint"""
+        return {
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "total_duration_ms": round(self.total_duration_ms, 1),
+            "components": {
+                name: {**asdict(component), "duration_ms": round(component.duration_ms, 1)}
+                for name, component in self.components.items()
+            }
+        }
+
+
+# Global startup orchestrator
+startup_orchestrator = StartupOrchestrator()
@@ -4,7 +4,8 @@ Defines the common interface for database operations
 """
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Type
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Type
 
 
 class DatabaseAdapter(ABC):
@@ -25,11 +26,46 @@ class DatabaseAdapter(ABC):
         """Create a new document/record"""
         pass
     
+    async def create_many(self, collection: str, documents: List[Dict[str, Any]]) -> List[Any]:
+        """Create several documents/records, returning their IDs in input order"""
+        ids = []
+        for data in documents:
+            created = await self.create(collection, data)
+            ids.append(created.get("_id") if isinstance(created, dict) else created)
+        return ids
+    
+    async def upsert(self, collection: str, filter_dict: Dict[str, Any], data: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Return the document matching ``filter_dict``, creating it from ``data`` if none exists
+        
+        Adapters should override this with a single atomic operation; this default
+        (find, then create) is only safe when callers serialize on the filter.
+        
+        Returns:
+            Tuple of (document, created)
+        """
+        results = await self.find(collection, filter_dict, limit=1)
+        if results:
+            return results[0], False
+        created = await self.create(collection, {**data, **filter_dict})
+        if not isinstance(created, dict):
+            created = {**data, **filter_dict, "_id": created}
+        return created, True
+    
     @abstractmethod
     async def get_by_id(self, collection: str, id: Any) -> Optional[Dict[str, Any]]:
         """Get document/record by ID"""
         pass
     
+    async def get_many_by_ids(self, collection: str, ids: List[Any]) -> List[Dict[str, Any]]:
+        """Get the documents/records with the given IDs (missing IDs are skipped, order is not kept)"""
+        docs = []
+        for id in ids:
+            doc = await self.get_by_id(collection, id)
+            if doc:
+                docs.append(doc)
+        return docs
+    
     @abstractmethod
     async def get_by_field(self, collection: str, field: str, value: Any) -> Optional[Dict[str, Any]]:
         """Get document/record by field value"""
@@ -58,6 +94,14 @@ class DatabaseAdapter(ABC):
         """Update document/record by ID"""
         pass
     
+    async def bulk_update(self, collection: str, updates: List[Tuple[Any, Dict[str, Any]]]) -> int:
+        """Apply several (id, data) updates, returning how many documents/records were modified"""
+        modified = 0
+        for id, data in updates:
+            if await self.update(collection, id, data):
+                modified += 1
+        return modified
+    
     @abstractmethod
     async def delete(self, collection: str, id: Any) -> bool:
         """Delete document/record by ID"""
@@ -87,6 +131,16 @@ class DatabaseAdapter(ABC):
     def rollback_transaction(self):
         """Rollback current transaction"""
         pass
+    
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[None]:
+        """
+        Run the enclosed async operations as one multi-document transaction
+        
+        Adapters without multi-document transactions run the operations as they
+        come; callers must keep them safe to retry.
+        """
+        yield
 
 
 class DatabaseSession:
@@ -175,18 +229,42 @@ class DatabaseSession:
         """Create a new document/record"""
         return await self.adapter.create(collection, data)
     
+    async def create_many(self, collection: str, documents: List[Dict[str, Any]]) -> List[Any]:
+        """Create several documents/records, returning their IDs in input order"""
+        return await self.adapter.create_many(collection, documents)
+    
+    async def upsert(self, collection: str, filter_dict: Dict[str, Any], data: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """Get the document matching the filter or create it, returning (document, created)"""
+        return await self.adapter.upsert(collection, filter_dict, data)
+    
     async def get_by_id(self, collection: str, id: Any) -> Optional[Dict[str, Any]]:
         """Get document/record by ID"""
         return await self.adapter.get_by_id(collection, id)
     
+    async def get_many_by_ids(self, collection: str, ids: List[Any]) -> List[Dict[str, Any]]:
+        """Get the documents/records with the given IDs"""
+        return await self.adapter.get_many_by_ids(collection, ids)
+    
     async def update(self, collection: str, id: Any, data: Dict[str, Any]) -> bool:
         """Update document/record by ID"""
         return await self.adapter.update(collection, id, data)
     
+    async def bulk_update(self, collection: str, updates: List[Tuple[Any, Dict[str, Any]]]) -> int:
+        """Apply several (id, data) updates, returning how many were modified"""
+        return await self.adapter.bulk_update(collection, updates)
+    
+    def transaction(self):
+        """Async context manager running the enclosed operations in one transaction"""
+        return self.adapter.transaction()
+    
     async def delete(self, collection: str, id: Any) -> bool:
         """Delete document/record by ID"""
         return await self.adapter.delete(collection, id)
     
+    async def aggregate(self, collection: str, pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Perform aggregation operations"""
+        return await self.adapter.aggregate(collection, pipeline)
+    
     async def find_one(self, collection: str, filter_dict: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
         """Find one document/record with filters"""
         results = await self.adapter.find(collection, filter_dict, limit=1)
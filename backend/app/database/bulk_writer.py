@@ -0,0 +1,80 @@
+"""
+Bulk Insert Buffer
+Coalesces concurrent single-document inserts into ``create_many`` batches
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from .abstract_layer import DatabaseSession
+
+logger = logging.getLogger(__name__)
+
+
+class BulkInsertBuffer:
+    """
+    Micro-batching writer for one collection
+
+    ``insert`` queues a document and waits for its ID. The buffer is written with
+    one ``create_many`` call as soon as ``max_batch_size`` documents are queued,
+    or ``max_delay_seconds`` after the first queued document, whichever comes
+    first, so callers running concurrently share a round trip.
+    """
+
+    def __init__(
+        self,
+        db: DatabaseSession,
+        collection: str,
+        max_batch_size: int = 50,
+        max_delay_seconds: float = 0.05
+    ):
+        self.db = db
+        self.collection = collection
+        self.max_batch_size = max_batch_size
+        self.max_delay_seconds = max_delay_seconds
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._timer: Optional[asyncio.Task] = None
+        self.batches_written = 0
+        self.documents_written = 0
+
+    async def insert(self, data: Dict[str, Any]) -> Any:
+        """Queue a document for the next batch and return its ID once written"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((data, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+        return await future
+
+    async def flush(self) -> None:
+        """Write every queued document now"""
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+        self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        try:
+            ids = await self.db.create_many(self.collection, [data for data, _ in batch])
+        except Exception as e:
+            logger.error(f"❌ Bulk insert into {self.collection} failed ({len(batch)} documents): {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches_written += 1
+        self.documents_written += len(batch)
+        for (_, future), inserted_id in zip(batch, ids):
+            if not future.done():
+                future.set_result(inserted_id)
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.max_delay_seconds)
+        await self.flush()
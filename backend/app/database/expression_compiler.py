@@ -0,0 +1,281 @@
+"""
+SQLAlchemy Expression Compiler for MongoDB
+Translates the SQLAlchemy column expressions used with ``db.query(Model)`` into
+MongoDB filter documents and sort specifications.
+
+Expressions that cannot be translated raise ExpressionCompileError instead of
+being dropped, so a query is never silently run without its filter.
+"""
+
+import re
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from sqlalchemy import Table
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import (
+    AsBoolean, BinaryExpression, BindParameter, BooleanClauseList, ClauseList, ColumnElement,
+    False_, Grouping, Null, True_, UnaryExpression
+)
+from sqlalchemy.sql.schema import Column
+
+
+class ExpressionCompileError(ValueError):
+    """A SQLAlchemy expression has no MongoDB equivalent"""
+
+
+# Comparison operators with a direct MongoDB counterpart
+COMPARISON_OPERATORS = {
+    operators.lt: "$lt",
+    operators.le: "$lte",
+    operators.gt: "$gt",
+    operators.ge: "$gte"
+}
+
+# Pattern operators: (negated, regex builder, case-insensitive)
+PATTERN_OPERATORS = {
+    operators.like_op: (False, "like", False),
+    operators.not_like_op: (True, "like", False),
+    operators.ilike_op: (False, "like", True),
+    operators.not_ilike_op: (True, "like", True),
+    operators.contains_op: (False, "contains", False),
+    operators.not_contains_op: (True, "contains", False),
+    operators.startswith_op: (False, "startswith", False),
+    operators.not_startswith_op: (True, "startswith", False),
+    operators.endswith_op: (False, "endswith", False),
+    operators.not_endswith_op: (True, "endswith", False)
+}
+
+
+def compile_filter(expression: Any, table: Optional[Table] = None) -> Dict[str, Any]:
+    """
+    Compile a SQLAlchemy filter expression into a MongoDB filter
+
+    Args:
+        expression: Expression passed to ``Query.filter`` (comparisons, ``in_``,
+            ``is_``, ``like``, ``between``, ``and_``/``or_``/``not_``, boolean columns)
+        table: Table of the queried model; columns of other tables are rejected
+
+    Returns:
+        MongoDB filter document
+
+    Raises:
+        ExpressionCompileError: If the expression has no MongoDB equivalent
+    """
+    if hasattr(expression, "__clause_element__"):
+        expression = expression.__clause_element__()
+
+    if isinstance(expression, Grouping):
+        return compile_filter(expression.element, table)
+
+    if isinstance(expression, Column):
+        # A bare boolean column: WHERE review_required
+        return compile_equality(_field_name(expression, table), True)
+
+    if isinstance(expression, AsBoolean):
+        field = _field_name(expression.element, table)
+        return compile_equality(field, expression.operator is operators.is_true)
+
+    if isinstance(expression, BooleanClauseList):
+        clauses = [compile_filter(clause, table) for clause in expression.clauses]
+        if expression.operator is operators.and_:
+            return combine_conditions(clauses)
+        if expression.operator is operators.or_:
+            return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+    if isinstance(expression, UnaryExpression) and expression.operator is operators.inv:
+        return {"$nor": [compile_filter(expression.element, table)]}
+
+    if isinstance(expression, BinaryExpression):
+        return _compile_binary(expression, table)
+
+    raise ExpressionCompileError(f"Unsupported filter expression: {expression}")
+
+
+def compile_equality(field: str, value: Any) -> Dict[str, Any]:
+    """MongoDB filter for ``field == value`` (``id`` matches ObjectIds and legacy integer IDs)"""
+    if field == "id":
+        return _compile_id_condition(operators.eq, [value])
+    return {field: _mongo_value(value)}
+
+
+def combine_conditions(conditions: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """AND several MongoDB filters, merging them into one document when their fields do not overlap"""
+    merged: Dict[str, Any] = {}
+    for condition in conditions:
+        if any(key in merged for key in condition):
+            return {"$and": [item for item in conditions if item]}
+        merged.update(condition)
+    return merged
+
+
+def compile_order_by(*clauses: Any) -> List[Tuple[str, int]]:
+    """
+    Compile ``Query.order_by`` arguments into a MongoDB sort specification
+
+    Args:
+        clauses: Columns, ``column.asc()``/``column.desc()`` or field names
+            (optionally followed by ``asc``/``desc``)
+
+    Returns:
+        List of (field, direction) pairs
+
+    Raises:
+        ExpressionCompileError: If a clause has no MongoDB equivalent
+    """
+    sort = []
+    for clause in clauses:
+        if hasattr(clause, "__clause_element__"):
+            clause = clause.__clause_element__()
+
+        if isinstance(clause, str):
+            parts = clause.split()
+            if not parts or len(parts) > 2 or (len(parts) == 2 and parts[1].lower() not in ("asc", "desc")):
+                raise ExpressionCompileError(f"Unsupported order_by clause: {clause!r}")
+            field, direction = parts[0], -1 if parts[-1].lower() == "desc" else 1
+        elif isinstance(clause, UnaryExpression) and clause.modifier in (operators.asc_op, operators.desc_op):
+            field = _field_name(clause.element)
+            direction = -1 if clause.modifier is operators.desc_op else 1
+        elif isinstance(clause, Column):
+            field, direction = _field_name(clause), 1
+        else:
+            raise ExpressionCompileError(f"Unsupported order_by clause: {clause}")
+
+        sort.append(("_id" if field == "id" else field, direction))
+    return sort
+
+
+def _compile_binary(expression: BinaryExpression, table: Optional[Table]) -> Dict[str, Any]:
+    """Compile a column comparison"""
+    field = _field_name(expression.left, table)
+    operator = expression.operator
+
+    if operator is operators.between_op or operator is operators.not_between_op:
+        low, high = (_bound_value(clause) for clause in expression.right.clauses)
+        condition = {"$gte": _mongo_value(low), "$lte": _mongo_value(high)}
+        if operator is operators.not_between_op:
+            condition = {"$not": condition}
+        return {field: condition}
+
+    value = _bound_value(expression.right)
+
+    if operator in PATTERN_OPERATORS:
+        negated, kind, ignore_case = PATTERN_OPERATORS[operator]
+        pattern = _pattern(kind, value, expression.modifiers.get("escape"), ignore_case)
+        return {field: {"$not": pattern} if negated else pattern}
+
+    if field == "id" and operator in (operators.eq, operators.ne, operators.in_op, operators.not_in_op):
+        return _compile_id_condition(operator, value if isinstance(value, (list, tuple)) else [value])
+
+    if operator is operators.eq or operator is operators.is_:
+        return {field: _mongo_value(value)}
+
+    # SQL comparisons never match NULL, while MongoDB $ne and $nin do
+    if operator is operators.ne or operator is operators.is_not:
+        if value is None:
+            return {field: {"$ne": None}}
+        return {field: {"$nin": [_mongo_value(value), None]}}
+    if operator is operators.in_op:
+        return {field: {"$in": [_mongo_value(item) for item in value]}}
+    if operator is operators.not_in_op:
+        return {field: {"$nin": [_mongo_value(item) for item in value] + [None]}}
+
+    if operator in COMPARISON_OPERATORS:
+        return {field: {COMPARISON_OPERATORS[operator]: _mongo_value(value)}}
+
+    raise ExpressionCompileError(f"Unsupported operator {getattr(operator, '__name__', operator)} in {expression}")
+
+
+def _compile_id_condition(operator: Any, values: List[Any]) -> Dict[str, Any]:
+    """Condition on a model ``id``: ObjectIds (or their hex strings) match ``_id``, other values ``id``"""
+    object_ids = [ObjectId(value) if isinstance(value, str) else value for value in values if _is_object_id(value)]
+    legacy_ids = [value for value in values if not _is_object_id(value)]
+    negated = operator in (operators.ne, operators.not_in_op)
+
+    clauses = []
+    if object_ids:
+        clauses.append({"_id": {"$nin" if negated else "$in": object_ids}})
+    if legacy_ids:
+        clauses.append({"id": {"$nin" if negated else "$in": legacy_ids}})
+    if not clauses:
+        # IN () matches nothing and NOT IN () matches everything
+        return {} if negated else {"_id": {"$in": []}}
+
+    # Single values keep the plain equality form
+    for clause in clauses:
+        field, condition = next(iter(clause.items()))
+        if not negated and len(condition["$in"]) == 1:
+            clause[field] = condition["$in"][0]
+    if len(clauses) == 1:
+        return clauses[0]
+    return {"$and": clauses} if negated else {"$or": clauses}
+
+
+def _is_object_id(value: Any) -> bool:
+    """Whether an ID value refers to a MongoDB ObjectId"""
+    return isinstance(value, ObjectId) or (isinstance(value, str) and ObjectId.is_valid(value))
+
+
+def _field_name(column: Any, table: Optional[Table] = None) -> str:
+    """Document field of a model column"""
+    if hasattr(column, "__clause_element__"):
+        column = column.__clause_element__()
+    if not isinstance(column, Column):
+        raise ExpressionCompileError(f"Expected a model column, got: {column}")
+    if table is not None and column.table is not table:
+        raise ExpressionCompileError(
+            f"Column {column.table.name}.{column.key} does not belong to {table.name}; joins are not supported"
+        )
+    return column.key
+
+
+def _bound_value(element: Any) -> Any:
+    """Python value of the right-hand side of a comparison"""
+    if isinstance(element, BindParameter):
+        return element.effective_value
+    if isinstance(element, True_):
+        return True
+    if isinstance(element, False_):
+        return False
+    if isinstance(element, Null):
+        return None
+    if isinstance(element, Grouping):
+        return _bound_value(element.element)
+    if isinstance(element, ClauseList):
+        return [_bound_value(clause) for clause in element.clauses]
+    if isinstance(element, ColumnElement):
+        raise ExpressionCompileError(f"Only comparisons with literal values are supported, got: {element}")
+    return element
+
+
+def _mongo_value(value: Any) -> Any:
+    """Stored form of a Python value (enums are stored by value)"""
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def _pattern(kind: str, value: str, escape: Optional[str], ignore_case: bool) -> "re.Pattern":
+    """Anchored regular expression equivalent to a LIKE pattern or string match"""
+    if kind == "like":
+        parts = []
+        characters = iter(value)
+        for character in characters:
+            if escape and character == escape:
+                parts.append(re.escape(next(characters, "")))
+            elif character == "%":
+                parts.append(".*")
+            elif character == "_":
+                parts.append(".")
+            else:
+                parts.append(re.escape(character))
+        regex = f"^{''.join(parts)}$"
+    elif kind == "contains":
+        regex = re.escape(value)
+    elif kind == "startswith":
+        regex = f"^{re.escape(value)}"
+    else:
+        regex = f"{re.escape(value)}$"
+
+    return re.compile(regex, re.IGNORECASE | re.DOTALL if ignore_case else re.DOTALL)
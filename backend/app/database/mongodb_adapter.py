@@ -4,24 +4,39 @@ Implements MongoDB operations and schema mapping from SQLAlchemy models
 """
 
 import logging
-from typing import Any, Dict, List, Optional, Type
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Type
 from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorClient
 from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
 
 from app.core.config import settings
 from .abstract_layer import DatabaseAdapter, DatabaseSession, QueryBuilder
+from .expression_compiler import combine_conditions, compile_equality, compile_filter, compile_order_by
 
 logger = logging.getLogger(__name__)
 
+# Client session of the transaction open in the current task, if any
+_transaction_session: ContextVar[Optional[Any]] = ContextVar("mongo_transaction_session", default=None)
+
 
 class MongoQueryBuilder(QueryBuilder):
-    """MongoDB-specific query builder"""
+    """
+    MongoDB-specific query builder
+    
+    SQLAlchemy filter and order_by expressions are compiled to MongoDB by
+    ``expression_compiler``. ``first()``, ``all()`` and ``count()`` are coroutines
+    and must be awaited.
+    """
     
     def __init__(self, adapter: 'MongoDBAdapter', model_class: Type, session: 'MongoSession'):
         super().__init__(adapter, model_class)
         self.session = session
         self.collection_name = self._get_collection_name()
+        self.conditions: List[Dict[str, Any]] = []
         
     def _get_collection_name(self) -> str:
         """Get MongoDB collection name for model"""
@@ -32,10 +47,11 @@ class MongoQueryBuilder(QueryBuilder):
         return self.model_class.__name__.lower()
     
     def filter(self, *args, **kwargs):
-        """Add filters to query"""
-        # For MongoDB, we'll store filters and apply them during execution
-        for key, value in kwargs.items():
-            self.filters[key] = value
+        """Add filters to query (SQLAlchemy expressions are compiled immediately)"""
+        table = getattr(self.model_class, '__table__', None)
+        for expression in args:
+            self.conditions.append(compile_filter(expression, table))
+        self.filters.update(kwargs)
         return self
     
     def filter_by(self, **kwargs):
@@ -55,13 +71,8 @@ class MongoQueryBuilder(QueryBuilder):
     
     def order_by(self, *args):
         """Set query ordering"""
-        # Convert SQLAlchemy ordering to MongoDB sort
-        for arg in args:
-            field_name = str(arg).split('.')[-1]
-            if 'desc' in str(arg).lower():
-                self.sort_fields[field_name] = -1
-            else:
-                self.sort_fields[field_name] = 1
+        for field, direction in compile_order_by(*args):
+            self.sort_fields[field] = direction
         return self
     
     def options(self, *args):
@@ -69,19 +80,13 @@ class MongoQueryBuilder(QueryBuilder):
         return self
     
     def join(self, *args, **kwargs):
-        """Add joins (implemented as aggregation pipeline in MongoDB)"""
-        # MongoDB joins are handled differently, store for later processing
+        """Joins are not translated; filters on joined models raise ExpressionCompileError"""
         return self
     
-    async def _execute_query(self):
-        """Execute the MongoDB query"""
+    def _cursor(self):
+        """Find cursor with the query's filter, sort and pagination"""
         collection = self.session.adapter.db[self.collection_name]
-        
-        # Build MongoDB query
-        mongo_filter = self._convert_filters_to_mongo()
-        
-        # Execute query
-        cursor = collection.find(mongo_filter)
+        cursor = collection.find(self._convert_filters_to_mongo(), **self.session.adapter._session_kwargs())
         
         # Apply sorting
         if self.sort_fields:
@@ -93,27 +98,28 @@ class MongoQueryBuilder(QueryBuilder):
         if self.limit_value:
             cursor = cursor.limit(self.limit_value)
         
+        return cursor
+    
+    async def _execute_query(self):
+        """Execute the MongoDB query"""
+        await self.session.adapter.warn_on_collection_scan(self)
+        
         # Convert results to model instances
         results = []
-        async for doc in cursor:
+        async for doc in self._cursor():
             model_instance = self._doc_to_model(doc)
             results.append(model_instance)
         
         return results
     
     def _convert_filters_to_mongo(self) -> Dict[str, Any]:
-        """Convert SQLAlchemy-style filters to MongoDB query"""
-        mongo_filter = {}
-        for key, value in self.filters.items():
-            if key == 'id':
-                # Convert id to MongoDB _id
-                if isinstance(value, int):
-                    mongo_filter['id'] = value  # Keep as id for compatibility
-                else:
-                    mongo_filter['_id'] = ObjectId(value)
-            else:
-                mongo_filter[key] = value
-        return mongo_filter
+        """Combine filter_by values and compiled filter expressions into one MongoDB query"""
+        equalities = [compile_equality(key, value) for key, value in self.filters.items()]
+        return combine_conditions(equalities + self.conditions)
+    
+    async def explain(self) -> Dict[str, Any]:
+        """Query plan MongoDB would use for this query"""
+        return await self._cursor().explain()
     
     def _doc_to_model(self, doc: Dict[str, Any]):
         """Convert MongoDB document to model instance"""
@@ -131,32 +137,46 @@ class MongoQueryBuilder(QueryBuilder):
         
         return instance
     
-    def first(self):
-        """Get first result (sync wrapper for async)"""
-        import asyncio
-        return asyncio.create_task(self._first_async())
-    
-    async def _first_async(self):
-        """Get first result async"""
+    async def first(self):
+        """Get first result"""
         self.limit_value = 1
         results = await self._execute_query()
         return results[0] if results else None
     
-    def all(self):
-        """Get all results (sync wrapper for async)"""
-        import asyncio
-        return asyncio.create_task(self._execute_query())
-    
-    def count(self):
-        """Count results (sync wrapper for async)"""
-        import asyncio
-        return asyncio.create_task(self._count_async())
+    async def all(self):
+        """Get all results"""
+        return await self._execute_query()
     
-    async def _count_async(self):
-        """Count results async"""
+    async def count(self):
+        """Count results"""
+        await self.session.adapter.warn_on_collection_scan(self)
         collection = self.session.adapter.db[self.collection_name]
-        mongo_filter = self._convert_filters_to_mongo()
-        return await collection.count_documents(mongo_filter)
+        return await collection.count_documents(
+            self._convert_filters_to_mongo(), **self.session.adapter._session_kwargs()
+        )
+
+
+def _plan_stages(plan: Any) -> List[str]:
+    """Stage names of a query plan and all of its input stages"""
+    stages = []
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            stages.append(plan['stage'])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(_plan_stages(value))
+    return stages
+
+
+def _query_shape(value: Any) -> Any:
+    """Hashable shape of a MongoDB filter: its fields and operators without the values"""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _query_shape(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(sorted({_query_shape(item) for item in value}, key=repr))
+    return None
 
 
 class MongoSession(DatabaseSession):
@@ -225,6 +245,8 @@ class MongoDBAdapter(DatabaseAdapter):
     def __init__(self):
         self.client = None
         self.db = None
+        self._supports_transactions: Optional[bool] = None
+        self._explained_shapes = set()
         
     async def initialize(self) -> None:
         """Initialize MongoDB connection"""
@@ -268,6 +290,29 @@ class MongoDBAdapter(DatabaseAdapter):
             await batch_uploads_collection.create_index("session_id", unique=True)
             await batch_uploads_collection.create_index("uploaded_by")
             
+            # Batch files indexes (per-session status aggregation)
+            batch_files_collection = self.db[settings.MONGODB_COLLECTIONS['batch_files']]
+            await batch_files_collection.create_index([("batch_upload_id", 1), ("processing_status", 1)])
+            # Admin review queue (pending files by stored priority, optionally per category or session)
+            await batch_files_collection.create_index(
+                [("review_required", 1), ("review_priority_rank", 1), ("created_at", 1)]
+            )
+            await batch_files_collection.create_index(
+                [("review_required", 1), ("review_category", 1), ("review_priority_rank", 1), ("created_at", 1)]
+            )
+            await batch_files_collection.create_index(
+                [("batch_upload_id", 1), ("review_required", 1), ("review_priority_rank", 1), ("created_at", 1)]
+            )
+            
+            # Patient digests indexes (one materialized digest per patient)
+            digests_collection = self.db[settings.MONGODB_COLLECTIONS['patient_digests']]
+            await digests_collection.create_index("patient_id", unique=True)
+            
+            # Jobs indexes (job lookup and recovery of interrupted jobs)
+            jobs_collection = self.db[settings.MONGODB_COLLECTIONS['jobs']]
+            await jobs_collection.create_index("job_id", unique=True)
+            await jobs_collection.create_index("status")
+            
             # Patient interactions indexes
             interactions_collection = self.db[settings.MONGODB_COLLECTIONS['patient_interactions']]
             await interactions_collection.create_index([("patient_id", 1), ("created_at", -1)])
@@ -288,28 +333,94 @@ class MongoDBAdapter(DatabaseAdapter):
         """Get a new MongoDB session"""
         return MongoSession(self)
     
+    @staticmethod
+    def _id_query(id: Any) -> Dict[str, Any]:
+        """Query matching a document by ObjectId (or its hex string) or by legacy integer ID"""
+        if isinstance(id, ObjectId):
+            return {'_id': id}
+        if isinstance(id, str) and len(id) == 24:
+            return {'_id': ObjectId(id)}
+        return {'id': id}
+    
+    @staticmethod
+    def _session_kwargs() -> Dict[str, Any]:
+        """Arguments binding an operation to the transaction open in the current task"""
+        session = _transaction_session.get()
+        return {'session': session} if session is not None else {}
+    
     async def create(self, collection: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new document and return the complete document"""
         collection_obj = self.db[collection]
-        result = await collection_obj.insert_one(data)
+        result = await collection_obj.insert_one(data, **self._session_kwargs())
         
         # Return the complete document with the new _id
         created_doc = data.copy()
         created_doc["_id"] = result.inserted_id
         return created_doc
     
+    async def create_many(self, collection: str, documents: List[Dict[str, Any]]) -> List[Any]:
+        """Create several documents with a single insert_many round trip"""
+        if not documents:
+            return []
+        collection_obj = self.db[collection]
+        result = await collection_obj.insert_many(documents, **self._session_kwargs())
+        return list(result.inserted_ids)
+    
+    async def upsert(self, collection: str, filter_dict: Dict[str, Any], data: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Atomically get the document matching ``filter_dict`` or insert it from ``data``
+        
+        Uses ``update_one(..., upsert=True)`` with ``$setOnInsert`` so an existing
+        document is never modified. Two racing upserts on a unique field can still
+        make the losing insert raise DuplicateKeyError; the winner's document is
+        returned in that case.
+        """
+        collection_obj = self.db[collection]
+        insert_data = {key: value for key, value in data.items() if key not in filter_dict}
+        
+        try:
+            result = await collection_obj.update_one(
+                filter_dict, {'$setOnInsert': insert_data}, upsert=True, **self._session_kwargs()
+            )
+        except DuplicateKeyError:
+            result = None
+        
+        if result is not None and result.upserted_id is not None:
+            return {**filter_dict, **insert_data, "_id": result.upserted_id}, True
+        
+        existing = await collection_obj.find_one(filter_dict, **self._session_kwargs())
+        if existing is None:
+            raise RuntimeError(f"Upsert on {collection} matched no document for {filter_dict}")
+        return existing, False
+    
     async def get_by_id(self, collection: str, id: Any) -> Optional[Dict[str, Any]]:
         """Get document by ID"""
         collection_obj = self.db[collection]
+        doc = await collection_obj.find_one(self._id_query(id), **self._session_kwargs())
+        return doc
+    
+    async def get_many_by_ids(self, collection: str, ids: List[Any]) -> List[Dict[str, Any]]:
+        """Get the documents with the given IDs in a single query"""
+        object_ids = []
+        legacy_ids = []
+        for id in ids:
+            query = self._id_query(id)
+            if '_id' in query:
+                object_ids.append(query['_id'])
+            else:
+                legacy_ids.append(query['id'])
         
-        # Handle both ObjectId and integer IDs
-        if isinstance(id, str) and len(id) == 24:
-            query = {'_id': ObjectId(id)}
-        else:
-            query = {'id': id}
+        clauses = []
+        if object_ids:
+            clauses.append({'_id': {'$in': object_ids}})
+        if legacy_ids:
+            clauses.append({'id': {'$in': legacy_ids}})
+        if not clauses:
+            return []
         
-        doc = await collection_obj.find_one(query)
-        return doc
+        query = clauses[0] if len(clauses) == 1 else {'$or': clauses}
+        cursor = self.db[collection].find(query, **self._session_kwargs())
+        return await cursor.to_list(length=None)
     
     async def get_by_field(self, collection: str, field: str, value: Any) -> Optional[Dict[str, Any]]:
         """Get document by field value"""
@@ -325,7 +436,7 @@ class MongoDBAdapter(DatabaseAdapter):
         
         # Build query
         query = filters or {}
-        cursor = collection_obj.find(query)
+        cursor = collection_obj.find(query, **self._session_kwargs())
         
         # Apply sorting
         if sort:
@@ -355,41 +466,41 @@ class MongoDBAdapter(DatabaseAdapter):
         """Update document by ID"""
         collection_obj = self.db[collection]
         
-        # Handle both ObjectId and integer IDs
-        if isinstance(id, str) and len(id) == 24:
-            query = {'_id': ObjectId(id)}
-        else:
-            query = {'id': id}
-        
         # Add updated timestamp
         data['updated_at'] = datetime.utcnow()
         
-        result = await collection_obj.update_one(query, {'$set': data})
+        result = await collection_obj.update_one(self._id_query(id), {'$set': data}, **self._session_kwargs())
         return result.modified_count > 0
     
+    async def bulk_update(self, collection: str, updates: List[Tuple[Any, Dict[str, Any]]]) -> int:
+        """Apply several (id, data) updates with a single unordered bulk_write"""
+        if not updates:
+            return 0
+        
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(self._id_query(id), {'$set': {**data, 'updated_at': now}})
+            for id, data in updates
+        ]
+        result = await self.db[collection].bulk_write(operations, ordered=False, **self._session_kwargs())
+        return result.modified_count
+    
     async def delete(self, collection: str, id: Any) -> bool:
         """Delete document by ID"""
         collection_obj = self.db[collection]
-        
-        # Handle both ObjectId and integer IDs
-        if isinstance(id, str) and len(id) == 24:
-            query = {'_id': ObjectId(id)}
-        else:
-            query = {'id': id}
-        
-        result = await collection_obj.delete_one(query)
+        result = await collection_obj.delete_one(self._id_query(id), **self._session_kwargs())
         return result.deleted_count > 0
     
     async def count(self, collection: str, filters: Dict[str, Any] = None) -> int:
         """Count documents"""
         collection_obj = self.db[collection]
         query = filters or {}
-        return await collection_obj.count_documents(query)
+        return await collection_obj.count_documents(query, **self._session_kwargs())
     
     async def aggregate(self, collection: str, pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Perform aggregation operations"""
         collection_obj = self.db[collection]
-        cursor = collection_obj.aggregate(pipeline)
+        cursor = collection_obj.aggregate(pipeline, **self._session_kwargs())
         return await cursor.to_list(length=None)
     
     def begin_transaction(self):
@@ -403,4 +514,63 @@ class MongoDBAdapter(DatabaseAdapter):
     
     def rollback_transaction(self):
         """Rollback current transaction"""
-        pass 
\ No newline at end of file
+        pass
+    
+    async def warn_on_collection_scan(self, query: MongoQueryBuilder) -> None:
+        """
+        Log a warning when a filtered or sorted query would scan its whole collection
+        
+        Each query shape (collection, filter fields and operators, sort) is
+        explained once per process; set MONGODB_EXPLAIN_QUERIES=false to disable.
+        """
+        mongo_filter = query._convert_filters_to_mongo()
+        if not settings.MONGODB_EXPLAIN_QUERIES or not (mongo_filter or query.sort_fields):
+            return
+        
+        shape = (query.collection_name, _query_shape(mongo_filter), tuple(query.sort_fields.items()))
+        if shape in self._explained_shapes:
+            return
+        self._explained_shapes.add(shape)
+        
+        try:
+            plan = await query.explain()
+        except Exception as e:
+            logger.debug(f"Explain failed for query on {query.collection_name}: {str(e)}")
+            return
+        
+        if 'COLLSCAN' in _plan_stages(plan.get('queryPlanner', {}).get('winningPlan')):
+            fields = sorted({key for key in mongo_filter if not key.startswith('$')} | set(query.sort_fields))
+            logger.warning(
+                f"⚠️ Query on {query.collection_name} does a COLLSCAN (no index on {', '.join(fields) or 'its fields'}): "
+                f"filter={mongo_filter} sort={query.sort_fields or None}"
+            )
+    
+    async def _transactions_supported(self) -> bool:
+        """Multi-document transactions need a replica set or a sharded cluster"""
+        if self._supports_transactions is None:
+            hello = await self.client.admin.command('hello')
+            self._supports_transactions = bool(hello.get('setName')) or hello.get('msg') == 'isdbgrid'
+            if not self._supports_transactions:
+                logger.warning("⚠️ MongoDB is a standalone server; transactions run without isolation")
+        return self._supports_transactions
+    
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[None]:
+        """
+        Run the enclosed adapter operations in one multi-document transaction
+        
+        The transaction commits when the block exits and aborts when it raises.
+        Nested blocks join the outer transaction. On a standalone server the
+        operations run without a transaction.
+        """
+        if _transaction_session.get() is not None or not await self._transactions_supported():
+            yield
+            return
+        
+        async with await self.client.start_session() as session:
+            async with session.start_transaction():
+                token = _transaction_session.set(session)
+                try:
+                    yield
+                finally:
+                    _transaction_session.reset(token) 
\ No newline at end of file
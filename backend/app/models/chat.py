@@ -49,6 +49,10 @@ class ChatRequest(BaseModel):
         default=None,
         description="Strategy for retrieving patient context. If not specified, uses intelligent default based on query type."
     )
+    conversation_id: Optional[str] = Field(
+        default=None,
+        description="Conversation identifier. Reusing it on follow-up turns avoids resending documents the model has already seen."
+    )
     
     class Config:
         use_enum_values = True
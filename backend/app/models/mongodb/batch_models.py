@@ -4,7 +4,7 @@ Pydantic models for batch upload and processing documents
 """
 
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 from datetime import datetime
 from enum import Enum
 
@@ -94,7 +94,7 @@ class BatchFile(BaseModel):
     patient_matching_status: PatientMatchingStatusEnum = PatientMatchingStatusEnum.PENDING
     matched_patient_id: Optional[int] = None  # If matched to existing patient
     matching_confidence: Optional[float] = None  # Confidence score 0-1
-    matching_details: Optional[str] = None  # JSON with detailed matching results
+    matching_details: Optional[Union[Dict[str, Any], str]] = None  # Match candidates (JSON string on legacy rows)
     
     # Processing results
     processing_status: VectorizationStatusEnum = VectorizationStatusEnum.PENDING
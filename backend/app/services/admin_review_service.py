@@ -4,15 +4,20 @@ Admin Review Service for TecSalud Batch Processing
 Handles administrative decisions on files requiring manual review
 """
 
+import asyncio
+import json
 import logging
 from datetime import datetime
-from typing import List, Dict, Optional, Any
+from typing import Iterable, List, Dict, Optional, Any, Tuple, Union
 from dataclasses import dataclass
 from enum import Enum
 
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, func, or_
 
+from app.core.config import settings
+from app.database.abstract_layer import DatabaseSession
+from app.database.sqlite_adapter import SQLiteSession
 from app.db.models import (
     BatchFile, BatchUpload, Patient, MedicalDocument,
     PatientMatchingStatusEnum, VectorizationStatusEnum,
@@ -20,6 +25,12 @@ from app.db.models import (
 )
 from app.services.patient_matching_service import PatientMatchingService
 from app.services.batch_processing_service import BatchProcessingService
+from app.services.patient_digest_service import patient_digest_service
+from app.services.review_triage import (
+    REVIEW_CATEGORIES, REVIEW_PRIORITIES, REVIEW_PRIORITY_RANK, TRIAGE_INPUT_FIELDS,
+    review_category, review_priority, review_triage_fields
+)
+from app.utils.ttl_cache import TTLCache
 
 
 logger = logging.getLogger(__name__)
@@ -35,6 +46,14 @@ class AdminDecisionEnum(str, Enum):
     DELETE_FILE = "delete_file"              # Remove file from batch
 
 
+# Decisions that can be applied in bulk: each assigns the file's document to a patient
+BULK_DECISION_TYPES = (
+    AdminDecisionEnum.APPROVE_MATCH,
+    AdminDecisionEnum.REJECT_MATCH,
+    AdminDecisionEnum.MANUAL_MATCH
+)
+
+
 @dataclass
 class AdminDecision:
     """Represents an admin decision on a review case"""
@@ -48,7 +67,7 @@ class AdminDecision:
 @dataclass
 class ReviewCase:
     """Complete review case information for admin interface"""
-    batch_file_id: int
+    batch_file_id: Union[int, str]
     filename: str
     session_id: str
     
@@ -79,6 +98,15 @@ class AdminReviewService:
     def __init__(self):
         # Don't initialize patient_matcher here - create it when needed with db session
         self.batch_service = BatchProcessingService()
+        self._statistics_cache = TTLCache(
+            max_entries=128, ttl_seconds=settings.REVIEW_STATISTICS_CACHE_TTL_SECONDS
+        )
+        self._triage_backfilled = False
+    
+    @staticmethod
+    def _is_sql_session(db: Any) -> bool:
+        """Whether ``db`` is a SQLAlchemy session (SQLite) rather than a document database session"""
+        return isinstance(db, (Session, SQLiteSession))
     
     async def get_pending_reviews(
         self,
@@ -86,9 +114,106 @@ class AdminReviewService:
         priority: Optional[str] = None,
         category: Optional[str] = None,
         limit: int = 50,
-        db: Session = None
+        db: Union[Session, DatabaseSession] = None,
+        offset: int = 0
+    ) -> List[ReviewCase]:
+        """
+        Get files requiring admin review with filtering options, highest priority first
+        
+        On MongoDB filtering, sorting and pagination run server-side on the stored
+        review priority and category (indexed), with one ``$lookup`` for the sessions.
+        The first call backfills files flagged before these fields were stored, which
+        would otherwise sort ahead of every other case and miss the filters.
+        
+        Args:
+            session_id: Only files of this batch session
+            priority: Only this priority (high, medium, low)
+            category: Only this category (patient_match, parsing_error, processing_error, other)
+            limit: Maximum number of cases
+            db: Database session
+            offset: Number of cases to skip (pagination)
+            
+        Returns:
+            List of review cases
+        """
+        if self._is_sql_session(db):
+            return await self._get_pending_reviews_sql(session_id, priority, category, limit, db)
+        
+        if not self._triage_backfilled:
+            await self.backfill_review_triage(db)
+            self._triage_backfilled = False
+        
+        match: Dict[str, Any] = {"review_required": True}
+        if session_id:
+            batch_upload = await db.find_one("batch_uploads", {"session_id": session_id})
+            if not batch_upload:
+                return []
+            match["batch_upload_id"] = str(batch_upload.get("_id"))
+        if priority:
+            if priority not in REVIEW_PRIORITY_RANK:
+                return []
+            match["review_priority_rank"] = REVIEW_PRIORITY_RANK[priority]
+        if category:
+            match["review_category"] = category
+        
+        pipeline = [
+            {"$match": match},
+            {"$sort": {"review_priority_rank": 1, "created_at": 1, "_id": 1}},
+            {"$skip": offset},
+            {"$limit": limit},
+            {"$lookup": {
+                "from": settings.MONGODB_COLLECTIONS["batch_uploads"],
+                "let": {"batch_upload_id": "$batch_upload_id"},
+                "pipeline": [
+                    # batch_upload_id is the session's ObjectId as a string
+                    {"$match": {"$expr": {"$eq": [
+                        "$_id",
+                        {"$convert": {"input": "$$batch_upload_id", "to": "objectId", "onError": "$$batch_upload_id"}}
+                    ]}}},
+                    {"$project": {"session_id": 1}}
+                ],
+                "as": "batch_upload"
+            }}
+        ]
+        batch_files = await db.aggregate("batch_files", pipeline)
+        
+        review_cases = []
+        for batch_file in batch_files:
+            batch_upload = (batch_file.get("batch_upload") or [{}])[0]
+            # Files flagged before triage fields were stored are classified on the fly
+            triage = (
+                batch_file if "review_priority" in batch_file else review_triage_fields(batch_file)
+            )
+            review_cases.append(ReviewCase(
+                batch_file_id=str(batch_file.get("_id")),
+                filename=batch_file.get("original_filename"),
+                session_id=batch_upload.get("session_id"),
+                parsed_patient_id=batch_file.get("parsed_patient_id"),
+                parsed_patient_name=batch_file.get("parsed_patient_name"),
+                parsed_document_type=batch_file.get("parsed_document_type"),
+                patient_matching_status=batch_file.get("patient_matching_status"),
+                processing_status=batch_file.get("processing_status"),
+                matching_confidence=batch_file.get("matching_confidence"),
+                error_message=batch_file.get("error_message"),
+                matching_details=batch_file.get("matching_details"),
+                suggested_matches=self._suggested_matches(batch_file.get("matching_details")),
+                review_priority=triage["review_priority"],
+                review_category=triage["review_category"],
+                created_at=batch_file.get("created_at")
+            ))
+        
+        logger.info(f"📋 Retrieved {len(review_cases)} review cases")
+        return review_cases
+    
+    async def _get_pending_reviews_sql(
+        self,
+        session_id: Optional[str],
+        priority: Optional[str],
+        category: Optional[str],
+        limit: int,
+        db: Session
     ) -> List[ReviewCase]:
-        """Get all files requiring admin review with filtering options"""
+        """Pending review cases from SQLite (priority and category are computed per file)"""
         
         # Build query for files requiring review
         query = db.query(BatchFile).filter(
@@ -104,29 +229,29 @@ class AdminReviewService:
         # Get batch files requiring review
         batch_files = query.limit(limit).all()
         
+        # Sessions of all files in one query
+        upload_ids = {batch_file.batch_upload_id for batch_file in batch_files}
+        session_ids = {
+            batch_upload.id: batch_upload.session_id
+            for batch_upload in db.query(BatchUpload).filter(BatchUpload.id.in_(upload_ids)).all()
+        } if upload_ids else {}
+        
         review_cases = []
         for batch_file in batch_files:
-            # Get batch upload session info
-            batch_upload = db.query(BatchUpload).filter_by(id=batch_file.batch_upload_id).first()
-            
-            # Parse matching details
-            suggested_matches = []
-            if batch_file.matching_details:
-                import json
-                try:
-                    matching_data = json.loads(batch_file.matching_details)
-                    suggested_matches = matching_data.get('suggestions', [])
-                except:
-                    suggested_matches = []
-            
             # Determine review category and priority
-            category = self._determine_review_category(batch_file)
-            priority = self._determine_review_priority(batch_file)
+            file_category = self._determine_review_category(batch_file)
+            file_priority = self._determine_review_priority(batch_file)
             
-            review_case = ReviewCase(
+            # Apply filters
+            if priority and file_priority != priority:
+                continue
+            if category and file_category != category:
+                continue
+            
+            review_cases.append(ReviewCase(
                 batch_file_id=batch_file.id,
                 filename=batch_file.original_filename,
-                session_id=batch_upload.session_id,
+                session_id=session_ids.get(batch_file.batch_upload_id),
                 parsed_patient_id=batch_file.parsed_patient_id,
                 parsed_patient_name=batch_file.parsed_patient_name,
                 parsed_document_type=batch_file.parsed_document_type,
@@ -135,27 +260,47 @@ class AdminReviewService:
                 matching_confidence=batch_file.matching_confidence,
                 error_message=batch_file.error_message,
                 matching_details=batch_file.matching_details,
-                suggested_matches=suggested_matches,
-                review_priority=priority,
-                review_category=category,
+                suggested_matches=self._suggested_matches(batch_file.matching_details),
+                review_priority=file_priority,
+                review_category=file_category,
                 created_at=batch_file.created_at
-            )
-            
-            # Apply filters
-            if priority and review_case.review_priority != priority:
-                continue
-            if category and review_case.review_category != category:
-                continue
-                
-            review_cases.append(review_case)
+            ))
         
         # Sort by priority and date
-        priority_order = {'high': 0, 'medium': 1, 'low': 2}
-        review_cases.sort(key=lambda x: (priority_order.get(x.review_priority, 3), x.created_at))
+        review_cases.sort(key=lambda x: (REVIEW_PRIORITY_RANK.get(x.review_priority, 3), x.created_at))
         
         logger.info(f"📋 Retrieved {len(review_cases)} review cases")
         return review_cases
     
+    @staticmethod
+    def _suggested_matches(matching_details: Any) -> List[Dict[str, Any]]:
+        """Match suggestions stored in a file's matching details (structured or JSON)"""
+        if isinstance(matching_details, str):
+            try:
+                matching_details = json.loads(matching_details)
+            except ValueError:
+                return []
+        if isinstance(matching_details, dict):
+            return matching_details.get('suggestions') or []
+        return []
+    
+    async def backfill_review_triage(self, db: DatabaseSession) -> int:
+        """
+        Store priority and category on pending review files flagged before they were stored
+        
+        Returns:
+            Number of files updated
+        """
+        batch_files = await db.find_many(
+            "batch_files", {"review_required": True, "review_priority_rank": {"$exists": False}}
+        )
+        for batch_file in batch_files:
+            await db.update_by_id("batch_files", str(batch_file.get("_id")), review_triage_fields(batch_file))
+        
+        self._statistics_cache.clear()
+        logger.info(f"📋 Backfilled review triage for {len(batch_files)} files")
+        return len(batch_files)
+    
     async def process_admin_decision(
         self,
         batch_file_id: int,
@@ -164,6 +309,9 @@ class AdminReviewService:
     ) -> Dict[str, Any]:
         """Process an admin decision on a review case"""
         
+        if not self._is_sql_session(db):
+            return await self._process_admin_decision_documents(batch_file_id, decision, db)
+        
         # Get batch file
         batch_file = db.query(BatchFile).filter_by(id=batch_file_id).first()
         if not batch_file:
@@ -211,6 +359,7 @@ class AdminReviewService:
             # Mark as no longer requiring review
             batch_file.review_required = False
             db.commit()
+            self._statistics_cache.clear()
             
             logger.info(f"✅ Admin decision processed successfully: {decision.decision}")
             return result
@@ -221,6 +370,397 @@ class AdminReviewService:
             result["message"] = f"Error processing decision: {str(e)}"
             return result
     
+    async def _process_admin_decision_documents(
+        self,
+        batch_file_id: Any,
+        decision: AdminDecision,
+        db: DatabaseSession
+    ) -> Dict[str, Any]:
+        """
+        Process an admin decision on the document database
+        
+        Approve, reject and manual-match decisions (and retries of matched files)
+        go through ``apply_bulk_decisions``; skip and delete only update the file.
+        """
+        batch_file = await db.get_by_id("batch_files", str(batch_file_id))
+        if not batch_file:
+            raise ValueError(f"Batch file not found: {batch_file_id}")
+        
+        logger.info(f"🔍 Processing admin decision: {decision.decision} for {batch_file.get('original_filename')}")
+        
+        if decision.decision in BULK_DECISION_TYPES:
+            return (await self.apply_bulk_decisions([(batch_file_id, decision)], db))[0]
+        
+        if decision.decision == AdminDecisionEnum.RETRY_PROCESSING and batch_file.get("matched_patient_id"):
+            retry = AdminDecision(
+                decision=AdminDecisionEnum.MANUAL_MATCH,
+                selected_patient_id=batch_file["matched_patient_id"],
+                admin_notes=decision.admin_notes,
+                reviewed_by=decision.reviewed_by
+            )
+            result = (await self.apply_bulk_decisions([(batch_file_id, retry)], db))[0]
+            result["decision"] = decision.decision
+            if result["success"]:
+                result["message"] = "Processing retried successfully"
+            return result
+        
+        result = self._decision_result(batch_file_id, decision)
+        result["filename"] = batch_file.get("original_filename")
+        now = datetime.now()
+        fields: Dict[str, Any] = {
+            "review_required": False,
+            "reviewed_by": decision.reviewed_by,
+            "reviewed_at": now,
+            "review_notes": decision.admin_notes,
+            "updated_at": now
+        }
+        
+        if decision.decision == AdminDecisionEnum.SKIP_FILE:
+            fields.update({
+                "patient_matching_status": PatientMatchingStatusEnum.REJECTED.value,
+                "processing_status": VectorizationStatusEnum.FAILED.value,
+                "error_message": f"Skipped by admin: {decision.admin_notes or 'No reason provided'}"
+            })
+            message = "File skipped as requested"
+        elif decision.decision == AdminDecisionEnum.DELETE_FILE:
+            import os
+            file_path = batch_file.get("file_path")
+            if file_path and os.path.exists(file_path):
+                os.remove(file_path)
+            fields.update({
+                "patient_matching_status": PatientMatchingStatusEnum.REJECTED.value,
+                "processing_status": VectorizationStatusEnum.FAILED.value,
+                "error_message": f"Deleted by admin: {decision.admin_notes or 'File removed'}"
+            })
+            message = "File deleted successfully"
+        elif decision.decision == AdminDecisionEnum.RETRY_PROCESSING:
+            fields.update({
+                "processing_status": VectorizationStatusEnum.PENDING.value,
+                "error_message": None
+            })
+            message = "File marked for retry - patient matching still required"
+        else:
+            raise ValueError(f"Unknown admin decision: {decision.decision}")
+        
+        await db.update_by_id("batch_files", str(batch_file_id), fields)
+        self._statistics_cache.clear()
+        result.update({"success": True, "message": message})
+        logger.info(f"✅ Admin decision processed successfully: {decision.decision}")
+        return result
+    
+    async def apply_bulk_decisions(
+        self,
+        decisions: List[Tuple[Any, AdminDecision]],
+        db: DatabaseSession
+    ) -> List[Dict[str, Any]]:
+        """
+        Apply many approve, reject and manual-match decisions in one call
+        
+        Files, their sessions, documents and target patients are loaded with one
+        query per collection. Decisions are then grouped by the patient they assign,
+        and each group is written in one transaction (new documents with a single
+        insert, existing documents and batch files with bulk updates), so a failing
+        group does not affect the others.
+        
+        Args:
+            decisions: (batch_file_id, decision) pairs
+            db: Database session
+            
+        Returns:
+            One result per decision, in request order
+        """
+        if self._is_sql_session(db):
+            return await self._apply_decisions_one_by_one(decisions, db)
+        
+        results = [self._decision_result(batch_file_id, decision) for batch_file_id, decision in decisions]
+        
+        batch_files = await self._load_by_id(db, "batch_files", [batch_file_id for batch_file_id, _ in decisions])
+        patients = await self._load_by_id(db, "patients", [
+            patient_id
+            for batch_file_id, decision in decisions
+            for patient_id in [self._requested_patient_id(batch_files.get(str(batch_file_id)), decision)]
+            if patient_id
+        ])
+        
+        # Resolve the target patient of every valid decision
+        groups: Dict[str, List[Tuple[Dict[str, Any], Dict[str, Any], AdminDecision]]] = {}
+        group_patients: Dict[str, Any] = {}
+        created_patients: Dict[str, Any] = {}
+        seen = set()
+        for result, (batch_file_id, decision) in zip(results, decisions):
+            batch_file = batch_files.get(str(batch_file_id))
+            try:
+                if decision.decision not in BULK_DECISION_TYPES:
+                    raise ValueError(f"Decision {decision.decision} cannot be applied in bulk")
+                if str(batch_file_id) in seen:
+                    raise ValueError(f"Duplicate decision for batch file {batch_file_id}")
+                seen.add(str(batch_file_id))
+                if not batch_file:
+                    raise ValueError(f"Batch file not found: {batch_file_id}")
+                if not batch_file.get("review_required"):
+                    raise ValueError("Batch file does not require review")
+                
+                result["filename"] = batch_file.get("original_filename")
+                patient_id = await self._decision_patient_id(batch_file, decision, patients, created_patients, db)
+            except Exception as e:
+                result["message"] = f"Error processing decision: {str(e)}"
+                continue
+            
+            groups.setdefault(str(patient_id), []).append((result, batch_file, decision))
+            group_patients[str(patient_id)] = patient_id
+        
+        grouped_files = [batch_file for items in groups.values() for _, batch_file, _ in items]
+        uploads = await self._load_by_id(db, "batch_uploads", [f.get("batch_upload_id") for f in grouped_files])
+        documents = await self._load_by_id(db, "medical_documents", [
+            f.get("medical_document_id") for f in grouped_files if f.get("medical_document_id")
+        ])
+        
+        for key, items in groups.items():
+            try:
+                await self._apply_decision_group(group_patients[key], items, uploads, documents, db)
+            except Exception as e:
+                logger.error(f"❌ Failed to apply {len(items)} decisions for patient {key}: {str(e)}")
+                for result, _, _ in items:
+                    result.update({
+                        "success": False,
+                        "message": f"Error processing decision: {str(e)}",
+                        "patient_id": None,
+                        "document_id": None
+                    })
+        
+        self._statistics_cache.clear()
+        applied = sum(1 for result in results if result["success"])
+        logger.info(
+            f"📋 Bulk decisions applied: {applied} succeeded, {len(results) - applied} failed "
+            f"across {len(groups)} patients"
+        )
+        return results
+    
+    async def _apply_decisions_one_by_one(
+        self,
+        decisions: List[Tuple[Any, AdminDecision]],
+        db: Session
+    ) -> List[Dict[str, Any]]:
+        """Bulk decisions on a SQLAlchemy session, applied with process_admin_decision"""
+        results = []
+        for batch_file_id, decision in decisions:
+            try:
+                results.append(await self.process_admin_decision(batch_file_id, decision, db))
+            except ValueError as e:
+                result = self._decision_result(batch_file_id, decision)
+                result["message"] = f"Error processing decision: {str(e)}"
+                results.append(result)
+        return results
+    
+    @staticmethod
+    def _decision_result(batch_file_id: Any, decision: AdminDecision) -> Dict[str, Any]:
+        """Initial (failed) result of a decision"""
+        return {
+            "batch_file_id": batch_file_id,
+            "filename": None,
+            "decision": decision.decision,
+            "success": False,
+            "message": "",
+            "patient_id": None,
+            "document_id": None
+        }
+    
+    @staticmethod
+    async def _load_by_id(db: DatabaseSession, collection: str, ids: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+        """Documents with the given IDs in one query, keyed by their string ID"""
+        unique_ids = list({str(id): id for id in ids if id is not None}.values())
+        if not unique_ids:
+            return {}
+        docs = await db.get_many_by_ids(collection, unique_ids)
+        return {
+            str(doc[key]): doc
+            for doc in docs
+            for key in ("_id", "id")
+            if doc.get(key) is not None
+        }
+    
+    @staticmethod
+    def _requested_patient_id(batch_file: Optional[Dict[str, Any]], decision: AdminDecision) -> Optional[Any]:
+        """Existing patient an approve or manual-match decision assigns the file to"""
+        if decision.decision == AdminDecisionEnum.MANUAL_MATCH:
+            return decision.selected_patient_id
+        if decision.decision != AdminDecisionEnum.APPROVE_MATCH or not batch_file:
+            return None
+        
+        # Files waiting on a match review were provisionally given a new patient;
+        # approving assigns them to the suggested one instead
+        if batch_file.get("patient_matching_status") == PatientMatchingStatusEnum.REVIEW_REQUIRED.value:
+            details = batch_file.get("matching_details")
+            if isinstance(details, str):
+                try:
+                    details = json.loads(details)
+                except ValueError:
+                    details = None
+            if isinstance(details, dict) and details.get("best_patient_id"):
+                return details["best_patient_id"]
+        return batch_file.get("matched_patient_id")
+    
+    async def _decision_patient_id(
+        self,
+        batch_file: Dict[str, Any],
+        decision: AdminDecision,
+        patients: Dict[str, Dict[str, Any]],
+        created_patients: Dict[str, Any],
+        db: DatabaseSession
+    ) -> Any:
+        """Patient a decision assigns the file to (new patients are created once per expediente)"""
+        if decision.decision == AdminDecisionEnum.REJECT_MATCH:
+            patient_data = decision.new_patient_data
+            if patient_data:
+                medical_record_number = patient_data.get("medical_record_number")
+            else:
+                medical_record_number = batch_file.get("parsed_patient_id")
+                if not batch_file.get("parsed_patient_name") or not medical_record_number:
+                    raise ValueError("Insufficient patient data in filename")
+            
+            if medical_record_number not in created_patients:
+                if patient_data:
+                    patient_id = await self._upsert_patient_from_admin_data(patient_data, db)
+                else:
+                    patient_id = await self.batch_service._create_new_patient(batch_file, db)
+                if not patient_id:
+                    raise ValueError(f"Failed to create patient {medical_record_number}")
+                created_patients[medical_record_number] = patient_id
+            return created_patients[medical_record_number]
+        
+        requested_id = self._requested_patient_id(batch_file, decision)
+        if not requested_id:
+            if decision.decision == AdminDecisionEnum.MANUAL_MATCH:
+                raise ValueError("No patient selected for manual match")
+            raise ValueError("No patient match to approve")
+        
+        patient = patients.get(str(requested_id))
+        if not patient:
+            raise ValueError(f"Selected patient not found: {requested_id}")
+        return patient.get("id") or patient.get("_id")
+    
+    async def _upsert_patient_from_admin_data(self, patient_data: Dict[str, Any], db: DatabaseSession) -> Any:
+        """Create a patient from admin-provided data, reusing the patient of its expediente"""
+        if not patient_data.get("medical_record_number") or not patient_data.get("name"):
+            raise ValueError("New patient data requires medical_record_number and name")
+        
+        patient, created = await db.upsert(
+            "patients",
+            {"medical_record_number": patient_data["medical_record_number"]},
+            {
+                "name": patient_data["name"],
+                "birth_date": patient_data.get("birth_date", "1900-01-01"),
+                "gender": patient_data.get("gender", GenderEnum.UNKNOWN.value),
+                "phone": patient_data.get("phone"),
+                "email": patient_data.get("email"),
+                "address": patient_data.get("address"),
+                "emergency_contact": patient_data.get("emergency_contact"),
+                "doctor_id": (
+                    patient_data.get("doctor_id")
+                    or await self.batch_service.reference_data.get_default_doctor_id(db)
+                ),
+                "status": "Activo",
+                "created_at": datetime.now(),
+                "updated_at": datetime.now()
+            }
+        )
+        patient_id = patient.get("id") or patient.get("_id")
+        if created:
+            logger.info(f"👤 Created patient from admin data: {patient_data['name']} (ID: {patient_id})")
+        return patient_id
+    
+    async def _apply_decision_group(
+        self,
+        patient_id: Any,
+        items: List[Tuple[Dict[str, Any], Dict[str, Any], AdminDecision]],
+        uploads: Dict[str, Dict[str, Any]],
+        documents: Dict[str, Dict[str, Any]],
+        db: DatabaseSession
+    ) -> None:
+        """Assign the documents of a group of reviewed files to one patient in a single transaction"""
+        now = datetime.now()
+        
+        # Files whose document was never created get one; the others are reassigned
+        new_items = [item for item in items if str(item[1].get("medical_document_id")) not in documents]
+        contents = await asyncio.gather(
+            *(self._read_file_content(batch_file.get("file_path")) for _, batch_file, _ in new_items)
+        )
+        
+        new_documents = []
+        for (_, batch_file, decision), content in zip(new_items, contents):
+            processing_type = (uploads.get(str(batch_file.get("batch_upload_id"))) or {}).get(
+                "processing_type", ProcessingTypeEnum.COMPLETE.value
+            )
+            document = self.batch_service.build_medical_document(
+                batch_file, patient_id, content, processing_type,
+                created_by=f"admin_review_{decision.reviewed_by}"
+            )
+            if processing_type in [ProcessingTypeEnum.VECTORIZED.value, ProcessingTypeEnum.BOTH.value]:
+                # Vectorization is a no-op: documents are used complete
+                document["vectorization_status"] = VectorizationStatusEnum.COMPLETED.value
+            new_documents.append(document)
+        
+        reassigned = {}
+        for result, batch_file, _ in items:
+            document = documents.get(str(batch_file.get("medical_document_id")))
+            if document is not None:
+                result["document_id"] = str(batch_file.get("medical_document_id"))
+                if str(document.get("patient_id")) != str(patient_id):
+                    reassigned[result["document_id"]] = document.get("patient_id")
+        
+        async with db.transaction():
+            document_ids = await db.create_many("medical_documents", new_documents) if new_documents else []
+            for (result, _, _), document_id in zip(new_items, document_ids):
+                result["document_id"] = str(document_id)
+            
+            await db.bulk_update("medical_documents", [
+                (document_id, {"patient_id": patient_id, "updated_at": now})
+                for document_id in reassigned
+            ])
+            await db.bulk_update("batch_files", [
+                (str(batch_file.get("_id")), {
+                    "matched_patient_id": patient_id,
+                    "patient_matching_status": (
+                        PatientMatchingStatusEnum.NEW_PATIENT.value
+                        if decision.decision == AdminDecisionEnum.REJECT_MATCH
+                        else PatientMatchingStatusEnum.MATCHED.value
+                    ),
+                    "medical_document_id": result["document_id"],
+                    "processing_status": VectorizationStatusEnum.COMPLETED.value,
+                    "processed_at": now,
+                    "error_message": None,
+                    "review_required": False,
+                    "reviewed_by": decision.reviewed_by,
+                    "reviewed_at": now,
+                    "review_notes": decision.admin_notes,
+                    "updated_at": now
+                })
+                for result, batch_file, decision in items
+            ])
+        
+        messages = {
+            AdminDecisionEnum.APPROVE_MATCH: "Patient match approved",
+            AdminDecisionEnum.REJECT_MATCH: "Assigned to new patient",
+            AdminDecisionEnum.MANUAL_MATCH: "Manually matched to patient"
+        }
+        for result, _, decision in items:
+            result.update({
+                "success": True,
+                "message": messages[decision.decision],
+                "patient_id": str(patient_id)
+            })
+        
+        # Summaries of new documents update the patient's digest when they finish;
+        # digests of patients that gained or lost a reassigned document are rebuilt
+        for document_id in document_ids:
+            self.batch_service.summary_service.schedule(document_id)
+        if reassigned:
+            for affected_id in {str(patient_id), *(str(previous) for previous in reassigned.values() if previous)}:
+                try:
+                    await patient_digest_service.rebuild(affected_id, db)
+                except Exception as e:
+                    logger.warning(f"⚠️ Digest rebuild failed for patient {affected_id}: {str(e)}")
+    
     async def _handle_approve_match(
         self,
         batch_file: BatchFile,
@@ -510,9 +1050,7 @@ class AdminReviewService:
     
     async def _read_file_content(self, file_path: str) -> str:
         """Read file content"""
-        # For now, return placeholder content
-        # In production, this would use PDF extraction
-        return f"Document content from {file_path}"
+        return await self.batch_service._read_file_content(file_path)
     
     async def _vectorize_document(self, document_id: int, content: str, db: Session) -> None:
         """Vectorize document content"""
@@ -529,76 +1067,179 @@ class AdminReviewService:
     
     def _determine_review_category(self, batch_file: BatchFile) -> str:
         """Determine the category of review case"""
-        
-        if not batch_file.parsed_patient_id:
-            return "parsing_error"
-        elif batch_file.patient_matching_status == PatientMatchingStatusEnum.REVIEW_REQUIRED:
-            return "patient_match"
-        elif batch_file.processing_status == VectorizationStatusEnum.FAILED:
-            return "processing_error"
-        else:
-            return "other"
+        return review_category(self._triage_inputs(batch_file))
     
     def _determine_review_priority(self, batch_file: BatchFile) -> str:
         """Determine the priority of review case"""
-        
-        # High priority: parsing errors or complete failures
-        if not batch_file.parsed_patient_id or batch_file.processing_status == VectorizationStatusEnum.FAILED:
-            return "high"
-        
-        # Medium priority: low confidence matches
-        if batch_file.matching_confidence and batch_file.matching_confidence < 0.7:
-            return "medium"
-        
-        # Low priority: medium confidence matches
-        return "low"
+        return review_priority(self._triage_inputs(batch_file))
+    
+    @staticmethod
+    def _triage_inputs(batch_file: BatchFile) -> Dict[str, Any]:
+        """Fields of a SQLAlchemy batch file used to triage it"""
+        return {field: getattr(batch_file, field, None) for field in TRIAGE_INPUT_FIELDS}
     
     async def get_review_statistics(
         self,
         session_id: Optional[str] = None,
-        db: Session = None
+        db: Union[Session, DatabaseSession] = None
     ) -> Dict[str, Any]:
-        """Get statistics about review cases"""
+        """
+        Get statistics about review cases
         
-        # Build base query
-        query = db.query(BatchFile)
+        Computed with one query (a ``$facet`` aggregation on MongoDB, a grouped
+        query on SQLite) and cached for ``REVIEW_STATISTICS_CACHE_TTL_SECONDS`` so
+        dashboards can poll without scanning batch files.
         
-        if session_id:
-            batch_upload = db.query(BatchUpload).filter_by(session_id=session_id).first()
-            if batch_upload:
-                query = query.filter(BatchFile.batch_upload_id == batch_upload.id)
+        Args:
+            session_id: Only files of this batch session
+            db: Database session
+            
+        Returns:
+            File and review counts with category and priority breakdowns
+        """
+        cache_key = ("sql" if self._is_sql_session(db) else "document", session_id)
+        stats = self._statistics_cache.get(cache_key)
+        if stats is not None:
+            return stats
+        
+        if self._is_sql_session(db):
+            stats = self._review_statistics_sql(session_id, db)
+        else:
+            stats = await self._review_statistics_aggregate(session_id, db)
         
-        # Get counts
-        total_files = query.count()
-        review_required = query.filter(BatchFile.review_required == True).count()
-        completed_reviews = query.filter(
-            and_(
-                BatchFile.review_required == False,
-                BatchFile.reviewed_by.isnot(None)
+        self._statistics_cache.set(cache_key, stats)
+        return stats
+    
+    async def _review_statistics_aggregate(self, session_id: Optional[str], db: DatabaseSession) -> Dict[str, Any]:
+        """Review statistics from one $facet aggregation over batch_files"""
+        match: Dict[str, Any] = {}
+        if session_id:
+            batch_upload = await db.find_one("batch_uploads", {"session_id": session_id})
+            if not batch_upload:
+                return self._review_statistics(0, 0, 0, [])
+            match["batch_upload_id"] = str(batch_upload.get("_id"))
+        
+        pipeline = [
+            {"$match": match},
+            {"$facet": {
+                "totals": [{"$group": {
+                    "_id": None,
+                    "total_files": {"$sum": 1},
+                    "review_required": {"$sum": {"$cond": [{"$eq": ["$review_required", True]}, 1, 0]}},
+                    "completed_reviews": {"$sum": {"$cond": [
+                        {"$and": [{"$eq": ["$review_required", False]}, {"$gt": ["$reviewed_by", None]}]}, 1, 0
+                    ]}}
+                }}],
+                "triaged": [
+                    {"$match": {"review_required": True, "review_priority": {"$exists": True}}},
+                    {"$group": {
+                        "_id": {"category": "$review_category", "priority": "$review_priority"},
+                        "count": {"$sum": 1}
+                    }}
+                ],
+                # Files flagged before triage fields were stored, grouped by triage inputs
+                "untriaged": [
+                    {"$match": {"review_required": True, "review_priority": {"$exists": False}}},
+                    {"$group": {
+                        "_id": {
+                            "parsed": {"$ne": [{"$ifNull": ["$parsed_patient_id", ""]}, ""]},
+                            "patient_matching_status": "$patient_matching_status",
+                            "processing_status": "$processing_status",
+                            "low_confidence": {"$and": [
+                                {"$gt": ["$matching_confidence", 0]}, {"$lt": ["$matching_confidence", 0.7]}
+                            ]}
+                        },
+                        "count": {"$sum": 1}
+                    }}
+                ]
+            }}
+        ]
+        facets = (await db.aggregate("batch_files", pipeline) or [{}])[0]
+        
+        totals = (facets.get("totals") or [{}])[0]
+        triage_groups = [
+            (group["_id"]["category"], group["_id"]["priority"], group["count"])
+            for group in facets.get("triaged", [])
+        ]
+        triage_groups.extend(
+            self._triage_group(
+                group["_id"].get("parsed"),
+                group["_id"].get("patient_matching_status"),
+                group["_id"].get("processing_status"),
+                group["_id"].get("low_confidence"),
+                group["count"]
             )
-        ).count()
-        
-        # Get category breakdown
-        review_files = query.filter(BatchFile.review_required == True).all()
-        categories = {
-            "parsing_error": 0,
-            "patient_match": 0,
-            "processing_error": 0,
-            "other": 0
-        }
-        
-        priorities = {
-            "high": 0,
-            "medium": 0,
-            "low": 0
+            for group in facets.get("untriaged", [])
+        )
+        return self._review_statistics(
+            totals.get("total_files", 0),
+            totals.get("review_required", 0),
+            totals.get("completed_reviews", 0),
+            triage_groups
+        )
+    
+    def _review_statistics_sql(self, session_id: Optional[str], db: Session) -> Dict[str, Any]:
+        """Review statistics from one query grouped by review state and triage inputs"""
+        sql_session = getattr(db, "sqlalchemy_session", db)
+        
+        group_columns = [
+            BatchFile.review_required.label("review_required"),
+            BatchFile.reviewed_by.isnot(None).label("reviewed"),
+            (func.coalesce(BatchFile.parsed_patient_id, "") != "").label("parsed"),
+            BatchFile.patient_matching_status.label("patient_matching_status"),
+            BatchFile.processing_status.label("processing_status"),
+            and_(BatchFile.matching_confidence > 0, BatchFile.matching_confidence < 0.7).label("low_confidence")
+        ]
+        query = sql_session.query(*group_columns, func.count(BatchFile.id).label("count"))
+        if session_id:
+            query = query.join(BatchUpload, BatchUpload.id == BatchFile.batch_upload_id).filter(
+                BatchUpload.session_id == session_id
+            )
+        rows = query.group_by(*group_columns).all()
+        
+        return self._review_statistics(
+            sum(row.count for row in rows),
+            sum(row.count for row in rows if row.review_required is True),
+            sum(row.count for row in rows if row.review_required is False and row.reviewed),
+            [
+                self._triage_group(
+                    row.parsed, row.patient_matching_status, row.processing_status, row.low_confidence, row.count
+                )
+                for row in rows if row.review_required is True
+            ]
+        )
+    
+    @staticmethod
+    def _triage_group(
+        parsed: bool,
+        patient_matching_status: Any,
+        processing_status: Any,
+        low_confidence: bool,
+        count: int
+    ) -> Tuple[str, str, int]:
+        """(category, priority, count) of a group of review files sharing their triage inputs"""
+        # Representative file of the group: only the tested conditions matter to the triage
+        batch_file = {
+            "parsed_patient_id": "parsed" if parsed else None,
+            "patient_matching_status": patient_matching_status,
+            "processing_status": processing_status,
+            "matching_confidence": 0.5 if low_confidence else None
         }
-        
-        for batch_file in review_files:
-            category = self._determine_review_category(batch_file)
-            priority = self._determine_review_priority(batch_file)
-            
-            categories[category] += 1
-            priorities[priority] += 1
+        return review_category(batch_file), review_priority(batch_file), count
+    
+    @staticmethod
+    def _review_statistics(
+        total_files: int,
+        review_required: int,
+        completed_reviews: int,
+        triage_groups: List[Tuple[str, str, int]]
+    ) -> Dict[str, Any]:
+        """Statistics response from file counts and (category, priority, count) groups"""
+        categories = {category: 0 for category in REVIEW_CATEGORIES}
+        priorities = {priority: 0 for priority in REVIEW_PRIORITIES}
+        for category, priority, count in triage_groups:
+            categories[category] = categories.get(category, 0) + count
+            priorities[priority] = priorities.get(priority, 0) + count
         
         return {
             "total_files": total_files,
@@ -617,6 +1258,9 @@ class AdminReviewService:
     ) -> Dict[str, Any]:
         """Bulk approve high confidence matches to speed up review process"""
         
+        if not self._is_sql_session(db):
+            return await self._bulk_approve_high_confidence_documents(session_id, confidence_threshold, db)
+        
         # Get batch upload
         batch_upload = db.query(BatchUpload).filter_by(session_id=session_id).first()
         if not batch_upload:
@@ -652,6 +1296,43 @@ class AdminReviewService:
         
         logger.info(f"📋 Bulk approval completed: {approved_count} approved, {failed_count} failed")
         
+        return {
+            "approved_count": approved_count,
+            "failed_count": failed_count,
+            "confidence_threshold": confidence_threshold
+        }
+    
+    async def _bulk_approve_high_confidence_documents(
+        self,
+        session_id: str,
+        confidence_threshold: float,
+        db: DatabaseSession
+    ) -> Dict[str, Any]:
+        """Bulk approve high confidence matches on the document database with one filtered query"""
+        batch_upload = await db.find_one("batch_uploads", {"session_id": session_id})
+        if not batch_upload:
+            raise ValueError(f"Batch upload session not found: {session_id}")
+        
+        high_confidence_files = await db.find_many("batch_files", {
+            "batch_upload_id": str(batch_upload.get("_id")),
+            "review_required": True,
+            "matching_confidence": {"$gte": confidence_threshold},
+            "matched_patient_id": {"$ne": None}
+        })
+        
+        results = await self.apply_bulk_decisions([
+            (batch_file.get("_id"), AdminDecision(
+                decision=AdminDecisionEnum.APPROVE_MATCH,
+                admin_notes=f"Auto-approved (confidence: {batch_file.get('matching_confidence'):.2%})",
+                reviewed_by="system_bulk_approve"
+            ))
+            for batch_file in high_confidence_files
+        ], db)
+        
+        approved_count = sum(1 for result in results if result["success"])
+        failed_count = len(results) - approved_count
+        logger.info(f"📋 Bulk approval completed: {approved_count} approved, {failed_count} failed")
+        
         return {
             "approved_count": approved_count,
             "failed_count": failed_count,
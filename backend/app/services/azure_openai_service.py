@@ -12,28 +12,50 @@ from openai.types.chat.chat_completion import Choice
 
 from app.core.config import settings
 from app.models.chat import ChatMessage, ChatResponse, ModelType
-from app.utils.exceptions import AzureOpenAIError
+from app.services.embedding_cache import EmbeddingCache
+from app.services.openai_client_registry import OpenAIClientRegistry, openai_client_registry
+from app.services.openai_resilience import OpenAIResilienceLayer, openai_resilience
+from app.services.prompt_caching import PromptCacheTracker, prompt_cache_tracker
+from app.services.rate_limiter import (
+    OpenAIRateLimiter, RequestPriority, openai_rate_limiter,
+    estimate_prompt_tokens, estimate_text_tokens
+)
+from app.utils.exceptions import AzureOpenAIError, AzureOpenAIOverloadedError
 
 logger = logging.getLogger(__name__)
 
 class AzureOpenAIService:
     """Service for interacting with Azure OpenAI API"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        resilience: Optional[OpenAIResilienceLayer] = None,
+        rate_limiter: Optional[OpenAIRateLimiter] = None,
+        client_registry: Optional[OpenAIClientRegistry] = None,
+        usage_tracker: Optional[PromptCacheTracker] = None
+    ):
         self.client: Optional[AsyncAzureOpenAI] = None
         self.is_initialized = False
+        self.client_registry = client_registry or openai_client_registry
+        self.resilience = resilience or openai_resilience
+        self.rate_limiter = rate_limiter or openai_rate_limiter
+        self.usage_tracker = usage_tracker or prompt_cache_tracker
+        self.embedding_cache = embedding_cache
+        if self.embedding_cache is None and settings.EMBEDDING_CACHE_ENABLED:
+            self.embedding_cache = EmbeddingCache()
     
     async def initialize(self) -> None:
-        """Initialize Azure OpenAI client"""
+        """Initialize Azure OpenAI client (shared process-wide client)"""
+        if self.is_initialized:
+            return
+        
         try:
-            self.client = AsyncAzureOpenAI(
-                api_key=settings.AZURE_OPENAI_API_KEY,
-                api_version=settings.AZURE_OPENAI_API_VERSION,
-                azure_endpoint=settings.AZURE_OPENAI_ENDPOINT
-            )
+            self.client = self.client_registry.get_client()
             
-            # Test connection
-            await self._test_connection()
+            # Test connection once per process, unless running in lazy mode
+            if not settings.AZURE_OPENAI_LAZY_INIT:
+                await self.client_registry.ensure_connection_tested(self._test_connection)
             self.is_initialized = True
             logger.info("✅ Azure OpenAI service initialized successfully")
             
@@ -63,7 +85,8 @@ class AzureOpenAIService:
         max_tokens: Optional[int] = None,
         tools: Optional[List[Dict[str, Any]]] = None,
         tool_choice: Optional[str] = None,
-        stream: bool = False
+        stream: bool = False,
+        priority: RequestPriority = RequestPriority.INTERACTIVE
     ) -> ChatResponse:
         """
         Generate chat completion using specified model (non-streaming)
@@ -76,6 +99,7 @@ class AzureOpenAIService:
             tools: Available tools for function calling
             tool_choice: Tool choice strategy
             stream: Whether to stream response (ignored, use chat_completion_stream)
+            priority: Rate limiter queue priority (interactive chat or batch work)
             
         Returns:
             ChatResponse with generated content
@@ -123,8 +147,10 @@ class AzureOpenAIService:
             
             logger.info(f"🤖 Generating completion with {model_type.value}")
             
-            return await self._single_completion(request_params, model_type)
+            return await self._single_completion(request_params, model_type, priority)
                 
+        except AzureOpenAIError:
+            raise
         except Exception as e:
             logger.error(f"❌ Chat completion failed: {str(e)}")
             raise AzureOpenAIError(f"Chat completion failed: {str(e)}")
@@ -136,7 +162,8 @@ class AzureOpenAIService:
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
         tools: Optional[List[Dict[str, Any]]] = None,
-        tool_choice: Optional[str] = None
+        tool_choice: Optional[str] = None,
+        priority: RequestPriority = RequestPriority.INTERACTIVE
     ) -> AsyncGenerator[str, None]:
         """
         Generate streaming chat completion using specified model
@@ -148,6 +175,7 @@ class AzureOpenAIService:
             max_tokens: Maximum tokens to generate
             tools: Available tools for function calling
             tool_choice: Tool choice strategy
+            priority: Rate limiter queue priority (interactive chat or batch work)
             
         Yields:
             Content chunks as they are generated
@@ -187,6 +215,10 @@ class AzureOpenAIService:
                 "stream": True
             }
             
+            # Ask for a final usage chunk so cached prompt tokens can be recorded
+            if settings.OPENAI_STREAM_USAGE_ENABLED:
+                request_params["extra_body"] = {"stream_options": {"include_usage": True}}
+            
             # Add tools if provided
             if tools and settings.ENABLE_TOOL_CALLING:
                 request_params["tools"] = tools
@@ -195,9 +227,11 @@ class AzureOpenAIService:
             
             logger.info(f"🌊 Streaming completion with {model_type.value}")
             
-            async for chunk in self._stream_completion(request_params):
+            async for chunk in self._stream_completion(request_params, model_type, priority):
                 yield chunk
                 
+        except AzureOpenAIError:
+            raise
         except Exception as e:
             logger.error(f"❌ Streaming completion failed: {str(e)}")
             raise AzureOpenAIError(f"Streaming completion failed: {str(e)}")
@@ -205,10 +239,26 @@ class AzureOpenAIService:
     async def _single_completion(
         self, 
         request_params: Dict[str, Any], 
-        model_type: ModelType
+        model_type: ModelType,
+        priority: RequestPriority = RequestPriority.INTERACTIVE
     ) -> ChatResponse:
-        """Generate single completion response"""
-        response: ChatCompletion = await self.client.chat.completions.create(**request_params)
+        """Generate single completion response, shedding load to GPT-4o-mini if needed"""
+        deployment = request_params["model"]
+        try:
+            response: ChatCompletion = await self.resilience.call(
+                deployment,
+                self._rate_limited_completion(request_params, priority)
+            )
+        except AzureOpenAIOverloadedError:
+            fallback_params = self._get_load_shed_params(request_params, model_type)
+            if fallback_params is None:
+                raise
+            model_type = ModelType.GPT4O_MINI
+            deployment = fallback_params["model"]
+            response = await self.resilience.call(
+                deployment,
+                self._rate_limited_completion(fallback_params, priority)
+            )
         
         choice: Choice = response.choices[0]
         message: ChatCompletionMessage = choice.message
@@ -231,24 +281,79 @@ class AzureOpenAIService:
         return ChatResponse(
             content=message.content or "",
             model=model_type,
-            usage={
-                "prompt_tokens": response.usage.prompt_tokens if response.usage else 0,
-                "completion_tokens": response.usage.completion_tokens if response.usage else 0,
-                "total_tokens": response.usage.total_tokens if response.usage else 0
-            },
+            usage=self.usage_tracker.record(deployment, response.usage),
             tool_calls=tool_calls,
             finish_reason=choice.finish_reason
         )
     
     async def _stream_completion(
         self, 
-        request_params: Dict[str, Any]
+        request_params: Dict[str, Any],
+        model_type: ModelType,
+        priority: RequestPriority = RequestPriority.INTERACTIVE
+    ) -> AsyncGenerator[str, None]:
+        """Generate streaming completion response, shedding load to GPT-4o-mini if needed"""
+        try:
+            async for chunk in self._stream_deployment(request_params, priority):
+                yield chunk
+        except AzureOpenAIOverloadedError:
+            fallback_params = self._get_load_shed_params(request_params, model_type)
+            if fallback_params is None:
+                raise
+            async for chunk in self._stream_deployment(fallback_params, priority):
+                yield chunk
+    
+    async def _stream_deployment(
+        self,
+        request_params: Dict[str, Any],
+        priority: RequestPriority
     ) -> AsyncGenerator[str, None]:
-        """Generate streaming completion response"""
-        stream = await self.client.chat.completions.create(**request_params)
+        """Stream content chunks from a single deployment"""
+        stream = self.resilience.stream(
+            request_params["model"],
+            self._rate_limited_completion(request_params, priority)
+        )
         async for chunk in stream:
             if chunk.choices and chunk.choices[0].delta.content:
                 yield chunk.choices[0].delta.content
+            usage = getattr(chunk, "usage", None)
+            if usage:
+                self.usage_tracker.record(request_params["model"], usage)
+    
+    def _rate_limited_completion(
+        self,
+        request_params: Dict[str, Any],
+        priority: RequestPriority
+    ):
+        """Completion call factory that waits for rate limit capacity before every attempt"""
+        # Azure counts max_tokens against the TPM quota when the request is accepted
+        estimated_tokens = (
+            estimate_prompt_tokens(request_params["messages"], request_params.get("tools"))
+            + request_params["max_tokens"]
+        )
+        
+        async def create():
+            await self.rate_limiter.acquire(request_params["model"], estimated_tokens, priority)
+            return await self.client.chat.completions.create(**request_params)
+        
+        return create
+    
+    def _get_load_shed_params(
+        self,
+        request_params: Dict[str, Any],
+        model_type: ModelType
+    ) -> Optional[Dict[str, Any]]:
+        """Request parameters re-targeted at GPT-4o-mini when GPT-4o is saturated"""
+        if not settings.OPENAI_LOAD_SHEDDING_ENABLED or model_type != ModelType.GPT4O:
+            return None
+        
+        self.resilience.record_load_shed(request_params["model"])
+        logger.warning("⚖️ GPT-4o saturated, shedding load to GPT-4o-mini")
+        return {
+            **request_params,
+            "model": self._get_deployment_name(ModelType.GPT4O_MINI),
+            "max_tokens": min(request_params["max_tokens"], settings.GPT4O_MINI_MAX_TOKENS)
+        }
     
     def _get_deployment_name(self, model_type: ModelType) -> str:
         """Get Azure deployment name for model type"""
@@ -270,13 +375,18 @@ class AzureOpenAIService:
     
     async def generate_embeddings(
         self, 
-        texts: List[str]
+        texts: List[str],
+        priority: RequestPriority = RequestPriority.BATCH
     ) -> List[List[float]]:
         """
         Generate embeddings for text chunks
         
+        Vectors already present in the embedding cache are served locally; only
+        cache misses are sent to Azure OpenAI.
+        
         Args:
             texts: List of text strings to embed
+            priority: Rate limiter queue priority
             
         Returns:
             List of embedding vectors
@@ -285,25 +395,67 @@ class AzureOpenAIService:
             raise AzureOpenAIError("Azure OpenAI service not initialized")
         
         try:
-            response = await self.client.embeddings.create(
-                model=settings.EMBEDDING_DEPLOYMENT_NAME,
-                input=texts
-            )
+            model = settings.EMBEDDING_DEPLOYMENT_NAME
+            
+            if self.embedding_cache:
+                embeddings = await asyncio.to_thread(self.embedding_cache.get_many, texts, model)
+            else:
+                embeddings = [None] * len(texts)
             
-            embeddings = [data.embedding for data in response.data]
-            logger.info(f"📊 Generated {len(embeddings)} embeddings")
+            # Embed each distinct missing text once
+            missing_texts = list(dict.fromkeys(
+                text for text, embedding in zip(texts, embeddings) if embedding is None
+            ))
+            
+            if missing_texts:
+                estimated_tokens = estimate_text_tokens(missing_texts)
+                
+                async def create():
+                    await self.rate_limiter.acquire(model, estimated_tokens, priority)
+                    return await self.client.embeddings.create(model=model, input=missing_texts)
+                
+                response = await self.resilience.call(model, create)
+                new_embeddings = [data.embedding for data in response.data]
+                
+                if self.embedding_cache:
+                    await asyncio.to_thread(
+                        self.embedding_cache.put_many, missing_texts, model, new_embeddings
+                    )
+                
+                by_text = dict(zip(missing_texts, new_embeddings))
+                embeddings = [
+                    embedding if embedding is not None else by_text[text]
+                    for text, embedding in zip(texts, embeddings)
+                ]
+            
+            logger.info(
+                f"📊 Generated {len(embeddings)} embeddings "
+                f"({len(texts) - len(missing_texts)} from cache)"
+            )
             
             return embeddings
             
+        except AzureOpenAIError:
+            raise
         except Exception as e:
             logger.error(f"❌ Embedding generation failed: {str(e)}")
             raise AzureOpenAIError(f"Embedding generation failed: {str(e)}")
     
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get Azure OpenAI call and rate limiter metrics"""
+        return {
+            **self.resilience.get_metrics(),
+            "rate_limits": self.rate_limiter.get_stats(),
+            "prompt_cache": self.usage_tracker.get_stats()
+        }
+    
     async def close(self) -> None:
-        """Close Azure OpenAI client"""
+        """Release the Azure OpenAI client (the shared connection pool is closed by the registry)"""
         if self.client:
-            await self.client.close()
+            self.client = None
             self.is_initialized = False
+            if self.embedding_cache:
+                self.embedding_cache.close()
             logger.info("🔒 Azure OpenAI service closed")
 
 # Global service instance
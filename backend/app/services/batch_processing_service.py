@@ -12,27 +12,42 @@ import logging
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple, Any
 from pathlib import Path
-from dataclasses import dataclass
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from dataclasses import dataclass, asdict
+from concurrent.futures import Executor, ThreadPoolExecutor, as_completed
 
 from fastapi import UploadFile
 
 from app.database.abstract_layer import DatabaseSession
 from app.database.factory import get_db_async
+from app.database.bulk_writer import BulkInsertBuffer
 from app.db.models import (
-    BatchUpload, BatchFile, MedicalDocument, Patient,
+    MedicalDocument, Patient,
     BatchUploadStatusEnum, PatientMatchingStatusEnum, VectorizationStatusEnum,
-    ProcessingTypeEnum, DocumentTypeEnum
+    ProcessingTypeEnum
 )
-from app.services.tecsalud_filename_parser import TecSaludFilenameParser, PatientData, DocumentTypeEnum as TecSaludDocTypeEnum
-from app.services.patient_matching_service import PatientMatchingService
+from app.services.tecsalud_filename_parser import TecSaludFilenameParser, PatientData, ParseResult, DocumentTypeEnum as TecSaludDocTypeEnum
+from app.services.patient_matching_service import PatientMatchingService, patient_resolution_locks
+from app.services.reference_data_cache import ReferenceDataCache, reference_data_cache
+from app.services.review_triage import with_review_triage
 # ChromaDB removed - using only complete documents
-from app.services.azure_openai_service import AzureOpenAIService
+from app.services.azure_openai_service import AzureOpenAIService, azure_openai_service as shared_openai_service
 from app.agents.document_analysis_agent import DocumentAnalysisAgent
+from app.services.document_summary_service import DocumentSummaryService, document_summary_service
+from app.services.job_queue import JobQueue, job_queue
+from app.services.batch_progress import CANCELLED_STATUS, BatchProgress, BatchProgressTracker, batch_progress_tracker
+from app.utils.keyed_lock import KeyedAsyncLock
+from app.utils.text_extraction import extract_text_from_path
 
 
 logger = logging.getLogger(__name__)
 
+# Matching outcome copied from the file a patient group was resolved with to the rest of the group
+PATIENT_MATCH_FIELDS = (
+    "patient_matching_status", "matching_confidence", "matching_details", "review_required",
+    "review_priority", "review_priority_rank", "review_category"
+)
+
 
 @dataclass
 class BatchProcessingResult:
@@ -47,6 +62,7 @@ class BatchProcessingResult:
     processing_time: float
     status: BatchUploadStatusEnum
     error_details: List[str]
+    patient_groups: int = 0
 
 
 @dataclass
@@ -65,13 +81,28 @@ class FileProcessingResult:
 class BatchProcessingService:
     """Service for processing bulk document uploads with patient matching"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        azure_openai_service: Optional[AzureOpenAIService] = None,
+        summary_service: Optional[DocumentSummaryService] = None,
+        progress_tracker: Optional[BatchProgressTracker] = None,
+        extraction_executor: Optional[Executor] = None,
+        patient_locks: Optional[KeyedAsyncLock] = None,
+        reference_data: Optional[ReferenceDataCache] = None
+    ):
         self.filename_parser = TecSaludFilenameParser()
         # Don't initialize patient_matcher here - create it when needed with db session
         # ChromaDB removed - using only complete documents
-        self.azure_openai_service = AzureOpenAIService()
-        self.document_agent = DocumentAnalysisAgent()
+        self.azure_openai_service = azure_openai_service or shared_openai_service
+        self.document_agent = DocumentAnalysisAgent(self.azure_openai_service)
+        self.summary_service = summary_service or document_summary_service
+        self.progress_tracker = progress_tracker or batch_progress_tracker
+        # Shared across service instances so concurrent batches cannot both create the same patient
+        self.patient_locks = patient_locks or patient_resolution_locks
+        self.reference_data = reference_data or reference_data_cache
+        self.extraction_executor = extraction_executor  # None extracts text in the default thread pool
         self.max_parallel_files = 5  # Process up to 5 files in parallel
+        self.document_batch_size = 1  # > 1 coalesces concurrent document inserts into create_many batches
         self.upload_directory = Path("/tmp/batch_uploads")
         self.upload_directory.mkdir(exist_ok=True)
         
@@ -134,38 +165,21 @@ class BatchProcessingService:
                 content_hash = hashlib.sha256(content).hexdigest()
                 
                 # Parse TecSalud filename
-                parsing_result = await self.filename_parser.parse_filename(file.filename)
+                parsing_result = self.filename_parser.parse_filename(file.filename)
                 
                 # Create batch file record
-                batch_file_data = {
-                    "batch_upload_id": str(batch_upload.get("_id")),
-                    "original_filename": file.filename,
-                    "file_path": str(file_path),
-                    "file_size": len(content),
-                    "content_hash": content_hash,
-                    "parsed_patient_id": parsing_result.patient_id if parsing_result.success else None,
-                    "parsed_patient_name": parsing_result.patient_name if parsing_result.success else None,
-                    "parsed_document_number": parsing_result.document_number if parsing_result.success else None,
-                    "parsed_document_type": parsing_result.document_type if parsing_result.success else None,
-                    "patient_matching_status": PatientMatchingStatusEnum.PENDING.value,
-                    "processing_status": VectorizationStatusEnum.PENDING.value,
-                    "created_at": datetime.now(),
-                    "updated_at": datetime.now(),
-                    "error_message": None,
-                    "review_required": False
-                }
-                
-                if not parsing_result.success:
-                    batch_file_data["error_message"] = f"Filename parsing failed: {parsing_result.error_message}"
-                    batch_file_data["review_required"] = True
+                batch_file_data = self.build_batch_file(
+                    str(batch_upload.get("_id")), file.filename, str(file_path),
+                    len(content), content_hash, parsing_result
+                )
                 
                 await db.create("batch_files", batch_file_data)
                 uploaded_files.append({
                     'filename': file.filename,
                     'size': len(content),
                     'parsed': parsing_result.success,
-                    'patient_id': parsing_result.patient_id if parsing_result.success else None,
-                    'patient_name': parsing_result.patient_name if parsing_result.success else None
+                    'patient_id': batch_file_data["parsed_patient_id"],
+                    'patient_name': batch_file_data["parsed_patient_name"]
                 })
                 
             except Exception as e:
@@ -196,12 +210,111 @@ class BatchProcessingService:
             'parsing_success_rate': len([f for f in uploaded_files if f['parsed']]) / len(uploaded_files) if uploaded_files else 0
         }
     
-    async def process_batch_upload(
+    def build_batch_file(
+        self,
+        batch_upload_id: str,
+        filename: str,
+        file_path: str,
+        file_size: int,
+        content_hash: Optional[str],
+        parsing_result: ParseResult
+    ) -> Dict[str, Any]:
+        """
+        Batch file record for a file registered in a session
+        
+        Args:
+            batch_upload_id: ID of the batch upload session
+            filename: Original filename
+            file_path: Where the file is read from during processing
+            file_size: File size in bytes
+            content_hash: SHA-256 of the file content
+            parsing_result: Result of parsing the TecSalud filename
+            
+        Returns:
+            Document to insert into ``batch_files``
+        """
+        patient_data = parsing_result.patient_data if parsing_result.success else None
+        
+        batch_file_data = {
+            "batch_upload_id": batch_upload_id,
+            "original_filename": filename,
+            "file_path": file_path,
+            "file_size": file_size,
+            "content_hash": content_hash,
+            "parsed_patient_id": None,
+            "parsed_patient_name": None,
+            "parsed_document_number": None,
+            "parsed_document_type": None,
+            "patient_matching_status": PatientMatchingStatusEnum.PENDING.value,
+            "processing_status": VectorizationStatusEnum.PENDING.value,
+            "created_at": datetime.now(),
+            "updated_at": datetime.now(),
+            "error_message": None,
+            "review_required": False
+        }
+        
+        if patient_data:
+            apellidos = f"{patient_data.apellido_paterno} {patient_data.apellido_materno}".strip()
+            batch_file_data.update({
+                "parsed_patient_id": patient_data.expediente_id,
+                "parsed_patient_name": f"{apellidos}, {patient_data.nombre}",
+                "parsed_document_number": patient_data.numero_adicional,
+                # TecSalud type code (e.g. CONS, LAB) as mapped by _create_medical_document
+                "parsed_document_type": os.path.splitext(filename)[0].rsplit('_', 1)[-1].upper()
+            })
+        else:
+            batch_file_data["error_message"] = f"Filename parsing failed: {parsing_result.error_message}"
+            batch_file_data["review_required"] = True
+            with_review_triage(batch_file_data, batch_file_data)
+        
+        return batch_file_data
+    
+    async def submit_batch_processing(
+        self,
+        session_id: str,
+        db: DatabaseSession,
+        queue: Optional[JobQueue] = None
+    ) -> str:
+        """
+        Queue a batch upload session for background processing
+        
+        Returns:
+            Job ID to poll at /documents/jobs/{job_id}
+        """
+        batch_upload = await db.find_one("batch_uploads", {"session_id": session_id})
+        if not batch_upload:
+            raise ValueError(f"Batch upload session not found: {session_id}")
+        
+        return await (queue or job_queue).enqueue(BATCH_JOB_TYPE, {"session_id": session_id}, db)
+    
+    async def resume_batch_upload(
         self,
         session_id: str,
         db: DatabaseSession
     ) -> BatchProcessingResult:
-        """Process all files in batch upload session"""
+        """Resume an interrupted or partially failed session, processing only unfinished files"""
+        return await self.process_batch_upload(session_id, db, resume=True)
+    
+    async def process_batch_upload(
+        self,
+        session_id: str,
+        db: DatabaseSession,
+        resume: bool = False
+    ) -> BatchProcessingResult:
+        """
+        Process all files in batch upload session
+        
+        Each file's ``processing_status`` is a checkpoint: it is set to processing
+        before the file starts and to completed or failed when it ends. With
+        ``resume`` a session left processing (or failed) by an interrupted run is
+        accepted and only its pending, processing and failed files are processed;
+        completed files are kept as they are.
+        
+        Args:
+            session_id: Batch upload session ID
+            db: Database session
+            resume: Continue a session that was already started
+        """
         
         start_time = datetime.now()
         
@@ -210,34 +323,66 @@ class BatchProcessingService:
         if not batch_upload:
             raise ValueError(f"Batch upload session not found: {session_id}")
         
-        if batch_upload.get("status") != BatchUploadStatusEnum.PENDING.value:
+        status = batch_upload.get("status")
+        resuming = resume and status != BatchUploadStatusEnum.PENDING.value
+        if status == BatchUploadStatusEnum.COMPLETED.value or (
+            status != BatchUploadStatusEnum.PENDING.value and not resume
+        ):
             raise ValueError(f"Batch upload session already processed: {session_id}")
         
         # Update status to processing
-        await db.update_by_id(
-            "batch_uploads",
-            str(batch_upload.get("_id")),
-            {
-                "status": BatchUploadStatusEnum.PROCESSING.value,
-                "started_at": start_time,
-                "updated_at": datetime.now()
-            }
-        )
+        status_update = {
+            "status": BatchUploadStatusEnum.PROCESSING.value,
+            "updated_at": datetime.now()
+        }
+        if resuming:
+            status_update.update({
+                "resumed_at": start_time,
+                "resume_count": batch_upload.get("resume_count", 0) + 1
+            })
+        else:
+            status_update["started_at"] = start_time
+        await db.update_by_id("batch_uploads", str(batch_upload.get("_id")), status_update)
         
-        logger.info(f"🔄 Starting batch processing for session: {session_id}")
+        logger.info(f"🔄 {'Resuming' if resuming else 'Starting'} batch processing for session: {session_id}")
         
+        progress: Optional[BatchProgress] = None
         try:
             # Get all batch files for this session
             batch_files = await db.find_many("batch_files", {"batch_upload_id": str(batch_upload.get("_id"))})
             
+            # Files completed by a previous run are not processed again
+            completed_before, pending_files = [], []
+            for batch_file in batch_files:
+                if batch_file.get("processing_status") == VectorizationStatusEnum.COMPLETED.value:
+                    completed_before.append(batch_file)
+                else:
+                    pending_files.append(batch_file)
+            if resuming:
+                logger.info(f"♻️ Skipping {len(completed_before)} completed files, {len(pending_files)} to process")
+            
+            # Live progress for the status stream
+            progress = self.progress_tracker.start(session_id, len(batch_files), len(completed_before))
+            
+            # Resolve each patient once, then fan out document creation
+            patient_groups = await self._resolve_patient_groups(pending_files, db, progress)
+            
             # Process files in parallel
-            results = await self._process_files_parallel(batch_files, batch_upload.get("processing_type"), db)
+            results = await self._process_files_parallel(
+                pending_files, batch_upload.get("processing_type"), db, progress
+            )
             
             # Aggregate results
-            processed_files = sum(1 for r in results if r.success)
+            processed_files = len(completed_before) + sum(1 for r in results if r.success)
             failed_files = sum(1 for r in results if not r.success)
-            created_patients = sum(1 for r in results if r.success and r.patient_id)
-            matched_patients = sum(1 for r in results if r.success and r.matching_confidence and r.matching_confidence > 0.8)
+            
+            # Patient counts come from the stored files so earlier runs of a resumed session count too
+            completed_files = await db.find_many("batch_files", {
+                "batch_upload_id": str(batch_upload.get("_id")),
+                "processing_status": VectorizationStatusEnum.COMPLETED.value
+            })
+            created_patients = sum(1 for f in completed_files if f.get("matched_patient_id"))
+            matched_patients = sum(1 for f in completed_files if (f.get("matching_confidence") or 0) > 0.8)
             review_required = sum(1 for r in results if r.review_required)
             error_details = [r.error_message for r in results if r.error_message]
             
@@ -266,6 +411,7 @@ class BatchProcessingService:
                 update_data["error_message"] = error_message
             
             await db.update_by_id("batch_uploads", str(batch_upload.get("_id")), update_data)
+            progress.finish(final_status)
             
             processing_time = (datetime.now() - start_time).total_seconds()
             
@@ -279,7 +425,8 @@ class BatchProcessingService:
                 review_required=review_required,
                 processing_time=processing_time,
                 status=BatchUploadStatusEnum(final_status),
-                error_details=error_details
+                error_details=error_details,
+                patient_groups=patient_groups
             )
             
             logger.info(f"✅ Batch processing completed: {session_id} - {processed_files}/{len(batch_files)} files processed")
@@ -289,6 +436,9 @@ class BatchProcessingService:
         except Exception as e:
             logger.error(f"❌ Batch processing failed: {session_id} - {str(e)}")
             
+            if progress is not None:
+                progress.finish(BatchUploadStatusEnum.FAILED.value)
+            
             # Update batch upload status to failed
             await db.update_by_id(
                 "batch_uploads",
@@ -315,16 +465,111 @@ class BatchProcessingService:
                 status=BatchUploadStatusEnum.FAILED,
                 error_details=[str(e)]
             )
+        
+        finally:
+            # Cancellation skips both branches above; end the live progress so streams stop
+            if progress is not None and not progress.is_finished:
+                logger.warning(f"⚠️ Batch processing cancelled: {session_id}")
+                progress.finish(CANCELLED_STATUS)
+    
+    @staticmethod
+    def _patient_group_key(batch_file: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """Files of the same patient share the parsed expediente and (normalized) name"""
+        expediente = batch_file.get("parsed_patient_id")
+        if not expediente:
+            return None
+        name = " ".join((batch_file.get("parsed_patient_name") or "").upper().split())
+        return expediente, name
+    
+    async def _resolve_patient_groups(
+        self,
+        batch_files: List[Dict[str, Any]],
+        db: DatabaseSession,
+        progress: Optional[BatchProgress] = None
+    ) -> int:
+        """
+        Resolve the patient of each (expediente, name) group once
+        
+        Groups are resolved concurrently (up to ``max_parallel_files``), each under
+        the lock of its expediente. The resolved patient is checkpointed on every file of
+        the group as ``matched_patient_id``, which ``_process_single_file`` reuses.
+        
+        Args:
+            batch_files: Files about to be processed
+            db: Database session
+            progress: Live progress to record matching latency on
+            
+        Returns:
+            Number of patient groups
+        """
+        groups: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        for batch_file in batch_files:
+            key = self._patient_group_key(batch_file)
+            if key:
+                groups.setdefault(key, []).append(batch_file)
+        
+        semaphore = asyncio.Semaphore(self.max_parallel_files)
+        
+        async def resolve(key: Tuple[str, str], files: List[Dict[str, Any]]) -> None:
+            async with semaphore, self.patient_locks.acquire(key[0]):
+                await self._resolve_patient_group(files, db, progress)
+        
+        keys = list(groups)
+        outcomes = await asyncio.gather(*(resolve(key, groups[key]) for key in keys), return_exceptions=True)
+        for key, outcome in zip(keys, outcomes):
+            if isinstance(outcome, Exception):
+                # Files of the group fall back to matching on their own
+                logger.error(f"❌ Patient resolution failed for expediente {key[0]}: {str(outcome)}")
+        
+        logger.info(f"👥 Resolved {len(groups)} patient groups for {len(batch_files)} files")
+        return len(groups)
+    
+    async def _resolve_patient_group(
+        self,
+        files: List[Dict[str, Any]],
+        db: DatabaseSession,
+        progress: Optional[BatchProgress] = None
+    ) -> None:
+        """Match or create the patient of one group and record it on all its files"""
+        
+        # A patient recorded by bulk pre-matching or an interrupted run is reused
+        patient_id = next((f["matched_patient_id"] for f in files if f.get("matched_patient_id")), None)
+        match_fields: Dict[str, Any] = {}
+        
+        if patient_id is None:
+            representative = files[0]
+            with progress.time_stage("patient_matching") if progress else nullcontext():
+                patient_id, _ = await self._match_or_create_patient(representative, db)
+            if not patient_id:
+                return
+            match_fields = {field: representative[field] for field in PATIENT_MATCH_FIELDS if field in representative}
+        
+        for batch_file in files:
+            if batch_file.get("matched_patient_id") == patient_id:
+                continue
+            update_data = {**match_fields, "matched_patient_id": patient_id, "updated_at": datetime.now()}
+            batch_file.update(update_data)
+            await db.update_by_id("batch_files", str(batch_file.get("_id")), update_data)
     
     async def _process_files_parallel(
         self,
         batch_files: List[Dict[str, Any]],
         processing_type: str,
-        db: DatabaseSession
+        db: DatabaseSession,
+        progress: Optional[BatchProgress] = None
     ) -> List[FileProcessingResult]:
         """Process files in parallel with limited concurrency"""
         
         results = []
+        document_writer = None
+        if self.document_batch_size > 1:
+            document_writer = BulkInsertBuffer(db, "medical_documents", self.document_batch_size)
+        
+        async def process_and_count(batch_file: Dict[str, Any]) -> FileProcessingResult:
+            result = await self._process_single_file(batch_file, processing_type, db, progress, document_writer)
+            if progress:
+                progress.record_file(result.success)
+            return result
         
         # Process files in batches to avoid overwhelming the system
         for i in range(0, len(batch_files), self.max_parallel_files):
@@ -333,9 +578,7 @@ class BatchProcessingService:
             # Create tasks for parallel processing
             tasks = []
             for batch_file in batch:
-                task = asyncio.create_task(
-                    self._process_single_file(batch_file, processing_type, db)
-                )
+                task = asyncio.create_task(process_and_count(batch_file))
                 tasks.append(task)
             
             # Wait for all tasks in this batch to complete
@@ -359,25 +602,40 @@ class BatchProcessingService:
         self,
         batch_file: Dict[str, Any],
         processing_type: str,
-        db: DatabaseSession
+        db: DatabaseSession,
+        progress: Optional[BatchProgress] = None,
+        document_writer: Optional[BulkInsertBuffer] = None
     ) -> FileProcessingResult:
         """Process a single file through the complete workflow"""
         
         start_time = datetime.now()
+        time_stage = progress.time_stage if progress else (lambda stage: nullcontext())
         
         try:
             logger.info(f"🔄 Processing file: {batch_file.get('original_filename')}")
             
+            # Checkpoint: a file left processing was interrupted and is retried on resume
+            await db.update_by_id(
+                "batch_files",
+                str(batch_file.get("_id")),
+                {
+                    "processing_status": VectorizationStatusEnum.PROCESSING.value,
+                    "error_message": None,
+                    "updated_at": datetime.now()
+                }
+            )
+            
             # Step 1: Check if filename was parsed successfully
             if not batch_file.get("parsed_patient_id"):
                 await db.update_by_id(
                     "batch_files",
                     str(batch_file.get("_id")),
-                    {
+                    with_review_triage(batch_file, {
                         "error_message": "Filename parsing failed - cannot extract patient information",
+                        "processing_status": VectorizationStatusEnum.FAILED.value,
                         "review_required": True,
                         "updated_at": datetime.now()
-                    }
+                    })
                 )
                 
                 return FileProcessingResult(
@@ -388,18 +646,24 @@ class BatchProcessingService:
                     processing_time=(datetime.now() - start_time).total_seconds()
                 )
             
-            # Step 2: Patient matching
-            patient_id, matching_result = await self._match_or_create_patient(batch_file, db)
+            # Step 2: Patient matching (normally resolved for the file's patient group already)
+            if batch_file.get("matched_patient_id"):
+                patient_id, matching_result = batch_file["matched_patient_id"], None
+            else:
+                async with self.patient_locks.acquire(batch_file.get("parsed_patient_id")):
+                    with time_stage("patient_matching"):
+                        patient_id, matching_result = await self._match_or_create_patient(batch_file, db)
             
             if not patient_id:
                 await db.update_by_id(
                     "batch_files",
                     str(batch_file.get("_id")),
-                    {
+                    with_review_triage(batch_file, {
                         "error_message": "Patient matching failed",
+                        "processing_status": VectorizationStatusEnum.FAILED.value,
                         "review_required": True,
                         "updated_at": datetime.now()
-                    }
+                    })
                 )
                 
                 return FileProcessingResult(
@@ -411,16 +675,35 @@ class BatchProcessingService:
                 )
             
             # Step 3: Read file content
-            file_content = await self._read_file_content(batch_file.get("file_path"))
+            with time_stage("read_content"):
+                file_content = await self._read_file_content(batch_file.get("file_path"))
+            
+            # Step 4: Create medical document (idempotent on resume)
+            with time_stage("create_document"):
+                document_id = await self._find_existing_document(batch_file, patient_id, db)
+                if document_id is None:
+                    document_id = await self._create_medical_document(
+                        batch_file, patient_id, file_content, processing_type, db, document_writer
+                    )
             
-            # Step 4: Create medical document
-            document_id = await self._create_medical_document(
-                batch_file, patient_id, file_content, processing_type, db
+            # Checkpoint: the document exists even if a later step is interrupted
+            await db.update_by_id(
+                "batch_files",
+                str(batch_file.get("_id")),
+                {
+                    "matched_patient_id": patient_id,
+                    "medical_document_id": str(document_id),
+                    "updated_at": datetime.now()
+                }
             )
             
             # Step 5: Process document based on processing type
             if processing_type in ["vectorized", "both"]:
-                await self._vectorize_document(document_id, file_content, db)
+                with time_stage("vectorize"):
+                    await self._vectorize_document(document_id, file_content, db)
+            
+            # Step 6: Summarize in the background (summary and key points used by chat context)
+            self.summary_service.schedule(document_id)
             
             # Update batch file with success
             await db.update_by_id(
@@ -441,24 +724,28 @@ class BatchProcessingService:
                 success=True,
                 patient_id=patient_id,
                 document_id=document_id,
-                matching_confidence=matching_result.confidence if matching_result else None,
-                review_required=matching_result.review_required if matching_result else False,
+                matching_confidence=(
+                    matching_result.confidence if matching_result else batch_file.get("matching_confidence")
+                ),
+                review_required=(
+                    matching_result.review_required if matching_result else bool(batch_file.get("review_required"))
+                ),
                 processing_time=(datetime.now() - start_time).total_seconds()
             )
             
         except Exception as e:
             logger.error(f"❌ Error processing file {batch_file.get('original_filename')}: {str(e)}")
             
-            # Update batch file with error
+            # Update batch file with error (a file already in review moves up the queue)
             await db.update_by_id(
                 "batch_files",
                 str(batch_file.get("_id")),
-                {
+                with_review_triage(batch_file, {
                     "error_message": str(e),
                     "processing_status": VectorizationStatusEnum.FAILED.value,
                     "processed_at": datetime.now(),
                     "updated_at": datetime.now()
-                }
+                })
             )
             
             return FileProcessingResult(
@@ -476,7 +763,7 @@ class BatchProcessingService:
         """Match patient or create new one based on TecSalud data"""
         
         # Create patient matcher with db session
-        patient_matcher = PatientMatchingService(db)
+        patient_matcher = PatientMatchingService(db, reference_data=self.reference_data)
         
         # Try to match existing patient using TecSalud data
         tecsalud_data = PatientData(
@@ -496,7 +783,7 @@ class BatchProcessingService:
         # Update batch file with matching results
         update_data = {
             "matching_confidence": matching_result.best_match.confidence if matching_result.best_match else 0.0,
-            "matching_details": str(matching_result),
+            "matching_details": matching_result.to_matching_details(),
             "updated_at": datetime.now()
         }
         
@@ -507,6 +794,7 @@ class BatchProcessingService:
                 "matched_patient_id": matching_result.best_match.patient_id
             })
             
+            batch_file.update(update_data)  # Copied to the rest of the file's patient group
             await db.update_by_id("batch_files", str(batch_file.get("_id")), update_data)
             
             return matching_result.best_match.patient_id, matching_result
@@ -517,7 +805,9 @@ class BatchProcessingService:
                 "patient_matching_status": PatientMatchingStatusEnum.REVIEW_REQUIRED.value,
                 "review_required": True
             })
+            with_review_triage(batch_file, update_data)
             
+            batch_file.update(update_data)
             await db.update_by_id("batch_files", str(batch_file.get("_id")), update_data)
             
             # For now, create new patient but mark for review
@@ -530,6 +820,7 @@ class BatchProcessingService:
                 "patient_matching_status": PatientMatchingStatusEnum.NEW_PATIENT.value
             })
             
+            batch_file.update(update_data)
             await db.update_by_id("batch_files", str(batch_file.get("_id")), update_data)
             
             patient_id = await self._create_new_patient(batch_file, db)
@@ -566,19 +857,25 @@ class BatchProcessingService:
             
             # Create patient with minimal information from filename
             patient_data = {
-                "medical_record_number": batch_file.get("parsed_patient_id"),
                 "name": full_name,
                 "birth_date": "1900-01-01",  # Default date - requires admin review
                 "gender": "desconocido",  # Default gender - requires admin review
-                "doctor_id": 1,  # Default doctor - requires admin review
+                "doctor_id": await self.reference_data.get_default_doctor_id(db),  # Requires admin review
                 "status": "Activo",
                 "created_at": datetime.now(),
                 "updated_at": datetime.now()
             }
             
-            patient_id = await db.create("patients", patient_data)
+            # Atomic on the unique medical_record_number: another worker may have created it
+            patient, created = await db.upsert(
+                "patients", {"medical_record_number": batch_file.get("parsed_patient_id")}, patient_data
+            )
+            patient_id = patient.get("id") or patient.get("_id")
             
-            logger.info(f"👤 Created new patient: {full_name} (ID: {patient_id})")
+            if created:
+                logger.info(f"👤 Created new patient: {full_name} (ID: {patient_id})")
+            else:
+                logger.info(f"👤 Reusing existing patient for expediente {batch_file.get('parsed_patient_id')} (ID: {patient_id})")
             
             return patient_id
             
@@ -587,45 +884,51 @@ class BatchProcessingService:
             return None
     
     async def _read_file_content(self, file_path: str) -> str:
-        """Read file content (PDF extraction would go here)"""
+        """Extract file text off the event loop (in a worker process when an extraction executor is set)"""
         
-        # For now, return placeholder content
-        # In production, this would use PDF extraction libraries
-        return f"Document content from {os.path.basename(file_path)}"
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.extraction_executor, extract_text_from_path, file_path)
     
-    async def _create_medical_document(
+    async def _find_existing_document(
         self,
         batch_file: Dict[str, Any],
-        patient_id: int,
-        content: str,
-        processing_type: str,
+        patient_id: Any,
         db: DatabaseSession
-    ) -> int:
-        """Create medical document record"""
-        
-        # Map TecSalud document types to our enum
-        doc_type_mapping = {
-            'CONS': DocumentTypeEnum.CONSULTATION.value,
-            'HIST': DocumentTypeEnum.HISTORY.value,
-            'LAB': DocumentTypeEnum.LAB_RESULTS.value,
-            'IMG': DocumentTypeEnum.IMAGING.value,
-            'EMER': DocumentTypeEnum.CONSULTATION.value,
-            'CIRUG': DocumentTypeEnum.SURGERY.value,
-            'RECETA': DocumentTypeEnum.PRESCRIPTION.value,
-            'ALTA': DocumentTypeEnum.DISCHARGE.value
-        }
+    ) -> Optional[Any]:
+        """Document already created for a batch file by an earlier, interrupted run"""
         
-        document_type = doc_type_mapping.get(
-            batch_file.get("parsed_document_type"), 
-            DocumentTypeEnum.OTHER.value
-        )
+        if batch_file.get("medical_document_id"):
+            return batch_file["medical_document_id"]
+        
+        if not batch_file.get("content_hash"):
+            return None
         
-        document_data = {
+        existing = await db.find_one("medical_documents", {
             "patient_id": patient_id,
-            "document_type": document_type,
+            "content_hash": batch_file.get("content_hash"),
+            "original_filename": batch_file.get("original_filename")
+        })
+        if existing:
+            logger.info(f"♻️ Reusing document {existing.get('_id')} for {batch_file.get('original_filename')}")
+            return existing.get("_id")
+        return None
+    
+    def build_medical_document(
+        self,
+        batch_file: Dict[str, Any],
+        patient_id: Any,
+        content: str,
+        processing_type: str,
+        created_by: str = "batch_processor"
+    ) -> Dict[str, Any]:
+        """Medical document record for the content of a batch file"""
+        
+        return {
+            "patient_id": patient_id,
+            "document_type": self.reference_data.document_type(batch_file.get("parsed_document_type")),
             "title": f"{batch_file.get('parsed_document_type')} - {batch_file.get('parsed_patient_name')}",
             "content": content,
-            "created_by": "batch_processor",
+            "created_by": created_by,
             "processing_type": processing_type,
             "original_filename": batch_file.get("original_filename"),
             "vectorization_status": VectorizationStatusEnum.PENDING.value,
@@ -633,6 +936,22 @@ class BatchProcessingService:
             "created_at": datetime.now(),
             "updated_at": datetime.now()
         }
+    
+    async def _create_medical_document(
+        self,
+        batch_file: Dict[str, Any],
+        patient_id: int,
+        content: str,
+        processing_type: str,
+        db: DatabaseSession,
+        document_writer: Optional[BulkInsertBuffer] = None
+    ) -> int:
+        """Create medical document record (through the bulk writer when one is given)"""
+        
+        document_data = self.build_medical_document(batch_file, patient_id, content, processing_type)
+        
+        if document_writer:
+            return await document_writer.insert(document_data)
         
         document_id = await db.create("medical_documents", document_data)
         
@@ -684,43 +1003,122 @@ class BatchProcessingService:
     async def get_batch_status(
         self,
         session_id: str,
-        db: DatabaseSession
+        db: DatabaseSession,
+        include_files: bool = True
     ) -> Dict[str, Any]:
-        """Get current status of batch processing"""
+        """
+        Get current status of batch processing
         
-        batch_upload = db.query(BatchUpload).filter_by(session_id=session_id).first()
+        File counts come from a single aggregation over ``batch_files`` grouped by
+        processing and matching status; the per-file list is only loaded when
+        ``include_files`` is set.
+        """
+        
+        batch_upload = await db.find_one("batch_uploads", {"session_id": session_id})
         if not batch_upload:
             raise ValueError(f"Batch upload session not found: {session_id}")
         
-        # Get detailed file status
-        batch_files = db.query(BatchFile).filter_by(batch_upload_id=batch_upload.id).all()
+        batch_upload_id = str(batch_upload.get("_id"))
+        try:
+            groups = await db.aggregate("batch_files", [
+                {"$match": {"batch_upload_id": batch_upload_id}},
+                {"$group": {
+                    "_id": {"processing": "$processing_status", "matching": "$patient_matching_status"},
+                    "files": {"$sum": 1},
+                    "review_required": {"$sum": {"$cond": ["$review_required", 1, 0]}}
+                }}
+            ])
+        except NotImplementedError:
+            groups = []
         
-        file_status = []
-        for batch_file in batch_files:
-            file_status.append({
-                'filename': batch_file.original_filename,
-                'patient_matching_status': batch_file.patient_matching_status,
-                'processing_status': batch_file.processing_status,
-                'matching_confidence': batch_file.matching_confidence,
-                'review_required': batch_file.review_required,
-                'error_message': batch_file.error_message,
-                'processed_at': batch_file.processed_at
-            })
+        by_processing_status: Dict[str, int] = {}
+        by_matching_status: Dict[str, int] = {}
+        review_required = 0
+        for group in groups:
+            key = group["_id"]
+            processing = key.get("processing") or VectorizationStatusEnum.PENDING.value
+            matching = key.get("matching") or PatientMatchingStatusEnum.PENDING.value
+            by_processing_status[processing] = by_processing_status.get(processing, 0) + group["files"]
+            by_matching_status[matching] = by_matching_status.get(matching, 0) + group["files"]
+            review_required += group["review_required"]
         
-        return {
+        if not groups:
+            # Adapters without aggregation support (SQLite) return no groups
+            by_processing_status, by_matching_status, review_required = await self._count_batch_files_by_status(
+                batch_upload_id, db
+            )
+        
+        status = {
             'session_id': session_id,
-            'status': batch_upload.status,
-            'uploaded_by': batch_upload.uploaded_by,
-            'processing_type': batch_upload.processing_type,
-            'total_files': batch_upload.total_files,
-            'processed_files': batch_upload.processed_files,
-            'failed_files': batch_upload.failed_files,
-            'created_at': batch_upload.created_at,
-            'started_at': batch_upload.started_at,
-            'completed_at': batch_upload.completed_at,
-            'error_message': batch_upload.error_message,
-            'files': file_status
+            'status': batch_upload.get("status"),
+            'uploaded_by': batch_upload.get("uploaded_by"),
+            'processing_type': batch_upload.get("processing_type"),
+            'total_files': sum(by_processing_status.values()),
+            'processed_files': by_processing_status.get(VectorizationStatusEnum.COMPLETED.value, 0),
+            'failed_files': by_processing_status.get(VectorizationStatusEnum.FAILED.value, 0),
+            'files_by_processing_status': by_processing_status,
+            'files_by_matching_status': by_matching_status,
+            'review_required': review_required,
+            'created_at': batch_upload.get("created_at"),
+            'started_at': batch_upload.get("started_at"),
+            'completed_at': batch_upload.get("completed_at"),
+            'error_message': batch_upload.get("error_message")
         }
+        
+        if include_files:
+            batch_files = await db.find_many("batch_files", {"batch_upload_id": batch_upload_id})
+            status['files'] = [
+                {
+                    'filename': batch_file.get("original_filename"),
+                    'patient_matching_status': batch_file.get("patient_matching_status"),
+                    'processing_status': batch_file.get("processing_status"),
+                    'matching_confidence': batch_file.get("matching_confidence"),
+                    'review_required': batch_file.get("review_required"),
+                    'error_message': batch_file.get("error_message"),
+                    'processed_at': batch_file.get("processed_at")
+                }
+                for batch_file in batch_files
+            ]
+        
+        return status
+    
+    async def _count_batch_files_by_status(
+        self,
+        batch_upload_id: str,
+        db: DatabaseSession
+    ) -> Tuple[Dict[str, int], Dict[str, int], int]:
+        """
+        Count a session's files per processing and matching status with ``count`` queries
+        
+        Files without a known status are counted as pending, as in the aggregation.
+        
+        Returns:
+            Files by processing status, files by matching status and files requiring review
+        """
+        session_filter = {"batch_upload_id": batch_upload_id}
+        total_files = await db.count("batch_files", session_filter)
+        
+        async def count_by(field: str, values: List[str], pending: str) -> Dict[str, int]:
+            counts = {}
+            for value in values:
+                if value == pending:
+                    continue
+                files = await db.count("batch_files", {**session_filter, field: value})
+                if files:
+                    counts[value] = files
+            remaining = total_files - sum(counts.values())
+            if remaining > 0:
+                counts[pending] = remaining
+            return counts
+        
+        by_processing_status = await count_by(
+            "processing_status", [status.value for status in VectorizationStatusEnum], VectorizationStatusEnum.PENDING.value
+        )
+        by_matching_status = await count_by(
+            "patient_matching_status", [status.value for status in PatientMatchingStatusEnum], PatientMatchingStatusEnum.PENDING.value
+        )
+        review_required = await db.count("batch_files", {**session_filter, "review_required": True})
+        return by_processing_status, by_matching_status, review_required
     
     async def get_files_requiring_review(
         self,
@@ -729,24 +1127,24 @@ class BatchProcessingService:
     ) -> List[Dict[str, Any]]:
         """Get files that require admin review"""
         
-        batch_upload = db.query(BatchUpload).filter_by(session_id=session_id).first()
+        batch_upload = await db.find_one("batch_uploads", {"session_id": session_id})
         if not batch_upload:
             raise ValueError(f"Batch upload session not found: {session_id}")
         
-        review_files = db.query(BatchFile).filter_by(
-            batch_upload_id=batch_upload.id,
-            review_required=True
-        ).all()
+        review_files = await db.find_many("batch_files", {
+            "batch_upload_id": str(batch_upload.get("_id")),
+            "review_required": True
+        })
         
         return [
             {
-                'filename': batch_file.original_filename,
-                'parsed_patient_name': batch_file.parsed_patient_name,
-                'parsed_patient_id': batch_file.parsed_patient_id,
-                'matching_confidence': batch_file.matching_confidence,
-                'matching_details': batch_file.matching_details,
-                'error_message': batch_file.error_message,
-                'patient_matching_status': batch_file.patient_matching_status
+                'filename': batch_file.get("original_filename"),
+                'parsed_patient_name': batch_file.get("parsed_patient_name"),
+                'parsed_patient_id': batch_file.get("parsed_patient_id"),
+                'matching_confidence': batch_file.get("matching_confidence"),
+                'matching_details': batch_file.get("matching_details"),
+                'error_message': batch_file.get("error_message"),
+                'patient_matching_status': batch_file.get("patient_matching_status")
             }
             for batch_file in review_files
         ]
@@ -766,4 +1164,16 @@ class BatchProcessingService:
             logger.info(f"🧹 Cleaned up batch session directory: {session_id}")
         
         # Optionally remove batch records (keep for audit trail)
-        # This could be implemented as a separate cleanup job 
\ No newline at end of file
+        # This could be implemented as a separate cleanup job 
+
+
+BATCH_JOB_TYPE = "batch_processing"
+
+
+async def _run_batch_job(payload: Dict[str, Any], db: DatabaseSession) -> Dict[str, Any]:
+    """Job handler: process a batch upload session, resuming it if the job was interrupted"""
+    result = await BatchProcessingService().process_batch_upload(payload["session_id"], db, resume=True)
+    return {**asdict(result), "status": result.status.value}
+
+
+job_queue.register_handler(BATCH_JOB_TYPE, _run_batch_job)
@@ -0,0 +1,158 @@
+"""
+Batch Progress Tracker
+In-memory progress counters for running batch sessions (files done, throughput, ETA
+and per-stage latency), so progress can be streamed without querying the database
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Live status of a run that was cancelled; the session itself stays processing in
+# the database so it can be resumed
+CANCELLED_STATUS = "cancelled"
+
+
+@dataclass
+class StageLatency:
+    """Accumulated latency of one pipeline stage"""
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_seconds / self.count * 1000, 1) if self.count else 0.0,
+            "max_ms": round(self.max_seconds * 1000, 1)
+        }
+
+
+@dataclass
+class BatchProgress:
+    """Live progress of one batch session run"""
+    session_id: str
+    total_files: int
+    completed_before: int = 0  # Files completed by an earlier run of a resumed session
+    clock: Callable[[], float] = time.monotonic
+    processed: int = 0
+    failed: int = 0
+    status: str = "processing"
+    stages: Dict[str, StageLatency] = field(default_factory=dict)
+    started_at: datetime = field(default_factory=datetime.now)
+    finished_at: Optional[float] = None
+
+    def __post_init__(self):
+        self._started = self.clock()
+
+    @property
+    def is_finished(self) -> bool:
+        return self.finished_at is not None
+
+    def record_stage(self, stage: str, seconds: float) -> None:
+        """Record the latency of a pipeline stage for one file"""
+        self.stages.setdefault(stage, StageLatency()).record(seconds)
+
+    @contextmanager
+    def time_stage(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block as one execution of ``stage``"""
+        started = self.clock()
+        try:
+            yield
+        finally:
+            self.record_stage(stage, self.clock() - started)
+
+    def record_file(self, success: bool) -> None:
+        """Count a file that finished processing"""
+        if success:
+            self.processed += 1
+        else:
+            self.failed += 1
+
+    def finish(self, status: str) -> None:
+        self.status = status
+        self.finished_at = self.clock()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current progress: counters, throughput, ETA and per-stage latency"""
+        elapsed = (self.finished_at if self.is_finished else self.clock()) - self._started
+        done_this_run = self.processed + self.failed
+        files_done = self.completed_before + done_this_run
+        remaining = max(self.total_files - files_done, 0)
+        throughput = done_this_run / elapsed if elapsed > 0 else 0.0
+
+        eta_seconds = None
+        if self.is_finished:
+            eta_seconds = 0.0
+        elif throughput > 0:
+            eta_seconds = round(remaining / throughput, 1)
+
+        return {
+            "session_id": self.session_id,
+            "status": self.status,
+            "source": "live",
+            "total_files": self.total_files,
+            "files_done": files_done,
+            "processed_files": self.completed_before + self.processed,
+            "failed_files": self.failed,
+            "remaining_files": remaining,
+            "percent_complete": round(files_done / self.total_files * 100, 1) if self.total_files else 100.0,
+            "elapsed_seconds": round(elapsed, 1),
+            "throughput_files_per_second": round(throughput, 3),
+            "eta_seconds": eta_seconds,
+            "stage_latency": {stage: latency.to_dict() for stage, latency in self.stages.items()},
+            "started_at": self.started_at.isoformat()
+        }
+
+
+class BatchProgressTracker:
+    """
+    Registry of live batch progress
+
+    Progress is kept per process; finished sessions stay available for
+    ``retention_seconds`` so clients can read the final numbers.
+    """
+
+    def __init__(self, retention_seconds: float = 3600.0, clock: Callable[[], float] = time.monotonic):
+        self.retention_seconds = retention_seconds
+        self.clock = clock
+        self._sessions: Dict[str, BatchProgress] = {}
+
+    def start(self, session_id: str, total_files: int, completed_before: int = 0) -> BatchProgress:
+        """Start tracking a batch run (replaces the progress of an earlier run)"""
+        self._prune()
+        progress = BatchProgress(
+            session_id=session_id,
+            total_files=total_files,
+            completed_before=completed_before,
+            clock=self.clock
+        )
+        self._sessions[session_id] = progress
+        return progress
+
+    def get(self, session_id: str) -> Optional[BatchProgress]:
+        """Live progress of a session, if it ran in this process"""
+        return self._sessions.get(session_id)
+
+    def _prune(self) -> None:
+        now = self.clock()
+        expired = [
+            session_id for session_id, progress in self._sessions.items()
+            if progress.is_finished and now - progress.finished_at > self.retention_seconds
+        ]
+        for session_id in expired:
+            del self._sessions[session_id]
+
+
+# Global batch progress tracker
+batch_progress_tracker = BatchProgressTracker()
@@ -0,0 +1,334 @@
+"""
+Bulk Import Service
+Imports historical expedientes from a local directory or a CSV manifest without
+HTTP uploads. Files are registered in a batch session where they are (nothing is
+copied) and processed by the regular resumable batch pipeline.
+"""
+
+import asyncio
+import csv
+import hashlib
+import logging
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.database.abstract_layer import DatabaseSession
+from app.db.models import BatchUploadStatusEnum, PatientMatchingStatusEnum, ProcessingTypeEnum
+from app.services.batch_processing_service import BatchProcessingResult, BatchProcessingService
+from app.services.tecsalud_filename_parser import TecSaludFilenameParser
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_PATH_COLUMN = "file_path"
+IMPORT_EXTENSIONS = (".pdf",)
+
+
+def file_fingerprint(file_path: str) -> Tuple[str, int]:
+    """SHA-256 and size of a file, read in 1 MB blocks (runs in a worker process)"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+            size += len(block)
+    return digest.hexdigest(), size
+
+
+def iter_directory(directory: str) -> Iterator[str]:
+    """Walk a directory tree in a stable order, yielding importable files"""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(IMPORT_EXTENSIONS):
+                yield os.path.abspath(os.path.join(root, name))
+
+
+def iter_manifest(manifest_path: str) -> Iterator[str]:
+    """
+    Read file paths from a CSV manifest with a ``file_path`` column
+
+    Relative paths are resolved against the manifest's directory.
+    """
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        if MANIFEST_PATH_COLUMN not in (reader.fieldnames or []):
+            raise ValueError(f"Manifest {manifest_path} has no '{MANIFEST_PATH_COLUMN}' column")
+        for row in reader:
+            file_path = (row.get(MANIFEST_PATH_COLUMN) or "").strip()
+            if file_path:
+                yield os.path.normpath(os.path.join(base_dir, file_path))
+
+
+@dataclass
+class RegistrationResult:
+    """Files added to a batch session by one import run"""
+    registered_files: int = 0
+    already_registered: int = 0
+    unreadable_files: int = 0
+    unparsed_files: int = 0
+    prematched_files: int = 0
+
+
+@dataclass
+class BulkImportResult:
+    """Result of a bulk import run"""
+    session_id: str
+    registration: RegistrationResult
+    processing: BatchProcessingResult
+
+
+class BulkImportService:
+    """
+    Directory / manifest import built on BatchProcessingService
+
+    A run registers files in chunks (hashes computed in a process pool, patients
+    with an exact ``medical_record_number`` resolved with one query per chunk and
+    ``batch_files`` written with ``create_many``), then processes the session with
+    ``process_batch_upload(resume=True)``: text is extracted in the same process
+    pool and medical documents are inserted in bulk batches. Re-running with the
+    same session ID skips files already registered or completed.
+    """
+
+    def __init__(
+        self,
+        batch_service: Optional[BatchProcessingService] = None,
+        workers: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        document_batch_size: Optional[int] = None,
+        chunk_size: Optional[int] = None
+    ):
+        self.batch_service = batch_service or BatchProcessingService()
+        self.parser = TecSaludFilenameParser()
+        if workers is None:
+            workers = settings.BULK_IMPORT_WORKERS or os.cpu_count() or 1
+        self.workers = workers  # 0 hashes and extracts in threads instead of worker processes
+        self.concurrency = concurrency or settings.BULK_IMPORT_CONCURRENCY
+        self.document_batch_size = document_batch_size or settings.BULK_IMPORT_DOCUMENT_BATCH_SIZE
+        self.chunk_size = chunk_size or settings.BULK_IMPORT_REGISTRATION_CHUNK_SIZE
+    
+    async def run(
+        self,
+        db: DatabaseSession,
+        directory: Optional[str] = None,
+        manifest: Optional[str] = None,
+        session_id: Optional[str] = None,
+        processing_type: ProcessingTypeEnum = ProcessingTypeEnum.COMPLETE,
+        uploaded_by: str = "bulk_import"
+    ) -> BulkImportResult:
+        """
+        Register and process files from a directory or CSV manifest
+        
+        Args:
+            db: Database session
+            directory: Directory to walk for files
+            manifest: CSV manifest with a ``file_path`` column
+            session_id: Existing import session to resume (new files are added to it)
+            processing_type: Processing type of a new session
+            uploaded_by: Recorded as the uploader of a new session
+            
+        Returns:
+            BulkImportResult with registration and processing outcomes
+        """
+        if directory and manifest:
+            raise ValueError("Import from either a directory or a manifest, not both")
+        if not (directory or manifest or session_id):
+            raise ValueError("A directory, a manifest or a session to resume is required")
+        
+        if session_id:
+            if not await db.find_one("batch_uploads", {"session_id": session_id}):
+                raise ValueError(f"Batch upload session not found: {session_id}")
+            logger.info(f"♻️ Resuming bulk import session: {session_id}")
+        else:
+            session_id = await self.batch_service.create_batch_upload_session(uploaded_by, processing_type, db)
+        
+        source = None
+        if directory:
+            source = iter_directory(directory)
+        elif manifest:
+            source = iter_manifest(manifest)
+        
+        executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 0 else None
+        saved = (
+            self.batch_service.extraction_executor,
+            self.batch_service.max_parallel_files,
+            self.batch_service.document_batch_size
+        )
+        try:
+            registration = RegistrationResult()
+            if source is not None:
+                registration = await self.register_files(session_id, source, db, executor)
+            
+            batch_upload = await db.find_one("batch_uploads", {"session_id": session_id})
+            if batch_upload.get("status") == BatchUploadStatusEnum.COMPLETED.value:
+                # Registration reopens a finished import only when it added files
+                logger.info(f"✅ Bulk import {session_id} already completed, no files pending")
+                processing = await self._completed_result(session_id, db)
+            else:
+                self.batch_service.extraction_executor = executor
+                self.batch_service.max_parallel_files = self.concurrency
+                self.batch_service.document_batch_size = self.document_batch_size
+                processing = await self.batch_service.process_batch_upload(session_id, db, resume=True)
+        finally:
+            (
+                self.batch_service.extraction_executor,
+                self.batch_service.max_parallel_files,
+                self.batch_service.document_batch_size
+            ) = saved
+            if executor:
+                executor.shutdown()
+        
+        logger.info(
+            f"📦 Bulk import {session_id}: {registration.registered_files} registered, "
+            f"{processing.processed_files}/{processing.total_files} processed"
+        )
+        return BulkImportResult(session_id=session_id, registration=registration, processing=processing)
+    
+    async def _completed_result(self, session_id: str, db: DatabaseSession) -> BatchProcessingResult:
+        """Processing result of a completed session, built from its stored file counts"""
+        status = await self.batch_service.get_batch_status(session_id, db, include_files=False)
+        return BatchProcessingResult(
+            session_id=session_id,
+            total_files=status["total_files"],
+            processed_files=status["processed_files"],
+            failed_files=status["failed_files"],
+            created_patients=0,
+            matched_patients=0,
+            review_required=status["review_required"],
+            processing_time=0.0,
+            status=BatchUploadStatusEnum.COMPLETED,
+            error_details=[]
+        )
+    
+    async def register_files(
+        self,
+        session_id: str,
+        file_paths: Iterable[str],
+        db: DatabaseSession,
+        executor: Optional[Executor] = None
+    ) -> RegistrationResult:
+        """
+        Add files to a batch session in chunks, skipping files it already has
+        
+        Args:
+            session_id: Batch upload session ID
+            file_paths: Paths of the files to import (read in place)
+            db: Database session
+            executor: Executor used to hash files (default thread pool when None)
+            
+        Returns:
+            RegistrationResult with per-outcome counts
+        """
+        batch_upload = await db.find_one("batch_uploads", {"session_id": session_id})
+        if not batch_upload:
+            raise ValueError(f"Batch upload session not found: {session_id}")
+        batch_upload_id = str(batch_upload.get("_id"))
+        
+        known_paths = {
+            batch_file.get("file_path")
+            for batch_file in await db.find_many("batch_files", {"batch_upload_id": batch_upload_id})
+        }
+        result = RegistrationResult()
+        loop = asyncio.get_running_loop()
+        paths = iter(file_paths)
+        
+        while True:
+            chunk = list(islice(paths, self.chunk_size))
+            if not chunk:
+                break
+            
+            new_paths = []
+            for file_path in chunk:
+                if file_path in known_paths:
+                    result.already_registered += 1
+                else:
+                    known_paths.add(file_path)
+                    new_paths.append(file_path)
+            if not new_paths:
+                continue
+            
+            fingerprints = await asyncio.gather(
+                *(loop.run_in_executor(executor, file_fingerprint, file_path) for file_path in new_paths),
+                return_exceptions=True
+            )
+            
+            rows = []
+            for file_path, fingerprint in zip(new_paths, fingerprints):
+                if isinstance(fingerprint, Exception):
+                    logger.warning(f"⚠️ Skipping unreadable file {file_path}: {str(fingerprint)}")
+                    known_paths.discard(file_path)  # Retried by the next run
+                    result.unreadable_files += 1
+                    continue
+                
+                filename = os.path.basename(file_path)
+                content_hash, file_size = fingerprint
+                parsing_result = self.parser.parse_filename(filename, with_suggestions=False)
+                if not parsing_result.success:
+                    result.unparsed_files += 1
+                rows.append(self.batch_service.build_batch_file(
+                    batch_upload_id, filename, file_path, file_size, content_hash, parsing_result
+                ))
+            
+            result.prematched_files += await self._prematch_patients(rows, db)
+            if rows:
+                await db.create_many("batch_files", rows)
+                result.registered_files += len(rows)
+            
+            logger.info(f"📥 Registered {result.registered_files} files in bulk import {session_id}")
+        
+        session_update = {"total_files": len(known_paths), "import_source": "bulk_import"}
+        if result.registered_files and batch_upload.get("status") == BatchUploadStatusEnum.COMPLETED.value:
+            # New files reopen a finished import so they are processed
+            session_update["status"] = BatchUploadStatusEnum.PROCESSING.value
+        await db.update_by_id("batch_uploads", batch_upload_id, session_update)
+        return result
+    
+    async def _prematch_patients(self, rows: List[Dict[str, Any]], db: DatabaseSession) -> int:
+        """
+        Resolve rows whose expediente is an existing medical record number
+        
+        One query per chunk replaces per-file fuzzy matching for known patients;
+        ``process_batch_upload`` reuses the recorded ``matched_patient_id``.
+        
+        Returns:
+            Number of rows matched
+        """
+        expedientes = sorted({row["parsed_patient_id"] for row in rows if row.get("parsed_patient_id")})
+        if not expedientes:
+            return 0
+        
+        patients = await db.find_many("patients", {"medical_record_number": {"$in": expedientes}})
+        patients_by_expediente = {patient.get("medical_record_number"): patient for patient in patients}
+        
+        matched = 0
+        for row in rows:
+            patient = patients_by_expediente.get(row.get("parsed_patient_id"))
+            if patient is not None:
+                patient_id = patient.get("id") or patient.get("_id")
+                row.update({
+                    "matched_patient_id": patient_id,
+                    "matching_confidence": 1.0,
+                    "patient_matching_status": PatientMatchingStatusEnum.MATCHED.value,
+                    "matching_details": {
+                        "algorithm": "exact_medical_record_number",
+                        "confidence": 1.0,
+                        "best_patient_id": str(patient_id),
+                        "create_new_recommended": False,
+                        "total_candidates": 1,
+                        "suggestions": [{
+                            "patient_id": str(patient_id),
+                            "name": patient.get("name"),
+                            "medical_record_number": patient.get("medical_record_number"),
+                            "similarity": 1.0,
+                            "match_type": "exact_expediente",
+                            "expediente_match": True,
+                            "reasons": ["Exact medical_record_number match (bulk import)"]
+                        }]
+                    }
+                })
+                matched += 1
+        return matched
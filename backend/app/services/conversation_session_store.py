@@ -0,0 +1,299 @@
+"""
+Conversation Session Store
+Remembers which patient documents a conversation has already sent to the model so
+follow-up turns can carry a compact digest instead of every full document
+"""
+
+import logging
+import re
+import unicodedata
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from app.core.config import settings
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Queries that explicitly need the complete documents again
+FULL_CONTEXT_PATTERN = re.compile(
+    r"\b(resumen completo|expediente completo|todo el expediente|todos los documentos|"
+    r"texto completo|documento completo|a detalle|en detalle|detallad[oa]s?|"
+    r"revisa(r)? (de nuevo|otra vez)|vuelve a revisar)\b"
+)
+
+# Very common Spanish words ignored when matching passages to a query
+STOPWORDS = {
+    "que", "cual", "cuales", "como", "cuando", "donde", "para", "por", "con", "sin",
+    "del", "las", "los", "una", "uno", "unos", "unas", "este", "esta", "estos", "estas",
+    "ese", "esa", "sus", "mas", "muy", "tiene", "tuvo", "fue", "son", "hay", "paciente"
+}
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def query_terms(query: str) -> Set[str]:
+    """Distinctive, accent-insensitive words of a text (short words and stopwords removed)"""
+    return {
+        word for word in re.findall(r"\w+", _normalize(query))
+        if len(word) > 2 and word not in STOPWORDS
+    }
+
+
+def select_relevant_passages(content: str, query: str, max_chars: int, passage_chars: int = 400) -> List[str]:
+    """
+    Pick the passages of a document that share the most terms with the query
+
+    Args:
+        content: Full document text
+        query: Current user query
+        max_chars: Character budget for all returned passages
+        passage_chars: Approximate passage length
+
+    Returns:
+        Matching passages in document order
+    """
+    terms = query_terms(query)
+    if not terms or not content:
+        return []
+
+    # Group lines into passages of roughly passage_chars characters
+    passages, current = [], ""
+    for line in content.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if current and len(current) + len(line) > passage_chars:
+            passages.append(current)
+            current = ""
+        current = f"{current} {line}".strip()
+    if current:
+        passages.append(current)
+
+    scored = []
+    for index, passage in enumerate(passages):
+        score = len(terms & set(re.findall(r"\w+", _normalize(passage))))
+        if score:
+            scored.append((score, index, passage))
+
+    selected, used = [], 0
+    for score, index, passage in sorted(scored, key=lambda item: (-item[0], item[1])):
+        if used + len(passage) > max_chars:
+            continue
+        selected.append((index, passage))
+        used += len(passage)
+    return [passage for _, passage in sorted(selected)]
+
+
+@dataclass
+class SeenDocument:
+    """Compact record of a document already sent in a conversation"""
+    document_id: str
+    title: str
+    created_at: str
+    document_type: str
+    digest: str
+    content_chars: int
+    first_seen_turn: int
+
+
+@dataclass
+class ConversationSession:
+    """Per-conversation context state"""
+    conversation_id: str
+    patient_id: Optional[str]
+    seen_documents: Dict[str, SeenDocument] = field(default_factory=dict)
+    last_full_context_turn: int = 0
+    created_at: datetime = field(default_factory=datetime.now)
+
+
+@dataclass
+class CarryoverPlan:
+    """Documents to send for one conversation turn"""
+    mode: str  # "full" or "incremental"
+    reason: str
+    turn: int
+    full_documents: List[Dict[str, Any]]
+    digest: List[Dict[str, Any]]
+    passages: List[Dict[str, Any]]
+    chars_saved: int = 0
+
+    def to_metadata(self) -> Dict[str, Any]:
+        """Summary reported in the unified context and response metadata"""
+        return {
+            "mode": self.mode,
+            "reason": self.reason,
+            "turn": self.turn,
+            "full_documents": len(self.full_documents),
+            "digest_documents": len(self.digest),
+            "passages": len(self.passages),
+            "chars_saved": self.chars_saved
+        }
+
+
+class ConversationSessionStore:
+    """
+    In-process store of conversation sessions
+
+    A turn is identified by the number of user messages in the conversation, so
+    planning the same turn twice (retries, cancelled speculative streams) yields
+    the same plan: documents only count as seen from the turn after they were sent.
+
+    Full context is sent on the first turn, every
+    ``CONVERSATION_FULL_CONTEXT_EVERY_N_TURNS`` turns and whenever the query asks
+    for complete or detailed documents; other turns send new documents in full,
+    a digest of the documents already seen and the passages of those documents
+    that match the query.
+    """
+
+    def __init__(
+        self,
+        max_sessions: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        full_context_every_n_turns: Optional[int] = None,
+        digest_max_chars: Optional[int] = None,
+        passage_max_chars: Optional[int] = None
+    ):
+        self.sessions = TTLCache(
+            max_entries=max_sessions or settings.CONVERSATION_SESSION_MAX_SESSIONS,
+            ttl_seconds=ttl_seconds or settings.CONVERSATION_SESSION_TTL_SECONDS
+        )
+        self.full_context_every_n_turns = (
+            settings.CONVERSATION_FULL_CONTEXT_EVERY_N_TURNS
+            if full_context_every_n_turns is None else full_context_every_n_turns
+        )
+        self.digest_max_chars = digest_max_chars or settings.CONVERSATION_DIGEST_MAX_CHARS
+        self.passage_max_chars = passage_max_chars or settings.CONVERSATION_PASSAGE_MAX_CHARS
+        self.turns_by_mode: Dict[str, int] = {"full": 0, "incremental": 0}
+        self.total_chars_saved = 0
+
+    def get_session(self, conversation_id: str, patient_id: Optional[str]) -> ConversationSession:
+        """Get a conversation session, starting a new one if missing, expired or for another patient"""
+        session = self.sessions.get(conversation_id)
+        if session is None or session.patient_id != patient_id:
+            session = ConversationSession(conversation_id=conversation_id, patient_id=patient_id)
+        # Re-storing refreshes the TTL on every turn
+        self.sessions.set(conversation_id, session)
+        return session
+
+    def _digest(self, document: Dict[str, Any]) -> str:
+        """Short description of a document: its summary, key points or opening text"""
+        if document.get("summary"):
+            text = document["summary"]
+        elif document.get("key_points"):
+            text = "; ".join(document["key_points"])
+        else:
+            text = " ".join((document.get("content") or "").split())
+        if len(text) > self.digest_max_chars:
+            text = text[:self.digest_max_chars].rstrip() + "…"
+        return text
+
+    def plan_context(
+        self,
+        conversation_id: str,
+        patient_id: Optional[str],
+        documents: List[Dict[str, Any]],
+        query: str,
+        turn: int,
+        max_full_documents: Optional[int] = None
+    ) -> CarryoverPlan:
+        """
+        Decide which documents to send for a conversation turn
+
+        Args:
+            conversation_id: Client conversation identifier
+            patient_id: Patient the conversation is about
+            documents: Documents selected for this turn (unified context format)
+            query: Latest user message
+            turn: Number of user messages in the conversation
+            max_full_documents: Full documents the agent renders; the rest are not sent
+                this turn and so are not recorded as seen
+
+        Returns:
+            CarryoverPlan with full documents, digest and relevant passages
+        """
+        session = self.get_session(conversation_id, patient_id)
+        previously_seen = {
+            document_id: seen for document_id, seen in session.seen_documents.items()
+            if seen.first_seen_turn < turn
+        }
+
+        reason = None
+        if not previously_seen:
+            reason = "first_turn"
+        elif self.full_context_every_n_turns and turn - session.last_full_context_turn >= self.full_context_every_n_turns:
+            reason = "periodic_refresh"
+        elif FULL_CONTEXT_PATTERN.search(_normalize(query)):
+            reason = "full_context_requested"
+
+        if reason:
+            plan = CarryoverPlan(mode="full", reason=reason, turn=turn, full_documents=list(documents), digest=[], passages=[])
+            session.last_full_context_turn = max(session.last_full_context_turn, turn)
+        else:
+            new_documents, passages, chars_saved = [], [], 0
+            passage_budget = self.passage_max_chars
+            for document in documents:
+                document_id = str(document.get("document_id"))
+                if document_id not in previously_seen:
+                    new_documents.append(document)
+                    continue
+                content = document.get("content") or ""
+                matches = select_relevant_passages(content, query, passage_budget)
+                passage_budget -= sum(len(passage) for passage in matches)
+                passages.extend(
+                    {"document_id": document_id, "title": document.get("title"), "passage": passage}
+                    for passage in matches
+                )
+                chars_saved += len(content) - sum(len(passage) for passage in matches)
+
+            digest = [asdict(seen) for seen in previously_seen.values()]
+            chars_saved -= sum(len(item["digest"]) for item in digest)
+            plan = CarryoverPlan(
+                mode="incremental",
+                reason="follow_up",
+                turn=turn,
+                full_documents=new_documents,
+                digest=digest,
+                passages=passages,
+                chars_saved=max(chars_saved, 0)
+            )
+
+        if max_full_documents is not None:
+            plan.full_documents = plan.full_documents[:max_full_documents]
+
+        for document in plan.full_documents:
+            document_id = str(document.get("document_id"))
+            if document_id not in session.seen_documents:
+                session.seen_documents[document_id] = SeenDocument(
+                    document_id=document_id,
+                    title=document.get("title") or "Documento Médico",
+                    created_at=str(document.get("created_at") or ""),
+                    document_type=str(document.get("document_type") or ""),
+                    digest=self._digest(document),
+                    content_chars=len(document.get("content") or ""),
+                    first_seen_turn=turn
+                )
+
+        self.turns_by_mode[plan.mode] += 1
+        self.total_chars_saved += plan.chars_saved
+        logger.info(
+            f"🧵 Conversation {conversation_id} turn {turn}: {plan.mode} context ({plan.reason}), "
+            f"{len(plan.full_documents)} full docs, {len(plan.digest)} digested, {len(plan.passages)} passages"
+        )
+        return plan
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get session and carryover statistics"""
+        return {
+            "sessions": self.sessions.get_stats(),
+            "turns_by_mode": dict(self.turns_by_mode),
+            "total_chars_saved": self.total_chars_saved
+        }
+
+
+# Global conversation session store
+conversation_session_store = ConversationSessionStore()
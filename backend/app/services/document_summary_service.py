@@ -0,0 +1,276 @@
+"""
+Document Summary Service
+Generates per-document summaries and key points in the background after ingest so
+chat context can send a compact summary instead of the full text of older or less
+relevant documents
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from app.core.config import settings
+from app.database.factory import get_db_async
+from app.models.chat import ChatMessage, ModelType
+from app.services.azure_openai_service import AzureOpenAIService, azure_openai_service as shared_openai_service
+from app.services.patient_digest_service import FACT_FIELDS, PatientDigestService, patient_digest_service
+from app.services.rate_limiter import RequestPriority
+
+logger = logging.getLogger(__name__)
+
+
+class SummaryStatus:
+    """Values of ``medical_documents.summary_status``"""
+    PENDING = "pending"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+def content_fingerprint(content: str) -> str:
+    """Hash of the summarized text, used to skip documents whose summary is current"""
+    return hashlib.sha256((content or "").encode("utf-8")).hexdigest()
+
+
+def format_summary_content(summary: Optional[str], key_points: Optional[List[str]]) -> str:
+    """Text sent to the model in place of a document's full content"""
+    parts = []
+    if summary:
+        parts.append(f"Resumen: {summary}")
+    if key_points:
+        parts.append("Puntos clave:\n" + "\n".join(f"- {point}" for point in key_points))
+    return "\n".join(parts)
+
+
+class DocumentSummaryService:
+    """
+    Background summarization of medical documents
+
+    Documents are scheduled right after they are stored; summaries run as batch
+    priority GPT-4o-mini calls so they never compete with interactive chat, and at
+    most ``DOCUMENT_SUMMARY_CONCURRENCY`` run at once.
+    """
+
+    def __init__(
+        self,
+        azure_openai_service: Optional[AzureOpenAIService] = None,
+        max_concurrency: Optional[int] = None,
+        digest_service: Optional[PatientDigestService] = None
+    ):
+        self.azure_openai_service = azure_openai_service or shared_openai_service
+        self.digest_service = digest_service or patient_digest_service
+        self._semaphore = asyncio.Semaphore(max_concurrency or settings.DOCUMENT_SUMMARY_CONCURRENCY)
+        self._tasks: Set[asyncio.Task] = set()
+        self.stats = {"scheduled": 0, "completed": 0, "skipped": 0, "failed": 0}
+
+        self.system_prompt = """Eres un asistente médico que resume documentos clínicos de TecSalud.
+        Genera un resumen breve y fiel del documento y sus puntos clave:
+        - Diagnósticos, procedimientos, resultados relevantes y tratamientos
+        - Fechas, valores y dosis tal como aparecen en el documento
+        - No agregues información que no esté en el documento
+        Extrae además los diagnósticos, medicamentos, alergias y resultados de
+        laboratorio mencionados en el documento (listas vacías si no hay).
+        Responde en español."""
+
+        self.summary_tools = [
+            {
+                "type": "function",
+                "function": {
+                    "name": "store_document_summary",
+                    "description": "Store the summary, key points and clinical facts of a medical document",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "summary": {
+                                "type": "string",
+                                "description": "Summary of the document (max 120 words)"
+                            },
+                            "key_points": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "Clinically relevant key points (max 8)"
+                            },
+                            "diagnoses": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "Diagnoses or conditions documented"
+                            },
+                            "medications": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "Medications with dose when stated"
+                            },
+                            "allergies": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "Documented allergies"
+                            },
+                            "labs": {
+                                "type": "array",
+                                "items": {
+                                    "type": "object",
+                                    "properties": {
+                                        "name": {"type": "string"},
+                                        "value": {"type": "string", "description": "Value with units"},
+                                        "date": {"type": "string", "description": "YYYY-MM-DD if stated"}
+                                    },
+                                    "required": ["name", "value"]
+                                },
+                                "description": "Laboratory results"
+                            }
+                        },
+                        "required": ["summary", "key_points"]
+                    }
+                }
+            }
+        ]
+
+    async def summarize_content(self, title: str, content: str) -> Dict[str, Any]:
+        """
+        Summarize a document's text
+
+        Args:
+            title: Document title
+            content: Full document text
+
+        Returns:
+            Dict with ``summary``, ``key_points`` and ``clinical_facts``
+        """
+        if not self.azure_openai_service.is_initialized:
+            await self.azure_openai_service.initialize()
+
+        text = content[:settings.DOCUMENT_SUMMARY_MAX_INPUT_CHARS]
+        response = await self.azure_openai_service.chat_completion(
+            messages=[
+                ChatMessage(role="system", content=self.system_prompt),
+                ChatMessage(role="user", content=f"Título: {title}\n\n{text}")
+            ],
+            model_type=ModelType.GPT4O_MINI,
+            temperature=0.0,
+            max_tokens=1000,
+            tools=self.summary_tools,
+            tool_choice="auto",
+            priority=RequestPriority.BATCH
+        )
+
+        for tool_call in response.tool_calls or []:
+            if tool_call.function["name"] == "store_document_summary":
+                data = json.loads(tool_call.function["arguments"])
+                return {
+                    "summary": (data.get("summary") or "").strip(),
+                    "key_points": [point.strip() for point in data.get("key_points", []) if point.strip()],
+                    "clinical_facts": {field: data.get(field) or [] for field in FACT_FIELDS}
+                }
+
+        # Model answered in plain text instead of calling the tool
+        return {
+            "summary": (response.content or "").strip(),
+            "key_points": [],
+            "clinical_facts": {field: [] for field in FACT_FIELDS}
+        }
+
+    async def summarize_document(self, document_id: Any, db=None) -> bool:
+        """
+        Summarize a stored document and save the result on ``medical_documents``
+
+        Args:
+            document_id: Document ID
+            db: Database session (a new one is opened when omitted)
+
+        Returns:
+            True if a new summary was stored
+        """
+        if db is None:
+            async with get_db_async() as session:
+                return await self.summarize_document(document_id, session)
+
+        document = await db.get_by_id("medical_documents", document_id)
+        if not document:
+            logger.warning(f"⚠️ Document {document_id} not found for summarization")
+            self.stats["skipped"] += 1
+            return False
+
+        content = document.get("content") or ""
+        fingerprint = content_fingerprint(content)
+        if not content.strip() or (
+            document.get("summary_status") == SummaryStatus.COMPLETED
+            and document.get("summary_content_hash") == fingerprint
+        ):
+            self.stats["skipped"] += 1
+            return False
+
+        try:
+            async with self._semaphore:
+                result = await self.summarize_content(document.get("title") or "Documento Médico", content)
+        except Exception as e:
+            logger.error(f"❌ Summary failed for document {document_id}: {str(e)}")
+            await db.update("medical_documents", document_id, {
+                "summary_status": SummaryStatus.FAILED,
+                "updated_at": datetime.now().isoformat()
+            })
+            self.stats["failed"] += 1
+            return False
+
+        summary_fields = {
+            "summary": result["summary"],
+            "key_points": result["key_points"],
+            "clinical_facts": result["clinical_facts"],
+            "summary_status": SummaryStatus.COMPLETED,
+            "summary_content_hash": fingerprint,
+            "summarized_at": datetime.now().isoformat()
+        }
+        await db.update("medical_documents", document_id, summary_fields)
+        self.stats["completed"] += 1
+        
+        if settings.PATIENT_DIGEST_ENABLED:
+            try:
+                await self.digest_service.apply_document({**document, **summary_fields}, result["clinical_facts"], db)
+            except Exception as e:
+                logger.error(f"❌ Patient digest update failed for document {document_id}: {str(e)}")
+        logger.info(
+            f"📝 Summarized document {document_id}: {len(content)} → "
+            f"{len(format_summary_content(result['summary'], result['key_points']))} chars"
+        )
+        return True
+
+    def schedule(self, document_id: Any) -> Optional[asyncio.Task]:
+        """
+        Summarize a document in the background
+
+        Args:
+            document_id: ID of a document that was just stored
+
+        Returns:
+            The background task, or None when summaries are disabled
+        """
+        if not settings.DOCUMENT_SUMMARIES_ENABLED or document_id is None:
+            return None
+
+        task = asyncio.create_task(self._run(document_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        self.stats["scheduled"] += 1
+        return task
+
+    async def _run(self, document_id: Any) -> None:
+        """Background task body; errors are logged, never raised"""
+        try:
+            await self.summarize_document(document_id)
+        except Exception as e:
+            logger.error(f"❌ Background summary failed for document {document_id}: {str(e)}")
+            self.stats["failed"] += 1
+
+    async def drain(self) -> None:
+        """Wait for all scheduled summaries to finish"""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get summarization counters"""
+        return {**self.stats, "in_progress": len(self._tasks)}
+
+
+# Global document summary service
+document_summary_service = DocumentSummaryService()
@@ -0,0 +1,231 @@
+"""
+Embedding Cache
+Disk-backed cache for embedding vectors keyed by content hash and embedding model
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed embedding cache
+
+    Vectors are stored as packed float32 blobs keyed by ``(sha256(text), model)``,
+    so re-embedding unchanged content costs a local lookup instead of an API call.
+    The cache is bounded by ``max_entries`` and evicts least recently used vectors.
+
+    Each instance tracks the entry count in memory. Processes sharing the cache file
+    do not see each other's inserts until the count is reseeded from the table, at
+    most every ``recount_seconds``, so the file can exceed the bound by what other
+    processes insert in that interval.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        recount_seconds: Optional[float] = None
+    ):
+        self.db_path = db_path or settings.EMBEDDING_CACHE_PATH
+        self.max_entries = max_entries or settings.EMBEDDING_CACHE_MAX_ENTRIES
+        self.recount_seconds = (
+            settings.EMBEDDING_CACHE_RECOUNT_SECONDS if recount_seconds is None else recount_seconds
+        )
+        # Evict down to 90% of the limit so eviction does not run on every insert
+        self.low_watermark = int(self.max_entries * 0.9)
+        self._conn: Optional[sqlite3.Connection] = None
+        # Upper bound of the stored entries (replaced rows are counted as new), kept in
+        # memory so inserts only count the table when the bound may have been crossed
+        self._approx_entries = 0
+        self._counted_at = 0.0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the cache database lazily and create the schema"""
+        if self._conn is None:
+            if self.db_path != ":memory:":
+                Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    text_hash TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    dimensions INTEGER NOT NULL,
+                    vector BLOB NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL,
+                    PRIMARY KEY (text_hash, model)
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_embeddings_last_accessed ON embeddings (last_accessed)"
+            )
+            conn.commit()
+            self._count_entries(conn)
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        """Content hash used as cache key"""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _pack(vector: List[float]) -> bytes:
+        return array("f", vector).tobytes()
+
+    @staticmethod
+    def _unpack(blob: bytes) -> List[float]:
+        vector = array("f")
+        vector.frombytes(blob)
+        return vector.tolist()
+
+    def get_many(self, texts: List[str], model: str) -> List[Optional[List[float]]]:
+        """
+        Look up cached embeddings
+
+        Args:
+            texts: Texts to look up
+            model: Embedding deployment name
+
+        Returns:
+            List aligned with ``texts`` holding cached vectors or None for misses
+        """
+        if not texts:
+            return []
+
+        hashes = [self.hash_text(text) for text in texts]
+        unique_hashes = list(dict.fromkeys(hashes))
+        found: Dict[str, List[float]] = {}
+
+        with self._lock:
+            conn = self._connect()
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(unique_hashes), 500):
+                chunk = unique_hashes[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *chunk]
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = self._unpack(blob)
+
+            if found:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE embeddings SET last_accessed = ? WHERE text_hash = ? AND model = ?",
+                    [(now, text_hash, model) for text_hash in found]
+                )
+                conn.commit()
+
+        results = [found.get(text_hash) for text_hash in hashes]
+        hits = sum(1 for vector in results if vector is not None)
+        self.hits += hits
+        self.misses += len(results) - hits
+        return results
+
+    def put_many(self, texts: List[str], model: str, embeddings: List[List[float]]) -> None:
+        """
+        Store embeddings in the cache
+
+        Args:
+            texts: Texts that were embedded
+            model: Embedding deployment name
+            embeddings: Vectors aligned with ``texts``
+        """
+        if not texts:
+            return
+
+        now = time.time()
+        rows = [
+            (self.hash_text(text), model, len(vector), self._pack(vector), now, now)
+            for text, vector in zip(texts, embeddings)
+        ]
+
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings "
+                "(text_hash, model, dimensions, vector, created_at, last_accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.commit()
+            self._approx_entries += len(rows)
+            self._evict_if_needed(conn)
+
+    def _count_entries(self, conn: sqlite3.Connection) -> int:
+        """Reseed the in-memory entry count from the table"""
+        self._approx_entries = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        self._counted_at = time.monotonic()
+        return self._approx_entries
+
+    def _evict_if_needed(self, conn: sqlite3.Connection) -> None:
+        """Evict least recently used entries when the cache exceeds its bound"""
+        if time.monotonic() - self._counted_at >= self.recount_seconds:
+            self._count_entries(conn)
+        if self._approx_entries <= self.max_entries:
+            return
+
+        total = self._count_entries(conn)
+        if total <= self.max_entries:
+            return
+
+        to_evict = total - self.low_watermark
+        conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN "
+            "(SELECT rowid FROM embeddings ORDER BY last_accessed ASC LIMIT ?)",
+            (to_evict,)
+        )
+        conn.commit()
+        self._approx_entries = total - to_evict
+        self.evictions += to_evict
+        logger.info(f"🧹 Evicted {to_evict} embeddings from cache (limit {self.max_entries})")
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get cache statistics"""
+        with self._lock:
+            entries = self._connect().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions
+        }
+
+    def clear(self) -> None:
+        """Remove all cached embeddings"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM embeddings")
+            conn.commit()
+            self._approx_entries = 0
+
+    def close(self) -> None:
+        """Close the cache database"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
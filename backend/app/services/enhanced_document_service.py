@@ -21,7 +21,11 @@ class ProcessingTypeEnum(str, Enum):
     BOTH = "both"
 
 # ChromaDB removed - using only complete documents
-from app.services.azure_openai_service import AzureOpenAIService
+from app.services.azure_openai_service import AzureOpenAIService, azure_openai_service as shared_openai_service
+from app.services.conversation_session_store import query_terms
+from app.services.document_summary_service import format_summary_content
+from app.services.patient_digest_service import patient_digest_service
+from app.core.config import settings
 from app.utils.exceptions import DocumentError
 
 logger = logging.getLogger(__name__)
@@ -55,6 +59,7 @@ class DocumentContext:
     source: str  # 'mongodb', 'recent', 'critical'
     summary: Optional[str] = None
     key_points: Optional[List[str]] = None
+    content_mode: str = "full"  # "full" text or precomputed "summary"
 
 @dataclass
 class DocumentsContext:
@@ -68,14 +73,16 @@ class DocumentsContext:
     recommendations: List[str]
     confidence: float
     processing_time_ms: float
+    patient_digest: Optional[Dict[str, Any]] = None  # Materialized longitudinal digest
 
 class EnhancedDocumentService:
     """Enhanced document service providing complete medical document context"""
     
-    def __init__(self):
-        self.azure_openai_service = AzureOpenAIService()
+    def __init__(self, azure_openai_service: Optional[AzureOpenAIService] = None):
+        self.azure_openai_service = azure_openai_service or shared_openai_service
         self.max_context_tokens = 32000  # Conservative token limit
         self.max_documents = 10  # Maximum documents per request
+        self.full_text_top_n = settings.CONTEXT_FULL_TEXT_TOP_N  # Ranked documents sent with full text
         
     async def _ensure_azure_openai_initialized(self):
         """Ensure Azure OpenAI service is initialized"""
@@ -142,13 +149,17 @@ class EnhancedDocumentService:
                             title=doc.get("title", "Documento Médico"),
                             content=doc.get("content", ""),
                             document_type=DocumentTypeEnum.OTHER,  # Default type
-                            created_at=datetime.now(),  # Use current time as fallback
+                            created_at=self._parse_created_at(doc),
                             processing_type=ProcessingTypeEnum.COMPLETE,
                             relevance_score=0.8,  # Default high relevance
                             relevance_level=DocumentRelevance.HIGH,
-                            source="mongodb"
+                            source="mongodb",
+                            summary=doc.get("summary"),
+                            key_points=doc.get("key_points")
                         )
                         full_documents.append(doc_context)
+                    
+                    self._score_documents(full_documents, query)
                         
                 except Exception as e:
                     logger.error(f"❌ Error retrieving medical documents: {e}")
@@ -164,7 +175,8 @@ class EnhancedDocumentService:
                 full_documents = sorted(full_documents, key=lambda x: x.relevance_score, reverse=True)
                 logger.info(f"🚨 Using critical documents strategy: {len(full_documents)} documents")
             else:
-                # Default: all documents
+                # Default: all documents, ranked by query relevance and recency
+                full_documents = sorted(full_documents, key=lambda x: x.relevance_score, reverse=True)
                 logger.info(f"📋 Using all documents: {len(full_documents)} documents")
             
             # Apply document limit
@@ -173,6 +185,9 @@ class EnhancedDocumentService:
             else:
                 full_documents = full_documents[:self.max_documents]
             
+            # Only the top-ranked documents keep their full text
+            self._apply_summaries(full_documents)
+            
             # Calculate tokens and apply limits
             total_tokens = sum(len(doc.content) for doc in full_documents)
             if total_tokens > self.max_context_tokens:
@@ -188,6 +203,14 @@ class EnhancedDocumentService:
                 full_documents = truncated_docs
                 total_tokens = current_tokens
             
+            # Longitudinal digest covers the history beyond the selected documents
+            patient_digest = None
+            if db and settings.PATIENT_DIGEST_ENABLED:
+                try:
+                    patient_digest = await patient_digest_service.get_digest(patient_id, db)
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not load patient digest: {e}")
+            
             # Generate comprehensive summary and recommendations
             context_summary = f"Retrieved {len(full_documents)} complete medical documents for patient {patient.get('name', 'Unknown')}. Total content: {total_tokens} tokens."
             
@@ -196,6 +219,8 @@ class EnhancedDocumentService:
                 recommendations.append(f"Found {len(full_documents)} complete medical documents")
                 recommendations.append("Full patient medical history available")
                 recommendations.append("Complete document context available for diagnosis")
+                if patient_digest:
+                    recommendations.append(f"Longitudinal digest covers {patient_digest.get('document_count', 0)} documents")
             else:
                 recommendations.append("No medical documents found for this patient")
                 recommendations.append("Consider creating patient medical record")
@@ -213,7 +238,8 @@ class EnhancedDocumentService:
                 context_summary=context_summary,
                 recommendations=recommendations,
                 confidence=confidence,
-                processing_time_ms=processing_time
+                processing_time_ms=processing_time,
+                patient_digest=patient_digest
             )
             
             logger.info(f"✅ Documents context retrieved: {len(full_documents)} documents, {total_tokens} tokens")
@@ -222,6 +248,75 @@ class EnhancedDocumentService:
         except Exception as e:
             logger.error(f"❌ Failed to get documents context: {str(e)}")
             raise DocumentError(f"Documents context retrieval failed: {str(e)}")
+    
+    @staticmethod
+    def _parse_created_at(doc: Dict[str, Any]) -> datetime:
+        """Creation date stored on the document (oldest possible date if missing)"""
+        value = doc.get("created_at") or doc.get("updated_at")
+        if isinstance(value, str):
+            try:
+                value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            except ValueError:
+                value = None
+        if not isinstance(value, datetime):
+            return datetime.min
+        return value.replace(tzinfo=None)
+    
+    def _score_documents(self, documents: List[DocumentContext], query: str) -> None:
+        """
+        Score documents for the query
+        
+        The score combines the share of query terms found in the document (title,
+        summary, key points and text) with recency, so without matching terms the
+        newest documents rank first.
+        """
+        if not documents:
+            return
+        
+        terms = query_terms(query or "")
+        by_age = sorted(documents, key=lambda x: x.created_at)
+        recency = {
+            id(doc): (index / (len(by_age) - 1) if len(by_age) > 1 else 1.0)
+            for index, doc in enumerate(by_age)
+        }
+        
+        for doc in documents:
+            if terms:
+                text = " ".join([doc.title or "", doc.summary or "", " ".join(doc.key_points or []), doc.content or ""])
+                term_match = len(terms & query_terms(text)) / len(terms)
+            else:
+                term_match = 0.0
+            doc.relevance_score = round(0.7 * term_match + 0.3 * recency[id(doc)], 4)
+            doc.relevance_level = self._relevance_level(doc.relevance_score)
+    
+    @staticmethod
+    def _relevance_level(score: float) -> DocumentRelevance:
+        """Map a relevance score to its level"""
+        if score > 0.8:
+            return DocumentRelevance.CRITICAL
+        if score > 0.6:
+            return DocumentRelevance.HIGH
+        if score > 0.4:
+            return DocumentRelevance.MEDIUM
+        if score > 0.2:
+            return DocumentRelevance.LOW
+        return DocumentRelevance.MINIMAL
+    
+    def _apply_summaries(self, documents: List[DocumentContext]) -> None:
+        """Replace the text of documents ranked below the top N with their precomputed summary"""
+        if not self.full_text_top_n:
+            return
+        
+        summarized = 0
+        for doc in documents[self.full_text_top_n:]:
+            if not (doc.summary or doc.key_points):
+                continue  # Not summarized yet: keep full text
+            doc.content = format_summary_content(doc.summary, doc.key_points)
+            doc.content_mode = "summary"
+            summarized += 1
+        
+        if summarized:
+            logger.info(f"📝 Using summaries for {summarized} lower-ranked documents")
 
 # Global service instance
 enhanced_document_service = EnhancedDocumentService() 
\ No newline at end of file
@@ -0,0 +1,257 @@
+"""
+Job Queue
+In-process asynchronous job queue with job state persisted in the ``jobs`` collection,
+so uploads and batch processing run outside the HTTP request and interrupted jobs
+resume after a restart
+"""
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.database.factory import get_db_async
+
+logger = logging.getLogger(__name__)
+
+JOBS_COLLECTION = "jobs"
+
+# Handler signature: (payload, db) -> result stored on the job
+JobHandler = Callable[[Dict[str, Any], Any], Awaitable[Optional[Dict[str, Any]]]]
+
+# Cleanup signature: (payload) -> None, for jobs failed without running their handler
+JobCleanup = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class JobStatus(str, Enum):
+    """Job lifecycle states"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class JobQueue:
+    """
+    Async job queue with durable state
+
+    Jobs are stored before they are queued and every state change is written to
+    the ``jobs`` collection. On start, jobs left ``queued`` or ``running`` by a
+    previous process are queued again; a job interrupted more than
+    ``max_attempts`` times is marked failed instead of being retried forever.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        db_factory: Callable[[], Any] = get_db_async
+    ):
+        self.max_workers = max_workers or settings.JOB_QUEUE_MAX_WORKERS
+        self.max_attempts = max_attempts or settings.JOB_QUEUE_MAX_ATTEMPTS
+        self.db_factory = db_factory
+        self._handlers: Dict[str, JobHandler] = {}
+        self._cleanups: Dict[str, JobCleanup] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self.stats = {"enqueued": 0, "completed": 0, "failed": 0, "recovered": 0}
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._workers)
+
+    def register_handler(self, job_type: str, handler: JobHandler, cleanup: Optional[JobCleanup] = None) -> None:
+        """
+        Register the coroutine that executes jobs of a type
+
+        Args:
+            job_type: Job type
+            handler: Coroutine executing the job
+            cleanup: Coroutine releasing the job's resources (e.g. staged files) when
+                the job is failed without its handler running
+        """
+        self._handlers[job_type] = handler
+        if cleanup is not None:
+            self._cleanups[job_type] = cleanup
+
+    async def _find_job(self, job_id: str, db) -> Optional[Dict[str, Any]]:
+        return await db.find_one(JOBS_COLLECTION, {"job_id": job_id})
+
+    async def _update_job(self, job: Dict[str, Any], db, **fields) -> None:
+        fields["updated_at"] = datetime.now().isoformat()
+        job.update(fields)
+        await db.update(JOBS_COLLECTION, str(job["_id"]), fields)
+
+    async def enqueue(self, job_type: str, payload: Dict[str, Any], db) -> str:
+        """
+        Persist a job and queue it for the workers
+
+        Args:
+            job_type: Registered job type
+            payload: JSON-serializable job arguments
+            db: Database session
+
+        Returns:
+            Job ID
+        """
+        if job_type not in self._handlers:
+            raise ValueError(f"No handler registered for job type: {job_type}")
+
+        # Start (and recover) before storing the job, so recovery cannot queue it a second time
+        if not self.is_running:
+            await self.start()
+
+        job_id = str(uuid.uuid4())
+        now = datetime.now().isoformat()
+        await db.create(JOBS_COLLECTION, {
+            "job_id": job_id,
+            "job_type": job_type,
+            "payload": payload,
+            "status": JobStatus.QUEUED.value,
+            "attempts": 0,
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now
+        })
+        self.stats["enqueued"] += 1
+        self._queue.put_nowait(job_id)
+        logger.info(f"📥 Queued {job_type} job {job_id}")
+        return job_id
+
+    async def get_job(self, job_id: str, db) -> Optional[Dict[str, Any]]:
+        """Get the persisted state of a job (payload excluded)"""
+        job = await self._find_job(job_id, db)
+        if not job:
+            return None
+        return {key: value for key, value in job.items() if key not in ("_id", "payload")}
+
+    async def start(self) -> None:
+        """Start the workers and queue jobs interrupted by a previous shutdown"""
+        if self.is_running:
+            return
+
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker(index), name=f"job-worker-{index}")
+            for index in range(self.max_workers)
+        ]
+        logger.info(f"👷 Job queue started with {self.max_workers} workers")
+
+        try:
+            async with self.db_factory() as db:
+                await self._recover(db)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not recover pending jobs: {str(e)}")
+
+    async def _recover(self, db) -> None:
+        pending = []
+        for status in (JobStatus.RUNNING, JobStatus.QUEUED):
+            pending.extend(await db.find_many(JOBS_COLLECTION, {"status": status.value}))
+
+        for job in sorted(pending, key=lambda item: str(item.get("created_at"))):
+            if job.get("attempts", 0) >= self.max_attempts:
+                await self._update_job(
+                    job, db,
+                    status=JobStatus.FAILED.value,
+                    error=f"Interrupted {job['attempts']} times",
+                    finished_at=datetime.now().isoformat()
+                )
+                await self._cleanup(job)
+                continue
+            if job["status"] == JobStatus.RUNNING.value:
+                await self._update_job(job, db, status=JobStatus.QUEUED.value)
+            self._queue.put_nowait(job["job_id"])
+            self.stats["recovered"] += 1
+
+        if pending:
+            logger.info(f"♻️ Resumed {self.stats['recovered']} interrupted jobs")
+
+    async def _cleanup(self, job: Dict[str, Any]) -> None:
+        cleanup = self._cleanups.get(job.get("job_type"))
+        if cleanup is None:
+            return
+        try:
+            await cleanup(job.get("payload") or {})
+        except Exception as e:
+            logger.warning(f"⚠️ Cleanup of job {job.get('job_id')} failed: {str(e)}")
+
+    async def stop(self) -> None:
+        """Stop the workers; running jobs stay ``running`` and resume on next start"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info("👷 Job queue stopped")
+
+    async def join(self) -> None:
+        """Wait until every queued job has been processed"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run_job(job_id)
+            except Exception as e:
+                logger.error(f"❌ Job worker {index} failed on job {job_id}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def _run_job(self, job_id: str) -> None:
+        async with self.db_factory() as db:
+            job = await self._find_job(job_id, db)
+            if not job or job["status"] != JobStatus.QUEUED.value:
+                return
+
+            handler = self._handlers.get(job["job_type"])
+            if handler is None:
+                await self._update_job(job, db, status=JobStatus.FAILED.value, error=f"Unknown job type: {job['job_type']}")
+                self.stats["failed"] += 1
+                return
+
+            await self._update_job(
+                job, db,
+                status=JobStatus.RUNNING.value,
+                attempts=job.get("attempts", 0) + 1,
+                started_at=datetime.now().isoformat()
+            )
+            logger.info(f"⚙️ Running {job['job_type']} job {job_id} (attempt {job['attempts']})")
+
+            try:
+                result = await handler(job["payload"], db)
+            except Exception as e:
+                logger.error(f"❌ {job['job_type']} job {job_id} failed: {str(e)}")
+                await self._update_job(
+                    job, db,
+                    status=JobStatus.FAILED.value,
+                    error=str(e),
+                    finished_at=datetime.now().isoformat()
+                )
+                self.stats["failed"] += 1
+                return
+
+            await self._update_job(
+                job, db,
+                status=JobStatus.COMPLETED.value,
+                result=result,
+                finished_at=datetime.now().isoformat()
+            )
+            self.stats["completed"] += 1
+            logger.info(f"✅ {job['job_type']} job {job_id} completed")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue counters"""
+        return {
+            **self.stats,
+            "workers": len(self._workers),
+            "queued": self._queue.qsize() if self._queue is not None else 0
+        }
+
+
+# Global job queue
+job_queue = JobQueue()
@@ -0,0 +1,103 @@
+"""
+Azure OpenAI Client Registry
+Process-wide AsyncAzureOpenAI client backed by a tuned httpx connection pool
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+import httpx
+from openai import AsyncAzureOpenAI
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 support requires the optional h2 package
+try:
+    import h2  # noqa: F401
+    H2_AVAILABLE = True
+except ImportError:
+    H2_AVAILABLE = False
+
+
+class OpenAIClientRegistry:
+    """
+    Owns the single AsyncAzureOpenAI client used by every service and agent
+
+    All callers share one httpx connection pool (so TLS connections are reused
+    across agents) and the startup connection test runs at most once per process.
+    """
+
+    def __init__(self):
+        self._client: Optional[AsyncAzureOpenAI] = None
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._test_lock: Optional[asyncio.Lock] = None
+        self.connection_tested = False
+        self.http2_enabled = False
+
+    def _build_http_client(self) -> httpx.AsyncClient:
+        """Create the pooled HTTP client from settings"""
+        http2 = settings.OPENAI_HTTP2_ENABLED
+        if http2 and not H2_AVAILABLE:
+            logger.warning("⚠️ h2 not installed, Azure OpenAI client falling back to HTTP/1.1")
+            http2 = False
+        self.http2_enabled = http2
+
+        return httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.OPENAI_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.OPENAI_HTTP_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(
+                settings.OPENAI_HTTP_TIMEOUT,
+                connect=settings.OPENAI_HTTP_CONNECT_TIMEOUT
+            )
+        )
+
+    def get_client(self) -> AsyncAzureOpenAI:
+        """Get the shared client, creating it on first use"""
+        if self._client is None:
+            self._http_client = self._build_http_client()
+            self._client = AsyncAzureOpenAI(
+                api_key=settings.AZURE_OPENAI_API_KEY,
+                api_version=settings.AZURE_OPENAI_API_VERSION,
+                azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
+                http_client=self._http_client,
+                max_retries=0  # Retries are handled by the resilience layer
+            )
+            logger.info(
+                f"🔗 Shared Azure OpenAI client created "
+                f"(max_connections={settings.OPENAI_HTTP_MAX_CONNECTIONS}, "
+                f"http2={self.http2_enabled})"
+            )
+        return self._client
+
+    async def ensure_connection_tested(self, test: Callable[[], Awaitable[None]]) -> None:
+        """Run the connection test once per process; concurrent callers wait for it"""
+        if self.connection_tested:
+            return
+
+        if self._test_lock is None:
+            self._test_lock = asyncio.Lock()
+
+        async with self._test_lock:
+            if not self.connection_tested:
+                await test()
+                self.connection_tested = True
+
+    async def close(self) -> None:
+        """Close the shared client and its connection pool"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+            self._http_client = None
+            self.connection_tested = False
+            logger.info("🔒 Shared Azure OpenAI client closed")
+
+
+# Global client registry
+openai_client_registry = OpenAIClientRegistry()
@@ -0,0 +1,354 @@
+"""
+Azure OpenAI Resilience Layer
+Retries with jittered exponential backoff, per-deployment circuit breakers and call metrics
+"""
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, asdict
+from email.utils import parsedate_to_datetime
+from enum import Enum
+from typing import Any, AsyncGenerator, AsyncIterator, Awaitable, Callable, Dict, Optional, TypeVar
+
+import openai
+
+from app.core.config import settings
+from app.utils.exceptions import AzureOpenAIOverloadedError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# HTTP status codes worth retrying: timeouts, conflicts, throttling and server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+
+class CircuitState(str, Enum):
+    """Circuit breaker states"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Per-deployment circuit breaker
+
+    Opens after ``failure_threshold`` consecutive transient failures and rejects
+    calls until ``recovery_timeout`` elapses. It then lets a single probe through
+    (half-open); a successful probe closes the circuit, a failed one re-opens it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        recovery_timeout: float,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._clock = clock
+        self._state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> CircuitState:
+        """Current state, moving from open to half-open once the recovery timeout passed"""
+        if self._state == CircuitState.OPEN and self._clock() - self._opened_at >= self.recovery_timeout:
+            self._state = CircuitState.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Check whether a call may be attempted right now"""
+        state = self.state
+        if state == CircuitState.CLOSED:
+            return True
+        if state == CircuitState.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self._state != CircuitState.CLOSED:
+            logger.info(f"🔌 Circuit for {self.name} closed")
+        self._state = CircuitState.CLOSED
+        self._consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """Free the half-open probe slot of a call that ended without a result (e.g. cancelled)"""
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._consecutive_failures += 1
+        if self._state == CircuitState.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            if self._state != CircuitState.OPEN:
+                logger.warning(
+                    f"🔌 Circuit for {self.name} opened after "
+                    f"{self._consecutive_failures} consecutive failures"
+                )
+            self._state = CircuitState.OPEN
+            self._opened_at = self._clock()
+            self._probe_in_flight = False
+
+
+@dataclass
+class DeploymentMetrics:
+    """Call counters for a single deployment"""
+    requests: int = 0
+    successes: int = 0
+    failures: int = 0
+    retries: int = 0
+    rate_limited: int = 0
+    server_errors: int = 0
+    circuit_rejections: int = 0
+    load_shed: int = 0
+    total_latency_ms: float = 0.0
+
+
+class OpenAIResilienceLayer:
+    """
+    Wraps Azure OpenAI calls with retries, circuit breaking and metrics
+
+    Retries transient failures (429, 408, 409, 5xx, connection errors and timeouts)
+    with full-jitter exponential backoff, honouring ``Retry-After`` when Azure sends
+    it. Once retries are exhausted or a deployment's circuit is open,
+    ``AzureOpenAIOverloadedError`` is raised so callers can shed load to another model.
+    """
+
+    def __init__(
+        self,
+        max_retries: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None,
+        failure_threshold: Optional[int] = None,
+        recovery_timeout: Optional[float] = None,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep
+    ):
+        self.max_retries = settings.OPENAI_MAX_RETRIES if max_retries is None else max_retries
+        self.base_delay = settings.OPENAI_RETRY_BASE_DELAY if base_delay is None else base_delay
+        self.max_delay = settings.OPENAI_RETRY_MAX_DELAY if max_delay is None else max_delay
+        self.failure_threshold = failure_threshold or settings.OPENAI_CIRCUIT_FAILURE_THRESHOLD
+        self.recovery_timeout = (
+            settings.OPENAI_CIRCUIT_RECOVERY_TIMEOUT if recovery_timeout is None else recovery_timeout
+        )
+        self._sleep = sleep
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._metrics: Dict[str, DeploymentMetrics] = {}
+
+    def get_breaker(self, deployment: str) -> CircuitBreaker:
+        """Get (or create) the circuit breaker for a deployment"""
+        if deployment not in self._breakers:
+            self._breakers[deployment] = CircuitBreaker(
+                deployment, self.failure_threshold, self.recovery_timeout
+            )
+        return self._breakers[deployment]
+
+    def _get_metrics(self, deployment: str) -> DeploymentMetrics:
+        if deployment not in self._metrics:
+            self._metrics[deployment] = DeploymentMetrics()
+        return self._metrics[deployment]
+
+    def is_saturated(self, deployment: str) -> bool:
+        """A deployment is saturated while its circuit is not closed"""
+        return self.get_breaker(deployment).state != CircuitState.CLOSED
+
+    def record_load_shed(self, deployment: str) -> None:
+        """Count a request diverted away from a saturated deployment"""
+        self._get_metrics(deployment).load_shed += 1
+
+    @staticmethod
+    def is_retryable(error: Exception) -> bool:
+        """Check whether an error is transient and worth retrying"""
+        if isinstance(error, openai.APIConnectionError):
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code in RETRYABLE_STATUS_CODES or error.status_code >= 500
+        return False
+
+    @staticmethod
+    def get_retry_after(error: Exception) -> Optional[float]:
+        """Extract the server-requested delay in seconds, if any"""
+        response = getattr(error, "response", None)
+        if response is None:
+            return None
+
+        headers = response.headers
+        retry_after_ms = headers.get("retry-after-ms")
+        if retry_after_ms:
+            try:
+                return float(retry_after_ms) / 1000
+            except ValueError:
+                pass
+
+        retry_after = headers.get("retry-after")
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                try:
+                    return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    return None
+        return None
+
+    def compute_delay(self, attempt: int, error: Exception) -> float:
+        """Backoff delay before retry number ``attempt`` (starting at 0)"""
+        retry_after = self.get_retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _acquire(self, deployment: str) -> None:
+        metrics = self._get_metrics(deployment)
+        metrics.requests += 1
+        if not self.get_breaker(deployment).allow_request():
+            metrics.circuit_rejections += 1
+            raise AzureOpenAIOverloadedError(f"Circuit open for deployment {deployment}")
+
+    def _record_success(self, deployment: str, started: float) -> None:
+        metrics = self._get_metrics(deployment)
+        metrics.successes += 1
+        metrics.total_latency_ms += (time.perf_counter() - started) * 1000
+        self.get_breaker(deployment).record_success()
+
+    async def _handle_failure(self, deployment: str, error: Exception, attempt: int) -> None:
+        """Record a failed attempt and sleep before retrying, or raise"""
+        metrics = self._get_metrics(deployment)
+        metrics.failures += 1
+
+        if not self.is_retryable(error):
+            # The deployment answered, so a client error says nothing about its health
+            self.get_breaker(deployment).record_success()
+            raise error
+
+        status_code = getattr(error, "status_code", None)
+        if status_code == 429:
+            metrics.rate_limited += 1
+        elif status_code and status_code >= 500:
+            metrics.server_errors += 1
+
+        breaker = self.get_breaker(deployment)
+        breaker.record_failure()
+
+        if attempt >= self.max_retries or breaker.state == CircuitState.OPEN:
+            raise AzureOpenAIOverloadedError(
+                f"Deployment {deployment} unavailable after {attempt + 1} attempts: {str(error)}"
+            ) from error
+
+        delay = self.compute_delay(attempt, error)
+        metrics.retries += 1
+        logger.warning(
+            f"🔁 Retrying {deployment} in {delay:.2f}s "
+            f"(attempt {attempt + 2}/{self.max_retries + 1}): {str(error)}"
+        )
+        await self._sleep(delay)
+
+    async def call(self, deployment: str, operation: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run a single Azure OpenAI call with retries
+
+        Args:
+            deployment: Deployment name the call targets
+            operation: Zero-argument coroutine factory performing the call
+
+        Returns:
+            Result of the operation
+        """
+        attempt = 0
+        while True:
+            self._acquire(deployment)
+            started = time.perf_counter()
+            try:
+                result = await operation()
+            except Exception as e:
+                await self._handle_failure(deployment, e, attempt)
+                attempt += 1
+                continue
+            except BaseException:
+                # Cancellation must not leave a half-open circuit waiting for this probe forever
+                self.get_breaker(deployment).release_probe()
+                raise
+
+            self._record_success(deployment, started)
+            return result
+
+    async def stream(
+        self,
+        deployment: str,
+        open_stream: Callable[[], Awaitable[AsyncIterator[T]]]
+    ) -> AsyncGenerator[T, None]:
+        """
+        Open a streaming call with retries
+
+        Retries only happen until the first chunk arrives; once output has been
+        yielded to the caller a failure is propagated as-is.
+
+        Args:
+            deployment: Deployment name the call targets
+            open_stream: Zero-argument coroutine factory returning the stream
+
+        Yields:
+            Stream chunks
+        """
+        attempt = 0
+        while True:
+            self._acquire(deployment)
+            started = time.perf_counter()
+            try:
+                iterator = (await open_stream()).__aiter__()
+                first_chunk = await iterator.__anext__()
+            except StopAsyncIteration:
+                self._record_success(deployment, started)
+                return
+            except Exception as e:
+                await self._handle_failure(deployment, e, attempt)
+                attempt += 1
+                continue
+            except BaseException:
+                self.get_breaker(deployment).release_probe()
+                raise
+
+            self._record_success(deployment, started)
+            break
+
+        yield first_chunk
+        async for chunk in iterator:
+            yield chunk
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get per-deployment call metrics and circuit states"""
+        deployments = {}
+        for deployment, metrics in self._metrics.items():
+            data = asdict(metrics)
+            data["avg_latency_ms"] = (
+                metrics.total_latency_ms / metrics.successes if metrics.successes else 0.0
+            )
+            data["circuit_state"] = self.get_breaker(deployment).state.value
+            deployments[deployment] = data
+        return {
+            "max_retries": self.max_retries,
+            "deployments": deployments
+        }
+
+
+def is_overload_error(error: BaseException) -> bool:
+    """Check whether an error (or anything it wraps) is an Azure OpenAI overload"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, AzureOpenAIOverloadedError):
+            return True
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return False
+
+
+# Global resilience layer shared by all AzureOpenAIService instances
+openai_resilience = OpenAIResilienceLayer()
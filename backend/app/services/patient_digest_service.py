@@ -0,0 +1,275 @@
+"""
+Patient Digest Service
+Materialized per-patient clinical digest (diagnoses, medications, allergies, labs and a
+document timeline) that is updated incrementally as documents are summarized, so chat
+context can cover a patient's whole history in a block of bounded size
+"""
+
+import hashlib
+import json
+import logging
+import unicodedata
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.utils.keyed_lock import KeyedAsyncLock
+
+logger = logging.getLogger(__name__)
+
+DIGEST_COLLECTION = "patient_digests"
+
+# Fields extracted from each document when it is summarized
+FACT_FIELDS = ("diagnoses", "medications", "allergies", "labs")
+
+
+def _item_key(name: str) -> str:
+    """Case and accent insensitive key used to merge repeated findings"""
+    text = unicodedata.normalize("NFKD", (name or "").strip().lower())
+    return " ".join("".join(ch for ch in text if not unicodedata.combining(ch)).split())
+
+
+def _document_date(document: Dict[str, Any]) -> str:
+    """ISO date (YYYY-MM-DD) of a document, empty if unknown"""
+    value = document.get("created_at") or ""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    return str(value)[:10]
+
+
+def digest_fingerprint(document: Dict[str, Any], facts: Dict[str, Any]) -> str:
+    """Hash of what a document contributes to the digest, used to detect re-summarized documents"""
+    payload = {"title": document.get("title"), "summary": document.get("summary"), "facts": facts}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def empty_digest(patient_id: str) -> Dict[str, Any]:
+    """Digest of a patient with no processed documents"""
+    return {
+        "patient_id": patient_id,
+        "diagnoses": [],
+        "medications": [],
+        "allergies": [],
+        "labs": [],
+        "timeline": [],
+        "document_count": 0
+    }
+
+
+def _merge_named_items(items: List[Dict[str, Any]], names: List[str], date: str, document_id: str) -> None:
+    """Add findings to a digest list, extending the date range of findings already present"""
+    by_key = {_item_key(item["name"]): item for item in items}
+    for name in names or []:
+        key = _item_key(name)
+        if not key:
+            continue
+        item = by_key.get(key)
+        if item is None:
+            item = {"name": name.strip(), "first_seen": date, "last_seen": date, "document_id": document_id}
+            items.append(item)
+            by_key[key] = item
+            continue
+        if date and (not item["first_seen"] or date < item["first_seen"]):
+            item["first_seen"] = date
+        if date and date > (item["last_seen"] or ""):
+            item["last_seen"] = date
+            item["document_id"] = document_id
+
+
+def merge_document_facts(
+    digest: Dict[str, Any],
+    document: Dict[str, Any],
+    facts: Dict[str, Any],
+    max_labs: Optional[int] = None,
+    max_timeline_entries: Optional[int] = None,
+    max_items: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Merge the clinical facts of one document into a patient digest
+
+    Merging is order independent: lists are kept sorted by date, and every list
+    keeps only its newest entries so the digest stays bounded in size.
+
+    Args:
+        digest: Current digest (modified in place)
+        document: Medical document (needs ``_id``/``id``, ``created_at``, ``title``, ``summary``)
+        facts: Clinical facts extracted from the document
+        max_labs: Lab results kept in the digest
+        max_timeline_entries: Timeline entries kept in the digest
+        max_items: Diagnoses, medications and allergies kept in each list
+
+    Returns:
+        The updated digest
+    """
+    max_labs = max_labs or settings.PATIENT_DIGEST_MAX_LABS
+    max_timeline_entries = max_timeline_entries or settings.PATIENT_DIGEST_MAX_TIMELINE_ENTRIES
+    max_items = max_items or settings.PATIENT_DIGEST_MAX_ITEMS
+
+    document_id = str(document.get("_id") or document.get("id"))
+    date = _document_date(document)
+
+    for field in ("diagnoses", "medications", "allergies"):
+        _merge_named_items(digest[field], facts.get(field, []), date, document_id)
+        newest = sorted(digest[field], key=lambda item: (item["last_seen"], _item_key(item["name"])))[-max_items:]
+        digest[field] = sorted(newest, key=lambda item: (item["first_seen"], _item_key(item["name"])))
+
+    for lab in facts.get("labs", []) or []:
+        if not lab.get("name"):
+            continue
+        digest["labs"].append({
+            "name": lab["name"].strip(),
+            "value": str(lab.get("value", "")).strip(),
+            "date": lab.get("date") or date,
+            "document_id": document_id
+        })
+    digest["labs"] = sorted(digest["labs"], key=lambda lab: (lab["date"], _item_key(lab["name"])))[-max_labs:]
+
+    digest["timeline"].append({
+        "date": date,
+        "document_id": document_id,
+        "title": document.get("title") or "Documento Médico",
+        "summary": document.get("summary") or ""
+    })
+    digest["timeline"] = sorted(digest["timeline"], key=lambda entry: (entry["date"], entry["document_id"]))[-max_timeline_entries:]
+
+    digest["document_count"] = digest.get("document_count", 0) + 1
+    return digest
+
+
+def format_patient_digest(digest: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Format a patient digest as a context block for the agents"""
+    if not digest or not digest.get("document_count"):
+        return None
+
+    def date_range(item: Dict[str, Any]) -> str:
+        if item["first_seen"] == item["last_seen"]:
+            return item["first_seen"] or "s/f"
+        return f"{item['first_seen'] or 's/f'} a {item['last_seen']}"
+
+    lines = [f"RESUMEN LONGITUDINAL DEL PACIENTE ({digest['document_count']} documentos procesados):"]
+    sections = [("Diagnósticos", "diagnoses"), ("Medicamentos", "medications"), ("Alergias", "allergies")]
+    for label, field in sections:
+        items = digest.get(field) or []
+        if items:
+            lines.append(f"{label}: " + "; ".join(f"{item['name']} ({date_range(item)})" for item in items))
+    if digest.get("labs"):
+        lines.append("Laboratorios recientes:")
+        lines.extend(f"- {lab['date'] or 's/f'} {lab['name']}: {lab['value']}" for lab in digest["labs"])
+    if digest.get("timeline"):
+        lines.append("Cronología de documentos:")
+        lines.extend(
+            f"- {entry['date'] or 's/f'} {entry['title']}" + (f": {entry['summary']}" if entry["summary"] else "")
+            for entry in digest["timeline"]
+        )
+    return "\\n".join(lines)
+
+
+class PatientDigestService:
+    """
+    Maintains one digest per patient in the ``patient_digests`` collection
+
+    Each summarized document is merged once: the fingerprint of what it contributed
+    is stored on the document as ``digest_fingerprint``, and a document whose
+    summary changed afterwards triggers a rebuild. Updates for the same patient are
+    serialized so concurrent summaries do not overwrite each other.
+    """
+
+    def __init__(self):
+        self._locks = KeyedAsyncLock()
+        self.stats = {"documents_merged": 0, "duplicates_skipped": 0, "rebuilds": 0}
+
+    async def get_digest(self, patient_id: Any, db) -> Optional[Dict[str, Any]]:
+        """Get the stored digest of a patient"""
+        return await db.find_one(DIGEST_COLLECTION, {"patient_id": str(patient_id)})
+
+    async def _save(self, digest: Dict[str, Any], db) -> None:
+        fields = {key: value for key, value in digest.items() if key != "_id"}
+        fields["updated_at"] = datetime.now().isoformat()
+        if digest.get("_id"):
+            await db.update(DIGEST_COLLECTION, str(digest["_id"]), fields)
+        else:
+            await db.create(DIGEST_COLLECTION, fields)
+
+    async def apply_document(self, document: Dict[str, Any], facts: Dict[str, Any], db) -> bool:
+        """
+        Merge a newly summarized document into its patient's digest
+
+        Args:
+            document: Medical document with its summary
+            facts: Clinical facts extracted from the document
+            db: Database session
+
+        Returns:
+            True if the digest changed
+        """
+        if not document.get("patient_id"):
+            return False
+
+        patient_id = str(document["patient_id"])
+        document_id = str(document.get("_id") or document.get("id"))
+        fingerprint = digest_fingerprint(document, facts)
+        async with self._locks.acquire(patient_id):
+            stored = await db.get_by_id("medical_documents", document_id) or document
+            merged_fingerprint = stored.get("digest_fingerprint")
+            if merged_fingerprint == fingerprint:
+                self.stats["duplicates_skipped"] += 1
+                return False
+
+            if merged_fingerprint:
+                # Re-summarized after a content change: its previous facts are already
+                # merged, so recompute the digest from the facts stored on the documents
+                await self._rebuild_locked(patient_id, db)
+                logger.info(f"🗂️ Patient {patient_id} digest rebuilt after document {document_id} was re-summarized")
+                return True
+
+            digest = await self.get_digest(patient_id, db) or empty_digest(patient_id)
+            merge_document_facts(digest, document, facts)
+            await self._save(digest, db)
+            await db.update("medical_documents", document_id, {"digest_fingerprint": fingerprint})
+
+        self.stats["documents_merged"] += 1
+        logger.info(f"🗂️ Patient {patient_id} digest updated with document {document_id} ({digest['document_count']} documents)")
+        return True
+
+    async def rebuild(self, patient_id: Any, db) -> Dict[str, Any]:
+        """
+        Rebuild a patient's digest from the clinical facts stored on its documents
+
+        Used to backfill digests; no model calls are made.
+        """
+        patient_id = str(patient_id)
+        async with self._locks.acquire(patient_id):
+            digest = await self._rebuild_locked(patient_id, db)
+
+        logger.info(f"🗂️ Rebuilt digest for patient {patient_id}: {digest['document_count']} documents")
+        return digest
+
+    async def _rebuild_locked(self, patient_id: str, db) -> Dict[str, Any]:
+        """Rebuild a digest while holding the patient's lock"""
+        documents = await db.find_many("medical_documents", {"patient_id": patient_id})
+        existing = await self.get_digest(patient_id, db)
+        digest = empty_digest(patient_id)
+        if existing and existing.get("_id"):
+            digest["_id"] = existing["_id"]
+        for document in documents:
+            facts = document.get("clinical_facts")
+            if facts is None:
+                continue
+            merge_document_facts(digest, document, facts)
+            fingerprint = digest_fingerprint(document, facts)
+            if document.get("digest_fingerprint") != fingerprint:
+                await db.update(
+                    "medical_documents", str(document.get("_id") or document.get("id")), {"digest_fingerprint": fingerprint}
+                )
+        await self._save(digest, db)
+
+        self.stats["rebuilds"] += 1
+        return digest
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get digest update counters"""
+        return dict(self.stats)
+
+
+# Global patient digest service
+patient_digest_service = PatientDigestService()
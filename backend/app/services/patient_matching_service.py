@@ -30,11 +30,16 @@ except ImportError:
 
 # ✅ MONGODB: Use abstraction layer only
 from app.database.abstract_layer import DatabaseSession
+from app.services.reference_data_cache import ReferenceDataCache, reference_data_cache
 from app.services.tecsalud_filename_parser import PatientData, TecSaludFilenameService
+from app.utils.keyed_lock import KeyedAsyncLock
 
 # ✅ MONGODB: Use current logging configuration
 logger = logging.getLogger(__name__)
 
+# Candidates kept in a batch file's matching_details for admin review
+MATCHING_DETAILS_MAX_SUGGESTIONS = 5
+
 class MatchTypeEnum(str, Enum):
     """Types of patient matches"""
     EXACT_NAME = "exact_name"
@@ -62,6 +67,19 @@ class PatientMatch:
     name_similarity: float
     expediente_match: bool
     reasons: List[str]
+    
+    def to_suggestion(self) -> Dict[str, Any]:
+        """Compact, JSON-safe form of the match stored as a review suggestion"""
+        return {
+            "patient_id": str(self.patient_id),
+            "name": self.patient_name,
+            "medical_record_number": self.medical_record_number,
+            "similarity": round(self.confidence, 4),
+            "match_type": self.match_type.value,
+            "name_similarity": round(self.name_similarity, 4),
+            "expediente_match": self.expediente_match,
+            "reasons": self.reasons
+        }
 
 @dataclass
 class MatchResult:
@@ -73,6 +91,24 @@ class MatchResult:
     create_new_recommended: bool
     total_candidates: int
     processing_time_ms: float
+    
+    def to_matching_details(self, max_suggestions: int = MATCHING_DETAILS_MAX_SUGGESTIONS) -> Dict[str, Any]:
+        """
+        Structured matching details stored on a batch file
+        
+        Keeps the best candidates (highest confidence first) with their IDs, scores
+        and reasons, so the review queue can offer suggestions without re-running
+        the match.
+        """
+        candidates = self.exact_matches + self.fuzzy_matches
+        return {
+            "algorithm": "fuzzy_match",
+            "confidence": round(self.best_match.confidence, 4) if self.best_match else 0.0,
+            "best_patient_id": str(self.best_match.patient_id) if self.best_match else None,
+            "create_new_recommended": self.create_new_recommended,
+            "total_candidates": self.total_candidates,
+            "suggestions": [match.to_suggestion() for match in candidates[:max_suggestions]]
+        }
 
 @dataclass
 class PatientCreationResult:
@@ -94,16 +130,23 @@ class PatientMatchingService:
     - Combined confidence scoring
     """
     
-    def __init__(self, db_session: DatabaseSession, confidence_threshold: float = 0.8):
+    def __init__(
+        self,
+        db_session: DatabaseSession,
+        confidence_threshold: float = 0.8,
+        reference_data: Optional[ReferenceDataCache] = None
+    ):
         """
         Initialize patient matching service
         
         Args:
             db_session: Database session for patient queries
             confidence_threshold: Minimum confidence for automatic matches (0.8 = 80%)
+            reference_data: Reference data cache (default: the shared process cache)
         """
         self.db = db_session
         self.confidence_threshold = confidence_threshold
+        self.reference_data = reference_data or reference_data_cache
         self.filename_service = TecSaludFilenameService()
         
         # Precompiled regex patterns for optimization
@@ -467,56 +510,28 @@ class PatientMatchingService:
         """
         Create new patient from TecSalud parsed data
         
+        Creation is a single upsert on ``medical_record_number`` (unique index), so
+        concurrent files or workers for the same expediente all get the same patient
+        instead of racing on insert. Callers that matched first should hold
+        ``patient_resolution_locks`` for the expediente across match and create.
+        
         Args:
             patient_data: Parsed patient data from TecSalud filename
             
         Returns:
-            PatientCreationResult with creation status
+            PatientCreationResult with creation status; ``duplicate_detected`` is set
+            when a patient with the same expediente already existed
         """
         try:
             logger.info(f"Creating new patient: {patient_data.full_name}")
             
-            # Check for duplicates one more time before creating
-            match_result = await self.find_patient_matches(patient_data)
-            
-            if match_result.best_match and match_result.best_match.confidence >= 0.95:
-                logger.warning(f"High confidence duplicate detected during creation: {match_result.best_match.patient_name}")
-                return PatientCreationResult(
-                    success=False,
-                    error_message="High confidence duplicate patient detected",
-                    duplicate_detected=True
-                )
-            
-            # Get a default doctor (first available doctor)
-            doctors = await self.db.find_many("doctors", filter_dict={}, limit=1)
-            default_doctor = doctors[0] if doctors else None
-            
-            if not default_doctor:
-                # Create a default doctor if none exists
-                default_doctor_data = {
-                    "email": "default@tecsalud.com",
-                    "name": "Dr. Sistema",
-                    "specialty": "General",
-                    "license_number": "DEFAULT001",
-                    "created_at": datetime.now().isoformat(),
-                    "updated_at": datetime.now().isoformat()
-                }
-                default_doctor = await self.db.create("doctors", default_doctor_data)
-            
-            # Get doctor ID correctly
-            doctor_id = None
-            if default_doctor:
-                if isinstance(default_doctor, dict):
-                    doctor_id = str(default_doctor.get("_id") or default_doctor.get("id"))
-                else:
-                    doctor_id = str(default_doctor)
+            doctor_id = await self.reference_data.get_default_doctor_id(self.db)
             
             # Create patient with all required fields
             from datetime import date
             
             new_patient_data = {
                 "name": patient_data.full_name,
-                "medical_record_number": patient_data.expediente_id,
                 "birth_date": date(1900, 1, 1).isoformat(),  # Default date since not available in filename
                 "gender": "desconocido",  # Default gender since not available in filename
                 "doctor_id": doctor_id,  # Assign to default doctor
@@ -526,21 +541,23 @@ class PatientMatchingService:
                 "updated_at": datetime.now().isoformat()
             }
             
-            new_patient = await self.db.create("patients", new_patient_data)
+            patient, created = await self.db.upsert(
+                "patients",
+                {"medical_record_number": patient_data.expediente_id},
+                new_patient_data
+            )
+            patient_id = str(patient.get("_id") or patient.get("id"))
             
-            # Get patient ID correctly
-            patient_id = None
-            if isinstance(new_patient, dict):
-                patient_id = str(new_patient.get("_id") or new_patient.get("id"))
+            if created:
+                logger.info(f"Successfully created patient {patient_id}: {patient.get('name')}")
             else:
-                patient_id = str(new_patient)
-            
-            logger.info(f"Successfully created patient {patient_id}: {new_patient.get('name') if isinstance(new_patient, dict) else 'Unknown'}")
+                logger.info(f"Patient with expediente {patient_data.expediente_id} already exists: {patient_id}")
             
             return PatientCreationResult(
                 success=True,
                 patient_id=patient_id,
-                patient=new_patient
+                patient=patient,
+                duplicate_detected=not created
             )
             
         except Exception as e:
@@ -589,6 +606,10 @@ class PatientMatchingService:
             'success_rate': (exact_matches + fuzzy_matches) / total_matches * 100 if total_matches > 0 else 0
         }
 
+# Per-expediente locks held across patient matching and creation, shared by
+# uploads and batch processing so concurrent work for a patient is matched once
+patient_resolution_locks = KeyedAsyncLock()
+
 # ✅ EXISTING: Export for use in existing backend structure
 __all__ = [
     'PatientMatchingService',
@@ -596,5 +617,7 @@ __all__ = [
     'MatchResult',
     'PatientCreationResult',
     'MatchTypeEnum',
-    'MatchConfidenceEnum'
+    'MatchConfidenceEnum',
+    'MATCHING_DETAILS_MAX_SUGGESTIONS',
+    'patient_resolution_locks'
 ] 
\ No newline at end of file
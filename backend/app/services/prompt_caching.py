@@ -0,0 +1,166 @@
+"""
+Prompt Caching
+Prefix-stable prompt assembly and cached-token accounting for Azure OpenAI prompt caching
+"""
+
+import logging
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.models.chat import ChatMessage
+
+logger = logging.getLogger(__name__)
+
+
+def document_sort_key(document: Dict[str, Any]) -> Tuple[str, str]:
+    """Deterministic document order: oldest first, ties broken by document id"""
+    created_at = document.get("created_at") or document.get("date") or ""
+    document_id = document.get("document_id") or document.get("id") or ""
+    return str(created_at), str(document_id)
+
+
+class PromptAssembler:
+    """
+    Builds agent messages in prefix-cache friendly order
+
+    Azure OpenAI reuses computation for the longest prompt prefix it has already
+    seen (from 1024 tokens on), so content is laid out from most to least stable:
+
+        1. agent instructions (identical for every call of the agent)
+        2. patient documents, oldest first (stable across a conversation; newly
+           added documents extend the prefix instead of shifting it)
+        3. patient information
+        4. conversation history
+        5. per-turn content (relevance rankings, search results)
+        6. the latest user message
+
+    Only content in steps 5-6 changes between follow-up turns.
+    """
+
+    def __init__(self, system_prompt: str):
+        self.system_prompt = system_prompt
+
+    @staticmethod
+    def sort_documents(documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Order documents deterministically, independent of per-query relevance"""
+        return sorted(documents, key=document_sort_key)
+
+    def assemble(
+        self,
+        messages: List[ChatMessage],
+        documents_block: Optional[str] = None,
+        patient_block: Optional[str] = None,
+        volatile_blocks: Optional[List[str]] = None
+    ) -> List[ChatMessage]:
+        """
+        Assemble the messages for a completion call
+
+        Args:
+            messages: Conversation messages from the user
+            documents_block: Formatted patient documents (must not contain per-query data)
+            patient_block: Formatted patient information
+            volatile_blocks: Per-turn content placed right before the latest user message
+
+        Returns:
+            Messages ordered from most to least stable
+        """
+        assembled = [ChatMessage(role="system", content=self.system_prompt)]
+        if documents_block:
+            assembled.append(ChatMessage(role="system", content=documents_block))
+        if patient_block:
+            assembled.append(ChatMessage(role="system", content=patient_block))
+
+        volatile = [block for block in (volatile_blocks or []) if block]
+        if not volatile:
+            return assembled + list(messages)
+
+        last_user_index = next(
+            (i for i in range(len(messages) - 1, -1, -1) if messages[i].role == "user"),
+            len(messages)
+        )
+        return (
+            assembled
+            + list(messages[:last_user_index])
+            + [ChatMessage(role="system", content="\n\n".join(volatile))]
+            + list(messages[last_user_index:])
+        )
+
+
+def _usage_value(obj: Any, name: str) -> Any:
+    """Read a usage field from an SDK object or a raw dict"""
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def extract_cached_tokens(usage: Any) -> int:
+    """Cached prompt tokens reported in ``usage.prompt_tokens_details`` (0 if absent)"""
+    details = _usage_value(usage, "prompt_tokens_details")
+    return int(_usage_value(details, "cached_tokens") or 0)
+
+
+@dataclass
+class DeploymentTokenUsage:
+    """Accumulated token usage for a deployment"""
+    calls: int = 0
+    calls_with_cache_hit: int = 0
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    completion_tokens: int = 0
+
+
+class PromptCacheTracker:
+    """Records prompt, cached and completion tokens per Azure OpenAI call"""
+
+    def __init__(self):
+        self._usage: Dict[str, DeploymentTokenUsage] = {}
+
+    def record(self, deployment: str, usage: Any) -> Dict[str, int]:
+        """
+        Record the usage of a single call
+
+        Args:
+            deployment: Deployment that served the call
+            usage: ``usage`` from a completion or final stream chunk
+
+        Returns:
+            Normalized usage dict including ``cached_tokens``
+        """
+        normalized = {
+            "prompt_tokens": int(_usage_value(usage, "prompt_tokens") or 0),
+            "completion_tokens": int(_usage_value(usage, "completion_tokens") or 0),
+            "total_tokens": int(_usage_value(usage, "total_tokens") or 0),
+            "cached_tokens": extract_cached_tokens(usage)
+        }
+        if usage is None:
+            return normalized
+
+        stats = self._usage.setdefault(deployment, DeploymentTokenUsage())
+        stats.calls += 1
+        stats.prompt_tokens += normalized["prompt_tokens"]
+        stats.cached_tokens += normalized["cached_tokens"]
+        stats.completion_tokens += normalized["completion_tokens"]
+        if normalized["cached_tokens"]:
+            stats.calls_with_cache_hit += 1
+
+        logger.debug(
+            f"🧮 {deployment}: {normalized['prompt_tokens']} prompt tokens "
+            f"({normalized['cached_tokens']} cached), {normalized['completion_tokens']} completion tokens"
+        )
+        return normalized
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get token usage and prompt cache hit ratios per deployment"""
+        return {
+            deployment: {
+                **asdict(stats),
+                "cached_token_ratio": stats.cached_tokens / stats.prompt_tokens if stats.prompt_tokens else 0.0
+            }
+            for deployment, stats in self._usage.items()
+        }
+
+
+# Global prompt cache tracker
+prompt_cache_tracker = PromptCacheTracker()
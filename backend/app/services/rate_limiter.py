@@ -0,0 +1,247 @@
+"""
+Azure OpenAI Rate Limiter
+Client-side token buckets per deployment for requests and tokens per minute,
+with a priority queue so interactive chat is served before batch work
+"""
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import time
+from enum import IntEnum
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RequestPriority(IntEnum):
+    """Queue priority for Azure OpenAI requests (lower is served first)"""
+    INTERACTIVE = 0
+    BATCH = 1
+
+
+def estimate_prompt_tokens(
+    messages: List[Dict[str, Any]],
+    tools: Optional[List[Dict[str, Any]]] = None
+) -> int:
+    """
+    Estimate prompt tokens before sending a request
+
+    Uses the ~4 characters per token heuristic plus the per-message framing
+    overhead of the chat format. Good enough for rate limiting; not for billing.
+    """
+    tokens = 3
+    for message in messages:
+        tokens += 4 + len(message.get("content") or "") // 4
+    if tools:
+        tokens += len(json.dumps(tools)) // 4
+    return tokens
+
+
+def estimate_text_tokens(texts: List[str]) -> int:
+    """Estimate tokens for embedding inputs"""
+    return sum(len(text) // 4 + 1 for text in texts)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``refill_rate`` units per second"""
+
+    def __init__(self, capacity: float, refill_rate: float, clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self._clock = clock
+        self.tokens = capacity
+        self._last_refill = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last_refill) * self.refill_rate)
+        self._last_refill = now
+
+    def time_until_available(self, amount: float) -> float:
+        """Seconds until ``amount`` units can be consumed (0 if available now)"""
+        self._refill()
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_rate
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= amount
+
+
+class DeploymentRateLimiter:
+    """
+    Rate limiter for a single Azure deployment
+
+    Requests wait in a priority queue (priority, arrival order) and only the head
+    of the queue may consume from the buckets, so a large batch job cannot starve
+    interactive chat and equal-priority requests are served first come first served.
+    """
+
+    def __init__(
+        self,
+        deployment: str,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        burst_seconds: float = 10.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.deployment = deployment
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        # Azure evaluates RPM over short windows, so request bursts are limited to a few
+        # seconds worth of quota; TPM is evaluated per minute
+        burst_fraction = min(1.0, burst_seconds / 60)
+        self.request_bucket = TokenBucket(
+            max(1.0, requests_per_minute * burst_fraction), requests_per_minute / 60, clock
+        )
+        self.token_bucket = TokenBucket(tokens_per_minute, tokens_per_minute / 60, clock)
+        self._queue: List[List[Any]] = []
+        self._sequence = itertools.count()
+        self._condition: Optional[asyncio.Condition] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.acquired = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.max_queue_depth = 0
+        self.wait_by_priority: Dict[str, float] = {priority.name.lower(): 0.0 for priority in RequestPriority}
+        self.acquired_by_priority: Dict[str, int] = {priority.name.lower(): 0 for priority in RequestPriority}
+
+    def _get_condition(self) -> asyncio.Condition:
+        """Condition bound to the running event loop (scripts may run several loops)"""
+        loop = asyncio.get_running_loop()
+        if self._condition is None or self._loop is not loop:
+            self._condition = asyncio.Condition()
+            self._loop = loop
+        return self._condition
+
+    def _time_until_available(self, tokens: int) -> float:
+        return max(
+            self.request_bucket.time_until_available(1),
+            self.token_bucket.time_until_available(tokens)
+        )
+
+    async def acquire(self, tokens: int, priority: RequestPriority = RequestPriority.INTERACTIVE) -> float:
+        """
+        Wait until the deployment has capacity for a request
+
+        Args:
+            tokens: Estimated tokens the request will count against the TPM quota
+            priority: Queue priority
+
+        Returns:
+            Seconds spent waiting
+        """
+        # A request larger than the bucket would never fit; let it through once the bucket is full
+        tokens = min(tokens, self.token_bucket.capacity)
+        entry = [int(priority), next(self._sequence), tokens]
+        started = time.perf_counter()
+
+        condition = self._get_condition()
+        async with condition:
+            heapq.heappush(self._queue, entry)
+            self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+            try:
+                while True:
+                    timeout = None
+                    if self._queue[0] is entry:
+                        timeout = self._time_until_available(tokens)
+                        if timeout <= 0:
+                            heapq.heappop(self._queue)
+                            self.request_bucket.consume(1)
+                            self.token_bucket.consume(tokens)
+                            condition.notify_all()
+                            break
+                    try:
+                        await asyncio.wait_for(condition.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        pass
+            except BaseException:
+                if entry in self._queue:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    condition.notify_all()
+                raise
+
+        waited = time.perf_counter() - started
+        self._record_wait(priority, waited)
+        return waited
+
+    def _record_wait(self, priority: RequestPriority, waited: float) -> None:
+        name = RequestPriority(priority).name.lower()
+        self.acquired += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        self.acquired_by_priority[name] += 1
+        self.wait_by_priority[name] += waited
+        if waited > 1:
+            logger.info(f"⏳ Waited {waited:.2f}s for {self.deployment} rate limit ({name})")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue and wait statistics"""
+        return {
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+            "queue_depth": len(self._queue),
+            "max_queue_depth": self.max_queue_depth,
+            "acquired": self.acquired,
+            "avg_wait_ms": (self.total_wait / self.acquired * 1000) if self.acquired else 0.0,
+            "max_wait_ms": self.max_wait * 1000,
+            "avg_wait_ms_by_priority": {
+                name: (self.wait_by_priority[name] / count * 1000) if count else 0.0
+                for name, count in self.acquired_by_priority.items()
+            },
+            "available_requests": round(self.request_bucket.tokens, 2),
+            "available_tokens": round(self.token_bucket.tokens, 2)
+        }
+
+
+class OpenAIRateLimiter:
+    """Registry of per-deployment rate limiters configured from settings"""
+
+    def __init__(self, enabled: Optional[bool] = None):
+        self.enabled = settings.OPENAI_RATE_LIMIT_ENABLED if enabled is None else enabled
+        self._limiters: Dict[str, DeploymentRateLimiter] = {}
+
+    def get_limiter(self, deployment: str) -> DeploymentRateLimiter:
+        """Get (or create) the limiter for a deployment"""
+        if deployment not in self._limiters:
+            limits = settings.OPENAI_DEPLOYMENT_RATE_LIMITS.get(deployment, {})
+            self._limiters[deployment] = DeploymentRateLimiter(
+                deployment,
+                requests_per_minute=limits.get("rpm", settings.OPENAI_DEFAULT_RPM),
+                tokens_per_minute=limits.get("tpm", settings.OPENAI_DEFAULT_TPM),
+                burst_seconds=settings.OPENAI_RATE_LIMIT_BURST_SECONDS
+            )
+        return self._limiters[deployment]
+
+    async def acquire(
+        self,
+        deployment: str,
+        tokens: int,
+        priority: RequestPriority = RequestPriority.INTERACTIVE
+    ) -> float:
+        """Wait for capacity on a deployment; returns seconds waited"""
+        if not self.enabled:
+            return 0.0
+        return await self.get_limiter(deployment).acquire(tokens, priority)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get statistics for every deployment seen so far"""
+        return {
+            "enabled": self.enabled,
+            "deployments": {
+                deployment: limiter.get_stats()
+                for deployment, limiter in self._limiters.items()
+            }
+        }
+
+
+# Global rate limiter shared by all AzureOpenAIService instances
+openai_rate_limiter = OpenAIRateLimiter()
@@ -0,0 +1,122 @@
+"""
+Reference Data Cache
+Process-level cache of the reference data needed to create patients and documents
+(default doctor, TecSalud document type mapping), so batch processing does not
+query it once per file
+"""
+
+import logging
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.database.abstract_layer import DatabaseSession
+from app.db.models import DocumentTypeEnum
+from app.utils.keyed_lock import KeyedAsyncLock
+from app.utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DOCTOR_KEY = "default_doctor_id"
+
+DEFAULT_DOCTOR_EMAIL = "default@tecsalud.com"
+
+# TecSalud filename document codes to stored document types
+TECSALUD_DOCUMENT_TYPES: Dict[str, str] = {
+    'CONS': DocumentTypeEnum.CONSULTATION.value,
+    'HIST': DocumentTypeEnum.HISTORY.value,
+    'LAB': DocumentTypeEnum.LAB_RESULTS.value,
+    'IMG': DocumentTypeEnum.IMAGING.value,
+    'EMER': DocumentTypeEnum.CONSULTATION.value,
+    'CIRUG': DocumentTypeEnum.SURGERY.value,
+    'RECETA': DocumentTypeEnum.PRESCRIPTION.value,
+    'ALTA': DocumentTypeEnum.DISCHARGE.value
+}
+
+
+class ReferenceDataCache:
+    """
+    TTL cache for reference data shared by patient matching and batch processing
+
+    Entries are reloaded after ``ttl_seconds`` and dropped immediately through the
+    ``invalidate_*`` methods when the underlying records change. Concurrent misses
+    for the same entry are collapsed into a single query.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self._cache = TTLCache(
+            max_entries=64,
+            ttl_seconds=ttl_seconds or settings.REFERENCE_DATA_CACHE_TTL_SECONDS,
+            clock=clock
+        )
+        self._loading = KeyedAsyncLock()
+
+    async def get_default_doctor_id(self, db: DatabaseSession) -> str:
+        """
+        ID of the doctor new patients are assigned to
+
+        The first available doctor is used; a default doctor is created when there
+        is none.
+
+        Args:
+            db: Database session used on a cache miss
+
+        Returns:
+            Doctor ID as a string
+        """
+        doctor_id = self._cache.get(DEFAULT_DOCTOR_KEY)
+        if doctor_id is not None:
+            return doctor_id
+
+        async with self._loading.acquire(DEFAULT_DOCTOR_KEY):
+            # Another task may have loaded it while this one waited
+            doctor_id = self._cache.get(DEFAULT_DOCTOR_KEY)
+            if doctor_id is not None:
+                return doctor_id
+
+            doctors = await db.find_many("doctors", filter_dict={}, limit=1)
+            if doctors:
+                default_doctor = doctors[0]
+            else:
+                default_doctor, _ = await db.upsert(
+                    "doctors",
+                    {"email": DEFAULT_DOCTOR_EMAIL},
+                    {
+                        "name": "Dr. Sistema",
+                        "specialty": "General",
+                        "license_number": "DEFAULT001",
+                        "created_at": datetime.now().isoformat(),
+                        "updated_at": datetime.now().isoformat()
+                    }
+                )
+                logger.info(f"👨‍⚕️ Created default doctor {default_doctor.get('_id') or default_doctor.get('id')}")
+
+            doctor_id = str(default_doctor.get("_id") or default_doctor.get("id"))
+            self._cache.set(DEFAULT_DOCTOR_KEY, doctor_id)
+            return doctor_id
+
+    def invalidate_doctors(self) -> None:
+        """Drop cached doctor data (call after creating, updating or deleting doctors)"""
+        self._cache.invalidate(DEFAULT_DOCTOR_KEY)
+
+    def clear(self) -> None:
+        """Drop all cached reference data"""
+        self._cache.clear()
+
+    @staticmethod
+    def document_type(code: Optional[str]) -> str:
+        """Stored document type of a TecSalud filename document code"""
+        return TECSALUD_DOCUMENT_TYPES.get((code or "").upper(), DocumentTypeEnum.OTHER.value)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache hit-rate statistics"""
+        return self._cache.get_stats()
+
+
+# Global reference data cache instance
+reference_data_cache = ReferenceDataCache()
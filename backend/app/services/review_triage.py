@@ -0,0 +1,73 @@
+"""
+Review Triage
+Priority and category of batch files flagged for admin review. They are stored on
+the file when it is flagged, so the review queue can filter and sort on indexed
+fields instead of classifying every pending file in Python.
+"""
+
+from typing import Any, Dict, Mapping
+
+from app.db.models import PatientMatchingStatusEnum, VectorizationStatusEnum
+
+REVIEW_PRIORITIES = ("high", "medium", "low")
+REVIEW_CATEGORIES = ("parsing_error", "patient_match", "processing_error", "other")
+
+# Sort key of each priority (stored as review_priority_rank, high first)
+REVIEW_PRIORITY_RANK = {priority: rank for rank, priority in enumerate(REVIEW_PRIORITIES)}
+
+# Batch file fields the triage depends on
+TRIAGE_INPUT_FIELDS = ("parsed_patient_id", "patient_matching_status", "processing_status", "matching_confidence")
+
+
+def review_category(batch_file: Mapping[str, Any]) -> str:
+    """Category of a review case: parsing_error, patient_match, processing_error or other"""
+    if not batch_file.get("parsed_patient_id"):
+        return "parsing_error"
+    elif batch_file.get("patient_matching_status") == PatientMatchingStatusEnum.REVIEW_REQUIRED:
+        return "patient_match"
+    elif batch_file.get("processing_status") == VectorizationStatusEnum.FAILED:
+        return "processing_error"
+    else:
+        return "other"
+
+
+def review_priority(batch_file: Mapping[str, Any]) -> str:
+    """Priority of a review case: high, medium or low"""
+    # High priority: parsing errors or complete failures
+    if not batch_file.get("parsed_patient_id") or batch_file.get("processing_status") == VectorizationStatusEnum.FAILED:
+        return "high"
+
+    # Medium priority: low confidence matches
+    confidence = batch_file.get("matching_confidence")
+    if confidence and confidence < 0.7:
+        return "medium"
+
+    # Low priority: medium confidence matches
+    return "low"
+
+
+def review_triage_fields(batch_file: Mapping[str, Any]) -> Dict[str, Any]:
+    """Stored triage fields (review_priority, review_priority_rank, review_category) of a batch file"""
+    priority = review_priority(batch_file)
+    return {
+        "review_priority": priority,
+        "review_priority_rank": REVIEW_PRIORITY_RANK[priority],
+        "review_category": review_category(batch_file)
+    }
+
+
+def with_review_triage(batch_file: Mapping[str, Any], update_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Add up-to-date triage fields to an update of a batch file that requires review
+
+    Args:
+        batch_file: Current batch file document
+        update_data: Fields about to be written
+
+    Returns:
+        ``update_data``, with triage fields when the updated file requires review
+    """
+    updated = {**batch_file, **update_data}
+    if updated.get("review_required"):
+        update_data.update(review_triage_fields(updated))
+    return update_data
@@ -8,9 +8,13 @@ Example filename: "3000003799_GARZA TIJERINA, MARIA ESTHER_6001467010_CONS.pdf"
 Pattern: [EXPEDIENTE]_[APELLIDOS, NOMBRE]_[NUMERO]_[TIPO].pdf
 """
 
+import os
 import re
 import logging
-from typing import Dict, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from dataclasses import dataclass
 from enum import Enum
 
@@ -68,6 +72,16 @@ class TecSaludFilenameParser:
         r'^(\d{10})_([^_]+)_(\d+)_([A-Z]{2,6})\.PDF$',     # Uppercase extension
     ]
     
+    # Single-pass pattern covering the primary and alternative patterns above;
+    # which of them matched is derived from the captured groups
+    COMBINED_PATTERN = (
+        r'^(?P<expediente>\d{8,12})_(?P<nombre_apellidos>[^_]+)_'
+        r'(?:(?P<numero_adicional>\d+)_)?(?P<tipo_documento>[A-Z]{2,6})\.pdf$'
+    )
+    
+    # Expediente length of the primary pattern (the only one allowed without numero_adicional)
+    PRIMARY_EXPEDIENTE_LENGTH = 10
+    
     # Document type mapping from TecSalud codes
     DOCUMENT_TYPE_MAPPING = {
         'CONS': DocumentTypeEnum.CONSULTATION,
@@ -110,13 +124,15 @@ class TecSaludFilenameParser:
             re.compile(pattern, re.IGNORECASE) 
             for pattern in self.ALTERNATIVE_PATTERNS
         ]
+        self.combined_regex = re.compile(self.COMBINED_PATTERN, re.IGNORECASE)
     
-    def parse_filename(self, filename: str) -> ParseResult:
+    def parse_filename(self, filename: str, with_suggestions: bool = True) -> ParseResult:
         """
         Parse TecSalud filename and extract patient data
         
         Args:
             filename: TecSalud filename to parse
+            with_suggestions: Whether to generate fix suggestions for invalid filenames
             
         Returns:
             ParseResult with patient data or error information
@@ -125,19 +141,17 @@ class TecSaludFilenameParser:
             # Remove any leading/trailing whitespace
             filename = filename.strip()
             
-            # Try primary pattern first
-            match = self.primary_regex.match(filename)
+            # One pass over all supported patterns
+            match = self.combined_regex.match(filename)
             if match:
-                return self._extract_patient_data(match, filename, is_primary=True)
-            
-            # Try alternative patterns
-            for alt_regex in self.alternative_regexes:
-                match = alt_regex.match(filename)
-                if match:
-                    return self._extract_patient_data(match, filename, is_primary=False)
+                expediente_length = match.end('expediente')
+                has_numero = match.start('numero_adicional') != -1
+                if has_numero or expediente_length == self.PRIMARY_EXPEDIENTE_LENGTH:
+                    is_primary = has_numero and expediente_length == self.PRIMARY_EXPEDIENTE_LENGTH
+                    return self._extract_patient_data(match, filename, is_primary=is_primary)
             
             # If no pattern matches, provide suggestions
-            suggestions = self._generate_suggestions(filename)
+            suggestions = self._generate_suggestions(filename) if with_suggestions else []
             
             return ParseResult(
                 success=False,
@@ -157,7 +171,7 @@ class TecSaludFilenameParser:
         Extract patient data from regex match
         
         Args:
-            match: Regex match object
+            match: Match of the combined pattern
             filename: Original filename
             is_primary: Whether this used the primary pattern
             
@@ -165,19 +179,8 @@ class TecSaludFilenameParser:
             ParseResult with extracted patient data
         """
         try:
-            groups = match.groups()
-            
-            # Handle different group counts based on pattern
-            if len(groups) == 4:
-                expediente_id, nombre_apellidos, numero_adicional, tipo_documento = groups
-            elif len(groups) == 3:
-                expediente_id, nombre_apellidos, tipo_documento = groups
-                numero_adicional = "0"  # Default for missing numero
-            else:
-                return ParseResult(
-                    success=False,
-                    error_message=f"Unexpected pattern match for '{filename}'"
-                )
+            expediente_id, nombre_apellidos, numero_adicional, tipo_documento = match.groups()
+            numero_adicional = numero_adicional or "0"  # Default for missing numero
             
             # Parse patient name
             nombre, apellido_paterno, apellido_materno = self._parse_patient_name(nombre_apellidos)
@@ -200,7 +203,7 @@ class TecSaludFilenameParser:
                 confidence=confidence
             )
             
-            logger.info(f"Successfully parsed filename: {filename} -> {patient_data.full_name}")
+            logger.debug("Successfully parsed filename: %s -> %s", filename, patient_data.full_name)
             
             return ParseResult(
                 success=True,
@@ -226,8 +229,9 @@ class TecSaludFilenameParser:
         """
         # Apply name corrections
         corrected_name = nombre_apellidos.upper()
-        for old, new in self.NAME_CORRECTIONS.items():
-            corrected_name = corrected_name.replace(old, new)
+        if not corrected_name.isascii():  # Corrections only apply to accented names
+            for old, new in self.NAME_CORRECTIONS.items():
+                corrected_name = corrected_name.replace(old, new)
         
         if ',' in corrected_name:
             # Standard format: "APELLIDOS, NOMBRE"
@@ -301,31 +305,93 @@ class TecSaludFilenameParser:
         
         return suggestions
     
-    def parse_batch(self, filenames: List[str]) -> Dict[str, ParseResult]:
+    def parse_batch(self, filenames: List[str], workers: int = 1) -> Dict[str, ParseResult]:
         """
         Parse multiple filenames in batch
         
         Args:
             filenames: List of filenames to parse
+            workers: Number of worker processes (1 parses in this process)
             
         Returns:
             Dictionary mapping filename to ParseResult
         """
-        results = {}
+        return dict(self.parse_iter(filenames, with_suggestions=True, workers=workers))
+    
+    def parse_iter(
+        self,
+        source: Union[Iterable[str], IO[str], str, os.PathLike],
+        with_suggestions: bool = False,
+        workers: int = 1,
+        chunk_size: int = 10000
+    ) -> Iterator[Tuple[str, ParseResult]]:
+        """
+        Stream-parse filenames from an iterable, an open manifest or a manifest path
+        
+        Manifest files are read lazily, one filename per line (blank lines are
+        skipped), so arbitrarily large manifests parse in constant memory.
+        
+        Args:
+            source: Iterable of filenames, open text file or path to a manifest file
+            with_suggestions: Whether to generate fix suggestions for invalid filenames
+            workers: Number of worker processes (1 parses in this process)
+            chunk_size: Filenames sent to a worker process at a time
+            
+        Yields:
+            (filename, ParseResult) tuples in input order
+        """
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'r', encoding='utf-8') as manifest:
+                yield from self.parse_iter(manifest, with_suggestions, workers, chunk_size)
+            return
+        
+        filenames = source
+        if hasattr(source, 'readline'):
+            filenames = (line.rstrip('\r\n') for line in source if line.strip())
+        
+        if workers <= 1:
+            for filename in filenames:
+                yield filename, self.parse_filename(filename, with_suggestions)
+            return
+        
+        yield from self._parse_parallel(filenames, with_suggestions, workers, chunk_size)
+    
+    def _parse_parallel(
+        self,
+        filenames: Iterable[str],
+        with_suggestions: bool,
+        workers: int,
+        chunk_size: int
+    ) -> Iterator[Tuple[str, ParseResult]]:
+        """
+        Parse filename chunks in worker processes, keeping a bounded number in flight
         
-        for filename in filenames:
-            try:
-                result = self.parse_filename(filename)
-                results[filename] = result
+        Args:
+            filenames: Filenames to parse
+            with_suggestions: Whether to generate fix suggestions for invalid filenames
+            workers: Number of worker processes
+            chunk_size: Filenames per chunk
+            
+        Yields:
+            (filename, ParseResult) tuples in input order
+        """
+        iterator = iter(filenames)
+        max_in_flight = workers * 2
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            while True:
+                while len(pending) < max_in_flight:
+                    chunk = list(islice(iterator, chunk_size))
+                    if not chunk:
+                        break
+                    pending.append((chunk, executor.submit(_parse_chunk, chunk, with_suggestions)))
+                
+                if not pending:
+                    return
                 
-            except Exception as e:
-                logger.error(f"Error in batch parsing for '{filename}': {str(e)}")
-                results[filename] = ParseResult(
-                    success=False,
-                    error_message=f"Batch parsing error: {str(e)}"
-                )
-        
-        return results
+                chunk, future = pending.popleft()
+                yield from zip(chunk, future.result())
     
     def get_statistics(self, results: Dict[str, ParseResult]) -> Dict[str, any]:
         """
@@ -399,6 +465,17 @@ class TecSaludFilenameParser:
         return normalized
 
 
+_worker_parser: Optional[TecSaludFilenameParser] = None
+
+
+def _parse_chunk(filenames: List[str], with_suggestions: bool) -> List[ParseResult]:
+    """Parse a chunk of filenames inside a worker process"""
+    global _worker_parser
+    if _worker_parser is None:
+        _worker_parser = TecSaludFilenameParser()
+    return [_worker_parser.parse_filename(filename, with_suggestions) for filename in filenames]
+
+
 # ✅ EXISTING: Integration with current service pattern
 class TecSaludFilenameService:
     """
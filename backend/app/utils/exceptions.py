@@ -11,6 +11,9 @@ class AzureOpenAIError(TecSaludError):
     """Exception for Azure OpenAI service errors"""
     pass
 
+class AzureOpenAIOverloadedError(AzureOpenAIError):
+    """Exception for Azure OpenAI deployments that are saturated or unavailable"""
+    pass
 
 
 class AgentError(TecSaludError):
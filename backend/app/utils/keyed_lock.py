@@ -0,0 +1,46 @@
+"""
+Keyed Async Lock
+One asyncio lock per key, created on demand and dropped when no longer used
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Hashable, List
+
+
+class KeyedAsyncLock:
+    """
+    Serializes work per key (e.g. per patient) while different keys run concurrently
+
+    Locks are reference counted and removed once no task holds or waits for them,
+    so the number of locks is bounded by the keys in use rather than every key seen.
+    """
+
+    def __init__(self):
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+        self._users: Dict[Hashable, int] = {}
+
+    @asynccontextmanager
+    async def acquire(self, key: Hashable) -> AsyncIterator[None]:
+        """Hold the lock of ``key`` for the duration of the block"""
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        self._users[key] = self._users.get(key, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._users[key] -= 1
+            if not self._users[key]:
+                del self._users[key]
+                del self._locks[key]
+
+    def locked(self, key: Hashable) -> bool:
+        """Whether a task currently holds the lock of ``key``"""
+        lock = self._locks.get(key)
+        return lock is not None and lock.locked()
+
+    def active_keys(self) -> List[Hashable]:
+        """Keys with a lock currently held or awaited"""
+        return list(self._locks)
@@ -0,0 +1,137 @@
+"""
+Text Extraction
+Extracts plain text from uploaded PDF, Word and text files
+
+Functions are synchronous and module-level so they can run in a thread or a
+worker process (bulk imports extract text in a process pool).
+"""
+
+import io
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def extract_text(filename: str, content: bytes) -> str:
+    """
+    Extract text content from a file using the appropriate library
+    
+    Args:
+        filename: Original filename (its extension selects the extractor)
+        content: Raw file bytes
+        
+    Returns:
+        Extracted text, or a bracketed placeholder when nothing can be extracted
+    """
+    try:
+        if filename.lower().endswith('.txt'):
+            return content.decode('utf-8')
+            
+        elif filename.lower().endswith('.pdf'):
+            # Try with pdfplumber first (better for complex layouts)
+            try:
+                import pdfplumber
+                
+                text_content = []
+                with io.BytesIO(content) as file_buffer:
+                    with pdfplumber.open(file_buffer) as pdf:
+                        for page_num, page in enumerate(pdf.pages, 1):
+                            try:
+                                page_text = page.extract_text()
+                                if page_text and page_text.strip():
+                                    text_content.append(f"=== PÁGINA {page_num} ===\n{page_text.strip()}")
+                                else:
+                                    text_content.append(f"=== PÁGINA {page_num} ===\n[Página sin texto extraíble]")
+                            except Exception as e:
+                                logger.warning(f"Error extracting page {page_num}: {str(e)}")
+                                text_content.append(f"=== PÁGINA {page_num} ===\n[Error en extracción: {str(e)}]")
+                
+                if text_content:
+                    full_text = "\n\n".join(text_content)
+                    logger.info(f"✅ PDF extraction successful using pdfplumber: {len(full_text)} characters from {len(text_content)} pages")
+                    return full_text
+                else:
+                    logger.warning("⚠️ No text extracted with pdfplumber, trying PyPDF2")
+                    
+            except Exception as e:
+                logger.warning(f"⚠️ pdfplumber extraction failed: {str(e)}, trying PyPDF2")
+            
+            # Fallback to PyPDF2
+            try:
+                import PyPDF2
+                
+                text_content = []
+                with io.BytesIO(content) as file_buffer:
+                    pdf_reader = PyPDF2.PdfReader(file_buffer)
+                    
+                    for page_num, page in enumerate(pdf_reader.pages, 1):
+                        try:
+                            page_text = page.extract_text()
+                            if page_text and page_text.strip():
+                                text_content.append(f"=== PÁGINA {page_num} ===\n{page_text.strip()}")
+                            else:
+                                text_content.append(f"=== PÁGINA {page_num} ===\n[Página sin texto extraíble]")
+                        except Exception as e:
+                            logger.warning(f"Error extracting page {page_num} with PyPDF2: {str(e)}")
+                            text_content.append(f"=== PÁGINA {page_num} ===\n[Error en extracción: {str(e)}]")
+                
+                if text_content:
+                    full_text = "\n\n".join(text_content)
+                    logger.info(f"✅ PDF extraction successful using PyPDF2: {len(full_text)} characters from {len(text_content)} pages")
+                    return full_text
+                else:
+                    logger.error("❌ No text could be extracted from PDF with either library")
+                    return f"[PDF Error] {filename} - No se pudo extraer texto del PDF. Posiblemente sea un PDF de imagen o esté protegido."
+                    
+            except Exception as e:
+                logger.error(f"❌ PyPDF2 extraction failed: {str(e)}")
+                return f"[PDF Error] {filename} - Error al extraer contenido: {str(e)}"
+            
+        elif filename.lower().endswith(('.doc', '.docx')):
+            # Try to extract from Word documents
+            try:
+                import docx
+                
+                with io.BytesIO(content) as file_buffer:
+                    doc = docx.Document(file_buffer)
+                    text_content = []
+                    
+                    for paragraph in doc.paragraphs:
+                        if paragraph.text.strip():
+                            text_content.append(paragraph.text.strip())
+                    
+                    if text_content:
+                        full_text = "\n\n".join(text_content)
+                        logger.info(f"✅ DOCX extraction successful: {len(full_text)} characters")
+                        return full_text
+                    else:
+                        return f"[Word Document] {filename} - Documento vacío o sin texto extraíble"
+                        
+            except ImportError:
+                logger.warning("python-docx not installed, cannot extract Word documents")
+                return f"[Word Document] {filename} - Biblioteca python-docx no disponible para extraer contenido"
+            except Exception as e:
+                logger.error(f"❌ Word document extraction failed: {str(e)}")
+                return f"[Word Document Error] {filename} - Error al extraer contenido: {str(e)}"
+        else:
+            return f"[Unknown Format] {filename} - Formato de archivo no soportado para extracción de texto"
+            
+    except Exception as e:
+        logger.error(f"❌ Text extraction failed for {filename}: {str(e)}")
+        return f"[Error] No se pudo extraer texto de {filename}: {str(e)}"
+
+
+def extract_text_from_path(file_path: str) -> str:
+    """
+    Extract text content from a file on disk
+    
+    Args:
+        file_path: Path of the file to read
+        
+    Returns:
+        Extracted text
+    """
+    with open(file_path, 'rb') as f:
+        content = f.read()
+    return extract_text(os.path.basename(file_path), content)
@@ -10,13 +10,18 @@ from fastapi.responses import JSONResponse
 import uvicorn
 import logging
 from contextlib import asynccontextmanager
+from datetime import datetime
 
 from app.core.config import settings
 from app.core.logging import setup_logging
 from app.api.routes import api_router
 from app.core.database import init_db
+from app.core.startup import startup_orchestrator
 # ChromaDB removed - using only complete documents
 from app.services.azure_openai_service import azure_openai_service
+from app.services.openai_client_registry import openai_client_registry
+from app.services.job_queue import job_queue
+from app.api.endpoints.chat import ensure_services_initialized
 
 # Setup logging
 setup_logging()
@@ -28,13 +33,15 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("🚀 Starting TecSalud Backend...")
     
-    # Initialize database
-    await init_db()
-    logger.info("✅ Database initialized")
+    # Initialize independent components concurrently
+    startup_orchestrator.register("database", init_db)
+    startup_orchestrator.register("azure_openai", azure_openai_service.initialize)
+    # Agents are optional at startup: the chat endpoint retries lazily on first request
+    startup_orchestrator.register("medical_agents", ensure_services_initialized, required=False)
+    await startup_orchestrator.run()
     
-    # Initialize Azure OpenAI service
-    await azure_openai_service.initialize()
-    logger.info("✅ Azure OpenAI service initialized")
+    # Job workers need the database; jobs interrupted by the last shutdown resume here
+    await job_queue.start()
     
     logger.info("🎉 TecSalud Backend started successfully!")
     
@@ -43,6 +50,9 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("🛑 Shutting down TecSalud Backend...")
     # ChromaDB removed - no cleanup needed
+    await job_queue.stop()
+    await azure_openai_service.close()
+    await openai_client_registry.close()
     logger.info("👋 TecSalud Backend shutdown complete")
 
 # Create FastAPI application
@@ -87,14 +97,24 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    components = startup_orchestrator.components
+    
+    def component_status(name: str, ready: str) -> str:
+        component = components.get(name)
+        if component is None:
+            return "unknown"
+        return ready if component.status == "ready" else component.status
+    
     return {
-        "status": "healthy",
-        "timestamp": "2024-01-01T00:00:00Z",
+        "status": "healthy" if startup_orchestrator.is_healthy else "degraded",
+        "timestamp": datetime.now().isoformat(),
         "services": {
-            "database": "connected",
-            "azure_openai": "connected",
+            "database": component_status("database", "connected"),
+            "azure_openai": component_status("azure_openai", "connected"),
+            "medical_agents": component_status("medical_agents", "ready"),
             "documents": "complete_only"
-        }
+        },
+        "startup": startup_orchestrator.get_report()
     }
 
 @app.exception_handler(HTTPException)
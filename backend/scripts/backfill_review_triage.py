@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Backfill Review Triage
+
+Stores review_priority, review_priority_rank and review_category on batch files
+that were flagged for review before these fields were written at flag time, so
+the admin review queue can filter and sort them with its indexes.
+
+Usage:
+    python scripts/backfill_review_triage.py
+"""
+
+import asyncio
+import sys
+import os
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.logging import setup_logging
+from app.database.factory import close_database, get_db_async, init_database
+from app.services.admin_review_service import AdminReviewService
+
+
+async def main():
+    """Backfill triage fields of pending review files"""
+    setup_logging()
+    await init_database()
+
+    try:
+        async with get_db_async() as db:
+            updated = await AdminReviewService().backfill_review_triage(db)
+    finally:
+        await close_database()
+
+    print(f"📋 Review triage stored on {updated:,} pending review files")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Filename Parser Benchmark
+
+Generates a synthetic TecSalud manifest (default 1M filenames, ~5% invalid) and
+compares the legacy sequential pattern matching against the single-pass
+combined pattern, then times the full streaming parse in one process and
+across worker processes (only useful on multi-core hosts).
+
+Usage:
+    python scripts/benchmark_filename_parser.py
+    python scripts/benchmark_filename_parser.py --count 200000 --workers 4
+    python scripts/benchmark_filename_parser.py --manifest expedientes.txt
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Optional
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.tecsalud_filename_parser import TecSaludFilenameParser
+
+APELLIDOS = ["GARZA", "TIJERINA", "LOPEZ", "MARTINEZ", "GONZALEZ", "RODRIGUEZ", "HERNANDEZ", "PEREZ"]
+NOMBRES = ["MARIA ESTHER", "JUAN CARLOS", "ANA SOFIA", "LUIS MIGUEL", "PEDRO", "CARMEN"]
+TIPOS = ["CONS", "EMER", "LAB", "IMG", "RX", "PRESC", "ALTA", "CIR", "OTROS"]
+
+
+def synthetic_filename(rng: random.Random) -> str:
+    """Build one manifest entry covering the supported variations and some invalid names"""
+    expediente = str(rng.randrange(3000000000, 3999999999))
+    nombre = f"{rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}, {rng.choice(NOMBRES)}"
+    tipo = rng.choice(TIPOS)
+    roll = rng.random()
+
+    if roll < 0.80:
+        return f"{expediente}_{nombre}_{rng.randrange(10**9, 10**10)}_{tipo}.pdf"
+    if roll < 0.87:
+        return f"{expediente}_{nombre}_{tipo}.pdf"
+    if roll < 0.91:
+        return f"{expediente[:8]}_{nombre}_{rng.randrange(1000)}_{tipo}.pdf"
+    if roll < 0.95:
+        return f"{expediente}_{nombre}_{rng.randrange(1000)}_{tipo}.PDF"
+    return f"{nombre.replace(',', '')} {tipo}.docx"
+
+
+def write_manifest(path: str, count: int, seed: int) -> None:
+    """Write a synthetic manifest with one filename per line"""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(count):
+            f.write(synthetic_filename(rng) + "\n")
+
+
+def legacy_parse(parser: TecSaludFilenameParser) -> Callable[[str], bool]:
+    """Sequential primary-then-alternatives matching with suggestions on every failure"""
+    primary = re.compile(parser.PRIMARY_PATTERN, re.IGNORECASE)
+    alternatives = [re.compile(pattern, re.IGNORECASE) for pattern in parser.ALTERNATIVE_PATTERNS]
+
+    def parse(filename: str) -> bool:
+        filename = filename.strip()
+        if primary.match(filename):
+            return True
+        for regex in alternatives:
+            if regex.match(filename):
+                return True
+        parser._generate_suggestions(filename)
+        return False
+
+    return parse
+
+
+def run_legacy(parser: TecSaludFilenameParser, manifest: str) -> Dict[str, int]:
+    """Match every manifest entry with the legacy pattern sequence"""
+    parse = legacy_parse(parser)
+    parsed = failed = 0
+    with open(manifest, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            if parse(line.rstrip("\r\n")):
+                parsed += 1
+            else:
+                failed += 1
+    return {"parsed": parsed, "failed": failed}
+
+
+def run_combined(parser: TecSaludFilenameParser, manifest: str) -> Dict[str, int]:
+    """Match every manifest entry with the single-pass combined pattern"""
+    parsed = failed = 0
+    with open(manifest, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            match = parser.combined_regex.match(line.strip())
+            if match and (match.group("numero_adicional") is not None
+                          or len(match.group("expediente")) == parser.PRIMARY_EXPEDIENTE_LENGTH):
+                parsed += 1
+            else:
+                failed += 1
+    return {"parsed": parsed, "failed": failed}
+
+
+def run_streaming(parser: TecSaludFilenameParser, manifest: str, workers: int, chunk_size: int) -> Dict[str, int]:
+    """Fully parse the manifest (patient data included) with parse_iter"""
+    parsed = failed = 0
+    for _, result in parser.parse_iter(manifest, workers=workers, chunk_size=chunk_size):
+        if result.success:
+            parsed += 1
+        else:
+            failed += 1
+    return {"parsed": parsed, "failed": failed}
+
+
+def timed(label: str, entries: int, run: Callable[[], Dict[str, int]], baseline: Optional[float]) -> float:
+    """Run one benchmark mode and print its throughput"""
+    started = time.perf_counter()
+    counts = run()
+    elapsed = time.perf_counter() - started
+
+    speedup = f"  x{baseline / elapsed:.2f}" if baseline else ""
+    print(f"{label:28} {elapsed:8.2f}s  {entries / elapsed:>12,.0f} names/s  "
+          f"parsed={counts['parsed']:,} failed={counts['failed']:,}{speedup}")
+    return elapsed
+
+
+def main():
+    """Run the benchmark"""
+    arg_parser = argparse.ArgumentParser(description="Benchmark TecSalud filename parsing over a large manifest")
+    arg_parser.add_argument("--count", type=int, default=1_000_000, help="Synthetic manifest size")
+    arg_parser.add_argument("--manifest", help="Use an existing manifest (one filename per line)")
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes for parallel mode")
+    arg_parser.add_argument("--chunk-size", type=int, default=10000, help="Filenames per worker chunk")
+    arg_parser.add_argument("--seed", type=int, default=7)
+    arg_parser.add_argument("--skip-legacy", action="store_true", help="Skip the legacy sequential baseline")
+    args = arg_parser.parse_args()
+
+    temp_dir = None
+    manifest = args.manifest
+    if not manifest:
+        temp_dir = tempfile.TemporaryDirectory()
+        manifest = os.path.join(temp_dir.name, "manifest.txt")
+        print(f"📝 Generating synthetic manifest with {args.count:,} filenames...")
+        write_manifest(manifest, args.count, args.seed)
+
+    with open(manifest, "r", encoding="utf-8") as f:
+        entries = sum(1 for line in f if line.strip())
+
+    parser = TecSaludFilenameParser()
+
+    print("📊 FILENAME PARSER BENCHMARK")
+    print("=" * 60)
+    print(f"Entries: {entries:,}  Workers: {args.workers}  Chunk size: {args.chunk_size:,}")
+
+    print("\nPattern matching only")
+    baseline = None
+    if not args.skip_legacy:
+        baseline = timed("Legacy sequential patterns", entries, lambda: run_legacy(parser, manifest), None)
+    timed("Combined pattern", entries, lambda: run_combined(parser, manifest), baseline)
+
+    print("\nFull parse (patient data)")
+    streamed = timed("parse_iter, 1 process", entries,
+                     lambda: run_streaming(parser, manifest, 1, args.chunk_size), None)
+    if args.workers > 1:
+        timed(f"parse_iter, {args.workers} processes", entries,
+              lambda: run_streaming(parser, manifest, args.workers, args.chunk_size), streamed)
+
+    if temp_dir:
+        temp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Query Classifier Benchmark
+
+Compares the local FastQueryClassifier against reference labels (either provided
+in a JSONL dataset or produced live by the LLM classifier) and reports a confusion
+matrix, fast-path coverage and the classification latency saved.
+
+Usage:
+    python scripts/benchmark_query_classifier.py
+    python scripts/benchmark_query_classifier.py --dataset queries.jsonl --llm
+    python scripts/benchmark_query_classifier.py --dataset labelled.jsonl --train-model data/query_model.json
+
+Dataset format (one JSON object per line):
+    {"query": "dame un resumen del expediente", "label": "document_analysis", "has_context": true}
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import os
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.config import settings
+from app.models.chat import ChatMessage
+from app.agents.query_classifier import QueryType, FastQueryClassifier, NaiveBayesQueryModel
+
+# Hand-labelled sample following the LLM classifier prompt examples
+SAMPLE_QUERIES: List[Dict[str, Any]] = [
+    {"query": "hola, buenos días", "label": "general", "has_context": True},
+    {"query": "Hola doctor", "label": "general", "has_context": False},
+    {"query": "muchas gracias", "label": "general", "has_context": True},
+    {"query": "hasta luego", "label": "general", "has_context": True},
+    {"query": "¿qué puedes hacer?", "label": "general", "has_context": False},
+    {"query": "dame un resumen del expediente", "label": "document_analysis", "has_context": True},
+    {"query": "resumen completo del paciente", "label": "document_analysis", "has_context": True},
+    {"query": "qué estudios se ha hecho pedro", "label": "document_analysis", "has_context": True},
+    {"query": "cuáles son los resultados de laboratorio", "label": "document_analysis", "has_context": True},
+    {"query": "últimos laboratorios", "label": "document_analysis", "has_context": True},
+    {"query": "interpreta la radiografía de tórax", "label": "document_analysis", "has_context": True},
+    {"query": "revisa la nota de evolución más reciente", "label": "document_analysis", "has_context": True},
+    {"query": "busca la fecha de la última consulta", "label": "search", "has_context": True},
+    {"query": "¿cuándo fue su última cirugía?", "label": "search", "has_context": True},
+    {"query": "¿cuál es su tipo de sangre?", "label": "search", "has_context": True},
+    {"query": "encuentra las alergias registradas", "label": "search", "has_context": True},
+    {"query": "analiza los síntomas del paciente", "label": "diagnostic", "has_context": True},
+    {"query": "diagnóstico diferencial para fiebre y tos de 3 semanas", "label": "diagnostic", "has_context": True},
+    {"query": "paciente con dolor abdominal y fiebre, ¿qué puede tener?", "label": "diagnostic", "has_context": True},
+    {"query": "¿cuáles son las posibles causas de su anemia?", "label": "diagnostic", "has_context": True},
+    {"query": "cuáles son los síntomas de diabetes", "label": "quick_question", "has_context": False},
+    {"query": "¿Qué es la hipertensión?", "label": "quick_question", "has_context": False},
+    {"query": "cuál es la dosis de metformina", "label": "quick_question", "has_context": True},
+    {"query": "efectos secundarios del losartán", "label": "quick_question", "has_context": True},
+    {"query": "valores normales de hemoglobina glucosilada", "label": "quick_question", "has_context": False},
+    {"query": "¿para qué sirve la amoxicilina?", "label": "quick_question", "has_context": False},
+    {"query": "¿cómo ha evolucionado su función renal?", "label": "document_analysis", "has_context": True},
+    {"query": "¿debería ajustar su tratamiento antihipertensivo?", "label": "diagnostic", "has_context": True},
+]
+
+LABELS = [query_type.value for query_type in QueryType]
+
+
+def load_dataset(path: str) -> List[Dict[str, Any]]:
+    """Load a JSONL dataset of queries"""
+    samples = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                samples.append(json.loads(line))
+    return samples
+
+
+def _synthetic_context(has_context: bool):
+    """Minimal stand-in for the enhanced context object the LLM classifier inspects"""
+    if not has_context:
+        return None
+    from app.services.enhanced_document_service import ContextStrategy
+    return SimpleNamespace(
+        total_documents=3,
+        total_tokens=12000,
+        strategy_used=ContextStrategy.FULL_DOCS_ONLY,
+        confidence=0.9,
+        full_documents=[None, None, None]
+    )
+
+
+async def label_with_llm(samples: List[Dict[str, Any]]) -> None:
+    """Label samples with the LLM classifier and record its latency"""
+    from app.agents.medical_coordinator import MedicalCoordinatorAgent
+
+    settings.QUERY_CLASSIFIER_FAST_PATH_ENABLED = False
+    coordinator = MedicalCoordinatorAgent()
+    await coordinator.initialize()
+
+    for i, sample in enumerate(samples, 1):
+        messages = [ChatMessage(role="user", content=sample["query"])]
+        started = time.perf_counter()
+        classification = await coordinator._classify_query_enhanced(
+            messages, _synthetic_context(sample.get("has_context", False))
+        )
+        sample["llm_latency_ms"] = (time.perf_counter() - started) * 1000
+        sample["label"] = classification["query_type"]
+        print(f"🤖 [{i}/{len(samples)}] {sample['label']:18} {sample['llm_latency_ms']:7.0f}ms  {sample['query']}")
+
+
+def run_benchmark(
+    samples: List[Dict[str, Any]],
+    classifier: FastQueryClassifier,
+    threshold: float,
+    llm_latency_ms: float
+) -> Dict[str, Any]:
+    """Classify samples locally and compare against reference labels"""
+    confusion = {label: {predicted: 0 for predicted in LABELS} for label in LABELS}
+    confusion_fast_path = {label: {predicted: 0 for predicted in LABELS} for label in LABELS}
+    local_latencies = []
+    covered = correct = covered_correct = 0
+
+    for sample in samples:
+        started = time.perf_counter()
+        result = classifier.classify(sample["query"], sample.get("has_context", False))
+        local_latencies.append((time.perf_counter() - started) * 1000)
+
+        label, predicted = sample["label"], result["query_type"]
+        confusion[label][predicted] += 1
+        correct += label == predicted
+
+        if result["confidence"] >= threshold:
+            covered += 1
+            covered_correct += label == predicted
+            confusion_fast_path[label][predicted] += 1
+
+    measured_llm = [sample["llm_latency_ms"] for sample in samples if "llm_latency_ms" in sample]
+    avg_llm_latency = statistics.mean(measured_llm) if measured_llm else llm_latency_ms
+    avg_local_latency = statistics.mean(local_latencies) if local_latencies else 0.0
+    coverage = covered / len(samples) if samples else 0.0
+
+    return {
+        "samples": len(samples),
+        "threshold": threshold,
+        "overall_accuracy": correct / len(samples) if samples else 0.0,
+        "fast_path_coverage": coverage,
+        "fast_path_accuracy": covered_correct / covered if covered else 0.0,
+        "avg_local_latency_ms": avg_local_latency,
+        "avg_llm_latency_ms": avg_llm_latency,
+        "llm_latency_measured": bool(measured_llm),
+        "avg_latency_saved_ms": coverage * (avg_llm_latency - avg_local_latency),
+        "confusion_matrix": confusion,
+        "fast_path_confusion_matrix": confusion_fast_path
+    }
+
+
+def print_confusion_matrix(title: str, matrix: Dict[str, Dict[str, int]]) -> None:
+    """Print a confusion matrix (rows: reference, columns: predicted)"""
+    short = {label: label[:10] for label in LABELS}
+    print(f"\n{title} (rows: reference, columns: local)")
+    print(" " * 19 + " ".join(f"{short[label]:>10}" for label in LABELS))
+    for label in LABELS:
+        print(f"{label:18} " + " ".join(f"{matrix[label][predicted]:>10}" for predicted in LABELS))
+
+
+async def main():
+    """Run the benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark the local query classifier against LLM labels")
+    parser.add_argument("--dataset", help="JSONL file with query, label and has_context fields")
+    parser.add_argument("--llm", action="store_true", help="Label queries live with the LLM classifier (uses Azure OpenAI)")
+    parser.add_argument("--llm-latency-ms", type=float, default=900.0,
+                        help="Assumed LLM classification latency when not measured live")
+    parser.add_argument("--threshold", type=float, default=settings.QUERY_CLASSIFIER_CONFIDENCE_THRESHOLD)
+    parser.add_argument("--model", help="Naive Bayes model to evaluate together with the rules")
+    parser.add_argument("--train-model", help="Train a naive Bayes model on the labelled dataset and save it here")
+    parser.add_argument("--output", help="Write the JSON report (and LLM labels) to this file")
+    args = parser.parse_args()
+
+    samples = load_dataset(args.dataset) if args.dataset else [dict(sample) for sample in SAMPLE_QUERIES]
+
+    if args.llm:
+        await label_with_llm(samples)
+
+    missing_labels = [sample["query"] for sample in samples if "label" not in sample]
+    if missing_labels:
+        print(f"❌ {len(missing_labels)} queries have no label; run with --llm to label them")
+        sys.exit(1)
+
+    if args.train_model:
+        model = NaiveBayesQueryModel().train((sample["query"], sample["label"]) for sample in samples)
+        model.save(args.train_model)
+        print(f"🧠 Naive Bayes model trained on {len(samples)} queries and saved to {args.train_model}")
+
+    classifier = FastQueryClassifier(model_path=args.model or "")
+    report = run_benchmark(samples, classifier, args.threshold, args.llm_latency_ms)
+
+    print("📊 QUERY CLASSIFIER BENCHMARK")
+    print("=" * 60)
+    print(f"Samples:               {report['samples']}")
+    print(f"Overall accuracy:      {report['overall_accuracy']:.1%}")
+    print(f"Fast-path coverage:    {report['fast_path_coverage']:.1%} (confidence >= {args.threshold})")
+    print(f"Fast-path accuracy:    {report['fast_path_accuracy']:.1%}")
+    print(f"Local latency:         {report['avg_local_latency_ms']:.3f} ms/query")
+    print(f"LLM latency:           {report['avg_llm_latency_ms']:.0f} ms/query "
+          f"({'measured' if report['llm_latency_measured'] else 'assumed'})")
+    print(f"Avg latency saved:     {report['avg_latency_saved_ms']:.0f} ms/query")
+    print_confusion_matrix("All queries", report["confusion_matrix"])
+    print_confusion_matrix("Fast-path queries", report["fast_path_confusion_matrix"])
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"report": report, "samples": samples}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Report saved to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
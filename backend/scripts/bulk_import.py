@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Bulk Import
+
+Imports historical TecSalud expedientes from a local directory or a CSV manifest
+(``file_path`` column) straight into a batch session, without HTTP uploads or
+copying files. Interrupted imports are resumed with --session-id.
+
+Usage:
+    python scripts/bulk_import.py --directory /data/expedientes
+    python scripts/bulk_import.py --manifest migracion.csv --workers 8 --concurrency 32
+    python scripts/bulk_import.py --session-id <session_id>
+    python scripts/bulk_import.py --session-id <session_id> --manifest migracion.csv
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import os
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.config import settings
+from app.core.logging import setup_logging
+from app.database.factory import close_database, get_db_async, init_database
+from app.db.models import ProcessingTypeEnum
+from app.services.bulk_import_service import BulkImportService
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    """Run a bulk import"""
+    parser = argparse.ArgumentParser(description="Import TecSalud documents from a directory or CSV manifest")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--directory", help="Directory to walk for PDF files")
+    source.add_argument("--manifest", help="CSV manifest with a file_path column")
+    parser.add_argument("--session-id", help="Resume (or add files to) an existing import session")
+    parser.add_argument("--processing-type", default=ProcessingTypeEnum.COMPLETE.value,
+                        choices=[processing_type.value for processing_type in ProcessingTypeEnum])
+    parser.add_argument("--uploaded-by", default="bulk_import")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Hashing/extraction processes (default BULK_IMPORT_WORKERS or CPU count; 0 uses threads)")
+    parser.add_argument("--concurrency", type=int, default=settings.BULK_IMPORT_CONCURRENCY,
+                        help="Files processed concurrently")
+    parser.add_argument("--batch-size", type=int, default=settings.BULK_IMPORT_DOCUMENT_BATCH_SIZE,
+                        help="Medical documents per bulk insert")
+    args = parser.parse_args()
+
+    if not (args.directory or args.manifest or args.session_id):
+        parser.error("one of --directory, --manifest or --session-id is required")
+
+    setup_logging()
+    await init_database()
+
+    service = BulkImportService(
+        workers=args.workers,
+        concurrency=args.concurrency,
+        document_batch_size=args.batch_size
+    )
+
+    try:
+        async with get_db_async() as db:
+            result = await service.run(
+                db,
+                directory=args.directory,
+                manifest=args.manifest,
+                session_id=args.session_id,
+                processing_type=ProcessingTypeEnum(args.processing_type),
+                uploaded_by=args.uploaded_by
+            )
+    except ValueError as e:
+        print(f"❌ {str(e)}")
+        sys.exit(1)
+    finally:
+        await close_database()
+
+    registration, processing = result.registration, result.processing
+    print("📦 BULK IMPORT")
+    print("=" * 60)
+    print(f"Session:             {result.session_id}")
+    print(f"Registered files:    {registration.registered_files:,} "
+          f"({registration.already_registered:,} already registered, "
+          f"{registration.unreadable_files:,} unreadable, {registration.unparsed_files:,} unparsed filenames)")
+    print(f"Pre-matched:         {registration.prematched_files:,} by medical record number")
+    print(f"Processed:           {processing.processed_files:,}/{processing.total_files:,} "
+          f"({processing.failed_files:,} failed, {processing.review_required:,} for review)")
+    print(f"Status:              {processing.status.value} in {processing.processing_time:.1f}s")
+    if processing.failed_files:
+        print(f"\n♻️ Resume with: python scripts/bulk_import.py --session-id {result.session_id}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
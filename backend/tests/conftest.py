@@ -0,0 +1,225 @@
+"""
+Shared test fixtures
+
+Provides an in-memory stand-in for the database session and a manually
+advanced clock. Test modules subclass FakeDB only where they need behaviour
+the fake does not model (e.g. a specific aggregation pipeline).
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+from contextlib import asynccontextmanager
+from itertools import count
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+
+def matches(doc, filter_dict):
+    """Evaluate the subset of MongoDB filters used by the services under test"""
+    for key, value in (filter_dict or {}).items():
+        if key == "$or":
+            if not any(matches(doc, clause) for clause in value):
+                return False
+            continue
+
+        field = doc.get(key)
+        if not (isinstance(value, dict) and value and all(op.startswith("$") for op in value)):
+            if field != value:
+                return False
+            continue
+
+        for op, operand in value.items():
+            if op == "$exists" and (key in doc) != operand:
+                return False
+            if op == "$ne" and field == operand:
+                return False
+            if op == "$in" and field not in operand:
+                return False
+            if op == "$nin" and field in operand:
+                return False
+            if op in ("$gt", "$gte", "$lt", "$lte"):
+                if field is None:
+                    return False
+                if op == "$gt" and not field > operand:
+                    return False
+                if op == "$gte" and not field >= operand:
+                    return False
+                if op == "$lt" and not field < operand:
+                    return False
+                if op == "$lte" and not field <= operand:
+                    return False
+    return True
+
+
+class FakeDB:
+    """
+    In-memory stand-in for the database session
+
+    Documents are stored per collection keyed by their ``_id``; created
+    documents get ``<collection>-<n>`` IDs and ``create`` returns the ID.
+    Every call is recorded in ``calls`` as (method, collection), bulk inserts
+    in ``bulk_writes`` as (collection, size) and aggregation pipelines in
+    ``pipelines``. ``latency`` is awaited on every call, so concurrent callers
+    interleave as they would against a database.
+    """
+
+    def __init__(self, latency=0.0, **collections):
+        self.collections = {}
+        self.latency = latency
+        self.calls = []
+        self.bulk_writes = []
+        self.pipelines = []
+        self.transactions = 0
+        self._ids = count(1)
+        for collection, documents in collections.items():
+            self.seed(collection, documents)
+
+    def seed(self, collection, documents):
+        """Replace the documents of a collection"""
+        self.collections[collection] = {str(doc["_id"]): dict(doc) for doc in documents}
+
+    def documents(self, collection):
+        """Stored documents of a collection"""
+        return self.collections.setdefault(collection, {})
+
+    def calls_to(self, method, collection=None):
+        """Number of recorded calls to a method (optionally for one collection)"""
+        return sum(
+            1 for called, called_collection in self.calls
+            if called == method and collection in (None, called_collection)
+        )
+
+    async def _record(self, method, collection):
+        self.calls.append((method, collection))
+        await asyncio.sleep(self.latency)
+
+    async def find_one(self, collection, filter_dict=None):
+        await self._record("find_one", collection)
+        for doc in self.documents(collection).values():
+            if matches(doc, filter_dict):
+                return dict(doc)
+        return None
+
+    async def find_many(self, collection, filter_dict=None, limit=None, offset=None, **kwargs):
+        await self._record("find_many", collection)
+        found = [dict(doc) for doc in self.documents(collection).values() if matches(doc, filter_dict)]
+        start = offset or 0
+        return found[start:start + limit] if limit is not None else found[start:]
+
+    async def count(self, collection, filters=None):
+        await self._record("count", collection)
+        return sum(1 for doc in self.documents(collection).values() if matches(doc, filters))
+
+    async def get_by_id(self, collection, id):
+        await self._record("get_by_id", collection)
+        doc = self.documents(collection).get(str(id))
+        return dict(doc) if doc is not None else None
+
+    async def find_by_id(self, collection, id):
+        return await self.get_by_id(collection, id)
+
+    async def get_many_by_ids(self, collection, ids):
+        await self._record("get_many_by_ids", collection)
+        stored = self.documents(collection)
+        return [dict(stored[str(id)]) for id in ids if str(id) in stored]
+
+    async def create(self, collection, data):
+        await self._record("create", collection)
+        doc_id = f"{collection}-{next(self._ids)}"
+        self.documents(collection)[doc_id] = {**data, "_id": doc_id}
+        return doc_id
+
+    async def create_many(self, collection, documents):
+        await self._record("create_many", collection)
+        self.bulk_writes.append((collection, len(documents)))
+        ids = []
+        for data in documents:
+            doc_id = f"{collection}-{next(self._ids)}"
+            self.documents(collection)[doc_id] = {**data, "_id": doc_id}
+            ids.append(doc_id)
+        return ids
+
+    async def update(self, collection, id, data):
+        await self._record("update", collection)
+        doc = self.documents(collection).get(str(id))
+        if doc is None:
+            return False
+        doc.update(data)
+        return True
+
+    async def update_by_id(self, collection, id, data):
+        return await self.update(collection, id, data)
+
+    async def bulk_update(self, collection, updates):
+        await self._record("bulk_update", collection)
+        for id, data in updates:
+            self.documents(collection)[str(id)].update(data)
+        return len(updates)
+
+    async def upsert(self, collection, filter_dict, data):
+        await self._record("upsert", collection)
+        for doc in self.documents(collection).values():
+            if matches(doc, filter_dict):
+                return dict(doc), False
+        doc_id = f"{collection}-{next(self._ids)}"
+        self.documents(collection)[doc_id] = {**data, **filter_dict, "_id": doc_id}
+        return dict(self.documents(collection)[doc_id]), True
+
+    async def delete(self, collection, id):
+        await self._record("delete", collection)
+        return self.documents(collection).pop(str(id), None) is not None
+
+    async def aggregate(self, collection, pipeline):
+        """Evaluate $match / $sort / $skip / $limit stages"""
+        await self._record("aggregate", collection)
+        self.pipelines.append(pipeline)
+        docs = [dict(doc) for doc in self.documents(collection).values()]
+        for stage in pipeline:
+            if "$match" in stage:
+                docs = [doc for doc in docs if matches(doc, stage["$match"])]
+            elif "$sort" in stage:
+                for field, direction in reversed(list(stage["$sort"].items())):
+                    docs.sort(key=lambda doc: (doc.get(field) is not None, doc.get(field)), reverse=direction < 0)
+            elif "$skip" in stage:
+                docs = docs[stage["$skip"]:]
+            elif "$limit" in stage:
+                docs = docs[:stage["$limit"]]
+            else:
+                raise NotImplementedError(f"Unsupported pipeline stage: {stage}")
+        return docs
+
+    @asynccontextmanager
+    async def transaction(self):
+        """Snapshot the collections and restore them when the block fails"""
+        snapshot = {name: {id: dict(doc) for id, doc in docs.items()} for name, docs in self.collections.items()}
+        self.transactions += 1
+        try:
+            yield
+        except Exception:
+            self.collections = snapshot
+            raise
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def fake_db():
+    """Empty in-memory database session"""
+    return FakeDB()
+
+
+@pytest.fixture
+def fake_clock():
+    """Clock starting at zero"""
+    return FakeClock()
@@ -0,0 +1,230 @@
+"""
+Tests for batch progress tracking
+
+Verifies live progress counters, the aggregated batch status and the
+progress event stream
+"""
+
+import asyncio
+import json
+import pytest
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from conftest import FakeDB
+from app.db.models import BatchUploadStatusEnum, VectorizationStatusEnum
+from app.services.batch_progress import CANCELLED_STATUS, BatchProgressTracker
+from app.services.batch_processing_service import BatchProcessingService
+
+
+class BatchStatusDB(FakeDB):
+    """Database fake evaluating the $match / $group pipeline used for batch status"""
+
+    async def aggregate(self, collection, pipeline):
+        self.pipelines.append(pipeline)
+        docs = await self.find_many(collection, pipeline[0]["$match"])
+        groups = {}
+        for doc in docs:
+            key = (doc.get("processing_status"), doc.get("patient_matching_status"))
+            group = groups.setdefault(key, {
+                "_id": {"processing": key[0], "matching": key[1]}, "files": 0, "review_required": 0
+            })
+            group["files"] += 1
+            group["review_required"] += 1 if doc.get("review_required") else 0
+        return list(groups.values())
+
+
+class NoAggregationDB(FakeDB):
+    """Database fake without aggregation support, like the SQLite adapter"""
+
+    async def aggregate(self, collection, pipeline):
+        return []
+
+
+class TestBatchProgress:
+    """Test suite for live progress counters"""
+
+    @pytest.fixture(autouse=True)
+    def setup_fixtures(self, fake_clock):
+        """Setup test fixtures"""
+        self.clock = fake_clock
+        self.tracker = BatchProgressTracker(retention_seconds=60, clock=self.clock)
+
+    def test_throughput_and_eta(self):
+        progress = self.tracker.start("s1", total_files=10, completed_before=2)
+        self.clock.now += 4
+        for success in (True, True, True, False):
+            progress.record_file(success)
+
+        snapshot = progress.snapshot()
+
+        assert snapshot["files_done"] == 6
+        assert snapshot["processed_files"] == 5
+        assert snapshot["failed_files"] == 1
+        assert snapshot["remaining_files"] == 4
+        assert snapshot["throughput_files_per_second"] == 1.0
+        assert snapshot["eta_seconds"] == 4.0
+        assert snapshot["percent_complete"] == 60.0
+
+    def test_stage_latency(self):
+        progress = self.tracker.start("s1", total_files=2)
+        for seconds in (0.2, 0.4):
+            with progress.time_stage("patient_matching"):
+                self.clock.now += seconds
+
+        latency = progress.snapshot()["stage_latency"]["patient_matching"]
+        assert latency == {"count": 2, "avg_ms": 300.0, "max_ms": 400.0}
+
+    def test_finished_sessions_are_pruned(self):
+        self.tracker.start("old", total_files=1).finish(BatchUploadStatusEnum.COMPLETED.value)
+        assert self.tracker.get("old").snapshot()["eta_seconds"] == 0.0
+
+        self.clock.now += 61
+        self.tracker.start("new", total_files=1)
+
+        assert self.tracker.get("old") is None
+        assert self.tracker.get("new") is not None
+
+
+class TestBatchStatus:
+    """Test suite for the aggregated status and pipeline instrumentation"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.tracker = BatchProgressTracker()
+        self.service = BatchProcessingService(
+            azure_openai_service=MagicMock(), summary_service=MagicMock(), progress_tracker=self.tracker
+        )
+        self.service._read_file_content = AsyncMock(return_value="texto")
+        self.service._match_or_create_patient = AsyncMock(
+            return_value=("patient-1", SimpleNamespace(confidence=1.0, review_required=False))
+        )
+        self.db = BatchStatusDB()
+
+    async def make_session(self, states):
+        batch_upload_id = await self.db.create("batch_uploads", {
+            "session_id": "s1", "status": BatchUploadStatusEnum.PENDING.value, "processing_type": "complete"
+        })
+        for index, (processing_status, review_required) in enumerate(states):
+            await self.db.create("batch_files", {
+                "batch_upload_id": batch_upload_id,
+                "original_filename": f"f{index}.pdf",
+                "file_path": f"/tmp/f{index}.pdf",
+                "parsed_patient_id": "3000003799",
+                "processing_status": processing_status.value,
+                "patient_matching_status": "pending",
+                "review_required": review_required
+            })
+        return batch_upload_id
+
+    @pytest.mark.asyncio
+    async def test_status_is_aggregated(self):
+        batch_upload_id = await self.make_session([
+            (VectorizationStatusEnum.COMPLETED, False),
+            (VectorizationStatusEnum.COMPLETED, True),
+            (VectorizationStatusEnum.FAILED, True),
+            (VectorizationStatusEnum.PENDING, False),
+        ])
+
+        status = await self.service.get_batch_status("s1", self.db, include_files=False)
+
+        assert self.db.pipelines[0][0] == {"$match": {"batch_upload_id": batch_upload_id}}
+        assert status["total_files"] == 4
+        assert status["processed_files"] == 2
+        assert status["failed_files"] == 1
+        assert status["review_required"] == 2
+        assert status["files_by_processing_status"]["pending"] == 1
+        assert "files" not in status
+
+    @pytest.mark.asyncio
+    async def test_status_counts_without_aggregation(self):
+        self.db = NoAggregationDB()
+        await self.make_session([
+            (VectorizationStatusEnum.COMPLETED, False),
+            (VectorizationStatusEnum.COMPLETED, True),
+            (VectorizationStatusEnum.FAILED, True),
+            (VectorizationStatusEnum.PENDING, False),
+        ])
+
+        status = await self.service.get_batch_status("s1", self.db, include_files=False)
+
+        assert status["total_files"] == 4
+        assert status["processed_files"] == 2
+        assert status["failed_files"] == 1
+        assert status["review_required"] == 2
+        assert status["files_by_processing_status"] == {"completed": 2, "failed": 1, "pending": 1}
+        assert status["files_by_matching_status"] == {"pending": 4}
+
+    @pytest.mark.asyncio
+    async def test_unknown_session(self):
+        with pytest.raises(ValueError):
+            await self.service.get_batch_status("missing", self.db)
+
+    @pytest.mark.asyncio
+    async def test_processing_updates_live_progress(self):
+        await self.make_session([(VectorizationStatusEnum.PENDING, False)] * 3)
+
+        await self.service.process_batch_upload("s1", self.db)
+
+        snapshot = self.tracker.get("s1").snapshot()
+        assert snapshot["status"] == BatchUploadStatusEnum.COMPLETED.value
+        assert snapshot["files_done"] == 3
+        # The three files share a patient, which is matched once for the group
+        assert snapshot["stage_latency"]["patient_matching"]["count"] == 1
+        assert snapshot["stage_latency"]["create_document"]["count"] == 3
+
+    @pytest.mark.asyncio
+    async def test_cancelled_run_finishes_live_progress(self):
+        await self.make_session([(VectorizationStatusEnum.PENDING, False)] * 2)
+        self.service._process_files_parallel = AsyncMock(side_effect=asyncio.CancelledError)
+
+        with pytest.raises(asyncio.CancelledError):
+            await self.service.process_batch_upload("s1", self.db)
+
+        progress = self.tracker.get("s1")
+        assert progress.is_finished
+        assert progress.snapshot()["status"] == CANCELLED_STATUS
+
+
+class TestProgressStream:
+    """Test suite for the progress event stream"""
+
+    @pytest.mark.asyncio
+    async def test_stream_ends_when_batch_finishes(self, monkeypatch):
+        from app.api.endpoints import documents
+
+        tracker = BatchProgressTracker()
+        tracker.start("s1", total_files=1).finish(BatchUploadStatusEnum.COMPLETED.value)
+        monkeypatch.setattr(documents, "batch_progress_tracker", tracker)
+
+        response = await documents.stream_batch_progress("s1")
+        events = [chunk async for chunk in response.body_iterator]
+
+        assert len(events) == 1
+        assert events[0].startswith("event: progress\ndata: ")
+        payload = json.loads(events[0].split("data: ", 1)[1])
+        assert payload["status"] == "completed"
+        assert payload["source"] == "live"
+
+    @pytest.mark.asyncio
+    async def test_stream_ends_after_idle_timeout(self, monkeypatch):
+        from app.api.endpoints import documents
+
+        tracker = BatchProgressTracker()
+        tracker.start("s1", total_files=2)  # Never advances
+        monkeypatch.setattr(documents, "batch_progress_tracker", tracker)
+        monkeypatch.setattr(documents.settings, "BATCH_PROGRESS_STREAM_INTERVAL_SECONDS", 0.0)
+        monkeypatch.setattr(documents.settings, "BATCH_PROGRESS_STREAM_IDLE_TIMEOUT_SECONDS", 0.0)
+
+        response = await documents.stream_batch_progress("s1")
+        events = [chunk async for chunk in response.body_iterator]
+
+        assert [event.split("\n", 1)[0] for event in events] == [
+            "event: progress", "event: progress", "event: timeout"
+        ]
+        assert json.loads(events[-1].split("data: ", 1)[1])["session_id"] == "s1"
@@ -0,0 +1,146 @@
+"""
+Tests for resumable batch processing
+
+Verifies per-file checkpoints and that resuming a session only processes
+unfinished files without duplicating patients or documents
+"""
+
+import pytest
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db.models import BatchUploadStatusEnum, VectorizationStatusEnum
+from app.services.batch_processing_service import BatchProcessingService
+
+
+class TestBatchResume:
+    """Test suite for checkpointed batch processing"""
+
+    @pytest.fixture(autouse=True)
+    def setup_fixtures(self, fake_db):
+        """Setup test fixtures"""
+        summary_service = MagicMock()
+        self.service = BatchProcessingService(azure_openai_service=MagicMock(), summary_service=summary_service)
+        self.service._read_file_content = AsyncMock(side_effect=lambda path: f"contenido {path}")
+        self.service._match_or_create_patient = AsyncMock(
+            return_value=("patient-1", SimpleNamespace(confidence=1.0, review_required=False))
+        )
+        self.db = fake_db
+
+    async def make_session(self, status, files):
+        """Create a batch session with files in the given processing states"""
+        batch_upload_id = await self.db.create("batch_uploads", {
+            "session_id": "s1", "status": status.value, "processing_type": "complete"
+        })
+        for name, processing_status, extra in files:
+            await self.db.create("batch_files", {
+                "batch_upload_id": batch_upload_id,
+                "original_filename": name,
+                "file_path": f"/tmp/{name}",
+                "content_hash": f"hash-{name}",
+                "parsed_patient_id": "3000003799",
+                "parsed_patient_name": "GARZA, MARIA",
+                "parsed_document_type": "CONS",
+                "processing_status": processing_status.value,
+                **extra
+            })
+
+    def file_states(self):
+        return {f["original_filename"]: f["processing_status"] for f in self.db.collections["batch_files"].values()}
+
+    @pytest.mark.asyncio
+    async def test_started_session_requires_resume(self):
+        await self.make_session(BatchUploadStatusEnum.PROCESSING, [("a.pdf", VectorizationStatusEnum.PENDING, {})])
+
+        with pytest.raises(ValueError):
+            await self.service.process_batch_upload("s1", self.db)
+
+    @pytest.mark.asyncio
+    async def test_completed_session_cannot_be_resumed(self):
+        await self.make_session(BatchUploadStatusEnum.COMPLETED, [("a.pdf", VectorizationStatusEnum.COMPLETED, {})])
+
+        with pytest.raises(ValueError):
+            await self.service.resume_batch_upload("s1", self.db)
+
+    @pytest.mark.asyncio
+    async def test_resume_processes_only_unfinished_files(self):
+        await self.make_session(BatchUploadStatusEnum.PROCESSING, [
+            ("done.pdf", VectorizationStatusEnum.COMPLETED, {"medical_document_id": "old-doc"}),
+            ("interrupted.pdf", VectorizationStatusEnum.PROCESSING, {}),
+            ("failed.pdf", VectorizationStatusEnum.FAILED, {}),
+            ("pending.pdf", VectorizationStatusEnum.PENDING, {}),
+        ])
+
+        result = await self.service.resume_batch_upload("s1", self.db)
+
+        processed_paths = sorted(call.args[0] for call in self.service._read_file_content.await_args_list)
+        assert processed_paths == ["/tmp/failed.pdf", "/tmp/interrupted.pdf", "/tmp/pending.pdf"]
+        assert set(self.file_states().values()) == {VectorizationStatusEnum.COMPLETED.value}
+        assert result.processed_files == 4
+        assert result.status == BatchUploadStatusEnum.COMPLETED
+
+        session = next(iter(self.db.collections["batch_uploads"].values()))
+        assert session["status"] == BatchUploadStatusEnum.COMPLETED.value
+        assert session["resume_count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_patient_counts_include_earlier_runs(self):
+        await self.make_session(BatchUploadStatusEnum.PROCESSING, [
+            ("done.pdf", VectorizationStatusEnum.COMPLETED, {
+                "matched_patient_id": "patient-7", "matching_confidence": 0.95, "medical_document_id": "old-doc"
+            }),
+            ("pending.pdf", VectorizationStatusEnum.PENDING, {"parsed_patient_id": "4000000001"}),
+        ])
+
+        result = await self.service.resume_batch_upload("s1", self.db)
+
+        assert result.processed_files == 2
+        assert result.created_patients == 2
+        assert result.matched_patients == 1
+
+    @pytest.mark.asyncio
+    async def test_resume_reuses_patient_and_document(self):
+        # An interrupted run resolved the patient and created the document before stopping
+        existing_doc = await self.db.create("medical_documents", {
+            "patient_id": "patient-7",
+            "content_hash": "hash-a.pdf",
+            "original_filename": "a.pdf"
+        })
+        await self.make_session(BatchUploadStatusEnum.PROCESSING, [
+            ("a.pdf", VectorizationStatusEnum.PROCESSING, {"matched_patient_id": "patient-7"})
+        ])
+
+        await self.service.resume_batch_upload("s1", self.db)
+
+        self.service._match_or_create_patient.assert_not_called()
+        assert list(self.db.collections["medical_documents"]) == [existing_doc]
+        batch_file = next(iter(self.db.collections["batch_files"].values()))
+        assert batch_file["medical_document_id"] == existing_doc
+        assert batch_file["processing_status"] == VectorizationStatusEnum.COMPLETED.value
+
+    @pytest.mark.asyncio
+    async def test_failed_file_is_checkpointed_as_failed(self):
+        await self.make_session(BatchUploadStatusEnum.PENDING, [
+            ("ok.pdf", VectorizationStatusEnum.PENDING, {}),
+            ("bad.pdf", VectorizationStatusEnum.PENDING, {}),
+        ])
+
+        async def read_file_content(path):
+            if "bad" in path:
+                raise IOError("unreadable")
+            return "texto"
+
+        self.service._read_file_content = read_file_content
+
+        result = await self.service.process_batch_upload("s1", self.db)
+
+        assert result.status == BatchUploadStatusEnum.PARTIALLY_FAILED
+        assert self.file_states() == {
+            "ok.pdf": VectorizationStatusEnum.COMPLETED.value,
+            "bad.pdf": VectorizationStatusEnum.FAILED.value
+        }
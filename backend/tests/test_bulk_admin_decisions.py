@@ -0,0 +1,330 @@
+"""
+Tests for bulk admin decisions
+
+Verifies that approve, reject and manual-match decisions are applied in one
+call, grouped by target patient with one transaction per group, and reported
+per item
+"""
+
+import pytest
+import sys
+import os
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from conftest import FakeDB
+from app.api.endpoints import admin_review
+from app.database.factory import get_db
+from app.database.mongodb_adapter import MongoDBAdapter
+from app.db.models import PatientMatchingStatusEnum, VectorizationStatusEnum
+from app.services.admin_review_service import AdminDecision, AdminDecisionEnum, AdminReviewService
+from app.services.batch_processing_service import BatchProcessingService
+from app.services.reference_data_cache import ReferenceDataCache
+
+
+class ConflictingDB(FakeDB):
+    """Database fake whose bulk updates fail for the patient in ``fail_updates_for``"""
+
+    def __init__(self):
+        super().__init__()
+        self.fail_updates_for = None
+
+    async def bulk_update(self, collection, updates):
+        failing = self.fail_updates_for
+        if failing and any(data.get("matched_patient_id") == failing for _, data in updates):
+            raise RuntimeError("write conflict")
+        return await super().bulk_update(collection, updates)
+
+
+class TestBulkAdminDecisions:
+    """Test suite for AdminReviewService.apply_bulk_decisions"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.db = ConflictingDB()
+        self.summary_service = MagicMock()
+        self.service = AdminReviewService()
+        self.service.batch_service = BatchProcessingService(
+            azure_openai_service=MagicMock(), summary_service=self.summary_service, reference_data=ReferenceDataCache()
+        )
+        self.service._read_file_content = AsyncMock(return_value="contenido")
+
+    async def add_patient(self, mrn, name):
+        return await self.db.create("patients", {"medical_record_number": mrn, "name": name})
+
+    async def add_review_file(self, name, **fields):
+        upload = await self.db.create("batch_uploads", {"session_id": "s1", "processing_type": "complete"})
+        return await self.db.create("batch_files", {
+            "batch_upload_id": upload,
+            "original_filename": name,
+            "file_path": f"/tmp/{name}",
+            "parsed_patient_id": "3000003799",
+            "parsed_patient_name": "GARZA TIJERINA, MARIA ESTHER",
+            "parsed_document_type": "CONS",
+            "review_required": True,
+            "created_at": datetime(2026, 1, 1),
+            **fields
+        })
+
+    @pytest.mark.asyncio
+    async def test_decisions_are_grouped_by_target_patient(self):
+        suggested = await self.add_patient("1", "GARZA TIJERINA, MARIA ESTER")
+        provisional = await self.add_patient("3000003799", "GARZA TIJERINA, MARIA ESTHER")
+        document = await self.db.create("medical_documents", {"patient_id": provisional})
+        reviewed = await self.add_review_file(
+            "a.pdf",
+            patient_matching_status=PatientMatchingStatusEnum.REVIEW_REQUIRED.value,
+            matched_patient_id=provisional,
+            medical_document_id=document,
+            matching_details={"best_patient_id": suggested, "suggestions": []}
+        )
+        failed = await self.add_review_file("b.pdf", processing_status=VectorizationStatusEnum.FAILED.value)
+        manual = await self.add_review_file("c.pdf", parsed_patient_id=None)
+
+        results = await self.service.apply_bulk_decisions([
+            (reviewed, AdminDecision(decision=AdminDecisionEnum.APPROVE_MATCH, reviewed_by="ana")),
+            (failed, AdminDecision(decision=AdminDecisionEnum.MANUAL_MATCH, selected_patient_id=suggested, reviewed_by="ana")),
+            (manual, AdminDecision(decision=AdminDecisionEnum.MANUAL_MATCH, selected_patient_id=suggested, reviewed_by="ana"))
+        ], self.db)
+
+        assert [result["success"] for result in results] == [True, True, True]
+        assert {result["patient_id"] for result in results} == {suggested}
+        assert self.db.transactions == 1
+        assert self.db.calls_to("get_many_by_ids", "batch_files") == 1
+
+        # The provisional document moves to the approved patient; the others get one
+        assert results[0]["document_id"] == document
+        assert self.db.collections["medical_documents"][document]["patient_id"] == suggested
+        for result in results[1:]:
+            created = self.db.collections["medical_documents"][result["document_id"]]
+            assert created["patient_id"] == suggested
+            assert created["created_by"] == "admin_review_ana"
+        assert self.summary_service.schedule.call_count == 2
+
+        for file_id in (reviewed, failed, manual):
+            batch_file = self.db.collections["batch_files"][file_id]
+            assert batch_file["review_required"] is False
+            assert batch_file["matched_patient_id"] == suggested
+            assert batch_file["patient_matching_status"] == PatientMatchingStatusEnum.MATCHED.value
+            assert batch_file["processing_status"] == VectorizationStatusEnum.COMPLETED.value
+            assert batch_file["reviewed_by"] == "ana"
+
+    @pytest.mark.asyncio
+    async def test_reject_creates_one_patient_per_expediente(self):
+        first = await self.add_review_file("a.pdf")
+        second = await self.add_review_file("b.pdf")
+
+        results = await self.service.apply_bulk_decisions([
+            (first, AdminDecision(decision=AdminDecisionEnum.REJECT_MATCH)),
+            (second, AdminDecision(decision=AdminDecisionEnum.REJECT_MATCH))
+        ], self.db)
+
+        assert all(result["success"] for result in results)
+        assert len(self.db.collections["patients"]) == 1
+        assert results[0]["patient_id"] == results[1]["patient_id"]
+        assert self.db.collections["batch_files"][first]["patient_matching_status"] == (
+            PatientMatchingStatusEnum.NEW_PATIENT.value
+        )
+
+    @pytest.mark.asyncio
+    async def test_invalid_items_fail_individually(self):
+        patient = await self.add_patient("1", "LOPEZ, JUAN")
+        valid = await self.add_review_file("a.pdf")
+        done = await self.add_review_file("b.pdf", review_required=False)
+        unparsed = await self.add_review_file("c.pdf", parsed_patient_id=None, parsed_patient_name=None)
+        other = await self.add_review_file("d.pdf")
+
+        results = await self.service.apply_bulk_decisions([
+            (valid, AdminDecision(decision=AdminDecisionEnum.MANUAL_MATCH, selected_patient_id=patient)),
+            (valid, AdminDecision(decision=AdminDecisionEnum.MANUAL_MATCH, selected_patient_id=patient)),
+            ("missing", AdminDecision(decision=AdminDecisionEnum.APPROVE_MATCH)),
+            (done, AdminDecision(decision=AdminDecisionEnum.MANUAL_MATCH, selected_patient_id=patient)),
+            (unparsed, AdminDecision(decision=AdminDecisionEnum.APPROVE_MATCH)),
+            (unparsed, AdminDecision(decision=AdminDecisionEnum.DELETE_FILE)),
+            (other, AdminDecision(decision=AdminDecisionEnum.MANUAL_MATCH, selected_patient_id="nobody"))
+        ], self.db)
+
+        assert [result["success"] for result in results] == [True, False, False, False, False, False, False]
+        messages = [result["message"] for result in results[1:]]
+        assert "Duplicate decision" in messages[0]
+        assert "Batch file not found" in messages[1]
+        assert "does not require review" in messages[2]
+        assert "No patient match to approve" in messages[3]
+        assert "cannot be applied in bulk" in messages[4]
+        assert "Selected patient not found" in messages[5]
+        assert self.db.collections["batch_files"][unparsed]["review_required"] is True
+
+    @pytest.mark.asyncio
+    async def test_failed_group_is_rolled_back_without_affecting_others(self):
+        kept = await self.add_patient("1", "LOPEZ, JUAN")
+        conflicted = await self.add_patient("2", "PEREZ, ANA")
+        ok_file = await self.add_review_file("a.pdf")
+        bad_file = await self.add_review_file("b.pdf")
+        self.db.fail_updates_for = conflicted
+
+        results = await self.service.apply_bulk_decisions([
+            (ok_file, AdminDecision(decision=AdminDecisionEnum.MANUAL_MATCH, selected_patient_id=kept)),
+            (bad_file, AdminDecision(decision=AdminDecisionEnum.MANUAL_MATCH, selected_patient_id=conflicted))
+        ], self.db)
+
+        assert results[0]["success"]
+        assert not results[1]["success"]
+        assert "write conflict" in results[1]["message"]
+        assert results[1]["document_id"] is None
+        assert self.db.transactions == 2
+        assert self.db.collections["batch_files"][bad_file]["review_required"] is True
+        assert [doc["patient_id"] for doc in self.db.collections["medical_documents"].values()] == [kept]
+
+    @pytest.mark.asyncio
+    async def test_bulk_approve_only_touches_high_confidence_matches(self):
+        patient = await self.add_patient("3000003799", "GARZA TIJERINA, MARIA ESTHER")
+        high = await self.add_review_file("a.pdf", matched_patient_id=patient, matching_confidence=0.95)
+        low = await self.add_review_file("b.pdf", matched_patient_id=patient, matching_confidence=0.7)
+        unmatched = await self.add_review_file("c.pdf", matched_patient_id=None, matching_confidence=0.99)
+        session_upload = self.db.collections["batch_files"][high]["batch_upload_id"]
+        for file_id in (low, unmatched):
+            self.db.collections["batch_files"][file_id]["batch_upload_id"] = session_upload
+        self.db.collections["batch_uploads"][session_upload]["session_id"] = "target"
+
+        result = await self.service.bulk_approve_high_confidence_matches("target", 0.9, self.db)
+
+        assert result["approved_count"] == 1
+        assert result["failed_count"] == 0
+        assert self.db.collections["batch_files"][high]["reviewed_by"] == "system_bulk_approve"
+        assert self.db.collections["batch_files"][low]["review_required"] is True
+        assert self.db.collections["batch_files"][unmatched]["review_required"] is True
+
+
+class TestAdminReviewRoutes:
+    """Test suite for the single-decision and bulk-approval routes on the document database"""
+
+    @pytest.fixture(autouse=True)
+    def setup_fixtures(self, fake_db, monkeypatch):
+        """Setup test fixtures"""
+        self.db = fake_db
+        service = AdminReviewService()
+        service.batch_service = BatchProcessingService(
+            azure_openai_service=MagicMock(), summary_service=MagicMock(), reference_data=ReferenceDataCache()
+        )
+        service._read_file_content = AsyncMock(return_value="contenido")
+        monkeypatch.setattr(admin_review, "admin_review_service", service)
+
+        app = FastAPI()
+        app.include_router(admin_review.router)
+        app.dependency_overrides[get_db] = lambda: self.db
+        self.client = TestClient(app)
+
+        self.db.seed("patients", [{"_id": "p1", "medical_record_number": "3000003799", "name": "GARZA, MARIA"}])
+        self.db.seed("batch_uploads", [{"_id": "u1", "session_id": "s1", "processing_type": "complete"}])
+        self.db.seed("batch_files", [
+            {
+                "_id": f"65a1b2c3d4e5f60718293a4{i}", "batch_upload_id": "u1", "original_filename": f"{i}.pdf",
+                "file_path": f"/tmp/{i}.pdf", "review_required": True, "matched_patient_id": "p1",
+                "matching_confidence": confidence, "created_at": datetime(2026, 1, 1)
+            }
+            for i, confidence in enumerate((0.95, 0.97, 0.5))
+        ])
+
+    def test_bulk_approve_route(self):
+        response = self.client.post("/review/s1/bulk-approve", json={"confidence_threshold": 0.9, "reviewed_by": "ana"})
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["approved_count"] == 2
+        assert body["failed_count"] == 0
+        assert body["success"] is True
+        assert [f["review_required"] for f in self.db.documents("batch_files").values()] == [False, False, True]
+
+    def test_bulk_approve_unknown_session(self):
+        response = self.client.post("/review/missing/bulk-approve", json={"reviewed_by": "ana"})
+
+        assert response.status_code == 404
+
+    def test_single_decision_route_accepts_string_ids(self):
+        file_id = "65a1b2c3d4e5f60718293a42"
+
+        response = self.client.post(
+            f"/review/{file_id}/decision",
+            json={"decision": "manual_match", "selected_patient_id": "p1", "reviewed_by": "ana"}
+        )
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["success"] is True
+        assert body["batch_file_id"] == file_id
+        assert body["processed_patient_id"] == "p1"
+        assert self.db.documents("batch_files")[file_id]["review_required"] is False
+
+    def test_single_skip_decision(self):
+        file_id = "65a1b2c3d4e5f60718293a40"
+
+        response = self.client.post(
+            f"/review/{file_id}/decision", json={"decision": "skip_file", "admin_notes": "duplicado", "reviewed_by": "ana"}
+        )
+
+        assert response.json()["success"] is True
+        batch_file = self.db.documents("batch_files")[file_id]
+        assert batch_file["review_required"] is False
+        assert batch_file["error_message"] == "Skipped by admin: duplicado"
+
+    def test_single_decision_unknown_file(self):
+        response = self.client.post("/review/nope/decision", json={"decision": "skip_file", "reviewed_by": "ana"})
+
+        assert response.status_code == 400
+
+
+class TestMongoBulkOperations:
+    """Test suite for the MongoDB adapter bulk reads and writes"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.collection = MagicMock()
+        self.adapter = MongoDBAdapter()
+        self.adapter.db = {"batch_files": self.collection}
+
+    @pytest.mark.asyncio
+    async def test_get_many_by_ids_uses_one_query(self):
+        object_id = ObjectId()
+        cursor = MagicMock()
+        cursor.to_list = AsyncMock(return_value=[{"_id": object_id}])
+        self.collection.find = MagicMock(return_value=cursor)
+
+        docs = await self.adapter.get_many_by_ids("batch_files", [str(object_id), 7])
+
+        assert docs == [{"_id": object_id}]
+        self.collection.find.assert_called_once_with(
+            {"$or": [{"_id": {"$in": [object_id]}}, {"id": {"$in": [7]}}]}
+        )
+
+    @pytest.mark.asyncio
+    async def test_bulk_update_uses_one_bulk_write(self):
+        self.collection.bulk_write = AsyncMock(return_value=MagicMock(modified_count=2))
+        first, second = ObjectId(), ObjectId()
+
+        modified = await self.adapter.bulk_update(
+            "batch_files", [(str(first), {"review_required": False}), (second, {"review_required": False})]
+        )
+
+        assert modified == 2
+        operations = self.collection.bulk_write.await_args.args[0]
+        assert [operation._filter for operation in operations] == [{"_id": first}, {"_id": second}]
+        assert self.collection.bulk_write.await_args.kwargs == {"ordered": False}
+
+    @pytest.mark.asyncio
+    async def test_transaction_is_skipped_on_standalone_server(self):
+        self.adapter.client = MagicMock()
+        self.adapter.client.admin.command = AsyncMock(return_value={"isWritablePrimary": True})
+        self.collection.bulk_write = AsyncMock(return_value=MagicMock(modified_count=1))
+
+        async with self.adapter.transaction():
+            await self.adapter.bulk_update("batch_files", [(ObjectId(), {"review_required": False})])
+
+        self.adapter.client.start_session.assert_not_called()
+        assert "session" not in self.collection.bulk_write.await_args.kwargs
@@ -0,0 +1,161 @@
+"""
+Tests for the bulk import mode
+
+Verifies in-place registration from directories and manifests, bulk patient
+pre-matching, bulk document writes and resuming an import session
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.database.bulk_writer import BulkInsertBuffer
+from app.db.models import BatchUploadStatusEnum, PatientMatchingStatusEnum, VectorizationStatusEnum
+from app.services.batch_processing_service import BatchProcessingService
+from app.services.bulk_import_service import BulkImportService, iter_manifest
+
+
+class TestBulkImport:
+    """Test suite for directory and manifest imports"""
+
+    @pytest.fixture(autouse=True)
+    def setup_fixtures(self, fake_db):
+        """Setup test fixtures"""
+        self.batch_service = BatchProcessingService(azure_openai_service=MagicMock(), summary_service=MagicMock())
+        self.batch_service._read_file_content = AsyncMock(return_value="texto")
+        self.batch_service._match_or_create_patient = AsyncMock(
+            return_value=("new-patient", SimpleNamespace(confidence=0.0, review_required=False))
+        )
+        self.service = BulkImportService(
+            batch_service=self.batch_service, workers=0, concurrency=4, document_batch_size=10, chunk_size=2
+        )
+        self.db = fake_db
+
+    def files(self):
+        return {f["original_filename"]: f for f in self.db.collections["batch_files"].values()}
+
+    def write_files(self, directory, names):
+        for name in names:
+            (directory / name).write_bytes(f"contenido {name}".encode())
+
+    @pytest.mark.asyncio
+    async def test_directory_import(self, tmp_path):
+        self.write_files(tmp_path, [
+            "3000003799_GARZA TIJERINA, MARIA ESTHER_6001467010_CONS.pdf",
+            "3000003799_GARZA TIJERINA, MARIA ESTHER_6001467011_LAB.pdf",
+            "4000000001_LOPEZ, JUAN_123_RX.pdf",
+            "notas.txt",
+        ])
+        existing = await self.db.create("patients", {"medical_record_number": "3000003799"})
+
+        result = await self.service.run(self.db, directory=str(tmp_path))
+
+        files = self.files()
+        assert sorted(files) == sorted(name for name in os.listdir(tmp_path) if name.endswith(".pdf"))
+        assert all(f["file_path"] == str(tmp_path / name) for name, f in files.items())
+        assert result.registration.registered_files == 3
+        assert result.registration.prematched_files == 2
+        assert files["3000003799_GARZA TIJERINA, MARIA ESTHER_6001467011_LAB.pdf"]["matched_patient_id"] == existing
+        details = files["3000003799_GARZA TIJERINA, MARIA ESTHER_6001467011_LAB.pdf"]["matching_details"]
+        assert [s["patient_id"] for s in details["suggestions"]] == [existing]
+        assert files["4000000001_LOPEZ, JUAN_123_RX.pdf"]["parsed_patient_name"] == "LOPEZ, JUAN"
+        assert files["4000000001_LOPEZ, JUAN_123_RX.pdf"]["parsed_document_type"] == "RX"
+
+        # Only the unknown expediente went through per-file matching
+        assert self.batch_service._match_or_create_patient.await_count == 1
+        assert result.processing.status == BatchUploadStatusEnum.COMPLETED
+        assert ("medical_documents", 3) in self.db.bulk_writes
+        assert not os.path.exists(self.batch_service.upload_directory / result.session_id)
+
+    @pytest.mark.asyncio
+    async def test_resume_adds_only_new_files(self, tmp_path):
+        self.write_files(tmp_path, ["3000003799_GARZA, MARIA_1_CONS.pdf"])
+        first = await self.service.run(self.db, directory=str(tmp_path))
+
+        self.write_files(tmp_path, ["3000003799_GARZA, MARIA_2_LAB.pdf"])
+        second = await self.service.run(self.db, directory=str(tmp_path), session_id=first.session_id)
+
+        assert second.registration.registered_files == 1
+        assert second.registration.already_registered == 1
+        assert second.processing.processed_files == 2
+        assert self.batch_service._read_file_content.await_count == 2
+        assert len(self.db.collections["medical_documents"]) == 2
+        assert {f["processing_status"] for f in self.files().values()} == {VectorizationStatusEnum.COMPLETED.value}
+
+    @pytest.mark.asyncio
+    async def test_rerunning_a_completed_session(self, tmp_path):
+        self.write_files(tmp_path, ["3000003799_GARZA, MARIA_1_CONS.pdf"])
+        first = await self.service.run(self.db, directory=str(tmp_path))
+
+        again = await self.service.run(self.db, directory=str(tmp_path), session_id=first.session_id)
+        resumed = await self.service.run(self.db, session_id=first.session_id)
+
+        for result in (again, resumed):
+            assert result.registration.registered_files == 0
+            assert result.processing.status == BatchUploadStatusEnum.COMPLETED
+            assert result.processing.processed_files == 1
+            assert result.processing.total_files == 1
+        assert self.batch_service._read_file_content.await_count == 1
+        assert len(self.db.collections["medical_documents"]) == 1
+
+    @pytest.mark.asyncio
+    async def test_unreadable_and_unparsed_files(self, tmp_path):
+        self.write_files(tmp_path, ["3000003799_GARZA, MARIA_1_CONS.pdf", "escaneo.pdf"])
+        manifest = tmp_path / "manifest.csv"
+        manifest.write_text(
+            'file_path,notes\n"3000003799_GARZA, MARIA_1_CONS.pdf",\nescaneo.pdf,\nmissing.pdf,\n',
+            encoding="utf-8"
+        )
+
+        result = await self.service.run(self.db, manifest=str(manifest))
+
+        assert result.registration.registered_files == 2
+        assert result.registration.unreadable_files == 1
+        assert result.registration.unparsed_files == 1
+        unparsed = self.files()["escaneo.pdf"]
+        assert unparsed["review_required"] is True
+        assert unparsed["processing_status"] == VectorizationStatusEnum.FAILED.value
+        assert unparsed["patient_matching_status"] == PatientMatchingStatusEnum.PENDING.value
+        assert result.processing.status == BatchUploadStatusEnum.PARTIALLY_FAILED
+
+    def test_manifest_requires_path_column(self, tmp_path):
+        manifest = tmp_path / "manifest.csv"
+        manifest.write_text("filename\na.pdf\n", encoding="utf-8")
+
+        with pytest.raises(ValueError):
+            list(iter_manifest(str(manifest)))
+
+    @pytest.mark.asyncio
+    async def test_source_is_required(self):
+        with pytest.raises(ValueError):
+            await self.service.run(self.db)
+
+
+class TestBulkInsertBuffer:
+    """Test suite for coalesced document inserts"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_inserts_share_a_batch(self, fake_db):
+        db = fake_db
+        buffer = BulkInsertBuffer(db, "medical_documents", max_batch_size=3, max_delay_seconds=0.01)
+
+        ids = await asyncio.gather(*(buffer.insert({"n": n}) for n in range(5)))
+
+        assert db.bulk_writes == [("medical_documents", 3), ("medical_documents", 2)]
+        assert [db.collections["medical_documents"][doc_id]["n"] for doc_id in ids] == list(range(5))
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_fails_every_insert(self, fake_db):
+        db = fake_db
+        db.create_many = AsyncMock(side_effect=RuntimeError("write conflict"))
+        buffer = BulkInsertBuffer(db, "medical_documents", max_batch_size=2)
+
+        results = await asyncio.gather(buffer.insert({}), buffer.insert({}), return_exceptions=True)
+
+        assert all(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,208 @@
+"""
+Tests for the Conversation Session Store
+
+Verifies document carryover between conversation turns and the full-context fallback policy
+"""
+
+import pytest
+import sys
+import os
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.models.chat import ChatMessage
+from app.services.conversation_session_store import ConversationSessionStore, select_relevant_passages
+from app.agents.document_analysis_agent import DocumentAnalysisAgent
+from app.agents.medical_coordinator import MedicalCoordinatorAgent
+from app.core.config import settings
+from app.services.enhanced_document_service import ContextStrategy
+
+
+def _document(document_id: str, content: str) -> dict:
+    return {
+        "document_id": document_id,
+        "title": f"Documento {document_id}",
+        "content": content,
+        "document_type": "consultation",
+        "created_at": f"2024-01-0{document_id}",
+        "relevance_score": 0.8
+    }
+
+
+LAB_NOTE = "\n".join([
+    "Paciente acude a control.",
+    "Hemoglobina glucosilada 8.2% en enero.",
+    "Se ajusta metformina a 850 mg cada 12 horas.",
+    "Sin otros hallazgos." * 30
+])
+
+
+class TestConversationSessionStore:
+    """Test suite for ConversationSessionStore"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.store = ConversationSessionStore(
+            max_sessions=10,
+            ttl_seconds=60,
+            full_context_every_n_turns=5,
+            digest_max_chars=50,
+            passage_max_chars=200
+        )
+        self.documents = [_document("1", LAB_NOTE), _document("2", "Radiografía de tórax normal.")]
+
+    def test_first_turn_sends_full_context(self):
+        plan = self.store.plan_context("conv", "p1", self.documents, "resumen del expediente", turn=1)
+
+        assert plan.mode == "full"
+        assert plan.reason == "first_turn"
+        assert len(plan.full_documents) == 2
+
+    def test_follow_up_sends_digest_and_passages(self):
+        self.store.plan_context("conv", "p1", self.documents, "resumen del expediente", turn=1)
+        documents = self.documents + [_document("3", "Nota nueva de cardiología.")]
+
+        plan = self.store.plan_context("conv", "p1", documents, "¿cuánto salió la hemoglobina glucosilada?", turn=2)
+
+        assert plan.mode == "incremental"
+        assert [doc["document_id"] for doc in plan.full_documents] == ["3"]
+        assert {item["document_id"] for item in plan.digest} == {"1", "2"}
+        assert all(len(item["digest"]) <= 51 for item in plan.digest)
+        assert len(plan.passages) == 1
+        assert "8.2%" in plan.passages[0]["passage"]
+        assert plan.chars_saved > 0
+
+    def test_documents_beyond_the_agent_limit_are_not_recorded_as_seen(self):
+        documents = [_document(str(i), f"Nota {i}.") for i in range(1, 8)]
+
+        first = self.store.plan_context("conv", "p1", documents, "resumen", turn=1, max_full_documents=5)
+        follow_up = self.store.plan_context("conv", "p1", documents, "¿y la presión?", turn=2, max_full_documents=5)
+
+        assert [doc["document_id"] for doc in first.full_documents] == ["1", "2", "3", "4", "5"]
+        assert [doc["document_id"] for doc in follow_up.full_documents] == ["6", "7"]
+        assert {item["document_id"] for item in follow_up.digest} == {"1", "2", "3", "4", "5"}
+
+    def test_same_turn_is_planned_identically(self):
+        self.store.plan_context("conv", "p1", self.documents, "resumen", turn=1)
+        # A retried or re-routed first turn must not treat its own documents as seen
+        retry = self.store.plan_context("conv", "p1", self.documents, "resumen", turn=1)
+        assert retry.mode == "full"
+
+    def test_explicit_request_falls_back_to_full_context(self):
+        self.store.plan_context("conv", "p1", self.documents, "resumen", turn=1)
+        plan = self.store.plan_context("conv", "p1", self.documents, "muéstrame el expediente completo", turn=2)
+        assert plan.mode == "full"
+        assert plan.reason == "full_context_requested"
+
+    def test_periodic_refresh(self):
+        self.store.plan_context("conv", "p1", self.documents, "resumen", turn=1)
+        modes = [
+            self.store.plan_context("conv", "p1", self.documents, "otra pregunta", turn=turn).mode
+            for turn in range(2, 8)
+        ]
+        assert modes == ["incremental"] * 4 + ["full", "incremental"]
+
+    def test_new_patient_starts_new_session(self):
+        self.store.plan_context("conv", "p1", self.documents, "resumen", turn=1)
+        plan = self.store.plan_context("conv", "p2", self.documents, "resumen", turn=2)
+        assert plan.mode == "full"
+
+    def test_stats(self):
+        self.store.plan_context("conv", "p1", self.documents, "resumen", turn=1)
+        self.store.plan_context("conv", "p1", self.documents, "hemoglobina", turn=2)
+        stats = self.store.get_stats()
+        assert stats["turns_by_mode"] == {"full": 1, "incremental": 1}
+        assert stats["total_chars_saved"] > 0
+
+
+class TestRelevantPassages:
+    """Test suite for passage selection"""
+
+    def test_passages_match_query_terms(self):
+        passages = select_relevant_passages(LAB_NOTE, "dosis de metformina", max_chars=500, passage_chars=60)
+        assert passages == ["Se ajusta metformina a 850 mg cada 12 horas."]
+
+    def test_no_terms_no_passages(self):
+        assert select_relevant_passages(LAB_NOTE, "¿y eso?", max_chars=500) == []
+
+
+class TestDocumentAnalysisCarryover:
+    """Test suite for carryover blocks in the document analysis prompt"""
+
+    @pytest.mark.asyncio
+    async def test_digest_and_passages_are_formatted(self):
+        agent = DocumentAnalysisAgent(MagicMock())
+        context = {
+            "full_documents": [],
+            "document_digest": [{"document_id": "1", "title": "Laboratorio", "created_at": "2024-01-01",
+                                 "digest": "HbA1c 8.2%"}],
+            "relevant_passages": [{"document_id": "1", "title": "Laboratorio",
+                                   "passage": "Hemoglobina glucosilada 8.2%"}]
+        }
+
+        messages = await agent._prepare_document_context([ChatMessage(role="user", content="¿HbA1c?")], context)
+
+        assert "DOCUMENTOS YA REVISADOS" in messages[1].content
+        assert "FRAGMENTOS RELEVANTES" in messages[-2].content
+        assert messages[-1].content == "¿HbA1c?"
+
+
+def _hybrid_context(document_ids) -> SimpleNamespace:
+    """Minimal stand-in for the HybridContext returned by the document service"""
+    documents = [
+        SimpleNamespace(
+            document_id=document_id, title=f"Documento {document_id}", content=LAB_NOTE,
+            document_type=SimpleNamespace(value="consultation"), relevance_score=0.8,
+            relevance_level=SimpleNamespace(value="high"), source="test", created_at=datetime(2024, 1, 1),
+            summary=None, key_points=[], content_mode="full"
+        )
+        for document_id in document_ids
+    ]
+    return SimpleNamespace(
+        patient_id="p1", strategy_used=ContextStrategy.FULL_DOCS_ONLY, total_documents=len(documents),
+        total_tokens=1000, context_summary="", confidence=0.9, recommendations=[],
+        full_documents=documents, patient_digest=None
+    )
+
+
+class TestCoordinatorCarryover:
+    """Test suite for which agents receive the carryover plan"""
+
+    @pytest.fixture(autouse=True)
+    def setup_fixtures(self, monkeypatch):
+        """Setup test fixtures"""
+        def no_database():
+            raise RuntimeError("no database in tests")
+
+        monkeypatch.setattr("app.database.factory.get_db_async", no_database)
+        monkeypatch.setattr(settings, "CONVERSATION_CONTEXT_CARRYOVER_ENABLED", True)
+        self.coordinator = MedicalCoordinatorAgent(azure_openai_service=MagicMock())
+
+    async def _follow_up(self, query_type: str) -> dict:
+        messages = [ChatMessage(role="user", content="resumen")]
+        await self.coordinator._prepare_unified_context(
+            None, _hybrid_context(["1"]), messages=messages, conversation_id=f"conv-{query_type}", query_type=query_type
+        )
+        messages += [ChatMessage(role="assistant", content="..."), ChatMessage(role="user", content="¿hemoglobina?")]
+        return await self.coordinator._prepare_unified_context(
+            None, _hybrid_context(["1", "2"]), messages=messages, conversation_id=f"conv-{query_type}",
+            query_type=query_type
+        )
+
+    @pytest.mark.asyncio
+    async def test_document_analysis_receives_digest(self):
+        context = await self._follow_up("document_analysis")
+
+        assert [doc["document_id"] for doc in context["full_documents"]] == ["2"]
+        assert [item["document_id"] for item in context["document_digest"]] == ["1"]
+
+    @pytest.mark.asyncio
+    async def test_other_agents_keep_every_document(self):
+        context = await self._follow_up("search")
+
+        assert [doc["document_id"] for doc in context["full_documents"]] == ["1", "2"]
+        assert "document_digest" not in context
@@ -0,0 +1,184 @@
+"""
+Tests for precomputed document summaries
+
+Verifies background summarization of stored documents and that the enhanced
+document context only keeps full text for the top-ranked documents
+"""
+
+import pytest
+import sys
+import os
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.config import settings
+from app.services.document_summary_service import (
+    DocumentSummaryService, SummaryStatus, content_fingerprint, format_summary_content
+)
+from app.services.enhanced_document_service import EnhancedDocumentService, DocumentRelevance
+
+
+def summary_response(summary, key_points):
+    """Chat response with a store_document_summary tool call"""
+    import json
+    tool_call = SimpleNamespace(function={
+        "name": "store_document_summary",
+        "arguments": json.dumps({"summary": summary, "key_points": key_points})
+    })
+    return SimpleNamespace(content="", tool_calls=[tool_call])
+
+
+class TestDocumentSummaryService:
+    """Test suite for background summarization"""
+
+    @pytest.fixture(autouse=True)
+    def setup_fixtures(self, fake_db):
+        """Setup test fixtures"""
+        self.openai = MagicMock()
+        self.openai.is_initialized = True
+        self.openai.chat_completion = AsyncMock(
+            return_value=summary_response("Consulta por hipertensión.", ["TA 150/95", "Inicia losartán"])
+        )
+        self.digest_service = MagicMock()
+        self.digest_service.apply_document = AsyncMock(return_value=True)
+        self.service = DocumentSummaryService(
+            azure_openai_service=self.openai, max_concurrency=1, digest_service=self.digest_service
+        )
+        self.db = fake_db
+        self.db.seed("medical_documents", [{"_id": "d1", "title": "Consulta", "content": "Texto largo " * 50}])
+
+    @pytest.mark.asyncio
+    async def test_summary_is_stored_on_document(self):
+        stored = await self.service.summarize_document("d1", self.db)
+
+        document = self.db.collections["medical_documents"]["d1"]
+        assert stored is True
+        assert document["summary"] == "Consulta por hipertensión."
+        assert document["key_points"] == ["TA 150/95", "Inicia losartán"]
+        assert document["summary_status"] == SummaryStatus.COMPLETED
+        assert document["summary_content_hash"] == content_fingerprint(document["content"])
+
+        from app.services.rate_limiter import RequestPriority
+        assert self.openai.chat_completion.await_args.kwargs["priority"] == RequestPriority.BATCH
+
+        # The patient digest is updated with the same document
+        merged_document, facts, _ = self.digest_service.apply_document.await_args.args
+        assert merged_document["summary"] == "Consulta por hipertensión."
+        assert set(facts) == {"diagnoses", "medications", "allergies", "labs"}
+
+    @pytest.mark.asyncio
+    async def test_current_summary_is_not_regenerated(self):
+        await self.service.summarize_document("d1", self.db)
+        stored = await self.service.summarize_document("d1", self.db)
+
+        assert stored is False
+        assert self.openai.chat_completion.await_count == 1
+        assert self.service.get_stats()["skipped"] == 1
+
+    @pytest.mark.asyncio
+    async def test_failure_marks_document(self):
+        self.openai.chat_completion = AsyncMock(side_effect=RuntimeError("boom"))
+
+        stored = await self.service.summarize_document("d1", self.db)
+
+        assert stored is False
+        assert self.db.collections["medical_documents"]["d1"]["summary_status"] == SummaryStatus.FAILED
+        assert self.service.get_stats()["failed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_plain_text_answer_is_used_as_summary(self):
+        self.openai.chat_completion = AsyncMock(return_value=SimpleNamespace(content=" Resumen libre ", tool_calls=None))
+
+        result = await self.service.summarize_content("Consulta", "texto")
+
+        assert result["summary"] == "Resumen libre"
+        assert result["key_points"] == []
+
+    @pytest.mark.asyncio
+    async def test_schedule_disabled(self, monkeypatch):
+        monkeypatch.setattr(settings, "DOCUMENT_SUMMARIES_ENABLED", False)
+        assert self.service.schedule("d1") is None
+
+    @pytest.mark.asyncio
+    async def test_schedule_runs_in_background(self, monkeypatch):
+        self.service.summarize_document = AsyncMock(return_value=True)
+
+        task = self.service.schedule("d1")
+        await self.service.drain()
+
+        assert task.done()
+        self.service.summarize_document.assert_awaited_once_with("d1")
+        assert self.service.get_stats()["in_progress"] == 0
+
+    def test_format_summary_content(self):
+        assert format_summary_content("Resumen.", ["uno", "dos"]) == "Resumen: Resumen.\nPuntos clave:\n- uno\n- dos"
+
+
+class TestEnhancedContextSummaries:
+    """Test suite for summary substitution in the enhanced document context"""
+
+    @pytest.fixture(autouse=True)
+    def setup_fixtures(self, fake_db):
+        """Setup test fixtures"""
+        openai = MagicMock()
+        openai.is_initialized = True
+        self.service = EnhancedDocumentService(azure_openai_service=openai)
+        self.service.full_text_top_n = 2
+
+        documents = []
+        for day in range(1, 6):
+            documents.append({
+                "_id": f"d{day}",
+                "patient_id": "p1",
+                "title": f"Nota {day}",
+                "content": f"Nota de evolución día {day}. " + "detalle " * 200,
+                "created_at": datetime(2024, 1, day).isoformat(),
+                "summary": f"Resumen día {day}",
+                "key_points": [f"punto {day}"]
+            })
+        documents[0]["content"] = "Biopsia hepática con fibrosis. " + "detalle " * 200
+        self.db = fake_db
+        self.db.seed("medical_documents", documents)
+        self.db.seed("patients", [{"_id": "p1", "name": "Paciente"}])
+
+    @pytest.mark.asyncio
+    async def test_top_ranked_documents_keep_full_text(self):
+        context = await self.service.get_enhanced_patient_context("p1", "resultado de la biopsia hepática", db=self.db)
+
+        ids = [doc.document_id for doc in context.full_documents]
+        modes = {doc.document_id: doc.content_mode for doc in context.full_documents}
+
+        # Matching document first, then the newest
+        assert ids[:2] == ["d1", "d5"]
+        assert modes["d1"] == modes["d5"] == "full"
+        assert all(modes[doc_id] == "summary" for doc_id in ids[2:])
+        assert context.full_documents[2].content.startswith("Resumen: ")
+        assert context.full_documents[0].relevance_level == DocumentRelevance.MEDIUM
+        assert context.full_documents[-1].relevance_level == DocumentRelevance.MINIMAL
+        assert context.total_tokens < 3 * 1700
+
+    @pytest.mark.asyncio
+    async def test_documents_without_summary_keep_full_text(self):
+        for doc in self.db.collections["medical_documents"].values():
+            doc.pop("summary")
+            doc.pop("key_points")
+
+        context = await self.service.get_enhanced_patient_context("p1", "evolución", db=self.db)
+
+        assert all(doc.content_mode == "full" for doc in context.full_documents)
+
+    @pytest.mark.asyncio
+    async def test_created_at_is_read_from_document(self):
+        context = await self.service.get_enhanced_patient_context("p1", "", db=self.db)
+
+        assert context.full_documents[0].created_at == datetime(2024, 1, 5)
+
+    def test_missing_created_at(self):
+        assert EnhancedDocumentService._parse_created_at({"created_at": "not a date"}) == datetime.min
+        assert EnhancedDocumentService._parse_created_at(
+            {"created_at": "2024-03-01T10:00:00Z"}
+        ) == datetime(2024, 3, 1, 10, 0)
@@ -0,0 +1,152 @@
+"""
+Tests for Embedding Cache
+
+Ensures cached vectors are reused per (content hash, model) and the cache stays bounded
+"""
+
+import pytest
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.embedding_cache import EmbeddingCache
+from app.services.azure_openai_service import AzureOpenAIService
+from app.core.config import settings
+
+
+class TestEmbeddingCache:
+    """Test suite for the SQLite embedding cache"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.cache = EmbeddingCache(db_path=":memory:", max_entries=10)
+
+    def teardown_method(self):
+        self.cache.close()
+
+    def test_round_trip(self):
+        """Stored vectors are returned for the same text and model"""
+        self.cache.put_many(["hola"], "embed-a", [[0.5, -0.25, 1.0]])
+
+        result = self.cache.get_many(["hola", "adios"], "embed-a")
+
+        assert result[0] == pytest.approx([0.5, -0.25, 1.0])
+        assert result[1] is None
+        assert self.cache.hits == 1
+        assert self.cache.misses == 1
+
+    def test_keyed_by_model(self):
+        """A vector cached for one deployment is not served for another"""
+        self.cache.put_many(["hola"], "embed-a", [[0.1, 0.2]])
+
+        assert self.cache.get_many(["hola"], "embed-b") == [None]
+
+    def test_duplicate_texts_share_entry(self):
+        """Identical texts resolve to the same cached vector"""
+        self.cache.put_many(["same"], "embed-a", [[1.0]])
+
+        result = self.cache.get_many(["same", "same"], "embed-a")
+
+        assert result == [[1.0], [1.0]]
+
+    def test_eviction_keeps_recently_used(self):
+        """Exceeding the bound evicts least recently used entries"""
+        self.cache.put_many([f"text {i}" for i in range(10)], "embed-a", [[float(i)] for i in range(10)])
+        # Touch the first entry so it becomes most recently used
+        self.cache.get_many(["text 0"], "embed-a")
+
+        self.cache.put_many(["text 10"], "embed-a", [[10.0]])
+
+        stats = self.cache.get_stats()
+        assert stats["entries"] <= self.cache.max_entries
+        assert stats["evictions"] > 0
+        assert self.cache.get_many(["text 0"], "embed-a")[0] == [0.0]
+        assert self.cache.get_many(["text 10"], "embed-a")[0] == [10.0]
+        assert self.cache.get_many(["text 1"], "embed-a")[0] is None
+
+    def test_writes_below_the_bound_do_not_count_entries(self):
+        """The table is only counted once the in-memory estimate exceeds the bound"""
+        statements = []
+        self.cache.put_many(["warm"], "embed-a", [[0.0]])
+        self.cache._conn.set_trace_callback(statements.append)
+
+        for i in range(5):
+            self.cache.put_many([f"text {i}"], "embed-a", [[float(i)]])
+        assert not [sql for sql in statements if "COUNT(*)" in sql]
+
+        # Rewriting cached texts inflates the estimate; the recount corrects it without evicting
+        for i in range(5):
+            self.cache.put_many([f"text {i}"], "embed-a", [[float(i)]])
+        assert [sql for sql in statements if "COUNT(*)" in sql]
+        assert self.cache.get_stats()["evictions"] == 0
+        assert self.cache.get_stats()["entries"] == 6
+
+    def test_inserts_from_another_process_are_counted(self, tmp_path):
+        """The periodic recount keeps a shared cache file bounded"""
+        db_path = str(tmp_path / "embeddings.db")
+        first = EmbeddingCache(db_path=db_path, max_entries=10, recount_seconds=0)
+        second = EmbeddingCache(db_path=db_path, max_entries=10, recount_seconds=0)
+        second.get_many(["open"], "embed-a")  # Counted before the first cache writes
+
+        first.put_many([f"first {i}" for i in range(8)], "embed-a", [[float(i)] for i in range(8)])
+        second.put_many([f"second {i}" for i in range(8)], "embed-a", [[float(i)] for i in range(8)])
+
+        assert second.get_stats()["entries"] <= 10
+        assert second.evictions > 0
+        first.close()
+        second.close()
+
+    def test_persists_to_disk(self, tmp_path):
+        """Vectors survive reopening the cache file"""
+        db_path = str(tmp_path / "cache" / "embeddings.db")
+        cache = EmbeddingCache(db_path=db_path, max_entries=100)
+        cache.put_many(["persist"], "embed-a", [[0.75]])
+        cache.close()
+
+        reopened = EmbeddingCache(db_path=db_path, max_entries=100)
+        assert reopened.get_many(["persist"], "embed-a") == [[0.75]]
+        reopened.close()
+
+
+class TestGenerateEmbeddingsWithCache:
+    """Test that AzureOpenAIService only embeds cache misses"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.cache = EmbeddingCache(db_path=":memory:", max_entries=100)
+        self.service = AzureOpenAIService(embedding_cache=self.cache)
+        self.service.is_initialized = True
+        self.service.client = SimpleNamespace(embeddings=SimpleNamespace(create=AsyncMock()))
+
+    def _respond_with(self, vectors):
+        self.service.client.embeddings.create.return_value = SimpleNamespace(
+            data=[SimpleNamespace(embedding=vector) for vector in vectors]
+        )
+
+    @pytest.mark.asyncio
+    async def test_only_misses_are_embedded(self):
+        """Cached texts are not sent to the API"""
+        self.cache.put_many(["cached"], settings.EMBEDDING_DEPLOYMENT_NAME, [[1.0, 1.0]])
+        self._respond_with([[2.0, 2.0]])
+
+        result = await self.service.generate_embeddings(["cached", "fresh", "fresh"])
+
+        create = self.service.client.embeddings.create
+        create.assert_awaited_once()
+        assert create.await_args.kwargs["input"] == ["fresh"]
+        assert result == [[1.0, 1.0], [2.0, 2.0], [2.0, 2.0]]
+
+    @pytest.mark.asyncio
+    async def test_fully_cached_batch_skips_api(self):
+        """A second call for the same texts costs no API request"""
+        self._respond_with([[0.5], [0.25]])
+        await self.service.generate_embeddings(["a", "b"])
+
+        result = await self.service.generate_embeddings(["a", "b"])
+
+        assert self.service.client.embeddings.create.await_count == 1
+        assert result == [[0.5], [0.25]]
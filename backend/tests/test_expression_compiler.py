@@ -0,0 +1,180 @@
+"""
+Tests for the SQLAlchemy to MongoDB expression compiler
+
+Verifies that query-builder filters and orderings are translated instead of
+dropped, that untranslatable expressions raise, and that queries doing a
+collection scan are reported
+"""
+
+import logging
+import re
+import pytest
+import sys
+import os
+from unittest.mock import AsyncMock, MagicMock
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bson import ObjectId
+from sqlalchemy import and_, not_, or_
+
+from app.database.expression_compiler import ExpressionCompileError, compile_filter, compile_order_by
+from app.database.mongodb_adapter import MongoDBAdapter, MongoSession
+from app.db.models import BatchFile, BatchUpload, PatientMatchingStatusEnum
+
+OBJECT_ID = "65a1b2c3d4e5f60718293a4b"
+
+
+def compile_batch_file_filter(expression):
+    return compile_filter(expression, BatchFile.__table__)
+
+
+class TestCompileFilter:
+    """Test suite for filter expression compilation"""
+
+    def test_comparisons(self):
+        assert compile_batch_file_filter(BatchFile.review_required == True) == {"review_required": True}
+        assert compile_batch_file_filter(BatchFile.matching_confidence >= 0.9) == {
+            "matching_confidence": {"$gte": 0.9}
+        }
+        assert compile_batch_file_filter(BatchFile.matching_confidence.between(0.8, 0.95)) == {
+            "matching_confidence": {"$gte": 0.8, "$lte": 0.95}
+        }
+        assert compile_batch_file_filter(
+            BatchFile.patient_matching_status == PatientMatchingStatusEnum.REVIEW_REQUIRED
+        ) == {"patient_matching_status": "review_required"}
+
+    def test_null_semantics_follow_sql(self):
+        assert compile_batch_file_filter(BatchFile.reviewed_by.isnot(None)) == {"reviewed_by": {"$ne": None}}
+        assert compile_batch_file_filter(BatchFile.reviewed_by == None) == {"reviewed_by": None}
+        assert compile_batch_file_filter(BatchFile.reviewed_by != "ana") == {"reviewed_by": {"$nin": ["ana", None]}}
+        assert compile_batch_file_filter(BatchFile.reviewed_by.notin_(["ana"])) == {
+            "reviewed_by": {"$nin": ["ana", None]}
+        }
+
+    def test_boolean_columns_and_connectives(self):
+        assert compile_batch_file_filter(BatchFile.review_required) == {"review_required": True}
+        assert compile_batch_file_filter(~BatchFile.review_required) == {"review_required": False}
+        assert compile_batch_file_filter(and_(
+            BatchFile.batch_upload_id == 3,
+            BatchFile.review_required == True,
+            BatchFile.matched_patient_id.isnot(None)
+        )) == {"batch_upload_id": 3, "review_required": True, "matched_patient_id": {"$ne": None}}
+        assert compile_batch_file_filter(or_(
+            BatchFile.matching_confidence < 0.5, BatchFile.parsed_patient_id == None
+        )) == {"$or": [{"matching_confidence": {"$lt": 0.5}}, {"parsed_patient_id": None}]}
+        assert compile_batch_file_filter(not_(and_(BatchFile.batch_upload_id == 1, BatchFile.review_required))) == {
+            "$nor": [{"batch_upload_id": 1, "review_required": True}]
+        }
+
+    def test_same_field_conditions_are_anded(self):
+        assert compile_batch_file_filter(and_(
+            BatchFile.matching_confidence > 0.5, BatchFile.matching_confidence < 0.9
+        )) == {"$and": [{"matching_confidence": {"$gt": 0.5}}, {"matching_confidence": {"$lt": 0.9}}]}
+
+    def test_patterns(self):
+        like = compile_batch_file_filter(BatchFile.original_filename.like("3000%_CONS.pdf"))
+        assert like == {"original_filename": re.compile(r"^3000.*.CONS\.pdf$", re.DOTALL)}
+        assert like["original_filename"].match("3000003799_GARZA_CONS.pdf")
+        ilike = compile_batch_file_filter(BatchFile.original_filename.ilike("%garza%"))
+        assert ilike["original_filename"].match("3000003799_GARZA TIJERINA.pdf")
+        assert compile_batch_file_filter(BatchFile.original_filename.contains("a.b")) == {
+            "original_filename": re.compile(r"a\.b", re.DOTALL)
+        }
+        assert "$not" in compile_batch_file_filter(BatchFile.original_filename.notlike("%.tmp"))["original_filename"]
+
+    def test_ids_match_object_ids_and_legacy_ids(self):
+        assert compile_batch_file_filter(BatchFile.id == OBJECT_ID) == {"_id": ObjectId(OBJECT_ID)}
+        assert compile_batch_file_filter(BatchFile.id == 5) == {"id": 5}
+        assert compile_batch_file_filter(BatchFile.id.in_([OBJECT_ID, 7])) == {
+            "$or": [{"_id": ObjectId(OBJECT_ID)}, {"id": 7}]
+        }
+        assert compile_batch_file_filter(BatchFile.id.in_([])) == {"_id": {"$in": []}}
+
+    def test_untranslatable_expressions_raise(self):
+        with pytest.raises(ExpressionCompileError, match="joins are not supported"):
+            compile_batch_file_filter(BatchUpload.session_id == "s1")
+        with pytest.raises(ExpressionCompileError, match="literal values"):
+            compile_batch_file_filter(BatchFile.batch_upload_id == BatchUpload.id)
+
+
+class TestCompileOrderBy:
+    """Test suite for order_by compilation"""
+
+    def test_columns_directions_and_names(self):
+        assert compile_order_by(
+            BatchFile.created_at.desc(), BatchFile.original_filename, "matching_confidence desc", BatchFile.id.asc()
+        ) == [("created_at", -1), ("original_filename", 1), ("matching_confidence", -1), ("_id", 1)]
+
+    def test_unsupported_clause_raises(self):
+        with pytest.raises(ExpressionCompileError):
+            compile_order_by(BatchFile.created_at.desc().nulls_last())
+
+
+class TestMongoQueryBuilder:
+    """Test suite for query-builder execution on MongoDB"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.cursor = MagicMock()
+        self.cursor.sort.return_value = self.cursor
+        self.cursor.limit.return_value = self.cursor
+        self.cursor.skip.return_value = self.cursor
+        self.cursor.__aiter__.return_value = [{"_id": ObjectId(OBJECT_ID), "original_filename": "a.pdf"}]
+        self.cursor.explain = AsyncMock(return_value={
+            "queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}}
+        })
+        self.collection = MagicMock()
+        self.collection.find.return_value = self.cursor
+        self.collection.count_documents = AsyncMock(return_value=4)
+        self.adapter = MongoDBAdapter()
+        self.adapter.db = {"batch_files": self.collection}
+        self.session = MongoSession(self.adapter)
+
+    @pytest.mark.asyncio
+    async def test_filters_and_sort_reach_the_query(self):
+        batch_file = await self.session.query(BatchFile).filter(
+            BatchFile.review_required == True, BatchFile.matching_confidence >= 0.9
+        ).filter_by(batch_upload_id="u1").order_by(BatchFile.created_at.desc()).first()
+
+        assert batch_file.original_filename == "a.pdf"
+        assert batch_file.id == OBJECT_ID
+        self.collection.find.assert_called_with(
+            {"batch_upload_id": "u1", "review_required": True, "matching_confidence": {"$gte": 0.9}}
+        )
+        self.cursor.sort.assert_called_with([("created_at", -1)])
+        self.cursor.limit.assert_called_with(1)
+
+    @pytest.mark.asyncio
+    async def test_all_and_count_are_awaitable(self):
+        query = self.session.query(BatchFile).filter(BatchFile.review_required == True)
+
+        assert len(await query.all()) == 1
+        assert await query.count() == 4
+        self.collection.count_documents.assert_awaited_with({"review_required": True})
+
+    @pytest.mark.asyncio
+    async def test_collection_scan_is_reported_once_per_query_shape(self, caplog):
+        self.cursor.explain = AsyncMock(return_value={
+            "queryPlanner": {"winningPlan": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}}
+        })
+
+        with caplog.at_level(logging.WARNING):
+            await self.session.query(BatchFile).filter(BatchFile.reviewed_by == "ana").all()
+            await self.session.query(BatchFile).filter(BatchFile.reviewed_by == "luis").all()
+
+        warnings = [record.message for record in caplog.records if "COLLSCAN" in record.message]
+        assert len(warnings) == 1
+        assert "reviewed_by" in warnings[0]
+        assert self.cursor.explain.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_index_scans_are_not_reported(self, caplog):
+        with caplog.at_level(logging.WARNING):
+            await self.session.query(BatchFile).filter(BatchFile.batch_upload_id == "u1").all()
+            await self.session.query(BatchFile).all()
+
+        assert not [record for record in caplog.records if "COLLSCAN" in record.message]
+        # Unfiltered, unsorted queries are not explained
+        assert self.cursor.explain.await_count == 1
@@ -0,0 +1,218 @@
+"""
+Tests for the Job Queue
+
+Verifies persisted job state, worker execution and recovery of jobs
+interrupted by a restart
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+from contextlib import asynccontextmanager
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.job_queue import JobQueue, JobStatus, JOBS_COLLECTION
+
+
+class TestJobQueue:
+    """Test suite for job execution and persistence"""
+
+    @pytest.fixture(autouse=True)
+    def setup_fixtures(self, fake_db):
+        """Setup test fixtures"""
+        self.db = fake_db
+
+        @asynccontextmanager
+        async def db_factory():
+            yield self.db
+
+        self.queue = JobQueue(max_workers=2, max_attempts=2, db_factory=db_factory)
+        self.calls = []
+
+        async def echo(payload, db):
+            self.calls.append(payload)
+            return {"echo": payload["value"]}
+
+        async def explode(payload, db):
+            raise RuntimeError("extraction failed")
+
+        self.queue.register_handler("echo", echo)
+        self.queue.register_handler("explode", explode)
+
+    def jobs(self):
+        return list(self.db.collections.get(JOBS_COLLECTION, {}).values())
+
+    @pytest.mark.asyncio
+    async def test_job_completes_with_result(self):
+        job_id = await self.queue.enqueue("echo", {"value": 42}, self.db)
+        queued = await self.queue.get_job(job_id, self.db)
+        await self.queue.join()
+
+        job = await self.queue.get_job(job_id, self.db)
+        assert queued["status"] in (JobStatus.QUEUED.value, JobStatus.RUNNING.value)
+        assert job["status"] == JobStatus.COMPLETED.value
+        assert job["result"] == {"echo": 42}
+        assert job["attempts"] == 1
+        assert "payload" not in job
+        await self.queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_failed_job_records_error(self):
+        job_id = await self.queue.enqueue("explode", {}, self.db)
+        await self.queue.join()
+
+        job = await self.queue.get_job(job_id, self.db)
+        assert job["status"] == JobStatus.FAILED.value
+        assert job["error"] == "extraction failed"
+        assert self.queue.get_stats()["failed"] == 1
+        await self.queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_unknown_job_type_is_rejected(self):
+        with pytest.raises(ValueError):
+            await self.queue.enqueue("missing", {}, self.db)
+        assert self.jobs() == []
+
+    @pytest.mark.asyncio
+    async def test_interrupted_jobs_resume_on_start(self):
+        await self.db.create(JOBS_COLLECTION, {
+            "job_id": "running-job", "job_type": "echo", "payload": {"value": 1},
+            "status": JobStatus.RUNNING.value, "attempts": 1, "created_at": "2024-01-01T00:00:00"
+        })
+        await self.db.create(JOBS_COLLECTION, {
+            "job_id": "queued-job", "job_type": "echo", "payload": {"value": 2},
+            "status": JobStatus.QUEUED.value, "attempts": 0, "created_at": "2024-01-01T00:00:01"
+        })
+        await self.db.create(JOBS_COLLECTION, {
+            "job_id": "poison-job", "job_type": "echo", "payload": {"value": 3},
+            "status": JobStatus.RUNNING.value, "attempts": 2, "created_at": "2024-01-01T00:00:02"
+        })
+
+        await self.queue.start()
+        await self.queue.join()
+
+        statuses = {job["job_id"]: job for job in self.jobs()}
+        assert statuses["running-job"]["status"] == JobStatus.COMPLETED.value
+        assert statuses["running-job"]["attempts"] == 2
+        assert statuses["queued-job"]["status"] == JobStatus.COMPLETED.value
+        assert statuses["poison-job"]["status"] == JobStatus.FAILED.value
+        assert sorted(call["value"] for call in self.calls) == [1, 2]
+        assert self.queue.get_stats()["recovered"] == 2
+        await self.queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_abandoned_job_is_cleaned_up(self):
+        cleaned = []
+
+        async def cleanup(payload):
+            cleaned.append(payload["value"])
+
+        self.queue.register_handler("echo", self.queue._handlers["echo"], cleanup=cleanup)
+        await self.db.create(JOBS_COLLECTION, {
+            "job_id": "poison-job", "job_type": "echo", "payload": {"value": 3},
+            "status": JobStatus.RUNNING.value, "attempts": 2, "created_at": "2024-01-01T00:00:02"
+        })
+
+        await self.queue.start()
+        await self.queue.join()
+
+        assert cleaned == [3]
+        assert self.calls == []
+        await self.queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_worker_concurrency_is_bounded(self):
+        running, peak = 0, 0
+
+        async def slow(payload, db):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        self.queue.register_handler("slow", slow)
+        for _ in range(6):
+            await self.queue.enqueue("slow", {}, self.db)
+        await self.queue.join()
+
+        assert peak == 2
+        await self.queue.stop()
+
+
+class TestUploadJob:
+    """Test suite for the document upload job handler"""
+
+    @pytest.mark.asyncio
+    async def test_staged_upload_is_processed_and_removed(self, tmp_path, monkeypatch):
+        from app.api.endpoints import documents
+        from app.core.config import settings
+
+        monkeypatch.setattr(settings, "UPLOAD_DIRECTORY", str(tmp_path))
+        received = {}
+
+        async def fake_process(filename, content, patient_id, document_type, title, processing_type, db,
+                               reuse_existing=False):
+            received.update(filename=filename, content=content, patient_id=patient_id, reuse_existing=reuse_existing)
+            return {"status": "processed"}
+
+        monkeypatch.setattr(documents, "_process_uploaded_document", fake_process)
+
+        staged = await documents._stage_upload("../nota.txt", b"texto")
+        result = await documents._run_upload_job({
+            "file_path": staged, "filename": "nota.txt", "patient_id": "p1",
+            "document_type": "general", "title": None, "processing_type": "complete"
+        }, db=None)
+
+        assert os.path.dirname(staged) == str(tmp_path / "pending")
+        assert result == {"status": "processed"}
+        assert received == {"filename": "nota.txt", "content": b"texto", "patient_id": "p1", "reuse_existing": True}
+        assert not os.path.exists(staged)
+
+    @pytest.mark.asyncio
+    async def test_staged_upload_is_removed_when_processing_fails(self, tmp_path, monkeypatch):
+        from app.api.endpoints import documents
+        from app.core.config import settings
+
+        monkeypatch.setattr(settings, "UPLOAD_DIRECTORY", str(tmp_path))
+
+        async def failing_process(*args, **kwargs):
+            raise RuntimeError("extraction failed")
+
+        monkeypatch.setattr(documents, "_process_uploaded_document", failing_process)
+
+        staged = await documents._stage_upload("nota.txt", b"texto")
+        with pytest.raises(RuntimeError):
+            await documents._run_upload_job({
+                "file_path": staged, "filename": "nota.txt", "patient_id": "p1",
+                "document_type": "general", "title": None, "processing_type": "complete"
+            }, db=None)
+
+        assert not os.path.exists(staged)
+
+    @pytest.mark.asyncio
+    async def test_rerun_reuses_the_stored_document(self, monkeypatch, fake_db):
+        from app.api.endpoints import documents
+
+        async def extract(filename, content):
+            return "texto"
+
+        monkeypatch.setattr(documents, "_extract_text_from_file", extract)
+        monkeypatch.setattr(documents.document_summary_service, "schedule", lambda document_id: None)
+        monkeypatch.setattr(documents, "_generate_document_analysis", extract)
+        db = fake_db
+
+        first = await documents._process_uploaded_document(
+            "nota.txt", b"texto", "p1", "general", None, "complete", db, reuse_existing=True
+        )
+        second = await documents._process_uploaded_document(
+            "nota.txt", b"texto", "p1", "general", None, "complete", db, reuse_existing=True
+        )
+
+        assert len(db.collections["medical_documents"]) == 1
+        assert first["processing_results"]["medical_document_id"] == (
+            second["processing_results"]["medical_document_id"]
+        )
@@ -0,0 +1,88 @@
+"""
+Tests for Azure OpenAI Client Registry
+
+Ensures every service shares one pooled client and the connection test runs once
+"""
+
+import pytest
+import sys
+import os
+from unittest.mock import AsyncMock, patch
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.openai_client_registry import OpenAIClientRegistry
+from app.services.azure_openai_service import AzureOpenAIService, azure_openai_service
+from app.agents.medical_coordinator import MedicalCoordinatorAgent
+
+
+class TestOpenAIClientRegistry:
+    """Test suite for the shared client registry"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.registry = OpenAIClientRegistry()
+
+    @pytest.mark.asyncio
+    async def test_client_is_shared(self):
+        first = self.registry.get_client()
+        second = self.registry.get_client()
+
+        assert first is second
+        await self.registry.close()
+
+    @pytest.mark.asyncio
+    async def test_services_share_client_and_test_once(self):
+        """Several services initialize against one client with a single test call"""
+        services = [AzureOpenAIService(client_registry=self.registry) for _ in range(3)]
+
+        with patch.object(AzureOpenAIService, "_test_connection", new=AsyncMock()) as test_connection:
+            for service in services:
+                await service.initialize()
+
+        assert test_connection.await_count == 1
+        assert len({id(service.client) for service in services}) == 1
+        await self.registry.close()
+
+    @pytest.mark.asyncio
+    async def test_lazy_mode_skips_connection_test(self):
+        service = AzureOpenAIService(client_registry=self.registry)
+
+        with patch("app.services.azure_openai_service.settings.AZURE_OPENAI_LAZY_INIT", True), \
+                patch.object(AzureOpenAIService, "_test_connection", new=AsyncMock()) as test_connection:
+            await service.initialize()
+
+        test_connection.assert_not_awaited()
+        assert service.is_initialized is True
+        assert self.registry.connection_tested is False
+        await self.registry.close()
+
+    @pytest.mark.asyncio
+    async def test_close_resets_registry(self):
+        client = self.registry.get_client()
+        self.registry.connection_tested = True
+
+        await self.registry.close()
+
+        assert self.registry.connection_tested is False
+        assert self.registry.get_client() is not client
+        await self.registry.close()
+
+
+class TestServiceInjection:
+    """Test that agents default to the shared Azure OpenAI service"""
+
+    def test_coordinator_agents_share_service(self):
+        coordinator = MedicalCoordinatorAgent()
+
+        assert coordinator.azure_openai_service is azure_openai_service
+        for agent in (coordinator.diagnostic_agent, coordinator.document_agent,
+                      coordinator.quick_agent, coordinator.search_agent):
+            assert agent.azure_openai_service is azure_openai_service
+
+    def test_injected_service_is_used(self):
+        service = AzureOpenAIService()
+        coordinator = MedicalCoordinatorAgent(service)
+
+        assert coordinator.diagnostic_agent.azure_openai_service is service
@@ -0,0 +1,293 @@
+"""
+Tests for Azure OpenAI Resilience Layer
+
+Runs AzureOpenAIService against a local fake OpenAI server to verify retries,
+Retry-After handling, circuit breaking and load shedding
+"""
+
+import pytest
+import sys
+import os
+import asyncio
+import json
+import threading
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from openai import AsyncAzureOpenAI
+
+from app.core.config import settings
+from app.models.chat import ChatMessage, ModelType
+from app.services.azure_openai_service import AzureOpenAIService
+from app.services.openai_resilience import OpenAIResilienceLayer, CircuitBreaker, CircuitState
+from app.services.rate_limiter import OpenAIRateLimiter
+from app.utils.exceptions import AzureOpenAIError, AzureOpenAIOverloadedError
+
+
+def _completion_body(deployment: str, content: str) -> dict:
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": deployment,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12}
+    }
+
+
+def _stream_body(deployment: str, pieces: list) -> bytes:
+    events = []
+    for piece in pieces:
+        chunk = {
+            "id": "chatcmpl-test",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": deployment,
+            "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]
+        }
+        events.append(f"data: {json.dumps(chunk)}\n\n")
+    events.append("data: [DONE]\n\n")
+    return "".join(events).encode()
+
+
+class FakeOpenAIServer:
+    """Minimal Azure OpenAI compatible server with scripted responses per deployment"""
+
+    def __init__(self):
+        self.scripts = defaultdict(deque)
+        self.calls = defaultdict(int)
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                deployment = self.path.split("/deployments/")[1].split("/")[0]
+                server.calls[deployment] += 1
+
+                script = server.scripts[deployment]
+                status, headers = script.popleft() if script else (200, {})
+
+                if status != 200:
+                    body = json.dumps({"error": {"message": f"status {status}", "code": str(status)}}).encode()
+                    content_type = "application/json"
+                elif payload.get("stream"):
+                    body = _stream_body(deployment, ["Hola", " doctor"])
+                    content_type = "text/event-stream"
+                else:
+                    body = json.dumps(_completion_body(deployment, f"ok from {deployment}")).encode()
+                    content_type = "application/json"
+
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True)
+
+    def script(self, deployment: str, *responses):
+        """Queue (status, headers) responses for a deployment; 200 is served afterwards"""
+        self.scripts[deployment].extend(responses)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def fake_server():
+    with FakeOpenAIServer() as server:
+        yield server
+
+
+def _make_service(server: FakeOpenAIServer, **resilience_kwargs) -> AzureOpenAIService:
+    options = {"max_retries": 2, "base_delay": 0.01, "max_delay": 0.05, "failure_threshold": 5}
+    options.update(resilience_kwargs)
+    service = AzureOpenAIService(
+        resilience=OpenAIResilienceLayer(**options),
+        rate_limiter=OpenAIRateLimiter(enabled=False)
+    )
+    service.client = AsyncAzureOpenAI(
+        api_key="test-key",
+        api_version=settings.AZURE_OPENAI_API_VERSION,
+        azure_endpoint=f"http://127.0.0.1:{server.port}",
+        max_retries=0
+    )
+    service.is_initialized = True
+    return service
+
+
+MESSAGES = [ChatMessage(role="user", content="¿Cuál es la dosis?")]
+GPT4O = settings.GPT4O_DEPLOYMENT_NAME
+GPT4O_MINI = settings.GPT4O_MINI_DEPLOYMENT_NAME
+
+
+class TestResilientCompletions:
+    """Test suite for retries and load shedding against the fake server"""
+
+    @pytest.mark.asyncio
+    async def test_retries_rate_limit_with_retry_after(self, fake_server):
+        """A 429 with Retry-After is retried and the call succeeds"""
+        fake_server.script(GPT4O_MINI, (429, {"Retry-After": "0"}))
+        service = _make_service(fake_server)
+
+        response = await service.chat_completion(MESSAGES, model_type=ModelType.GPT4O_MINI)
+
+        assert response.content == f"ok from {GPT4O_MINI}"
+        assert fake_server.calls[GPT4O_MINI] == 2
+        metrics = service.get_metrics()["deployments"][GPT4O_MINI]
+        assert metrics["retries"] == 1
+        assert metrics["rate_limited"] == 1
+        assert metrics["successes"] == 1
+
+    @pytest.mark.asyncio
+    async def test_client_errors_are_not_retried(self, fake_server):
+        """A 400 fails immediately without retries"""
+        fake_server.script(GPT4O_MINI, (400, {}))
+        service = _make_service(fake_server)
+
+        with pytest.raises(AzureOpenAIError):
+            await service.chat_completion(MESSAGES, model_type=ModelType.GPT4O_MINI)
+
+        assert fake_server.calls[GPT4O_MINI] == 1
+        assert service.get_metrics()["deployments"][GPT4O_MINI]["retries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_exhausted_retries_raise_overloaded(self, fake_server):
+        """Persistent 5xx on GPT-4o-mini exhausts retries and raises an overload error"""
+        fake_server.script(GPT4O_MINI, *[(503, {})] * 3)
+        service = _make_service(fake_server)
+
+        with pytest.raises(AzureOpenAIOverloadedError):
+            await service.chat_completion(MESSAGES, model_type=ModelType.GPT4O_MINI)
+
+        assert fake_server.calls[GPT4O_MINI] == 3
+        assert service.get_metrics()["deployments"][GPT4O_MINI]["server_errors"] == 3
+
+    @pytest.mark.asyncio
+    async def test_saturated_gpt4o_sheds_to_mini(self, fake_server):
+        """When GPT-4o keeps throttling, the request is served by GPT-4o-mini"""
+        fake_server.script(GPT4O, *[(429, {"Retry-After": "0"})] * 3)
+        service = _make_service(fake_server)
+
+        response = await service.chat_completion(MESSAGES, model_type=ModelType.GPT4O)
+
+        assert response.content == f"ok from {GPT4O_MINI}"
+        assert response.model == ModelType.GPT4O_MINI
+        assert service.get_metrics()["deployments"][GPT4O]["load_shed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_skips_gpt4o(self, fake_server):
+        """With the GPT-4o circuit open, requests go straight to GPT-4o-mini"""
+        fake_server.script(GPT4O, (500, {}), (500, {}))
+        service = _make_service(fake_server, max_retries=1, failure_threshold=2)
+
+        await service.chat_completion(MESSAGES, model_type=ModelType.GPT4O)
+        calls_before = fake_server.calls[GPT4O]
+        response = await service.chat_completion(MESSAGES, model_type=ModelType.GPT4O)
+
+        assert fake_server.calls[GPT4O] == calls_before
+        assert response.model == ModelType.GPT4O_MINI
+        metrics = service.get_metrics()["deployments"][GPT4O]
+        assert metrics["circuit_state"] == "open"
+        assert metrics["circuit_rejections"] == 1
+
+    @pytest.mark.asyncio
+    async def test_stream_retries_before_first_chunk(self, fake_server):
+        """Streaming calls are retried while no output has been produced"""
+        fake_server.script(GPT4O_MINI, (503, {}))
+        service = _make_service(fake_server)
+
+        chunks = [
+            chunk async for chunk in service.chat_completion_stream(
+                MESSAGES, model_type=ModelType.GPT4O_MINI
+            )
+        ]
+
+        assert "".join(chunks) == "Hola doctor"
+        assert fake_server.calls[GPT4O_MINI] == 2
+
+
+class TestCircuitBreaker:
+    """Test suite for circuit breaker state transitions"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.now = 0.0
+        self.breaker = CircuitBreaker("gpt-4o", failure_threshold=2, recovery_timeout=10, clock=lambda: self.now)
+
+    def test_opens_after_threshold(self):
+        self.breaker.record_failure()
+        assert self.breaker.state == CircuitState.CLOSED
+        self.breaker.record_failure()
+        assert self.breaker.state == CircuitState.OPEN
+        assert self.breaker.allow_request() is False
+
+    def test_half_open_allows_single_probe(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now = 11
+
+        assert self.breaker.allow_request() is True
+        assert self.breaker.allow_request() is False
+
+        self.breaker.record_success()
+        assert self.breaker.state == CircuitState.CLOSED
+
+    def test_failed_probe_reopens(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now = 11
+        self.breaker.allow_request()
+
+        self.breaker.record_failure()
+
+        assert self.breaker.state == CircuitState.OPEN
+
+    @pytest.mark.asyncio
+    async def test_cancelled_probe_releases_half_open_slot(self):
+        layer = OpenAIResilienceLayer(max_retries=0)
+        layer._breakers["gpt-4o"] = self.breaker
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now = 11
+
+        async def hang():
+            await asyncio.sleep(10)
+
+        async def open_stream():
+            await asyncio.sleep(10)
+
+        async def consume_stream():
+            async for _ in layer.stream("gpt-4o", open_stream):
+                pass
+
+        for probe in (layer.call("gpt-4o", hang), consume_stream()):
+            task = asyncio.create_task(probe)
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+            assert self.breaker.state == CircuitState.HALF_OPEN
+            assert self.breaker.allow_request() is True
+            self.breaker.release_probe()
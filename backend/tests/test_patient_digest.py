@@ -0,0 +1,164 @@
+"""
+Tests for the Patient Digest Service
+
+Verifies incremental merging of document facts into the materialized
+per-patient digest and its persistence in ``patient_digests``
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.patient_digest_service import (
+    PatientDigestService, empty_digest, merge_document_facts, format_patient_digest
+)
+
+
+def make_document(doc_id, date, summary="", patient_id="p1"):
+    return {"_id": doc_id, "patient_id": patient_id, "title": f"Nota {doc_id}", "created_at": date, "summary": summary}
+
+
+FACTS_1 = {
+    "diagnoses": ["Hipertensión arterial"],
+    "medications": ["Losartán 50 mg"],
+    "allergies": ["Penicilina"],
+    "labs": [{"name": "Glucosa", "value": "110 mg/dL"}]
+}
+FACTS_2 = {
+    "diagnoses": ["hipertension arterial", "Diabetes tipo 2"],
+    "medications": ["Metformina 850 mg"],
+    "allergies": [],
+    "labs": [{"name": "HbA1c", "value": "7.2 %", "date": "2024-03-02"}]
+}
+
+
+class TestMergeDocumentFacts:
+    """Test suite for digest merging"""
+
+    def test_repeated_findings_are_merged(self):
+        digest = empty_digest("p1")
+        merge_document_facts(digest, make_document("d1", "2024-01-10T09:00:00"), FACTS_1)
+        merge_document_facts(digest, make_document("d2", "2024-03-01T09:00:00"), FACTS_2)
+
+        diagnoses = {item["name"]: item for item in digest["diagnoses"]}
+        assert len(digest["diagnoses"]) == 2
+        assert diagnoses["Hipertensión arterial"]["first_seen"] == "2024-01-10"
+        assert diagnoses["Hipertensión arterial"]["last_seen"] == "2024-03-01"
+        assert [lab["date"] for lab in digest["labs"]] == ["2024-01-10", "2024-03-02"]
+        assert digest["document_count"] == 2
+
+    def test_merge_order_does_not_matter(self):
+        forward, backward = empty_digest("p1"), empty_digest("p1")
+        merge_document_facts(forward, make_document("d1", "2024-01-10"), FACTS_1)
+        merge_document_facts(forward, make_document("d2", "2024-03-01"), FACTS_2)
+        merge_document_facts(backward, make_document("d2", "2024-03-01"), FACTS_2)
+        merge_document_facts(backward, make_document("d1", "2024-01-10"), FACTS_1)
+
+        for field in ("labs", "timeline", "medications", "allergies"):
+            assert forward[field] == backward[field]
+        assert [d["first_seen"] for d in forward["diagnoses"]] == [d["first_seen"] for d in backward["diagnoses"]]
+
+    def test_labs_and_timeline_are_bounded(self):
+        digest = empty_digest("p1")
+        for day in range(1, 10):
+            facts = {"labs": [{"name": "Glucosa", "value": str(100 + day)}]}
+            merge_document_facts(digest, make_document(f"d{day}", f"2024-01-0{day}"), facts, max_labs=3, max_timeline_entries=4)
+
+        assert [lab["value"] for lab in digest["labs"]] == ["107", "108", "109"]
+        assert [entry["document_id"] for entry in digest["timeline"]] == ["d6", "d7", "d8", "d9"]
+        assert digest["document_count"] == 9
+
+    def test_named_items_keep_the_most_recently_seen(self):
+        digest = empty_digest("p1")
+        for day in range(1, 6):
+            facts = {"medications": [f"Fármaco {day}", "Losartán 50 mg"]}
+            merge_document_facts(digest, make_document(f"d{day}", f"2024-01-0{day}"), facts, max_items=3)
+
+        assert [item["name"] for item in digest["medications"]] == ["Losartán 50 mg", "Fármaco 4", "Fármaco 5"]
+        assert "document_ids" not in digest
+
+    def test_format_patient_digest(self):
+        digest = empty_digest("p1")
+        assert format_patient_digest(digest) is None
+
+        merge_document_facts(digest, make_document("d1", "2024-01-10", summary="Control de TA"), FACTS_1)
+        block = format_patient_digest(digest)
+
+        assert block.startswith("RESUMEN LONGITUDINAL DEL PACIENTE (1 documentos procesados):")
+        assert "Alergias: Penicilina (2024-01-10)" in block
+        assert "2024-01-10 Nota d1: Control de TA" in block
+
+
+class TestPatientDigestService:
+    """Test suite for digest persistence"""
+
+    @pytest.fixture(autouse=True)
+    def setup_fixtures(self, fake_db):
+        """Setup test fixtures"""
+        self.service = PatientDigestService()
+        self.db = fake_db
+
+    @pytest.mark.asyncio
+    async def test_digest_is_created_then_updated(self):
+        await self.service.apply_document(make_document("d1", "2024-01-10"), FACTS_1, self.db)
+        await self.service.apply_document(make_document("d2", "2024-03-01"), FACTS_2, self.db)
+
+        assert len(self.db.collections["patient_digests"]) == 1
+        digest = await self.service.get_digest("p1", self.db)
+        assert digest["document_count"] == 2
+        assert [entry["document_id"] for entry in digest["timeline"]] == ["d1", "d2"]
+
+    @pytest.mark.asyncio
+    async def test_document_is_merged_once(self):
+        document = make_document("d1", "2024-01-10")
+        self.db.seed("medical_documents", [document])
+
+        assert await self.service.apply_document(document, FACTS_1, self.db) is True
+        assert await self.service.apply_document(document, FACTS_1, self.db) is False
+        assert self.service.get_stats()["duplicates_skipped"] == 1
+        assert self.db.documents("medical_documents")["d1"]["digest_fingerprint"]
+
+    @pytest.mark.asyncio
+    async def test_resummarized_document_updates_the_digest(self):
+        self.db.seed("medical_documents", [{**make_document("d1", "2024-01-10"), "clinical_facts": FACTS_1}])
+        await self.service.apply_document(make_document("d1", "2024-01-10"), FACTS_1, self.db)
+
+        # The summary service stores the new facts before updating the digest
+        revised = {**FACTS_1, "diagnoses": ["Diabetes tipo 2"]}
+        self.db.documents("medical_documents")["d1"]["clinical_facts"] = revised
+        assert await self.service.apply_document(make_document("d1", "2024-01-10"), revised, self.db) is True
+
+        digest = await self.service.get_digest("p1", self.db)
+        assert [item["name"] for item in digest["diagnoses"]] == ["Diabetes tipo 2"]
+        assert digest["document_count"] == 1
+        assert self.service.get_stats()["rebuilds"] == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_updates_are_not_lost(self):
+        await asyncio.gather(*[
+            self.service.apply_document(make_document(f"d{i}", f"2024-01-0{i}"), FACTS_1, self.db)
+            for i in range(1, 6)
+        ])
+
+        digest = await self.service.get_digest("p1", self.db)
+        assert digest["document_count"] == 5
+
+    @pytest.mark.asyncio
+    async def test_rebuild_from_stored_facts(self):
+        self.db.seed("medical_documents", [
+            {**make_document("d1", "2024-01-10"), "clinical_facts": FACTS_1},
+            {**make_document("d2", "2024-03-01"), "clinical_facts": FACTS_2},
+            make_document("d3", "2024-04-01")  # Not summarized yet
+        ])
+
+        digest = await self.service.rebuild("p1", self.db)
+
+        assert digest["document_count"] == 2
+        assert len(self.db.collections["patient_digests"]) == 1
+        stored = self.db.documents("medical_documents")
+        assert stored["d1"]["digest_fingerprint"] and stored["d2"]["digest_fingerprint"]
+        assert "digest_fingerprint" not in stored["d3"]
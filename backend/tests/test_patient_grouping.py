@@ -0,0 +1,171 @@
+"""
+Tests for batch-wide patient grouping
+
+Verifies that each distinct expediente is matched once per batch and that
+concurrent files or batches for the same patient do not create duplicates
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db.models import BatchUploadStatusEnum, PatientMatchingStatusEnum, VectorizationStatusEnum
+from app.services.batch_processing_service import BatchProcessingService
+from app.utils.keyed_lock import KeyedAsyncLock
+
+
+class TestPatientGrouping:
+    """Test suite for per-group patient resolution"""
+
+    @pytest.fixture(autouse=True)
+    def setup_fixtures(self, fake_db):
+        """Setup test fixtures"""
+        self.locks = KeyedAsyncLock()
+        self.service = BatchProcessingService(
+            azure_openai_service=MagicMock(), summary_service=MagicMock(), patient_locks=self.locks
+        )
+        self.service._read_file_content = self.read_file_content
+        self.service._match_or_create_patient = self.match_or_create_patient
+        self.match_calls = []
+        self.db = fake_db
+
+    async def read_file_content(self, file_path):
+        return f"contenido {file_path}"
+
+    async def match_or_create_patient(self, batch_file, db):
+        """Find the patient by expediente or create it, slowly enough to expose races"""
+        self.match_calls.append(batch_file["parsed_patient_id"])
+        existing = await db.find_one("patients", {"medical_record_number": batch_file["parsed_patient_id"]})
+        await asyncio.sleep(0.01)
+        if existing:
+            return existing["_id"], SimpleNamespace(confidence=1.0, review_required=False)
+        patient_id = await db.create("patients", {"medical_record_number": batch_file["parsed_patient_id"]})
+        batch_file.update({
+            "patient_matching_status": PatientMatchingStatusEnum.NEW_PATIENT.value,
+            "matching_confidence": 0.0
+        })
+        return patient_id, SimpleNamespace(confidence=0.0, review_required=False)
+
+    async def make_session(self, session_id, files):
+        batch_upload_id = await self.db.create("batch_uploads", {
+            "session_id": session_id, "status": BatchUploadStatusEnum.PENDING.value, "processing_type": "complete"
+        })
+        for name, expediente, patient_name in files:
+            await self.db.create("batch_files", {
+                "batch_upload_id": batch_upload_id,
+                "original_filename": name,
+                "file_path": f"/tmp/{name}",
+                "parsed_patient_id": expediente,
+                "parsed_patient_name": patient_name,
+                "parsed_document_type": name.split("_")[-1].split(".")[0],
+                "processing_status": VectorizationStatusEnum.PENDING.value
+            })
+
+    def documents_by_patient(self):
+        patients = {}
+        for document in self.db.collections["medical_documents"].values():
+            patients.setdefault(document["patient_id"], []).append(document["original_filename"])
+        return patients
+
+    @pytest.mark.asyncio
+    async def test_each_patient_is_matched_once(self):
+        await self.make_session("s1", [
+            ("a_CONS.pdf", "3000003799", "GARZA TIJERINA, MARIA ESTHER"),
+            ("a_LAB.pdf", "3000003799", "GARZA TIJERINA, MARIA ESTHER"),
+            ("a_RX.pdf", "3000003799", "garza  tijerina, maria esther"),
+            ("b_CONS.pdf", "4000000001", "LOPEZ, JUAN"),
+            ("b_LAB.pdf", "4000000001", "LOPEZ, JUAN"),
+        ])
+
+        result = await self.service.process_batch_upload("s1", self.db)
+
+        assert sorted(self.match_calls) == ["3000003799", "4000000001"]
+        assert result.patient_groups == 2
+        assert result.status == BatchUploadStatusEnum.COMPLETED
+        assert len(self.db.collections["patients"]) == 2
+        assert sorted(len(files) for files in self.documents_by_patient().values()) == [2, 3]
+
+        # The matching outcome is recorded on every file of the group
+        statuses = {f["patient_matching_status"] for f in self.db.collections["batch_files"].values()}
+        assert statuses == {PatientMatchingStatusEnum.NEW_PATIENT.value}
+
+    @pytest.mark.asyncio
+    async def test_concurrent_batches_share_new_patient(self):
+        await self.make_session("s1", [("a_CONS.pdf", "3000003799", "GARZA, MARIA")])
+        await self.make_session("s2", [("a_LAB.pdf", "3000003799", "GARZA, MARIA")])
+        other = BatchProcessingService(
+            azure_openai_service=MagicMock(), summary_service=MagicMock(), patient_locks=self.locks
+        )
+        other._read_file_content = self.read_file_content
+        other._match_or_create_patient = self.match_or_create_patient
+
+        await asyncio.gather(
+            self.service.process_batch_upload("s1", self.db),
+            other.process_batch_upload("s2", self.db)
+        )
+
+        assert len(self.db.collections["patients"]) == 1
+        assert len(self.documents_by_patient()) == 1
+        assert self.locks.active_keys() == []
+
+    @pytest.mark.asyncio
+    async def test_failed_group_falls_back_to_per_file_matching(self):
+        await self.make_session("s1", [
+            ("a_CONS.pdf", "3000003799", "GARZA, MARIA"),
+            ("a_LAB.pdf", "3000003799", "GARZA, MARIA"),
+        ])
+        attempts = []
+
+        async def flaky_match(batch_file, db):
+            attempts.append(batch_file["original_filename"])
+            if len(attempts) == 1:
+                raise ConnectionError("patients unavailable")
+            return await self.match_or_create_patient(batch_file, db)
+
+        self.service._match_or_create_patient = flaky_match
+
+        result = await self.service.process_batch_upload("s1", self.db)
+
+        assert result.status == BatchUploadStatusEnum.COMPLETED
+        assert len(self.db.collections["patients"]) == 1
+        assert len(attempts) == 3
+
+
+class TestKeyedAsyncLock:
+    """Test suite for per-key locking"""
+
+    @pytest.mark.asyncio
+    async def test_same_key_is_serialized_and_other_keys_are_not(self):
+        locks = KeyedAsyncLock()
+        running = {"a": 0, "b": 0}
+        peak = {"a": 0, "b": 0}
+
+        async def work(key):
+            async with locks.acquire(key):
+                running[key] += 1
+                peak[key] = max(peak[key], running[key])
+                assert locks.locked(key)
+                await asyncio.sleep(0.01)
+                running[key] -= 1
+
+        await asyncio.gather(work("a"), work("a"), work("b"))
+
+        assert peak == {"a": 1, "b": 1}
+        assert locks.active_keys() == []
+
+    @pytest.mark.asyncio
+    async def test_lock_is_released_on_error(self):
+        locks = KeyedAsyncLock()
+
+        with pytest.raises(RuntimeError):
+            async with locks.acquire("a"):
+                raise RuntimeError("boom")
+
+        assert not locks.locked("a")
+        assert locks.active_keys() == []
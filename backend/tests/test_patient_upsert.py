@@ -0,0 +1,134 @@
+"""
+Tests for atomic patient creation
+
+Verifies that patients are created with a single upsert on medical_record_number,
+so concurrent creations for the same expediente share one patient
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+from unittest.mock import AsyncMock, MagicMock
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pymongo.errors import DuplicateKeyError
+
+from app.database.mongodb_adapter import MongoDBAdapter
+from app.services.batch_processing_service import BatchProcessingService
+from app.services.patient_matching_service import PatientMatchingService
+from app.services.reference_data_cache import ReferenceDataCache
+from app.services.tecsalud_filename_parser import DocumentTypeEnum, PatientData
+
+
+def make_patient_data(expediente_id="3000003799"):
+    return PatientData(
+        expediente_id=expediente_id,
+        nombre="MARIA ESTHER",
+        apellido_paterno="GARZA",
+        apellido_materno="TIJERINA",
+        full_name="MARIA ESTHER GARZA TIJERINA",
+        numero_adicional="6001467010",
+        document_type=DocumentTypeEnum.CONSULTATION,
+        original_filename="3000003799_GARZA TIJERINA, MARIA ESTHER_6001467010_CONS.pdf"
+    )
+
+
+class TestPatientUpsert:
+    """Test suite for upsert-based patient creation"""
+
+    @pytest.fixture(autouse=True)
+    def setup_fixtures(self, fake_db):
+        """Setup test fixtures"""
+        self.db = fake_db
+        self.reference_data = ReferenceDataCache()
+        self.service = PatientMatchingService(self.db, reference_data=self.reference_data)
+
+    @pytest.mark.asyncio
+    async def test_create_patient_without_duplicate_scan(self):
+        result = await self.service.create_patient_from_tecsalud_data(make_patient_data())
+
+        assert result.success
+        assert not result.duplicate_detected
+        assert self.db.calls_to("find_many", "patients") == 0
+        patient = self.db.collections["patients"][result.patient_id]
+        assert patient["medical_record_number"] == "3000003799"
+        assert patient["doctor_id"] in self.db.collections["doctors"]
+
+    @pytest.mark.asyncio
+    async def test_existing_expediente_returns_existing_patient(self):
+        first = await self.service.create_patient_from_tecsalud_data(make_patient_data())
+        second = await self.service.create_patient_from_tecsalud_data(make_patient_data())
+
+        assert second.success
+        assert second.duplicate_detected
+        assert second.patient_id == first.patient_id
+        assert len(self.db.collections["patients"]) == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_creations_share_one_patient(self):
+        results = await asyncio.gather(
+            *(self.service.create_patient_from_tecsalud_data(make_patient_data()) for _ in range(5))
+        )
+
+        assert len({result.patient_id for result in results}) == 1
+        assert sum(not result.duplicate_detected for result in results) == 1
+        assert len(self.db.collections["patients"]) == 1
+        assert len(self.db.collections["doctors"]) == 1
+
+    @pytest.mark.asyncio
+    async def test_batch_creation_reuses_existing_patient(self):
+        batch_service = BatchProcessingService(
+            azure_openai_service=MagicMock(), summary_service=MagicMock(), reference_data=self.reference_data
+        )
+        batch_file = {"parsed_patient_id": "3000003799", "parsed_patient_name": "GARZA TIJERINA, MARIA ESTHER"}
+
+        patient_ids = await asyncio.gather(
+            *(batch_service._create_new_patient(dict(batch_file), self.db) for _ in range(3))
+        )
+
+        assert len(set(patient_ids)) == 1
+        assert len(self.db.collections["patients"]) == 1
+
+
+class TestMongoUpsert:
+    """Test suite for the MongoDB adapter upsert"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.collection = MagicMock()
+        self.collection.find_one = AsyncMock(return_value={"_id": "existing", "medical_record_number": "1"})
+        self.adapter = MongoDBAdapter()
+        self.adapter.db = {"patients": self.collection}
+
+    @pytest.mark.asyncio
+    async def test_insert(self):
+        self.collection.update_one = AsyncMock(return_value=MagicMock(upserted_id="new"))
+
+        doc, created = await self.adapter.upsert("patients", {"medical_record_number": "1"}, {"name": "A"})
+
+        assert created
+        assert doc == {"_id": "new", "medical_record_number": "1", "name": "A"}
+        self.collection.update_one.assert_awaited_once_with(
+            {"medical_record_number": "1"}, {"$setOnInsert": {"name": "A"}}, upsert=True
+        )
+
+    @pytest.mark.asyncio
+    async def test_existing_document_is_not_modified(self):
+        self.collection.update_one = AsyncMock(return_value=MagicMock(upserted_id=None))
+
+        doc, created = await self.adapter.upsert("patients", {"medical_record_number": "1"}, {"name": "A"})
+
+        assert not created
+        assert doc["_id"] == "existing"
+
+    @pytest.mark.asyncio
+    async def test_lost_insert_race_returns_winner(self):
+        self.collection.update_one = AsyncMock(side_effect=DuplicateKeyError("E11000"))
+
+        doc, created = await self.adapter.upsert("patients", {"medical_record_number": "1"}, {"name": "A"})
+
+        assert not created
+        assert doc["_id"] == "existing"
@@ -0,0 +1,155 @@
+"""
+Tests for Prompt Caching
+
+Verifies prefix-stable prompt assembly and cached-token accounting
+"""
+
+import pytest
+import sys
+import os
+from unittest.mock import AsyncMock, MagicMock
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from openai.types import CompletionUsage
+from openai.types.chat import ChatCompletion
+
+from app.models.chat import ChatMessage, ModelType
+from app.services.azure_openai_service import AzureOpenAIService
+from app.services.openai_resilience import OpenAIResilienceLayer
+from app.services.rate_limiter import OpenAIRateLimiter
+from app.services.prompt_caching import PromptAssembler, PromptCacheTracker, extract_cached_tokens
+from app.agents.document_analysis_agent import DocumentAnalysisAgent
+
+
+def _document(document_id: str, created_at: str, relevance: float) -> dict:
+    return {
+        "document_id": document_id,
+        "title": f"Nota {document_id}",
+        "content": f"Contenido del documento {document_id}",
+        "document_type": "consultation",
+        "created_at": created_at,
+        "relevance_score": relevance
+    }
+
+
+class TestPromptAssembler:
+    """Test suite for prompt assembly order"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.assembler = PromptAssembler("Instrucciones del agente")
+
+    def test_stable_content_comes_first(self):
+        messages = [
+            ChatMessage(role="user", content="primera pregunta"),
+            ChatMessage(role="assistant", content="respuesta"),
+            ChatMessage(role="user", content="segunda pregunta")
+        ]
+
+        assembled = self.assembler.assemble(
+            messages,
+            documents_block="DOCUMENTOS",
+            patient_block="PACIENTE",
+            volatile_blocks=["RANKING", None]
+        )
+
+        assert [msg.content for msg in assembled] == [
+            "Instrucciones del agente", "DOCUMENTOS", "PACIENTE",
+            "primera pregunta", "respuesta", "RANKING", "segunda pregunta"
+        ]
+
+    def test_without_volatile_content_messages_follow_prefix(self):
+        assembled = self.assembler.assemble([ChatMessage(role="user", content="hola")])
+        assert [msg.role for msg in assembled] == ["system", "user"]
+
+    def test_documents_sorted_deterministically(self):
+        documents = [
+            _document("b", "2024-03-01", 0.9),
+            _document("a", "2024-03-01", 0.2),
+            _document("c", "2023-01-01", 0.5)
+        ]
+        ordered = [doc["document_id"] for doc in PromptAssembler.sort_documents(documents)]
+        assert ordered == ["c", "a", "b"]
+        assert PromptAssembler.sort_documents(list(reversed(documents))) == PromptAssembler.sort_documents(documents)
+
+
+class TestDocumentAnalysisPrefix:
+    """Test suite for the document analysis prompt prefix"""
+
+    @pytest.mark.asyncio
+    async def test_follow_up_turn_keeps_prefix(self):
+        agent = DocumentAnalysisAgent(MagicMock())
+        first_turn = [ChatMessage(role="user", content="resumen del expediente")]
+        second_turn = first_turn + [
+            ChatMessage(role="assistant", content="Resumen..."),
+            ChatMessage(role="user", content="¿y los laboratorios?")
+        ]
+        context_first = {"full_documents": [_document("a", "2024-01-01", 0.9), _document("b", "2024-02-01", 0.4)]}
+        context_second = {"full_documents": [_document("b", "2024-02-01", 0.8), _document("a", "2024-01-01", 0.3)]}
+
+        first = await agent._prepare_document_context(first_turn, context_first)
+        second = await agent._prepare_document_context(second_turn, context_second)
+
+        # Everything up to the per-turn relevance block is identical
+        prefix_length = len(first) - 2
+        assert [m.content for m in first[:prefix_length]] == [m.content for m in second[:prefix_length]]
+        assert second[prefix_length].content == "resumen del expediente"
+        assert "Relevancia" not in first[1].content
+        assert "RELEVANCIA" in second[-2].content
+        assert second[-1].content == "¿y los laboratorios?"
+
+
+class TestPromptCacheTracker:
+    """Test suite for cached-token accounting"""
+
+    def test_extract_cached_tokens(self):
+        assert extract_cached_tokens(None) == 0
+        assert extract_cached_tokens({"prompt_tokens_details": {"cached_tokens": 1024}}) == 1024
+        usage = CompletionUsage(prompt_tokens=2000, completion_tokens=10, total_tokens=2010,
+                                prompt_tokens_details={"cached_tokens": 1536})
+        assert extract_cached_tokens(usage) == 1536
+
+    def test_record_aggregates_per_deployment(self):
+        tracker = PromptCacheTracker()
+        tracker.record("gpt-4o", {"prompt_tokens": 2000, "completion_tokens": 50, "total_tokens": 2050,
+                                  "prompt_tokens_details": {"cached_tokens": 1024}})
+        tracker.record("gpt-4o", {"prompt_tokens": 2000, "completion_tokens": 50, "total_tokens": 2050})
+
+        stats = tracker.get_stats()["gpt-4o"]
+        assert stats["calls"] == 2
+        assert stats["calls_with_cache_hit"] == 1
+        assert stats["cached_tokens"] == 1024
+        assert stats["cached_token_ratio"] == pytest.approx(0.256)
+
+    @pytest.mark.asyncio
+    async def test_service_records_cached_tokens(self):
+        tracker = PromptCacheTracker()
+        service = AzureOpenAIService(
+            embedding_cache=MagicMock(),
+            resilience=OpenAIResilienceLayer(max_retries=0),
+            rate_limiter=OpenAIRateLimiter(enabled=False),
+            usage_tracker=tracker
+        )
+        completion = ChatCompletion(
+            id="chatcmpl-1",
+            object="chat.completion",
+            created=0,
+            model="gpt-4o",
+            choices=[{"index": 0, "finish_reason": "stop",
+                      "message": {"role": "assistant", "content": "ok"}}],
+            usage={"prompt_tokens": 1500, "completion_tokens": 5, "total_tokens": 1505,
+                   "prompt_tokens_details": {"cached_tokens": 1280}}
+        )
+        service.client = MagicMock()
+        service.client.chat.completions.create = AsyncMock(return_value=completion)
+        service.is_initialized = True
+
+        response = await service.chat_completion(
+            [ChatMessage(role="user", content="hola")], model_type=ModelType.GPT4O
+        )
+
+        assert response.usage["cached_tokens"] == 1280
+        assert response.usage["prompt_tokens"] == 1500
+        assert service.get_metrics()["prompt_cache"][service._get_deployment_name(ModelType.GPT4O)]["calls"] == 1
@@ -0,0 +1,201 @@
+"""
+Tests for the Fast Query Classifier
+
+Verifies local rule/model classification and that confident local results
+skip the LLM classification call in the coordinator
+"""
+
+import pytest
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.config import settings
+from app.models.chat import ChatMessage
+from app.agents.query_classifier import (
+    QueryType, FastQueryClassifier, NaiveBayesQueryModel, normalize_query
+)
+from app.services.enhanced_document_service import ContextStrategy
+
+
+def make_context(total_documents: int) -> SimpleNamespace:
+    """Minimal stand-in for the HybridContext the classifier inspects"""
+    return SimpleNamespace(
+        total_documents=total_documents,
+        total_tokens=1000 * total_documents,
+        strategy_used=ContextStrategy.FULL_DOCS_ONLY,
+        confidence=0.9,
+        full_documents=[None] * total_documents
+    )
+
+
+class TestFastQueryClassifier:
+    """Test suite for rule-based classification"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.classifier = FastQueryClassifier(model_path="")
+        self.threshold = settings.QUERY_CLASSIFIER_CONFIDENCE_THRESHOLD
+
+    def test_normalize_query(self):
+        assert normalize_query("  ¿Qué ES la   Hipertensión? ") == "que es la hipertension"
+
+    @pytest.mark.parametrize("query", ["hola", "hola, buenos días", "muchas gracias", "hasta luego"])
+    def test_greetings_are_general(self, query):
+        result = self.classifier.classify(query, has_context=True)
+        assert result["query_type"] == QueryType.GENERAL.value
+        assert result["confidence"] >= self.threshold
+        assert result["classifier"] == "rules"
+
+    @pytest.mark.parametrize("query,expected", [
+        ("dame un resumen del expediente", QueryType.DOCUMENT_ANALYSIS),
+        ("cuáles son los resultados de laboratorio", QueryType.DOCUMENT_ANALYSIS),
+        ("¿cuándo fue su última cirugía?", QueryType.SEARCH),
+        ("¿Qué es la hipertensión?", QueryType.QUICK_QUESTION),
+        ("diagnóstico diferencial para fiebre y tos de 3 semanas", QueryType.DIAGNOSTIC),
+    ])
+    def test_confident_classifications(self, query, expected):
+        result = self.classifier.classify(query, has_context=True)
+        assert result["query_type"] == expected.value
+        assert result["confidence"] >= self.threshold
+
+    def test_patient_query_without_context_is_general(self):
+        result = self.classifier.classify("dame un resumen del expediente", has_context=False)
+        assert result["query_type"] == QueryType.GENERAL.value
+        assert result["requires_patient_context"] is False
+        assert "no patient documents" in result["reasoning"]
+
+    def test_unknown_query_has_low_confidence(self):
+        result = self.classifier.classify("xyzzy plugh", has_context=True)
+        assert result["confidence"] < self.threshold
+        assert result["classifier"] == "none"
+
+    def test_result_has_llm_classification_shape(self):
+        result = self.classifier.classify("paciente con dolor de pecho intenso", has_context=True)
+        for key in ("query_type", "confidence", "reasoning", "requires_patient_context",
+                    "urgency", "context_strategy"):
+            assert key in result
+        assert result["urgency"] in ("low", "medium", "high", "emergency")
+
+
+class TestNaiveBayesQueryModel:
+    """Test suite for the optional trained model"""
+
+    SAMPLES = [
+        ("ajusta la dosis del anticoagulante", "diagnostic"),
+        ("conviene ajustar el anticoagulante", "diagnostic"),
+        ("muestra la ecografía renal", "document_analysis"),
+        ("abre la ecografía del riñón", "document_analysis"),
+    ]
+
+    def test_train_and_predict(self):
+        model = NaiveBayesQueryModel().train(self.SAMPLES)
+        probabilities = model.predict_proba("ajustar anticoagulante")
+        assert max(probabilities, key=probabilities.get) == "diagnostic"
+        assert abs(sum(probabilities.values()) - 1.0) < 1e-9
+
+    def test_save_and_load(self, tmp_path):
+        path = str(tmp_path / "model.json")
+        model = NaiveBayesQueryModel().train(self.SAMPLES)
+        model.save(path)
+
+        loaded = NaiveBayesQueryModel.load(path)
+        assert loaded.predict_proba("ecografía renal") == pytest.approx(model.predict_proba("ecografía renal"))
+
+    def test_model_used_when_rules_do_not_match(self, tmp_path):
+        model = NaiveBayesQueryModel().train(self.SAMPLES)
+        classifier = FastQueryClassifier(model=model, model_path="")
+
+        result = classifier.classify("ajustar anticoagulante", has_context=True)
+        assert result["query_type"] == QueryType.DIAGNOSTIC.value
+        assert result["classifier"] == "model"
+
+    def test_missing_model_file_falls_back_to_rules(self, tmp_path):
+        classifier = FastQueryClassifier(model_path=str(tmp_path / "missing.json"))
+        assert classifier.model is None
+        assert classifier.classify("hola")["classifier"] == "rules"
+
+
+class TestCoordinatorFastPath:
+    """Test suite for the coordinator classification fast path"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        from app.agents.medical_coordinator import MedicalCoordinatorAgent
+
+        self.service = MagicMock()
+        self.service.chat_completion = AsyncMock(side_effect=AssertionError("LLM should not be called"))
+        self.coordinator = MedicalCoordinatorAgent(azure_openai_service=self.service)
+        self.context = make_context(2)
+
+    def test_query_type_is_importable_from_the_coordinator(self):
+        from app.agents import medical_coordinator
+
+        assert medical_coordinator.QueryType is QueryType
+
+    @pytest.mark.asyncio
+    async def test_confident_query_skips_llm(self):
+        messages = [ChatMessage(role="user", content="dame un resumen del expediente")]
+
+        classification = await self.coordinator._classify_query_enhanced(messages, self.context)
+
+        assert classification["query_type"] == QueryType.DOCUMENT_ANALYSIS.value
+        assert classification["classifier"] == "rules"
+        assert classification["context_documents"] == 2
+        self.service.chat_completion.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_fast_path_disabled_uses_llm(self, monkeypatch):
+        monkeypatch.setattr(settings, "QUERY_CLASSIFIER_FAST_PATH_ENABLED", False)
+        self.service.chat_completion = AsyncMock(return_value=SimpleNamespace(content="", tool_calls=None))
+        messages = [ChatMessage(role="user", content="hola")]
+
+        classification = await self.coordinator._classify_query_enhanced(messages, None)
+
+        self.service.chat_completion.assert_awaited_once()
+        assert classification["query_type"] == QueryType.GENERAL.value
+
+    @pytest.mark.asyncio
+    async def test_repeated_llm_classification_is_cached(self, monkeypatch):
+        monkeypatch.setattr(settings, "QUERY_CLASSIFIER_FAST_PATH_ENABLED", False)
+        tool_call = SimpleNamespace(function={
+            "arguments": '{"query_type": "search", "confidence": 0.9, "reasoning": "dato puntual", '
+                         '"requires_patient_context": true, "urgency": "low"}'
+        })
+        self.service.chat_completion = AsyncMock(return_value=SimpleNamespace(content="", tool_calls=[tool_call]))
+
+        first = await self.coordinator._classify_query_enhanced(
+            [ChatMessage(role="user", content="¿Tipo de sangre?")], self.context
+        )
+        second = await self.coordinator._classify_query_enhanced(
+            [ChatMessage(role="user", content="  tipo de SANGRE ")], make_context(5)
+        )
+
+        assert self.service.chat_completion.await_count == 1
+        assert first["classifier"] == "llm" and "cache_hit" not in first
+        assert second["query_type"] == "search"
+        assert second["cache_hit"] is True
+        assert second["context_documents"] == 5
+
+        stats = self.coordinator.get_classification_stats()
+        assert stats["by_source"] == {"llm": 1, "cache": 1}
+        assert stats["cache"]["hit_rate"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_cache_is_keyed_by_context_availability(self, monkeypatch):
+        monkeypatch.setattr(settings, "QUERY_CLASSIFIER_FAST_PATH_ENABLED", False)
+        self.service.chat_completion = AsyncMock(return_value=SimpleNamespace(content="", tool_calls=[
+            SimpleNamespace(function={"arguments": '{"query_type": "general", "confidence": 0.9, '
+                                                   '"reasoning": "", "requires_patient_context": false, '
+                                                   '"urgency": "low"}'})
+        ]))
+        messages = [ChatMessage(role="user", content="tipo de sangre")]
+
+        await self.coordinator._classify_query_enhanced(messages, None)
+        await self.coordinator._classify_query_enhanced(messages, self.context)
+
+        assert self.service.chat_completion.await_count == 2
@@ -0,0 +1,145 @@
+"""
+Tests for Azure OpenAI Rate Limiter
+
+Covers token bucket accounting, prompt token estimation and priority queueing
+"""
+
+import pytest
+import sys
+import os
+import asyncio
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.rate_limiter import (
+    TokenBucket,
+    DeploymentRateLimiter,
+    OpenAIRateLimiter,
+    RequestPriority,
+    estimate_prompt_tokens
+)
+
+
+class TestTokenBucket:
+    """Test suite for token bucket refill math"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.now = 0.0
+        self.bucket = TokenBucket(capacity=10, refill_rate=2, clock=lambda: self.now)
+
+    def test_starts_full(self):
+        assert self.bucket.time_until_available(10) == 0.0
+
+    def test_wait_time_after_consume(self):
+        self.bucket.consume(10)
+        assert self.bucket.time_until_available(4) == pytest.approx(2.0)
+
+    def test_refill_is_capped(self):
+        self.bucket.consume(5)
+        self.now = 100
+        self.bucket.time_until_available(1)
+        assert self.bucket.tokens == 10
+
+
+class TestPromptEstimation:
+    """Test suite for prompt token estimation"""
+
+    def test_estimate_grows_with_content(self):
+        short = estimate_prompt_tokens([{"role": "user", "content": "hola"}])
+        long = estimate_prompt_tokens([{"role": "user", "content": "hola " * 400}])
+
+        assert long - short == pytest.approx(500, abs=2)
+
+    def test_estimate_counts_tools(self):
+        messages = [{"role": "user", "content": "hola"}]
+        tools = [{"type": "function", "function": {"name": "classify", "parameters": {}}}]
+
+        assert estimate_prompt_tokens(messages, tools) > estimate_prompt_tokens(messages)
+
+
+class TestDeploymentRateLimiter:
+    """Test suite for queueing behaviour"""
+
+    @pytest.mark.asyncio
+    async def test_within_budget_does_not_wait(self):
+        limiter = DeploymentRateLimiter("gpt-4o-mini", requests_per_minute=600, tokens_per_minute=60000)
+
+        waited = await limiter.acquire(100)
+
+        assert waited < 0.05
+        assert limiter.get_stats()["acquired"] == 1
+
+    @pytest.mark.asyncio
+    async def test_interactive_jumps_ahead_of_batch(self):
+        """Interactive requests queued behind batch work are served first"""
+        # One request of burst capacity, refilled every 50ms
+        limiter = DeploymentRateLimiter(
+            "gpt-4o", requests_per_minute=1200, tokens_per_minute=10_000_000, burst_seconds=0.05
+        )
+        await limiter.acquire(1)
+        order = []
+
+        async def request(name, priority):
+            await limiter.acquire(1, priority)
+            order.append(name)
+
+        batch_a = asyncio.create_task(request("batch-a", RequestPriority.BATCH))
+        batch_b = asyncio.create_task(request("batch-b", RequestPriority.BATCH))
+        await asyncio.sleep(0.005)
+        interactive = asyncio.create_task(request("interactive", RequestPriority.INTERACTIVE))
+        await asyncio.sleep(0.005)
+
+        assert limiter.get_stats()["queue_depth"] == 3
+
+        await asyncio.gather(batch_a, batch_b, interactive)
+
+        assert order == ["interactive", "batch-a", "batch-b"]
+        stats = limiter.get_stats()
+        assert stats["queue_depth"] == 0
+        assert stats["max_queue_depth"] == 3
+        assert stats["max_wait_ms"] > 0
+
+    @pytest.mark.asyncio
+    async def test_token_budget_limits_throughput(self):
+        """Large requests wait for the tokens-per-minute bucket"""
+        limiter = DeploymentRateLimiter("gpt-4o", requests_per_minute=10_000, tokens_per_minute=60_000)
+        # Bucket holds a minute of tokens and refills at 1000 tokens/s
+        await limiter.acquire(60_000)
+
+        waited = await limiter.acquire(100)
+
+        assert waited == pytest.approx(0.1, abs=0.05)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_queue(self):
+        limiter = DeploymentRateLimiter(
+            "gpt-4o", requests_per_minute=1, tokens_per_minute=1000, burst_seconds=60
+        )
+        await limiter.acquire(1)
+
+        waiter = asyncio.create_task(limiter.acquire(1))
+        await asyncio.sleep(0.005)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        assert limiter.get_stats()["queue_depth"] == 0
+
+
+class TestOpenAIRateLimiter:
+    """Test suite for the per-deployment registry"""
+
+    @pytest.mark.asyncio
+    async def test_disabled_limiter_is_a_no_op(self):
+        limiter = OpenAIRateLimiter(enabled=False)
+
+        assert await limiter.acquire("gpt-4o", 10_000_000) == 0.0
+        assert limiter.get_stats()["deployments"] == {}
+
+    def test_limiters_are_per_deployment(self):
+        limiter = OpenAIRateLimiter(enabled=True)
+
+        assert limiter.get_limiter("gpt-4o") is limiter.get_limiter("gpt-4o")
+        assert limiter.get_limiter("gpt-4o") is not limiter.get_limiter("gpt-4o-mini")
@@ -0,0 +1,87 @@
+"""
+Tests for the reference data cache
+
+Verifies that the default doctor is looked up once per TTL, that concurrent
+misses share one query and that invalidation forces a reload
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.db.models import DocumentTypeEnum
+from app.services.batch_processing_service import BatchProcessingService
+from app.services.reference_data_cache import ReferenceDataCache
+
+
+class TestReferenceDataCache:
+    """Test suite for cached reference data"""
+
+    @pytest.fixture(autouse=True)
+    def setup_fixtures(self, fake_db, fake_clock):
+        """Setup test fixtures"""
+        self.clock = fake_clock
+        self.cache = ReferenceDataCache(ttl_seconds=60, clock=self.clock)
+        # Slow enough for concurrent lookups to overlap
+        self.db = fake_db
+        self.db.latency = 0.01
+
+    def doctor_queries(self):
+        return self.db.calls_to("find_many", "doctors")
+
+    @pytest.mark.asyncio
+    async def test_default_doctor_is_queried_once(self):
+        self.db.seed("doctors", [{"_id": "doctor-1", "name": "Dra. Garza"}])
+
+        ids = await asyncio.gather(*(self.cache.get_default_doctor_id(self.db) for _ in range(10)))
+        ids.append(await self.cache.get_default_doctor_id(self.db))
+
+        assert set(ids) == {"doctor-1"}
+        assert self.doctor_queries() == 1
+
+    @pytest.mark.asyncio
+    async def test_default_doctor_is_created_when_missing(self):
+        doctor_id = await self.cache.get_default_doctor_id(self.db)
+
+        assert list(self.db.collections["doctors"]) == [doctor_id]
+        assert self.db.collections["doctors"][doctor_id]["email"] == "default@tecsalud.com"
+
+    @pytest.mark.asyncio
+    async def test_ttl_and_invalidation_reload(self):
+        self.db.seed("doctors", [{"_id": "doctor-1"}])
+        await self.cache.get_default_doctor_id(self.db)
+
+        self.clock.now = 61
+        await self.cache.get_default_doctor_id(self.db)
+        assert self.doctor_queries() == 2
+
+        self.db.seed("doctors", [{"_id": "doctor-2"}])
+        self.cache.invalidate_doctors()
+        assert await self.cache.get_default_doctor_id(self.db) == "doctor-2"
+        assert self.doctor_queries() == 3
+
+    def test_document_type_lookup(self):
+        assert self.cache.document_type("LAB") == DocumentTypeEnum.LAB_RESULTS.value
+        assert self.cache.document_type("cons") == DocumentTypeEnum.CONSULTATION.value
+        assert self.cache.document_type("XYZ") == DocumentTypeEnum.OTHER.value
+        assert self.cache.document_type(None) == DocumentTypeEnum.OTHER.value
+
+    @pytest.mark.asyncio
+    async def test_batch_patient_creation_uses_cached_doctor(self):
+        self.db.seed("doctors", [{"_id": "doctor-1"}])
+        service = BatchProcessingService(
+            azure_openai_service=MagicMock(), summary_service=MagicMock(), reference_data=self.cache
+        )
+
+        for n in range(5):
+            await service._create_new_patient(
+                {"parsed_patient_id": f"300000379{n}", "parsed_patient_name": "GARZA, MARIA"}, self.db
+            )
+
+        assert self.doctor_queries() == 1
+        assert {patient["doctor_id"] for patient in self.db.collections["patients"].values()} == {"doctor-1"}
@@ -0,0 +1,219 @@
+"""
+Tests for the admin review queue
+
+Verifies that review triage and structured match candidates are stored when
+files are flagged and that pending reviews are filtered, sorted and paginated
+by the database
+"""
+
+import json
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from conftest import FakeDB
+from app.db.models import PatientMatchingStatusEnum, VectorizationStatusEnum
+from app.services.admin_review_service import AdminReviewService
+from app.services.batch_processing_service import BatchProcessingService
+from app.services.reference_data_cache import ReferenceDataCache
+from app.services.review_triage import review_triage_fields, with_review_triage
+
+
+class ReviewQueueDB(FakeDB):
+    """Database fake that also resolves the batch_uploads $lookup of the review queue"""
+
+    async def aggregate(self, collection, pipeline):
+        docs = await super().aggregate(collection, [stage for stage in pipeline if "$lookup" not in stage])
+        self.pipelines[-1] = pipeline
+        for stage in pipeline:
+            if "$lookup" in stage:
+                for doc in docs:
+                    upload = self.documents("batch_uploads").get(doc.get("batch_upload_id"))
+                    doc[stage["$lookup"]["as"]] = [{"session_id": upload["session_id"]}] if upload else []
+        return docs
+
+
+class TestReviewTriage:
+    """Test suite for stored review priority and category"""
+
+    def test_triage_fields(self):
+        assert review_triage_fields({"parsed_patient_id": None}) == {
+            "review_priority": "high", "review_priority_rank": 0, "review_category": "parsing_error"
+        }
+        assert review_triage_fields({
+            "parsed_patient_id": "3000003799",
+            "patient_matching_status": PatientMatchingStatusEnum.REVIEW_REQUIRED.value,
+            "processing_status": VectorizationStatusEnum.PENDING.value,
+            "matching_confidence": 0.85
+        }) == {"review_priority": "low", "review_priority_rank": 2, "review_category": "patient_match"}
+
+    def test_only_files_requiring_review_are_triaged(self):
+        assert with_review_triage({"parsed_patient_id": "1"}, {"processing_status": "failed"}) == {
+            "processing_status": "failed"
+        }
+        update = with_review_triage({"parsed_patient_id": "1", "review_required": True}, {"processing_status": "failed"})
+        assert update["review_priority"] == "high"
+        assert update["review_category"] == "processing_error"
+
+    def test_unparsed_file_is_triaged_on_registration(self):
+        service = BatchProcessingService(azure_openai_service=MagicMock(), summary_service=MagicMock())
+        parsing_result = SimpleNamespace(success=False, patient_data=None, error_message="bad name")
+
+        batch_file = service.build_batch_file("upload-1", "escaneo.pdf", "/tmp/escaneo.pdf", 10, "abc", parsing_result)
+
+        assert batch_file["review_required"] is True
+        assert batch_file["review_category"] == "parsing_error"
+        assert batch_file["review_priority_rank"] == 0
+
+
+class TestPendingReviews:
+    """Test suite for the server-side review queue"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.service = AdminReviewService()
+        self.db = ReviewQueueDB()
+        self.start = datetime(2026, 1, 1)
+
+    async def add_file(self, name, upload_id, minutes, **fields):
+        data = {
+            "batch_upload_id": upload_id,
+            "original_filename": name,
+            "parsed_patient_id": "3000003799",
+            "patient_matching_status": PatientMatchingStatusEnum.REVIEW_REQUIRED.value,
+            "processing_status": VectorizationStatusEnum.PENDING.value,
+            "matching_confidence": 0.85,
+            "review_required": True,
+            "created_at": self.start + timedelta(minutes=minutes),
+            **fields
+        }
+        data.update(review_triage_fields(data) if data["review_required"] else {})
+        return await self.db.create("batch_files", data)
+
+    async def make_queue(self):
+        s1 = await self.db.create("batch_uploads", {"session_id": "s1"})
+        s2 = await self.db.create("batch_uploads", {"session_id": "s2"})
+        await self.add_file("low_old.pdf", s1, 0)
+        await self.add_file("high.pdf", s1, 5, processing_status=VectorizationStatusEnum.FAILED.value)
+        await self.add_file("medium.pdf", s2, 1, matching_confidence=0.6)
+        await self.add_file("low_new.pdf", s2, 2, matching_details=json.dumps({
+            "suggestions": [{"patient_id": "p1", "similarity": 0.85}]
+        }))
+        await self.add_file("done.pdf", s1, 3, review_required=False)
+
+    @pytest.mark.asyncio
+    async def test_sorted_by_priority_then_age(self):
+        await self.make_queue()
+
+        cases = await self.service.get_pending_reviews(db=self.db)
+
+        assert [case.filename for case in cases] == ["high.pdf", "medium.pdf", "low_old.pdf", "low_new.pdf"]
+        assert [case.session_id for case in cases] == ["s1", "s2", "s1", "s2"]
+        assert cases[3].suggested_matches == [{"patient_id": "p1", "similarity": 0.85}]
+
+    @pytest.mark.asyncio
+    async def test_filters_and_pagination_run_in_the_query(self):
+        await self.make_queue()
+
+        cases = await self.service.get_pending_reviews(
+            session_id="s2", priority="low", category="patient_match", limit=1, offset=0, db=self.db
+        )
+        page_two = await self.service.get_pending_reviews(priority="low", limit=1, offset=1, db=self.db)
+
+        assert [case.filename for case in cases] == ["low_new.pdf"]
+        assert [case.filename for case in page_two] == ["low_new.pdf"]
+        pipeline = self.db.pipelines[0]
+        assert pipeline[0]["$match"] == {
+            "review_required": True,
+            "batch_upload_id": "batch_uploads-2",
+            "review_priority_rank": 2,
+            "review_category": "patient_match"
+        }
+        assert {"$limit": 1} in pipeline
+
+    @pytest.mark.asyncio
+    async def test_unknown_session_or_priority_returns_nothing(self):
+        await self.make_queue()
+
+        assert await self.service.get_pending_reviews(session_id="missing", db=self.db) == []
+        assert await self.service.get_pending_reviews(priority="urgent", db=self.db) == []
+
+    @pytest.mark.asyncio
+    async def test_backfill_of_files_flagged_before_triage(self):
+        upload = await self.db.create("batch_uploads", {"session_id": "s1"})
+        legacy = await self.db.create("batch_files", {
+            "batch_upload_id": upload, "original_filename": "legacy.pdf", "parsed_patient_id": None,
+            "review_required": True, "created_at": self.start
+        })
+
+        assert await self.service.backfill_review_triage(self.db) == 1
+        assert self.db.collections["batch_files"][legacy]["review_priority_rank"] == 0
+        assert self.db.collections["batch_files"][legacy]["review_category"] == "parsing_error"
+        assert await self.service.backfill_review_triage(self.db) == 0
+
+    @pytest.mark.asyncio
+    async def test_queue_triages_files_flagged_before_triage(self):
+        await self.make_queue()
+        legacy = await self.db.create("batch_files", {
+            "batch_upload_id": "batch_uploads-1", "original_filename": "legacy_low.pdf",
+            "parsed_patient_id": "3000003799", "matching_confidence": 0.85,
+            "patient_matching_status": PatientMatchingStatusEnum.REVIEW_REQUIRED.value,
+            "review_required": True, "created_at": self.start - timedelta(days=1)
+        })
+
+        cases = await self.service.get_pending_reviews(db=self.db)
+        low = await self.service.get_pending_reviews(priority="low", category="patient_match", db=self.db)
+
+        # Without a stored rank the oldest file would sort ahead of the high priority case
+        assert [case.filename for case in cases] == [
+            "high.pdf", "medium.pdf", "legacy_low.pdf", "low_old.pdf", "low_new.pdf"
+        ]
+        assert [case.filename for case in low] == ["legacy_low.pdf", "low_old.pdf", "low_new.pdf"]
+        assert self.db.collections["batch_files"][legacy]["review_priority_rank"] == 2
+
+
+class TestStructuredMatchingDetails:
+    """Test suite for match candidates stored on review files"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.db = ReviewQueueDB()
+        self.batch_service = BatchProcessingService(
+            azure_openai_service=MagicMock(), summary_service=MagicMock(), reference_data=ReferenceDataCache()
+        )
+
+    @pytest.mark.asyncio
+    async def test_review_file_stores_candidates_used_as_suggestions(self):
+        close = await self.db.create("patients", {"name": "GARZA TIJERINA, MARIA ESTER", "medical_record_number": "1"})
+        weaker = await self.db.create("patients", {"name": "GARZA TIJERINA, MARIA", "medical_record_number": "2"})
+        await self.db.create("patients", {"name": "LOPEZ, JUAN", "medical_record_number": "3"})
+        upload = await self.db.create("batch_uploads", {"session_id": "s1"})
+        file_id = await self.db.create("batch_files", {
+            "batch_upload_id": upload,
+            "original_filename": "3000003799_GARZA TIJERINA, MARIA ESTHER_1_CONS.pdf",
+            "parsed_patient_id": "3000003799",
+            "parsed_patient_name": "GARZA TIJERINA, MARIA ESTHER",
+            "processing_status": VectorizationStatusEnum.PENDING.value,
+            "created_at": datetime(2026, 1, 1)
+        })
+
+        await self.batch_service._match_or_create_patient(dict(self.db.collections["batch_files"][file_id]), self.db)
+
+        details = self.db.collections["batch_files"][file_id]["matching_details"]
+        assert details["best_patient_id"] == close
+        assert details["total_candidates"] == 3
+        assert [s["patient_id"] for s in details["suggestions"]] == [close, weaker]
+        assert details["suggestions"][0]["reasons"]
+        assert 0.8 <= details["suggestions"][0]["similarity"] < 0.95
+        json.dumps(details)
+
+        cases = await AdminReviewService().get_pending_reviews(db=self.db)
+        assert [case.filename for case in cases] == ["3000003799_GARZA TIJERINA, MARIA ESTHER_1_CONS.pdf"]
+        assert cases[0].review_category == "patient_match"
+        assert cases[0].suggested_matches == details["suggestions"]
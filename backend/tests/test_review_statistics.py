@@ -0,0 +1,182 @@
+"""
+Tests for admin review statistics
+
+Verifies that statistics come from a single grouped query on SQLite and a single
+$facet aggregation on MongoDB, and that results are cached briefly
+"""
+
+import pytest
+import sys
+import os
+import uuid
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from conftest import FakeDB
+from app.db.models import (
+    Base, BatchFile, BatchUpload, BatchUploadStatusEnum, PatientMatchingStatusEnum,
+    ProcessingTypeEnum, VectorizationStatusEnum
+)
+from app.services.admin_review_service import AdminReviewService
+from app.utils.ttl_cache import TTLCache
+
+EXPECTED_CATEGORIES = {"parsing_error": 1, "patient_match": 2, "processing_error": 0, "other": 0}
+EXPECTED_PRIORITIES = {"high": 1, "medium": 1, "low": 1}
+
+
+class FacetDB(FakeDB):
+    """Database fake returning a canned $facet result"""
+
+    def __init__(self, facets):
+        super().__init__(batch_uploads=[{"_id": "upload-1", "session_id": "s1"}])
+        self.facets = facets
+
+    async def aggregate(self, collection, pipeline):
+        self.pipelines.append(pipeline)
+        return [self.facets]
+
+
+class TestSQLReviewStatistics:
+    """Test suite for statistics on SQLite"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        engine = create_engine(
+            "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(bind=engine)
+        self.statements = []
+        event.listen(engine, "before_cursor_execute", lambda *args: self.statements.append(args[2]))
+        self.session = sessionmaker(bind=engine)()
+        self.service = AdminReviewService()
+
+        self.upload = self.add_upload()
+        other_upload = self.add_upload()
+        self.add_file(self.upload, parsed_patient_id=None)
+        self.add_file(self.upload, matching_confidence=0.6)
+        self.add_file(self.upload, matching_confidence=0.85)
+        self.add_file(self.upload, review_required=False, reviewed_by="ana")
+        self.add_file(self.upload, review_required=False)
+        self.add_file(other_upload)
+        self.session.commit()
+        self.session_id = self.upload.session_id
+        self.statements.clear()
+
+    def add_upload(self):
+        upload = BatchUpload(
+            session_id=str(uuid.uuid4()),
+            uploaded_by="admin@tecsalud.mx",
+            processing_type=ProcessingTypeEnum.COMPLETE,
+            status=BatchUploadStatusEnum.PROCESSING
+        )
+        self.session.add(upload)
+        self.session.flush()
+        return upload
+
+    def add_file(self, upload, **fields):
+        values = {
+            "parsed_patient_id": "3000003799",
+            "patient_matching_status": PatientMatchingStatusEnum.REVIEW_REQUIRED,
+            "processing_status": VectorizationStatusEnum.PENDING,
+            "review_required": True,
+            **fields
+        }
+        self.session.add(BatchFile(
+            batch_upload_id=upload.id,
+            original_filename=f"{uuid.uuid4()}.pdf",
+            file_path="/tmp/file.pdf",
+            file_size=1024,
+            content_hash=str(uuid.uuid4()),
+            **values
+        ))
+
+    @pytest.mark.asyncio
+    async def test_statistics_from_one_grouped_query(self):
+        stats = await self.service.get_review_statistics(session_id=self.session_id, db=self.session)
+
+        assert stats == {
+            "total_files": 5,
+            "review_required": 3,
+            "completed_reviews": 1,
+            "review_percentage": 60.0,
+            "categories": EXPECTED_CATEGORIES,
+            "priorities": EXPECTED_PRIORITIES
+        }
+        assert len(self.statements) == 1
+        assert "GROUP BY" in self.statements[0]
+
+    @pytest.mark.asyncio
+    async def test_unknown_session_has_no_files(self):
+        stats = await self.service.get_review_statistics(session_id="missing", db=self.session)
+
+        assert stats["total_files"] == 0
+        assert stats["review_percentage"] == 0
+
+    @pytest.mark.asyncio
+    async def test_statistics_are_cached_until_expiry(self):
+        now = [0.0]
+        self.service._statistics_cache = TTLCache(ttl_seconds=5, clock=lambda: now[0])
+
+        first = await self.service.get_review_statistics(db=self.session)
+        self.add_file(self.upload)
+        self.session.commit()
+        self.statements.clear()
+
+        assert await self.service.get_review_statistics(db=self.session) == first
+        assert self.statements == []
+
+        now[0] = 5.0
+        refreshed = await self.service.get_review_statistics(db=self.session)
+        assert refreshed["total_files"] == first["total_files"] + 1
+
+
+class TestAggregatedReviewStatistics:
+    """Test suite for statistics on MongoDB"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.service = AdminReviewService()
+        self.db = FacetDB({
+            "totals": [{"_id": None, "total_files": 5, "review_required": 3, "completed_reviews": 1}],
+            "triaged": [
+                {"_id": {"category": "patient_match", "priority": "medium"}, "count": 1},
+                {"_id": {"category": "patient_match", "priority": "low"}, "count": 1}
+            ],
+            # A file flagged before triage fields were stored, without a parsed expediente
+            "untriaged": [{"_id": {"parsed": False, "low_confidence": False}, "count": 1}]
+        })
+
+    @pytest.mark.asyncio
+    async def test_statistics_from_one_facet_aggregation(self):
+        stats = await self.service.get_review_statistics(session_id="s1", db=self.db)
+
+        assert stats["review_percentage"] == 60.0
+        assert stats["categories"] == EXPECTED_CATEGORIES
+        assert stats["priorities"] == EXPECTED_PRIORITIES
+        assert len(self.db.pipelines) == 1
+        match, facet = self.db.pipelines[0]
+        assert match == {"$match": {"batch_upload_id": "upload-1"}}
+        assert set(facet["$facet"]) == {"totals", "triaged", "untriaged"}
+
+    @pytest.mark.asyncio
+    async def test_empty_collection(self):
+        self.db.facets = {"totals": [], "triaged": [], "untriaged": []}
+
+        stats = await self.service.get_review_statistics(db=self.db)
+
+        assert stats["total_files"] == 0
+        assert sum(stats["categories"].values()) == 0
+
+    @pytest.mark.asyncio
+    async def test_decisions_invalidate_cached_statistics(self):
+        await self.service.get_review_statistics(db=self.db)
+        await self.service.get_review_statistics(db=self.db)
+        assert len(self.db.pipelines) == 1
+
+        await self.service.apply_bulk_decisions([], self.db)
+        await self.service.get_review_statistics(db=self.db)
+        assert len(self.db.pipelines) == 2
@@ -0,0 +1,166 @@
+"""
+Tests for Speculative Streaming
+
+Verifies that context loading and classification overlap and that a speculative
+agent stream is flushed on agreement and cancelled on disagreement
+"""
+
+import pytest
+import sys
+import os
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.config import settings
+from app.models.chat import ChatMessage, ModelType
+from app.services.enhanced_document_service import ContextStrategy
+from app.agents.medical_coordinator import MedicalCoordinatorAgent
+
+
+def make_context(total_documents: int) -> SimpleNamespace:
+    """Minimal stand-in for the HybridContext returned by the document service"""
+    return SimpleNamespace(
+        total_documents=total_documents,
+        total_tokens=1000 * total_documents,
+        strategy_used=ContextStrategy.FULL_DOCS_ONLY,
+        confidence=0.9,
+        full_documents=[None] * total_documents
+    )
+
+
+class TestSpeculativeStreaming:
+    """Test suite for the coordinator speculative streaming mode"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.coordinator = MedicalCoordinatorAgent(azure_openai_service=MagicMock())
+        self.routed = []
+        self.completed = []
+        self.classified_as = "document_analysis"
+        self.classification_confidence = 0.9
+        self.classification_contexts = []
+        self.context_documents = 2
+        self.context_delay = 0.1
+        self.classification_delay = 0.13
+
+        async def load_context(patient_id, user_query, context_strategy=None):
+            await asyncio.sleep(self.context_delay)
+            return make_context(self.context_documents)
+
+        async def classify(messages, enhanced_context=None, context_expected=False):
+            self.classification_contexts.append(enhanced_context)
+            await asyncio.sleep(self.classification_delay)
+            without_documents = enhanced_context is not None and enhanced_context.total_documents == 0
+            return {
+                "query_type": "general" if without_documents else self.classified_as,
+                "confidence": self.classification_confidence,
+                "context_strategy": "full_docs_only",
+                "classifier": "llm"
+            }
+
+        async def route(classification, *args):
+            agent = classification["query_type"]
+            self.routed.append(agent)
+            for i in range(3):
+                await asyncio.sleep(0.02)
+                yield f"{agent}:{i} "
+            self.completed.append(agent)
+
+        self.coordinator._load_stream_context = load_context
+        self.coordinator._classify_query_enhanced = classify
+        self.coordinator._route_to_agent_stream_enhanced = route
+
+    async def _collect(self, query: str) -> str:
+        chunks = []
+        async for chunk in self.coordinator.process_request_stream(
+            messages=[ChatMessage(role="user", content=query)],
+            patient_id="patient-1",
+            model_type=ModelType.GPT4O
+        ):
+            chunks.append(chunk)
+        return "".join(chunks)
+
+    @pytest.mark.asyncio
+    async def test_agreeing_speculation_is_flushed(self, monkeypatch):
+        monkeypatch.setattr(settings, "SPECULATIVE_STREAMING_ENABLED", True)
+
+        started = time.perf_counter()
+        output = await self._collect("resumen del expediente por favor")
+        elapsed = time.perf_counter() - started
+
+        assert output == "document_analysis:0 document_analysis:1 document_analysis:2 "
+        assert self.routed == ["document_analysis"]
+        # Context, classification and generation overlap instead of adding up
+        assert elapsed < 0.25
+        speculation = self.coordinator.get_classification_stats()["speculation"]
+        assert speculation["started"] == 1
+        assert speculation["confirmed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_disagreeing_speculation_is_cancelled(self, monkeypatch):
+        monkeypatch.setattr(settings, "SPECULATIVE_STREAMING_ENABLED", True)
+        self.classified_as = "diagnostic"
+
+        output = await self._collect("resumen del expediente por favor")
+
+        assert output == "diagnostic:0 diagnostic:1 diagnostic:2 "
+        assert self.routed == ["document_analysis", "diagnostic"]
+        assert self.completed == ["diagnostic"]
+        assert self.coordinator.get_classification_stats()["speculation"]["cancelled"] == 1
+
+    @pytest.mark.asyncio
+    async def test_no_speculation_when_classification_finishes_first(self, monkeypatch):
+        monkeypatch.setattr(settings, "SPECULATIVE_STREAMING_ENABLED", True)
+        self.classification_delay = 0.01
+
+        output = await self._collect("resumen del expediente por favor")
+
+        assert output.startswith("document_analysis:0")
+        assert self.coordinator.get_classification_stats()["speculation"]["started"] == 0
+
+    @pytest.mark.asyncio
+    async def test_confident_classification_is_not_repeated(self, monkeypatch):
+        monkeypatch.setattr(settings, "SPECULATIVE_STREAMING_ENABLED", True)
+
+        await self._collect("resumen del expediente por favor")
+
+        assert self.classification_contexts == [None]
+
+    @pytest.mark.asyncio
+    async def test_uncertain_classification_is_repeated_with_context(self, monkeypatch):
+        monkeypatch.setattr(settings, "SPECULATIVE_STREAMING_ENABLED", True)
+        self.classification_confidence = 0.3
+
+        output = await self._collect("resumen del expediente por favor")
+
+        assert output == "document_analysis:0 document_analysis:1 document_analysis:2 "
+        assert len(self.classification_contexts) == 2
+        assert self.classification_contexts[0] is None
+        assert self.classification_contexts[1].total_documents == 2
+
+    @pytest.mark.asyncio
+    async def test_disabled_mode_runs_sequentially(self, monkeypatch):
+        monkeypatch.setattr(settings, "SPECULATIVE_STREAMING_ENABLED", False)
+
+        started = time.perf_counter()
+        output = await self._collect("resumen del expediente por favor")
+        elapsed = time.perf_counter() - started
+
+        assert output == "document_analysis:0 document_analysis:1 document_analysis:2 "
+        assert elapsed >= 0.2
+
+    @pytest.mark.asyncio
+    async def test_confident_route_without_documents_is_reclassified(self, monkeypatch):
+        monkeypatch.setattr(settings, "SPECULATIVE_STREAMING_ENABLED", True)
+        self.context_documents = 0
+
+        output = await self._collect("resumen del expediente por favor")
+
+        assert output == "general:0 general:1 general:2 "
+        assert len(self.classification_contexts) == 2
+        assert self.classification_contexts[1].total_documents == 0
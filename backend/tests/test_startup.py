@@ -0,0 +1,88 @@
+"""
+Tests for Startup Orchestration
+
+Verifies concurrent component initialization and the startup report used by /health
+"""
+
+import pytest
+import sys
+import os
+import asyncio
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.startup import StartupOrchestrator
+
+
+class TestStartupOrchestrator:
+    """Test suite for the startup orchestrator"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.orchestrator = StartupOrchestrator()
+
+    @pytest.mark.asyncio
+    async def test_components_start_concurrently(self):
+        async def slow():
+            await asyncio.sleep(0.1)
+
+        for name in ("database", "azure_openai", "medical_agents"):
+            self.orchestrator.register(name, slow)
+
+        await self.orchestrator.run()
+
+        report = self.orchestrator.get_report()
+        assert report["total_duration_ms"] < 250
+        assert all(c["status"] == "ready" for c in report["components"].values())
+        assert all(c["duration_ms"] >= 90 for c in report["components"].values())
+        assert self.orchestrator.is_healthy
+
+    @pytest.mark.asyncio
+    async def test_required_failure_aborts_startup(self):
+        async def broken():
+            raise ConnectionError("database unreachable")
+
+        async def ok():
+            return None
+
+        self.orchestrator.register("database", broken)
+        self.orchestrator.register("azure_openai", ok)
+
+        with pytest.raises(RuntimeError, match="database"):
+            await self.orchestrator.run()
+
+        components = self.orchestrator.get_report()["components"]
+        assert components["database"]["status"] == "failed"
+        assert components["database"]["error"] == "database unreachable"
+        assert components["azure_openai"]["status"] == "ready"
+
+    @pytest.mark.asyncio
+    async def test_optional_failure_is_reported(self):
+        async def broken():
+            raise RuntimeError("agents unavailable")
+
+        async def ok():
+            return None
+
+        self.orchestrator.register("database", ok)
+        self.orchestrator.register("medical_agents", broken, required=False)
+
+        await self.orchestrator.run()
+
+        assert self.orchestrator.is_healthy
+        assert self.orchestrator.components["medical_agents"].status == "failed"
+
+    @pytest.mark.asyncio
+    async def test_lazy_initialization_marks_component_ready(self):
+        async def broken():
+            raise RuntimeError("agents unavailable")
+
+        self.orchestrator.register("medical_agents", broken, required=False)
+        await self.orchestrator.run()
+
+        self.orchestrator.mark_ready("medical_agents")
+
+        component = self.orchestrator.components["medical_agents"]
+        assert component.status == "ready"
+        assert component.error is None
@@ -5,6 +5,7 @@ Comprehensive test suite to ensure 99% accuracy in parsing TecSalud filenames
 """
 
 import pytest
+import re
 import sys
 import os
 
@@ -255,6 +256,85 @@ class TestTecSaludFilenameParser:
             assert normalized == expected_output
 
 
+class TestStreamingParser:
+    """Test suite for single-pass, streaming and parallel parsing"""
+    
+    FILENAMES = [
+        "3000003799_GARZA TIJERINA, MARIA ESTHER_6001467010_CONS.pdf",
+        "4444444444_RODRIGUEZ, CARMEN_555555_LAB.PDF",
+        "7777777777_MORALES, PEDRO_RX.pdf",
+        "12345678_SHORT, NAME_123_CONS.pdf",
+        "123456789012_LONG, NAME_1_img.pdf",
+        "12345678_SHORT, NAME_CONS.pdf",
+        "3000003799_123_CONS.pdf",
+        "3000003799_GARZA, MARIA_6001467010_CONSULTA.pdf",
+        "1234567890123_TOO LONG, NAME_1_CONS.pdf",
+        "invalid_filename.pdf",
+        "  5555555555_GARCIA PEREZ, LUIS_111111_EMER.pdf  ",
+    ]
+    
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.parser = TecSaludFilenameParser()
+    
+    def legacy_match(self, filename):
+        """Sequential primary-then-alternatives matching the combined pattern replaces"""
+        filename = filename.strip()
+        if re.match(self.parser.PRIMARY_PATTERN, filename, re.IGNORECASE):
+            return 0.99
+        for pattern in self.parser.ALTERNATIVE_PATTERNS:
+            if re.match(pattern, filename, re.IGNORECASE):
+                return 0.95
+        return None
+    
+    def test_combined_pattern_matches_legacy_patterns(self):
+        for filename in self.FILENAMES:
+            result = self.parser.parse_filename(filename)
+            expected = self.legacy_match(filename)
+            assert result.success is (expected is not None), filename
+            if expected is not None:
+                assert result.patient_data.confidence == expected, filename
+    
+    def test_suggestions_can_be_skipped(self):
+        assert self.parser.parse_filename("invalid_filename.pdf", with_suggestions=False).suggestions == []
+        assert self.parser.parse_filename("invalid_filename.pdf").suggestions
+    
+    def test_parse_iter_reads_manifest_file(self, tmp_path):
+        manifest = tmp_path / "manifest.txt"
+        manifest.write_text("\n".join(self.FILENAMES[:3]) + "\n\n", encoding="utf-8")
+        
+        from_path = list(self.parser.parse_iter(str(manifest)))
+        with open(manifest, encoding="utf-8") as f:
+            from_file = list(self.parser.parse_iter(f))
+        
+        assert [filename for filename, _ in from_path] == self.FILENAMES[:3]
+        assert [filename for filename, _ in from_file] == self.FILENAMES[:3]
+        assert all(result.success for _, result in from_path)
+    
+    def test_parse_iter_is_lazy(self):
+        consumed = []
+        
+        def filenames():
+            for filename in self.FILENAMES:
+                consumed.append(filename)
+                yield filename
+        
+        first = next(self.parser.parse_iter(filenames()))
+        
+        assert first[0] == self.FILENAMES[0]
+        assert consumed == self.FILENAMES[:1]
+    
+    def test_parallel_parsing_preserves_order_and_results(self):
+        filenames = self.FILENAMES * 5
+        
+        sequential = list(self.parser.parse_iter(filenames))
+        parallel = list(self.parser.parse_iter(filenames, workers=2, chunk_size=4))
+        
+        assert [filename for filename, _ in parallel] == filenames
+        assert parallel == sequential
+        assert self.parser.parse_batch(filenames[:4], workers=2) == self.parser.parse_batch(filenames[:4])
+
+
 class TestTecSaludFilenameService:
     """Test suite for TecSalud filename service"""
     
@@ -0,0 +1,62 @@
+"""
+Tests for the TTL Cache
+
+Verifies LRU eviction, expiry and hit-rate statistics
+"""
+
+import pytest
+import sys
+import os
+
+# Add the backend app to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.utils.ttl_cache import TTLCache
+
+
+class TestTTLCache:
+    """Test suite for TTLCache"""
+
+    @pytest.fixture(autouse=True)
+    def setup_fixtures(self, fake_clock):
+        """Setup test fixtures"""
+        self.clock = fake_clock
+        self.cache = TTLCache(max_entries=2, ttl_seconds=10, clock=self.clock)
+
+    def test_get_and_set(self):
+        assert self.cache.get("a") is None
+        self.cache.set("a", 1)
+        assert self.cache.get("a") == 1
+
+        stats = self.cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_entries_expire(self):
+        self.cache.set("a", 1)
+        self.clock.now = 9.9
+        assert self.cache.get("a") == 1
+        self.clock.now = 10.0
+        assert self.cache.get("a") is None
+        assert self.cache.get_stats()["expirations"] == 1
+        assert len(self.cache) == 0
+
+    def test_least_recently_used_is_evicted(self):
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.get("a")
+        self.cache.set("c", 3)
+
+        assert self.cache.get("b") is None
+        assert self.cache.get("a") == 1
+        assert self.cache.get("c") == 3
+        assert self.cache.get_stats()["evictions"] == 1
+
+    def test_invalidate_and_clear(self):
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.invalidate("a")
+        assert self.cache.get("a") is None
+        self.cache.clear()
+        assert len(self.cache) == 0
@@ -1,7 +1,7 @@
 import { Injectable } from '@angular/core';
 import { HttpClient, HttpHeaders, HttpErrorResponse } from '@angular/common/http';
-import { Observable, throwError, of } from 'rxjs';
-import { catchError, map, retry } from 'rxjs/operators';
+import { Observable, throwError, of, timer } from 'rxjs';
+import { catchError, filter, map, retry, switchMap, take, timeout } from 'rxjs/operators';
 import { environment } from '@environments/environment';
 import {
   Patient,
@@ -126,6 +126,40 @@ export class ApiService {
     );
   }
 
+  getDocumentJob(jobId: string): Observable<any> {
+    return this.http.get<any>(
+      `${this.apiUrl}/api/v1/documents/jobs/${jobId}`,
+      { headers: this.headers }
+    ).pipe(
+      catchError(this.handleError)
+    );
+  }
+
+  // Resolves an upload response to the processing result, polling the job when the upload was queued
+  waitForDocumentJob(uploadResponse: any, pollIntervalMs = 1500, maxWaitMs = 10 * 60 * 1000): Observable<any> {
+    if (!uploadResponse?.job_id) {
+      return of(uploadResponse);
+    }
+
+    return timer(0, pollIntervalMs).pipe(
+      switchMap(() => this.getDocumentJob(uploadResponse.job_id)),
+      filter(job => job.status === 'completed' || job.status === 'failed'),
+      take(1),
+      timeout(maxWaitMs),
+      map(job => {
+        if (job.status === 'failed') {
+          throw new Error(job.error || 'Error al procesar el documento');
+        }
+        return job.result;
+      }),
+      catchError(error => throwError(() => (
+        error?.name === 'TimeoutError'
+          ? new Error('El procesamiento del documento sigue en curso; revise su estado más tarde')
+          : error
+      )))
+    );
+  }
+
   getDocuments(patientId?: string, documentType?: string): Observable<any> {
     let params = new URLSearchParams();
     if (patientId) params.set('patient_id', patientId);
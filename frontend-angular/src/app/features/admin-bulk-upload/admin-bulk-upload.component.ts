@@ -921,15 +921,25 @@ export class AdminBulkUploadComponent implements OnInit {
           // Always use BULK_UPLOAD_PATIENT to trigger automatic patient creation
           formData.append('patient_id', 'BULK_UPLOAD_PATIENT');
 
-          // Upload document using the correct endpoint
-          const response = await this.apiService.uploadDocument(formData).toPromise();
+          // Upload document using the correct endpoint, then wait for its processing job
+          const uploadResponse = await this.apiService.uploadDocument(formData).toPromise();
+          const response = await this.apiService.waitForDocumentJob(uploadResponse).toPromise();
+          
+          const storageStatus = response?.processing_results?.complete_storage;
+          if (typeof storageStatus === 'string' && storageStatus.startsWith('error')) {
+            throw new Error(storageStatus);
+          }
           
           batchFile.status = 'completed';
           this.batchUpload.processed_files++;
           
-          // Note: The current endpoint doesn't return patient_created info
-          // so we'll estimate based on whether we had parsed patient info
-          if (batchFile.patientInfo?.id) {
+          if (response?.patient_created !== undefined) {
+            if (response.patient_created) {
+              this.batchUpload.created_patients++;
+            } else {
+              this.batchUpload.matched_patients++;
+            }
+          } else if (batchFile.patientInfo?.id) {
             this.batchUpload.matched_patients++;
           } else {
             this.batchUpload.created_patients++;
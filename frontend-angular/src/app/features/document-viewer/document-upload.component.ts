@@ -22,7 +22,7 @@ interface DocumentUpload {
   document_type: string;
   processing_type: string;
   title: string;
-  status: 'pending' | 'uploading' | 'success' | 'error';
+  status: 'pending' | 'uploading' | 'processing' | 'success' | 'error';
   progress: number;
   error?: string;
   result?: any;
@@ -164,6 +164,10 @@ interface DocumentUpload {
                 <span>{{ upload.progress }}%</span>
               </div>
               
+              <div *ngIf="upload.status === 'processing'" class="status-processing">
+                ⚙️ Procesando
+              </div>
+              
               <div *ngIf="upload.status === 'success'" class="status-success">
                 ✅ Completado
               </div>
@@ -517,6 +521,11 @@ interface DocumentUpload {
         }
       }
       
+      .status-processing {
+        color: rgb(var(--color-blue-tec));
+        font-size: 0.875rem;
+      }
+      
       .status-success {
         color: var(--semantic-success);
         font-weight: 600;
@@ -764,10 +773,15 @@ export class DocumentUploadComponent implements OnInit {
         }
       }, 200);
       
-      const result = await this.apiService.uploadDocument(formData).toPromise();
-      
-      clearInterval(progressInterval);
+      const response = await this.apiService.uploadDocument(formData).toPromise()
+        .finally(() => clearInterval(progressInterval));
       upload.progress = 100;
+      
+      // Queued uploads are processed in the background; wait for the job to finish
+      upload.status = 'processing';
+      this.cdr.detectChanges();
+      const result = await this.apiService.waitForDocumentJob(response).toPromise();
+      
       upload.status = 'success';
       upload.result = result;
       